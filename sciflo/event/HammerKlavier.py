@@ -4,10 +4,27 @@ HammerKlavier.py -- Hammer a server by using multiple threads or processes to
 
 (HammerKlavier means 'hammer keyboard')
 
+Run the sharded PersistentDict throughput benchmark with:
+
+    python -m sciflo.event.HammerKlavier [--clients N] [--ops N] [--memory] [shards ...]
+
+and the per-get latency comparison of the TCP, unix socket and shared memory
+transports with:
+
+    python -m sciflo.event.HammerKlavier --transports [--ops N]
 """
 
-from processing import Process
-from .pdict import PersistentDict
+import os
+import sys
+import time
+import socket
+import getopt
+import tempfile
+import multiprocessing as mp
+
+from .pdict import PersistentDict, runPersistentDictServer
+
+BenchPort = 8020
 
 
 def multiProcessTest(n, funcs):
@@ -16,7 +33,7 @@ def multiProcessTest(n, funcs):
         funcs = [funcs] * n
     procs = []
     for f, args in funcs:
-        procs.append(Process(target=f, args=args))
+        procs.append(mp.Process(target=f, args=args))
     for p in procs:
         p.start()
     for p in procs:
@@ -25,7 +42,7 @@ def multiProcessTest(n, funcs):
 
 def testPDict(dictName, keyRoot):
     from random import randint
-    from time import clock
+    from time import perf_counter as clock
     abc = keyRoot + 'abcdefghijklmnopqrstuvwxyz'
     val1 = abc * 23
     val2 = abc * 20
@@ -65,9 +82,148 @@ def testPDict(dictName, keyRoot):
     db.close()
 
 
+def waitForPort(port, timeout=30.):
+    """Wait until something listens on a local port."""
+    end = time.time() + timeout
+    while True:
+        soc = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            soc.connect(('127.0.0.1', port))
+            return
+        except socket.error:
+            if time.time() > end:
+                raise
+            time.sleep(.1)
+        finally:
+            soc.close()
+
+
+def hammerClient(dictName, dictRegistry, keyRoot, ops, startEvent, q):
+    """Do ops get/insert pairs against the dict and put elapsed time on q."""
+    val = 'x' * 256
+    db = PersistentDict(dictName, dictRegistry=dictRegistry)
+    startEvent.wait()
+    t0 = time.perf_counter()
+    for i in range(ops):
+        key = '%s%6.6d' % (keyRoot, i)
+        db[key] = val
+        db[key]
+    q.put(time.perf_counter() - t0)
+    db.close()
+
+
+def benchmarkShards(shardCounts=(1, 2, 4), clients=4, ops=5000,
+                    memory=False):
+    """Measure PersistentDict throughput with the dict split into each number
+    of shards, each shard served by its own process.  Every client process
+    does ops inserts and ops gets.  Returns dict of shards -> ops/second."""
+    results = {}
+    spawn = mp.get_context('spawn')
+    for shards in shardCounts:
+        tmpDir = tempfile.mkdtemp(prefix='HammerKlavier.')
+        dictName = 'HammerKlavier'
+        dictRegistry = {dictName: {
+            'dbFile': None if memory else os.path.join(tmpDir, 'hammer.db'),
+            'port': BenchPort, 'shards': shards,
+            'logFile': os.path.join(tmpDir, 'hammer.log')}}
+        servers = [spawn.Process(target=runPersistentDictServer,
+                                 args=(dictName, dictRegistry,
+                                       shard if shards > 1 else None))
+                   for shard in range(shards)]
+        for server in servers:
+            server.start()
+        try:
+            for shard in range(shards):
+                waitForPort(BenchPort + shard)
+            startEvent = mp.Event()
+            q = mp.Queue()
+            procs = [mp.Process(target=hammerClient,
+                                args=(dictName, dictRegistry, 'c%d-' % i, ops,
+                                      startEvent, q))
+                     for i in range(clients)]
+            for p in procs:
+                p.start()
+            time.sleep(.5)
+            t0 = time.perf_counter()
+            startEvent.set()
+            for p in procs:
+                p.join()
+            elapsed = time.perf_counter() - t0
+            results[shards] = clients * ops * 2 / elapsed
+            print(('shards: %d  clients: %d  ops: %d  seconds: %.2f  ops/sec: %.0f'
+                   % (shards, clients, clients * ops * 2, elapsed,
+                      results[shards])))
+        finally:
+            for server in servers:
+                server.terminate()
+                server.join()
+    return results
+
+
+def benchmarkTransports(ops=20000, keys=1000, valSize=128):
+    """Measure per-get latency of a PersistentDict over TCP, over its unix
+    socket and from its shared memory table.  Returns dict of transport ->
+    microseconds per get."""
+    tmpDir = tempfile.mkdtemp(prefix='HammerKlavier.')
+    dictName = 'HammerKlavier'
+    entry = {'dbFile': None, 'port': BenchPort,
+             'logFile': os.path.join(tmpDir, 'hammer.log'),
+             'socketFile': os.path.join(tmpDir, 'hammer.sock'),
+             'shmSlots': 4 * keys,
+             'shmName': 'sciflo-HammerKlavier-%d' % os.getpid()}
+    server = mp.get_context('spawn').Process(
+        target=runPersistentDictServer, args=(dictName, {dictName: entry}))
+    server.start()
+    results = {}
+    try:
+        waitForPort(BenchPort)
+        val = 'x' * valSize
+        keyList = ['key%6.6d' % i for i in range(keys)]
+        transports = [('tcp', {'socketFile': None, 'shmSlots': 0}),
+                      ('unix', {'shmSlots': 0}),
+                      ('shm', {})]
+        for transport, override in transports:
+            dictRegistry = {dictName: dict(entry, **override)}
+            db = PersistentDict(dictName, dictRegistry=dictRegistry)
+            if transport == 'tcp':
+                db.mset([(k, val) for k in keyList])
+            for k in keyList:
+                db[k]
+            t0 = time.perf_counter()
+            for i in range(ops):
+                db[keyList[i % keys]]
+            results[transport] = (time.perf_counter() - t0) / ops * 1e6
+            print(('%-5s %8.1f us/get' % (transport, results[transport])))
+            db.close()
+    finally:
+        server.terminate()
+        server.join()
+    return results
+
+
 def main():
-    multiProcessTest(4, [(testPDict, ['EventStore', 'p1']), (testPDict, ['EventStore', 'p2']),
-                         (testPDict, ['EventStore', 'p3']), (testPDict, ['EventStore', 'p4'])])
+    opts, args = getopt.getopt(sys.argv[1:], '', ['clients=', 'ops=', 'memory',
+                                                  'transports'])
+    kargs = {}
+    transports = False
+    for opt, val in opts:
+        if opt == '--clients':
+            kargs['clients'] = int(val)
+        elif opt == '--ops':
+            kargs['ops'] = int(val)
+        elif opt == '--memory':
+            kargs['memory'] = True
+        elif opt == '--transports':
+            transports = True
+    if transports:
+        kargs.pop('clients', None)
+        kargs.pop('memory', None)
+        benchmarkTransports(**kargs)
+        return
+    if args:
+        kargs['shardCounts'] = [int(i) for i in args]
+    print(('cores: %d' % mp.cpu_count()))
+    benchmarkShards(**kargs)
 
 
 if __name__ == '__main__':
@@ -17,6 +17,12 @@ from twisted.python import log
 import os
 import sys
 import socket
+import struct
+import time
+import bisect
+import importlib
+import hashlib
+import threading
 from bsddb3 import dbshelve
 import pickle as pickle
 try:
@@ -27,6 +33,7 @@ except ImportError:
 
 # retrieve work unit cache dir and file from user configuration
 from sciflo.utils import ScifloConfigParser, validateDirectory
+from .shmTable import SharedValueTable, SharedValueTableError, toBytes
 scp = ScifloConfigParser()
 WorkUnitCacheDir = scp.getParameter("cacheHome")
 WorkUnitCacheFile = scp.getParameter("cacheDb")
@@ -34,18 +41,44 @@ WorkUnitCachePort = int(scp.getParameter("cachePort"))
 WorkUnitCache = os.path.join(WorkUnitCacheDir, WorkUnitCacheFile)
 WorkUnitCacheLog = os.path.join(sys.prefix, 'log', '%s.log' %
                                 os.path.splitext(WorkUnitCacheFile)[0])
+WorkUnitCacheShards = scp.getParameter("cacheShards")
+if WorkUnitCacheShards is None:
+    WorkUnitCacheShards = 1
+else:
+    WorkUnitCacheShards = int(WorkUnitCacheShards)
+WorkUnitCacheSocket = os.path.join(WorkUnitCacheDir, '%s.sock' %
+                                   os.path.splitext(WorkUnitCacheFile)[0])
+WorkUnitCacheShmSlots = scp.getParameter("cacheShmSlots")
+if WorkUnitCacheShmSlots is None:
+    WorkUnitCacheShmSlots = 0
+else:
+    WorkUnitCacheShmSlots = int(WorkUnitCacheShmSlots)
 
 DEBUG = False
 
-# Registry of named (shareable) dictionaries
+# Registry of named (shareable) dictionaries.  A dict with 'shards' > 1 is
+# split across that many servers on consecutive ports starting at 'port',
+# each with its own db and log file.  Optional transports: with 'socketFile'
+# the server also listens on that unix socket, which local clients prefer
+# over TCP; with 'shmSlots' > 0 the server keeps values of up to
+# 'shmSlotSize' bytes (default 512, less the key) in a shared memory table
+# ('shmName') that clients read gets from without a round trip; clients
+# count those hits and report them with touch every 'shmTouchInterval'
+# seconds (default 60) so hit-based expiry sees them.  A dict
+# with a 'compactor' names a function (dotted path) that is called with each
+# factory when the dict is served, e.g. to start expiring its entries.
 NamedDicts = {'WorkUnitCache':
               {'dbFile': WorkUnitCache, 'port': WorkUnitCachePort,
-               'logFile': WorkUnitCacheLog},
+               'logFile': WorkUnitCacheLog, 'shards': WorkUnitCacheShards,
+               'socketFile': WorkUnitCacheSocket,
+               'shmSlots': WorkUnitCacheShmSlots,
+               'compactor': 'sciflo.grid.cacheCompactor.startCacheCompactor'},
               'EventStore':
               {'dbFile': '/tmp/EventStore/eventStore.db', 'port': 8002,
                'logFile': 'eventStoreServer.log'},
               'Test':
-              {'dbFile': None, 'port': 8009, 'logFile': '/tmp/Test.log'},
+              {'dbFile': None, 'port': 8009, 'logFile': '/tmp/Test.log',
+               'socketFile': '/tmp/Test.sock'},
               }
 
 # String constants for client/server protocol across wire
@@ -57,9 +90,159 @@ ErrorMsg = MsgPrefix + 'error: '
 EndMsg = MsgPrefix + 'end'
 EndToken = EndMsg + NNL
 
+# Protocol v2: a client that sends V2Hello<NNL> and gets OkMsg<NNL> back
+# switches the connection to length-prefixed binary frames.  A frame is a
+# 4-byte big-endian body length followed by the body: a 4-byte field count
+# and that many fields, each a 4-byte length and its bytes (NoneLength for
+# None).  Requests are [cmd, arg, ...]; replies are ['ok', val, ...] or
+# ['error', message], sent in request order so requests can be pipelined.
+V2Hello = MsgPrefix + 'v2'
+FrameHeader = struct.Struct('!I')
+NoneLength = 0xFFFFFFFF
+
 _TestDict = {'foo': 'bar', 'bush': 'sucks', 'fool': 'no money'}
 
 
+def encodeFrame(fields):
+    """Return v2 frame holding fields, each bytes or None."""
+
+    parts = [FrameHeader.pack(len(fields))]
+    for field in fields:
+        if field is None:
+            parts.append(FrameHeader.pack(NoneLength))
+        else:
+            parts.append(FrameHeader.pack(len(field)))
+            parts.append(field)
+    body = b''.join(parts)
+    return FrameHeader.pack(len(body)) + body
+
+
+def decodeFrame(body):
+    """Return list of fields in v2 frame body."""
+
+    view = memoryview(body)
+    count = FrameHeader.unpack_from(view, 0)[0]
+    pos = FrameHeader.size
+    fields = []
+    for i in range(count):
+        length = FrameHeader.unpack_from(view, pos)[0]
+        pos += FrameHeader.size
+        if length == NoneLength:
+            fields.append(None)
+        else:
+            fields.append(bytes(view[pos:pos + length]))
+            pos += length
+    return fields
+
+
+def getShardCount(dictName, dictRegistry=NamedDicts):
+    """Return number of shards the named dict is split into."""
+
+    return dictRegistry[dictName].get('shards', 1)
+
+
+def getShardFile(path, shard):
+    """Return shard's version of a db or log file path, e.g. cache.db ->
+    cache.2.db.  Unsharded (shard None) paths are unchanged."""
+
+    if path is None or shard is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return '%s.%d%s' % (root, shard, ext)
+
+
+def getShmName(dictName, dictRegistry=NamedDicts, shard=None):
+    """Return name of the named dict's shared memory table."""
+
+    name = dictRegistry[dictName].get('shmName', None)
+    if name is None:
+        name = 'sciflo-%d-%s' % (os.getuid(), dictName)
+    if shard is not None:
+        name = '%s.%d' % (name, shard)
+    return name
+
+
+_SharedValueTables = {}
+
+
+def getSharedValueTable(dictName, dictRegistry=NamedDicts, shard=None):
+    """Return this process' attachment to the shared memory table of the
+    named dict (or shard), or None if it has none or its server is gone."""
+
+    if not dictRegistry[dictName].get('shmSlots', 0):
+        return None
+    name = getShmName(dictName, dictRegistry, shard)
+    now = time.time()
+    entry = _SharedValueTables.get(name, None)
+    if entry is not None:
+        table, checked = entry
+        if now - checked < 1.:
+            return table
+        if table is not None and table.isLive():
+            _SharedValueTables[name] = (table, now)
+            return table
+    try:
+        table = SharedValueTable(name)
+        if not table.isLive():
+            table.close()
+            table = None
+    except (OSError, SharedValueTableError):
+        table = None
+    _SharedValueTables[name] = (table, now)
+    return table
+
+
+class ShardRing(object):
+    """Consistent-hash ring mapping keys to shards.  Each shard owns replicas
+points on the ring and a key belongs to the shard owning the next point at
+or after its hash, so changing the number of shards only moves the keys
+of the points that changed hands.
+    """
+
+    def __init__(self, shards, replicas=64):
+        self.shards = shards
+        points = sorted((self._hash('%d-%d' % (shard, i)), shard)
+                        for shard in range(shards) for i in range(replicas))
+        self.hashes = [h for h, shard in points]
+        self.owners = [shard for h, shard in points]
+
+    def _hash(self, key):
+        return int.from_bytes(hashlib.md5(toBytes(key)).digest()[:8], 'big')
+
+    def getShards(self):
+        """Return list of shards; [None] if the dict is not sharded."""
+        if self.shards == 1:
+            return [None]
+        return list(range(self.shards))
+
+    def getShard(self, key):
+        """Return shard of key; None if the dict is not sharded."""
+        if self.shards == 1:
+            return None
+        i = bisect.bisect_left(self.hashes, self._hash(key))
+        return self.owners[i % len(self.owners)]
+
+    def groupKeys(self, keys):
+        """Return dict of shard -> list of indexes of keys in that shard."""
+        groups = {}
+        for i, key in enumerate(keys):
+            groups.setdefault(self.getShard(key), []).append(i)
+        return groups
+
+
+_ShardRings = {}
+
+
+def getShardRing(dictName, dictRegistry=NamedDicts):
+    """Return ShardRing of the named dict."""
+
+    shards = getShardCount(dictName, dictRegistry)
+    ring = _ShardRings.get(shards, None)
+    if ring is None:
+        ring = _ShardRings[shards] = ShardRing(shards)
+    return ring
+
+
 class PersistentDictProtocol(LineReceiver):
     """A twisted server to allow access to a persistent dictionary (e.g. bsddb)
 from multiple remote clients.  The line-oriented protocol accepts the commands:
@@ -69,6 +252,10 @@ from multiple remote clients.  The line-oriented protocol accepts the commands:
  - delete<NNL>key<NNL> : delete a key/value pair from the dictionary
  - insert<NNL>key<NNL>val<EndMsg><NNL> : insert a multi-line string value under that key)
  - length<NNL>         : return number of keys in dict (**CURRENTLY BROKEN, returns zero**)
+ - #!#v2<NNL>          : switch connection to protocol v2 (binary frames, see
+                         above), which adds mget, mset and mdelete of many
+                         keys and lets clients pipeline requests, and
+                         touch to count hits clients served themselves
 
 Notes:
  - Keys cannot contain network newlines, NNL = '\r\n'.
@@ -81,6 +268,7 @@ Notes:
         self.state = state  # state of FSM = 'start', 'get', 'delete', 'insert', or 'getval'
         self.key = None     # key to insert value under
         self.val = None     # value to insert
+        self.frameBuffer = bytearray()  # unparsed v2 frames
 
     def connectionMade(self):
         if DEBUG:
@@ -90,10 +278,15 @@ Notes:
         """Simple finite state machine to process the four possible commands.
         """
         dic = self.factory.dict  # get dictionary opened in factory init()
+        if self.state != 'getval':
+            line = line.decode('utf-8')
         if DEBUG:
             print(('**', line, '**'))
         if self.state == 'start':
-            if line == 'ping':
+            if line == V2Hello:
+                self.sendline(OkMsg)
+                self.setRawMode()
+            elif line == 'ping':
                 print('ping')
                 self.sendline(OkMsg)
             elif line == 'length':
@@ -106,36 +299,96 @@ Notes:
                 self.state = line
         elif self.state == 'get':
             print(('get', line))
-            val = dic.get(line, NoneMsg)
-            self.sendline(val + EndMsg)
+            val = self.factory.lookup(line)
+            if val is None:
+                self.sendline(NoneMsg + EndMsg)
+            else:
+                self.sendline(toBytes(val) + EndMsg.encode('utf-8'))
             self.state = 'start'
         elif self.state == 'delete':
             print(('delete', line))
-            if line in dic:
-                del dic[line]
+            self.factory.remove(line)
             self.sendline(OkMsg)
             self.state = 'start'
         elif self.state == 'insert':
             print(('insert', line))
             self.key = line
-            self.val = ''
+            self.val = b''
             self.state = 'getval'
         elif self.state == 'getval':
             if DEBUG:
                 print(('Adding to val:', line))
             self.val += line
-            if line.endswith(EndMsg):
+            if line.endswith(EndMsg.encode('utf-8')):
                 val = self.val[:-len(EndMsg)]
-                dic[self.key] = val
+                self.factory.store(self.key, val)
                 if DEBUG:
                     print('Inserted:')
                 if DEBUG:
                     print(val)
                 self.sendline(OkMsg)
                 self.state = 'start'
+            else:
+                self.val += NNL.encode('utf-8')
+
+    def rawDataReceived(self, data):
+        """Process v2 frames.  Replies to all complete frames received are
+        written at once."""
+
+        self.frameBuffer += data
+        replies = []
+        while len(self.frameBuffer) >= FrameHeader.size:
+            length = FrameHeader.unpack_from(self.frameBuffer, 0)[0]
+            end = FrameHeader.size + length
+            if len(self.frameBuffer) < end:
+                break
+            body = bytes(self.frameBuffer[FrameHeader.size:end])
+            del self.frameBuffer[:end]
+            try:
+                reply = self.handleRequest(decodeFrame(body))
+            except Exception as e:
+                reply = [b'error', toBytes(str(e))]
+            replies.append(encodeFrame(reply))
+        if replies:
+            self.transport.write(b''.join(replies))
+
+    def handleRequest(self, fields):
+        """Return reply fields for v2 request fields."""
+
+        dic = self.factory.dict
+        cmd = fields[0].decode('utf-8')
+        args = fields[1:]
+        if DEBUG:
+            print(('v2', cmd, len(args)))
+        if cmd == 'ping':
+            return [b'ok']
+        elif cmd == 'length':
+            return [b'ok', toBytes(str(len(dic)))]
+        elif cmd in ('get', 'mget'):
+            return [b'ok'] + [toBytes(self.factory.lookup(k.decode('utf-8')))
+                              for k in args]
+        elif cmd in ('insert', 'mset'):
+            if len(args) % 2 != 0:
+                return [b'error', b'mset needs key/value pairs']
+            for i in range(0, len(args), 2):
+                self.factory.store(args[i].decode('utf-8'), args[i + 1])
+            return [b'ok']
+        elif cmd in ('delete', 'mdelete'):
+            for k in args:
+                self.factory.remove(k.decode('utf-8'))
+            return [b'ok']
+        elif cmd == 'touch':
+            if len(args) % 2 != 0:
+                return [b'error', b'touch needs key/hits pairs']
+            for i in range(0, len(args), 2):
+                self.factory.touch(args[i].decode('utf-8'),
+                                   int(args[i + 1]))
+            return [b'ok']
+        else:
+            return [b'error', toBytes('unknown command: %s' % cmd)]
 
     def sendline(self, line):
-        self.transport.write(line + NNL)
+        self.transport.write(toBytes(line) + NNL.encode('utf-8'))
 
 
 class PersistentDictFactoryException(RuntimeError):
@@ -145,33 +398,168 @@ class PersistentDictFactoryException(RuntimeError):
 class PersistentDictFactory(ServerFactory):
     protocol = PersistentDictProtocol
 
-    def __init__(self, dictName, dictRegistry=NamedDicts):
-        """Set up for the protocol by opening the named persistent dictionary.
+    def __init__(self, dictName, dictRegistry=NamedDicts, shard=None):
+        """Set up for the protocol by opening the named persistent dictionary,
+        or only the given shard of it.
         """
         self.dictName = dictName
+        self.shard = shard
+        self.shards = getShardCount(dictName, dictRegistry)
         try:
-            self.dbFile = dictRegistry[dictName]['dbFile']
-            self.port = dictRegistry[dictName]['port']
+            self.dbFile = getShardFile(dictRegistry[dictName]['dbFile'], shard)
+            self.port = dictRegistry[dictName]['port'] + (shard or 0)
+            logFile = getShardFile(dictRegistry[dictName]['logFile'], shard)
             if self.dbFile:
                 dbHome = os.path.split(self.dbFile)[0]
                 if not os.path.exists(dbHome):
                     os.makedirs(dbHome, 0o777)
                 self.dbHome = dbHome
-                logFile = dictRegistry[dictName]['logFile']
                 if not logFile.startswith('/'):
                     logFile = os.path.join(dbHome, logFile)
-                self.logFile = logFile
+            self.logFile = logFile
         except:
             raise PersistentDictFactoryException(
                 'Error, no dict of that name: %s' % dictName)
+
+        # optional transports; the table is created before logging starts
+        # since the resource tracker it starts needs the real stderr
+        self.socketFile = getShardFile(
+            dictRegistry[dictName].get('socketFile', None), shard)
+        self.table = None
+        shmSlots = dictRegistry[dictName].get('shmSlots', 0)
+        if shmSlots:
+            self.table = SharedValueTable(
+                getShmName(dictName, dictRegistry, shard), shmSlots,
+                dictRegistry[dictName].get('shmSlotSize', 512), create=True)
         validateDirectory(os.path.dirname(self.logFile))
         log.startLogging(open(self.logFile, 'w'))
         if dictName == 'Test':
             self.dict = _TestDict
+        elif not self.dbFile:
+            self.dict = {}
         else:
             self.dict = dbshelve.open(self.dbFile)
             os.chmod(self.dbFile, 0o666)
 
+        # last hit time and hit count of keys since the server started
+        self.started = time.time()
+        self.hitStats = {}
+
+    def lookup(self, key):
+        """Return value of key or None.  Small values are copied to the
+        shared memory table."""
+        val = self.dict.get(key, None)
+        if val is not None:
+            self._hit(key, 1)
+            if self.table is not None:
+                self.table.put(key, val)
+        return val
+
+    def store(self, key, val):
+        """Insert or change value of key."""
+        self.dict[key] = val
+        self.hitStats.pop(key, None)
+        if self.table is not None:
+            self.table.put(key, val)
+
+    def remove(self, key):
+        """Delete key if it exists."""
+        if self.table is not None:
+            self.table.remove(key)
+        self.hitStats.pop(key, None)
+        if key in self.dict:
+            del self.dict[key]
+
+    def _hit(self, key, hits):
+        stats = self.hitStats.get(key, None)
+        if stats is None:
+            self.hitStats[key] = [time.time(), hits]
+        else:
+            stats[0] = time.time()
+            stats[1] += hits
+
+    def touch(self, key, hits=1):
+        """Count hits on key that clients served without a lookup."""
+        if key in self.dict:
+            self._hit(key, hits)
+
+    def getHitStats(self, key):
+        """Return (last hit time or None, hits) of key since the server
+        started."""
+        return tuple(self.hitStats.get(key, (None, 0)))
+
+    def stopFactory(self):
+        if self.table is not None:
+            self.table.close()
+            self.table = None
+
+    def listen(self, reactor):
+        """Listen on the dict's port and unix socket, if it has one."""
+        reactor.listenTCP(self.port, self)
+        if self.socketFile:
+            if os.path.exists(self.socketFile):
+                os.unlink(self.socketFile)
+            reactor.listenUNIX(self.socketFile, self, mode=0o600)
+
+    def getServices(self):
+        """Return twisted application services listening for this dict."""
+        from twisted.application import internet
+        services = [internet.TCPServer(self.port, self)]
+        if self.socketFile:
+            if os.path.exists(self.socketFile):
+                os.unlink(self.socketFile)
+            services.append(internet.UNIXServer(self.socketFile, self,
+                                                mode=0o600))
+        return services
+
+
+def runPersistentDictServer(dictName, dictRegistry=NamedDicts, shard=None):
+    """Serve the named dict, or one shard of it, until the reactor is
+    stopped."""
+
+    factory = PersistentDictFactory(dictName, dictRegistry, shard)
+    factory.listen(reactor)
+    startCompactor(factory, dictRegistry)
+    reactor.run()
+
+
+def startCompactor(factory, dictRegistry=NamedDicts):
+    """Call the compactor function of the factory's dict, if it has one.
+    Returns what the function returns or None."""
+
+    funcStr = dictRegistry[factory.dictName].get('compactor', None)
+    if funcStr is None:
+        return None
+    modName, funcName = funcStr.rsplit('.', 1)
+    return getattr(importlib.import_module(modName), funcName)(factory)
+
+
+def servePersistentDict(dictName, dictRegistry=NamedDicts):
+    """Serve the named dict.  A sharded dict is served by one process per
+    shard, so shards are served in parallel."""
+
+    shards = getShardCount(dictName, dictRegistry)
+    if shards == 1:
+        return runPersistentDictServer(dictName, dictRegistry)
+
+    # spawn rather than fork so that shards do not share the parent's reactor
+    import multiprocessing as mp
+    ctx = mp.get_context('spawn')
+    procs = [ctx.Process(target=runPersistentDictServer,
+                         args=(dictName, dictRegistry, shard),
+                         name='%s-%d' % (dictName, shard))
+             for shard in range(shards)]
+    for proc in procs:
+        proc.start()
+    try:
+        for proc in procs:
+            proc.join()
+    finally:
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+
 
 class PersistentDictClientException(RuntimeError):
     pass
@@ -179,94 +567,292 @@ class PersistentDictClientException(RuntimeError):
 
 class PersistentDictClient:
     """A simple client to call a persistent dictionary (e.g. bsddb) across a socket.
-The client only has four useful methods:  ping, get, delete, insert.
+The client's main methods are ping, get, delete and insert, plus mget, mset,
+mdelete and pipeline when the server speaks protocol v2.  Servers that don't
+are talked to with the original text protocol.  For a sharded dict, a client
+talks to one shard's server.  The server's unix socket is used instead of
+TCP if the dict has one, and gets are served from the dict's shared memory
+table when it holds the key; hits on the table are counted and sent to the
+server in batches with touch.
     """
 
-    def __init__(self, dictName, dictRegistry=NamedDicts, pickleVals=False, timeout=3.0, bufsize=4096):
+    def __init__(self, dictName, dictRegistry=NamedDicts, pickleVals=False, timeout=3.0, bufsize=4096,
+                 protocolVersion=2, shard=None):
         self.dictName = dictName
         self.pickleVals = pickleVals
         self.timeout = timeout
         self.bufsize = bufsize
+        self.shard = shard
+        self.dictRegistry = dictRegistry
+        self.pendingHits = {}
+        self.hitsFlushed = time.time()
         try:
-            self.port = dictRegistry[dictName]['port']
+            self.port = dictRegistry[dictName]['port'] + (shard or 0)
+            self.socketFile = getShardFile(
+                dictRegistry[dictName].get('socketFile', None), shard)
         except:
             raise PersistentDictClientException(
                 'Error, no dict of that name: %s' % dictName)
+        self.touchInterval = dictRegistry[dictName].get('shmTouchInterval',
+                                                        60.)
         self.soc = self._openLocalSocket(self.port)
+        self.protocolVersion = protocolVersion
+        if self.protocolVersion == 2 and not self._hello():
+            # old server; reconnect and use the text protocol
+            self.soc.close()
+            self.soc = self._openLocalSocket(self.port)
+            self.protocolVersion = 1
         if not self.ping():
             raise PersistentDictClientException(
                 'Error, server for %s on port %s does not return ping' % (dictName, self.port))
 
     def close(self):
+        self.flushHits()
         self.soc.close()
         if DEBUG:
             print(('PersistentDictClient: Closed socket connection to dictName, port: %s, %d' % (
                 self.dictName, self.port)))
 
+    def _hello(self):
+        """Ask server to switch to protocol v2.  Return True if it did."""
+        try:
+            self.soc.sendall((V2Hello + NNL).encode('utf-8'))
+            return self._recvLine() == OkMsg
+        except (socket.error, PersistentDictClientException):
+            return False
+
+    def _recvLine(self):
+        """Read one NNL-terminated line, a byte at a time so nothing past it
+        is consumed."""
+        data = bytearray()
+        while not data.endswith(b'\r\n'):
+            c = self.soc.recv(1)
+            if not c:
+                raise PersistentDictClientException(
+                    'Error, connection closed by server')
+            data += c
+        return data[:-2].decode('utf-8')
+
+    def _recvExact(self, n):
+        """Read exactly n bytes."""
+        buf = bytearray(n)
+        view = memoryview(buf)
+        pos = 0
+        while pos < n:
+            got = self.soc.recv_into(view[pos:])
+            if got == 0:
+                raise PersistentDictClientException(
+                    'Error, connection closed by server')
+            pos += got
+        return buf
+
+    def _recvFrame(self):
+        """Read one v2 reply frame and return its fields."""
+        length = FrameHeader.unpack(self._recvExact(FrameHeader.size))[0]
+        return decodeFrame(self._recvExact(length))
+
+    def pipeline(self, requests):
+        """Send v2 requests, each a list of fields starting with the command,
+        without waiting for replies.  Return list of reply field lists in
+        request order; a reply with an error raises."""
+        if self.protocolVersion != 2:
+            raise PersistentDictClientException(
+                'Error, server for %s does not support pipelining' % self.dictName)
+        try:
+            self.soc.sendall(b''.join(encodeFrame([toBytes(f) for f in r])
+                                      for r in requests))
+            replies = [self._recvFrame() for r in requests]
+        except (socket.error, PersistentDictClientException) as e:
+            self.soc.close()
+            raise PersistentDictClientException(
+                'Error, socket error talking to server: %s' % e)
+        for reply in replies:
+            if reply[0] != b'ok':
+                raise PersistentDictClientException(
+                    'Error from server: %s' % reply[1].decode('utf-8'))
+        return [reply[1:] for reply in replies]
+
+    def _request(self, *fields):
+        """Send one v2 request and return its reply fields."""
+        return self.pipeline([fields])[0]
+
+    def _dumpVal(self, val):
+        if self.pickleVals:
+            return pickle.dumps(val)
+        return toBytes(val)
+
+    def _loadVal(self, data):
+        if self.pickleVals:
+            return pickle.loads(data)
+        return data.decode('utf-8')
+
     def ping(self):
         """Ping server to ensure it's alive."""
         try:
+            if self.protocolVersion == 2:
+                self._request('ping')
+                return True
             return self._sendCmd('ping')
         except:
             return False
 
     def get(self, key, default=None):
         """Get value of a string key, or default value if missing."""
+        table = getSharedValueTable(self.dictName, self.dictRegistry,
+                                    self.shard)
+        if table is not None:
+            val = table.get(key)
+            if val is not None:
+                self._countHits([key])
+                return self._loadVal(val)
+        if self.protocolVersion == 2:
+            return self._mget([key], default)[0]
         soc = self.soc
-        cmd = 'get' + NNL + key + NNL
+        cmd = ('get' + NNL + key + NNL).encode('utf-8')
         try:
             soc.sendall(cmd)
         except socket.error as msg:
             soc.close()
             raise PersistentDictClientException(
                 'Error, cannot send to socket: %s' % cmd)
-        data = ''
+        data = bytearray()
+        endToken = EndToken.encode('utf-8')
         firstTry = True
-        while not data.endswith(EndToken):
+        while not data.endswith(endToken):
             try:
-                data += soc.recv(self.bufsize)
+                chunk = soc.recv(self.bufsize)
                 if DEBUG:
-                    print(('Got data:', data))
+                    print(('Got data:', chunk))
             except socket.error as msg:
                 soc.close()
                 raise PersistentDictClientException(
                     'Error, no data received from socket, sent: %s' % cmd)
-            if data.startswith(NoneMsg) or (firstTry and len(data) == 0):
+            data += chunk
+            if data.startswith(NoneMsg.encode('utf-8')) or (firstTry and len(data) == 0):
                 return default
             firstTry = False
-        data = data[:-len(EndToken)]
-        if self.pickleVals:
-            return pickle.loads(data)
-        else:
-            return data
+        return self._loadVal(bytes(data[:-len(endToken)]))
+
+    def mget(self, keys, default=None):
+        """Return list of values of keys, with default for missing ones, in
+        one round trip."""
+        if self.protocolVersion != 2:
+            return [self.get(key, default) for key in keys]
+        table = getSharedValueTable(self.dictName, self.dictRegistry,
+                                    self.shard)
+        if table is None:
+            return self._mget(keys, default)
+        vals = [table.get(key) for key in keys]
+        misses = [i for i, val in enumerate(vals) if val is None]
+        self._countHits([key for key, val in zip(keys, vals)
+                         if val is not None])
+        vals = [None if val is None else self._loadVal(val) for val in vals]
+        for i, val in zip(misses, self._mget([keys[i] for i in misses],
+                                             default)):
+            vals[i] = val
+        return vals
+
+    def _mget(self, keys, default=None):
+        """Get values of keys from the server."""
+        if len(keys) == 0:
+            return []
+        vals = self._request('mget', *keys)
+        return [default if val is None else self._loadVal(val) for val in vals]
 
     def delete(self, key):
         """Delete a key and its value from persistent dict."""
-        cmd = 'delete' + NNL + key + NNL
+        return self.mdelete([key])
+
+    def touch(self, key, hits=1):
+        """Tell the server about hits on key served without asking it.
+        Returns False if the server cannot count them."""
+        if self.protocolVersion != 2:
+            return False
+        self._request('touch', key, str(hits))
+        return True
+
+    def _countHits(self, keys):
+        """Count hits on keys served from the shared memory table, sending
+        them to the server once touchInterval has passed since the last
+        batch."""
+        if self.protocolVersion != 2 or len(keys) == 0:
+            return
+        for key in keys:
+            self.pendingHits[key] = self.pendingHits.get(key, 0) + 1
+        if time.time() - self.hitsFlushed >= self.touchInterval:
+            self.flushHits()
+
+    def flushHits(self):
+        """Send counted shared memory table hits to the server in one touch.
+        Hits are advisory, so they are dropped if the server can't take
+        them."""
+        self.hitsFlushed = time.time()
+        if len(self.pendingHits) == 0:
+            return
+        fields = ['touch']
+        for key, hits in self.pendingHits.items():
+            fields.append(key)
+            fields.append(str(hits))
+        self.pendingHits = {}
         try:
-            return self._sendCmd(cmd)
+            self._request(*fields)
+        except PersistentDictClientException:
+            pass
+
+    def mdelete(self, keys):
+        """Delete keys and their values in one round trip."""
+        try:
+            if self.protocolVersion != 2:
+                return all([self._sendCmd('delete' + NNL + key + NNL) is True
+                            for key in keys])
+            self._request('mdelete', *keys)
+            return True
         except:
             return False
 
     def insert(self, key, val):
         """Insert or change the value of a key."""
-        if self.pickleVals:
-            val = pickle.dumps(val)
-        cmd = 'insert' + NNL + key + NNL + val + EndToken
+        return self.mset([(key, val)])
+
+    def mset(self, items):
+        """Insert or change the values of keys, given a dict or list of
+        (key, value) pairs, in one round trip."""
+        if isinstance(items, dict):
+            items = list(items.items())
         try:
-            return self._sendCmd(cmd)
+            if self.protocolVersion != 2:
+                return all([self._sendCmd(('insert' + NNL + key + NNL).encode('utf-8') +
+                                          self._dumpVal(val) + EndToken.encode('utf-8')) is True
+                            for key, val in items])
+            fields = ['mset']
+            for key, val in items:
+                fields.append(key)
+                fields.append(self._dumpVal(val))
+            self._request(*fields)
+            return True
         except:
             return False
 
     def length(self):
         """Return number of keys in dict."""
         try:
+            if self.protocolVersion == 2:
+                return int(self._request('length')[0])
             return int(self._sendCmd('length'))
         except:
             return 0
 
     def _openLocalSocket(self, port):
-        """Open a port on localhost and send a ping command to ensure server is alive."""
+        """Open the dict's unix socket, if it has one the server listens on,
+        or else a port on localhost."""
+        if self.socketFile and os.path.exists(self.socketFile):
+            soc = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                soc.connect(self.socketFile)
+                soc.settimeout(self.timeout)
+                return soc
+            except socket.error:
+                soc.close()
         try:
             soc = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             soc.connect(('127.0.0.1', port))
@@ -279,10 +865,11 @@ The client only has four useful methods:  ping, get, delete, insert.
         return soc
 
     def _sendCmd(self, cmd):
-        """Send a command and check for returned 'ok' message."""
+        """Send a text protocol command and check for returned 'ok' message."""
         soc = self.soc
-        if cmd[-2:] != NNL:
-            cmd += NNL
+        cmd = toBytes(cmd)
+        if cmd[-2:] != b'\r\n':
+            cmd += b'\r\n'
         try:
             soc.sendall(cmd)
         except socket.error as msg:
@@ -290,13 +877,12 @@ The client only has four useful methods:  ping, get, delete, insert.
             raise RuntimeError(
                 'PersistentDictClient: Error, cannot send to socket: %s' % cmd)
         try:
-            data = soc.recv(self.bufsize)
-        except socket.error as e:
+            data = self._recvLine()
+        except (socket.error, PersistentDictClientException) as e:
             soc.close()
             print(
                 ('PersistentDictClient: Error, no data received from socket, sent: %s' % cmd))
             raise e
-        data = data[-len(NNL):]
         if data == OkMsg:
             data = True
         return data
@@ -306,36 +892,71 @@ class PersistentDictException(RuntimeError):
     pass
 
 
-class PersistentDict(DictMixin):
-    """Presents the usual dict interface, accessing a *named*, shared, persistent dictionary,
-and hides the (socket) client and (twisted) server classes from view.
+class ShardRouter(DictMixin):
+    """Dict interface over a possibly sharded named dict.  Each access is
+routed to the shard owning its key; batch calls are split per shard.
+Subclasses set self.ring and implement _call(method, *args, shard=None),
+which calls a PersistentDictClient method on a connection to shard.
     """
 
-    def __init__(self, dictName, pickleVals=False):
-        self.dictName = dictName
-        self.db = None
-        self.db = PersistentDictClient(dictName, pickleVals=pickleVals)
-
-    def __del__(self):
-        if self.db:
-            self.db.close()
-
-    def __getattr__(self, name):
-        """Many methods we can just pass through to the DB object."""
-        return getattr(self.db, name)
-
     # dictionary access methods
     def __len__(self):
-        return self.db.length()
+        return sum(self._call('length', shard=shard)
+                   for shard in self.ring.getShards())
 
     def __getitem__(self, key):
-        return self.db.get(key)
+        return self._call('get', key, shard=self.ring.getShard(key))
 
     def __setitem__(self, key, val):
-        self.db.insert(key, val)
+        self._call('insert', key, val, shard=self.ring.getShard(key))
 
     def __delitem__(self, key):
-        self.db.delete(key)
+        self._call('delete', key, shard=self.ring.getShard(key))
+
+    def get(self, key, default=None):
+        return self._call('get', key, default, shard=self.ring.getShard(key))
+
+    def insert(self, key, val):
+        return self._call('insert', key, val, shard=self.ring.getShard(key))
+
+    def delete(self, key):
+        return self._call('delete', key, shard=self.ring.getShard(key))
+
+    def touch(self, key, hits=1):
+        return self._call('touch', key, hits, shard=self.ring.getShard(key))
+
+    def mget(self, keys, default=None):
+        """Return list of values of keys, with default for missing ones."""
+        vals = [default] * len(keys)
+        for shard, idxs in self.ring.groupKeys(keys).items():
+            shardVals = self._call('mget', [keys[i] for i in idxs], default,
+                                   shard=shard)
+            for i, val in zip(idxs, shardVals):
+                vals[i] = val
+        return vals
+
+    def mset(self, items):
+        """Insert or change the values of keys, given a dict or list of
+        (key, value) pairs."""
+        if isinstance(items, dict):
+            items = list(items.items())
+        ok = True
+        for shard, idxs in self.ring.groupKeys([k for k, v in items]).items():
+            if not self._call('mset', [items[i] for i in idxs], shard=shard):
+                ok = False
+        return ok
+
+    def mdelete(self, keys):
+        """Delete keys and their values."""
+        ok = True
+        for shard, idxs in self.ring.groupKeys(keys).items():
+            if not self._call('mdelete', [keys[i] for i in idxs], shard=shard):
+                ok = False
+        return ok
+
+    def ping(self):
+        return all([self._call('ping', shard=shard)
+                    for shard in self.ring.getShards()])
 
     def keys(self, txn=None):
         raise PersistentDictException(
@@ -350,17 +971,193 @@ and hides the (socket) client and (twisted) server classes from view.
             'Error, class does not implement values() method.')
 
 
+class PersistentDict(ShardRouter):
+    """Presents the usual dict interface, accessing a *named*, shared, persistent dictionary,
+and hides the (socket) client and (twisted) server classes from view.  A
+sharded dict gets one client per shard.
+    """
+
+    def __init__(self, dictName, pickleVals=False, dictRegistry=NamedDicts):
+        self.dictName = dictName
+        self.db = None
+        self.dbs = {}
+        self.ring = getShardRing(dictName, dictRegistry)
+        for shard in self.ring.getShards():
+            self.dbs[shard] = PersistentDictClient(dictName, dictRegistry=dictRegistry,
+                                                   pickleVals=pickleVals, shard=shard)
+        self.db = self.dbs[self.ring.getShards()[0]]
+
+    def __del__(self):
+        if self.db:
+            self.close()
+
+    def __getattr__(self, name):
+        """Many methods we can just pass through to the DB object."""
+        return getattr(self.db, name)
+
+    def _call(self, method, *args, shard=None):
+        return getattr(self.dbs[shard], method)(*args)
+
+    def close(self):
+        for db in self.dbs.values():
+            db.close()
+        self.db = None
+
+
+class PersistentDictPool(object):
+    """Process-local pool of PersistentDictClient connections, kept per
+(dictName, pickleVals, shard).  Connections idle longer than
+healthCheckInterval seconds are pinged before reuse, ones idle longer than
+idleTimeout seconds are closed, and at most maxIdle idle connections are kept
+per dict shard.  Connections inherited across a fork are dropped in the child.
+    """
+
+    def __init__(self, maxIdle=8, idleTimeout=300., healthCheckInterval=30.):
+        self.maxIdle = maxIdle
+        self.idleTimeout = idleTimeout
+        self.healthCheckInterval = healthCheckInterval
+        self._reset()
+
+    def _reset(self):
+        """Forget all connections (after a fork they belong to the parent)."""
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.idle = {}  # (dictName, pickleVals, shard) -> [(client, lastUsed), ...]
+
+    def afterFork(self):
+        """Drop connections inherited from the parent process.  The sockets
+        are closed in this process only; the parent keeps using them."""
+        idle = self.idle
+        self._reset()
+        for clients in idle.values():
+            for client, lastUsed in clients:
+                self._close(client)
+
+    def _close(self, client):
+        try:
+            client.soc.close()
+        except Exception:
+            pass
+
+    def _checkFork(self):
+        if os.getpid() != self.pid:
+            self.afterFork()
+
+    def get(self, dictName, pickleVals=False, shard=None):
+        """Return a connected client, reusing an idle one if possible."""
+        self._checkFork()
+        key = (dictName, pickleVals, shard)
+        now = time.time()
+        stale = []
+        client = None
+        with self.lock:
+            clients = self.idle.get(key, [])
+            while clients:
+                candidate, lastUsed = clients.pop()
+                if now - lastUsed > self.idleTimeout:
+                    stale.append(candidate)
+                    continue
+                if now - lastUsed > self.healthCheckInterval:
+                    client = (candidate, False)
+                else:
+                    client = (candidate, True)
+                break
+        for s in stale:
+            self._close(s)
+        if client is not None:
+            candidate, healthy = client
+            if healthy or candidate.ping():
+                return candidate
+            self._close(candidate)
+        return PersistentDictClient(dictName, pickleVals=pickleVals, shard=shard)
+
+    def put(self, client):
+        """Return client to the pool.  Closed clients are discarded."""
+        if os.getpid() != self.pid or client.soc.fileno() == -1:
+            self._close(client)
+            return
+        key = (client.dictName, client.pickleVals, client.shard)
+        now = time.time()
+        with self.lock:
+            clients = self.idle.setdefault(key, [])
+            # evict idle connections from the front (oldest first)
+            while clients and (len(clients) >= self.maxIdle or
+                               now - clients[0][1] > self.idleTimeout):
+                self._close(clients.pop(0)[0])
+            clients.append((client, now))
+
+    def discard(self, client):
+        """Close a client that had an error instead of returning it."""
+        self._close(client)
+
+    def call(self, dictName, pickleVals, method, *args, shard=None):
+        """Call a client method on a pooled connection.  On a connection
+        error the connection is dropped and the call retried once on a new
+        one."""
+        for attempt in (0, 1):
+            client = self.get(dictName, pickleVals, shard)
+            try:
+                res = getattr(client, method)(*args)
+            except (socket.error, PersistentDictClientException):
+                self.discard(client)
+                if attempt == 1:
+                    raise
+                continue
+            except:
+                self.discard(client)
+                raise
+            # some client methods report errors by return value; a closed
+            # socket means the connection failed under them
+            if client.soc.fileno() == -1 and attempt == 0:
+                continue
+            self.put(client)
+            return res
+
+    def close(self):
+        """Close all idle connections."""
+        with self.lock:
+            idle, self.idle = self.idle, {}
+        for clients in idle.values():
+            for client, lastUsed in clients:
+                self._close(client)
+
+
+# the process-wide connection pool
+ClientPool = PersistentDictPool()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lambda: ClientPool.afterFork())
+
+
+class PooledPersistentDict(ShardRouter):
+    """Same interface as PersistentDict, but each access borrows a connection
+from ClientPool and gives it back, so connections stay warm across
+instances and the object can be shared between threads.
+    """
+
+    def __init__(self, dictName, pickleVals=False, pool=None):
+        self.dictName = dictName
+        self.pickleVals = pickleVals
+        self.pool = ClientPool if pool is None else pool
+        self.ring = getShardRing(dictName)
+        # fail now, like PersistentDict, if a server is not up
+        for shard in self.ring.getShards():
+            self.pool.put(self.pool.get(dictName, pickleVals, shard))
+
+    def _call(self, method, *args, shard=None):
+        return self.pool.call(self.dictName, self.pickleVals, method, *args,
+                              shard=shard)
+
+
 def startPersistentDictServer():
     """This code belongs in a twisted tac file (at toplevel)."""
-    from .pdict import NamedDicts, PersistentDictFactory
-    from twisted.application import internet, service
+    from .pdict import PersistentDictFactory
+    from twisted.application import service
 
     namedDict = "EventStore"
-    port = NamedDicts[namedDict]['port']
     application = service.Application("pdict")
     factory = PersistentDictFactory(namedDict)
-    pdictService = internet.TCPServer(port, factory)
-    pdictService.setServiceParent(service.IServiceCollection(application))
+    for pdictService in factory.getServices():
+        pdictService.setServiceParent(service.IServiceCollection(application))
 
 
 def testClientSimple():
@@ -387,7 +1184,10 @@ def testClient():
 
 
 def main():
-    testClient()
+    if len(sys.argv) == 3 and sys.argv[1] == 'serve':
+        servePersistentDict(sys.argv[2])
+    else:
+        testClient()
 
 
 if __name__ == '__main__':
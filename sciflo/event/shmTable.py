@@ -0,0 +1,203 @@
+"""
+shmTable.py -- Shared-memory table of small PersistentDict values.
+
+The PersistentDict server copies small values into a table in shared memory
+that clients on the same host read directly, so a get that hits the table
+costs no socket round trip.  The table is direct-mapped: a key can only live
+in the slot its hash selects and a newer key hashing to the same slot
+replaces it.  A miss therefore says nothing about whether the key exists; the
+server stays the authority.
+
+Only the server writes.  Each slot is guarded by a sequence number that the
+writer makes odd while it changes the slot, so readers retry or give up on
+a slot that changed under them instead of returning a torn value.
+"""
+
+import os
+import struct
+import hashlib
+import threading
+from multiprocessing import shared_memory
+
+Magic = b'SFLSHM1\0'
+# magic, number of slots, slot size, pid of the server owning the table
+TableHeader = struct.Struct('<8sIII')
+HeaderSize = 64
+# sequence number, key length, value length, key hash
+SlotHeader = struct.Struct('<IHIQ')
+SeqField = struct.Struct('<I')
+
+_AttachLock = threading.Lock()
+
+
+class SharedValueTableError(RuntimeError):
+    pass
+
+
+def hashKey(key):
+    """Return 64-bit hash of key bytes."""
+
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(),
+                          'little')
+
+
+class SharedValueTable(object):
+    """Direct-mapped table of slots in a named shared memory segment.  The
+server creates it with create=True; clients attach to it by name.
+    """
+
+    def __init__(self, name, slots=65536, slotSize=512, create=False):
+        self.name = name
+        self.create = create
+        if create:
+            try:
+                old = shared_memory.SharedMemory(name)
+                old.close()
+                old.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = shared_memory.SharedMemory(
+                name, create=True, size=HeaderSize + slots * slotSize)
+            self.slots = slots
+            self.slotSize = slotSize
+            self.buf = self.shm.buf
+            self.buf[:HeaderSize] = bytes(HeaderSize)
+            TableHeader.pack_into(self.buf, 0, Magic, slots, slotSize,
+                                  os.getpid())
+        else:
+            self.shm = attachSharedMemory(name)
+            self.buf = self.shm.buf
+            magic, self.slots, self.slotSize, pid = \
+                TableHeader.unpack_from(self.buf, 0)
+            if magic != Magic:
+                self.close()
+                raise SharedValueTableError(
+                    'Error, %s is not a shared value table' % name)
+        self.maxItemSize = self.slotSize - SlotHeader.size
+
+    def _slotOffset(self, keyHash):
+        return HeaderSize + (keyHash % self.slots) * self.slotSize
+
+    def isLive(self):
+        """Return True if the server that owns the table is still running."""
+
+        pid = TableHeader.unpack_from(self.buf, 0)[3]
+        if pid == 0:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def get(self, key, retries=3):
+        """Return value bytes of key or None if the table does not have it."""
+
+        key = toBytes(key)
+        keyHash = hashKey(key)
+        off = self._slotOffset(keyHash)
+        buf = self.buf
+        for i in range(retries):
+            seq, keyLen, valLen, slotHash = SlotHeader.unpack_from(buf, off)
+            if seq & 1:
+                continue
+            if slotHash != keyHash or keyLen != len(key):
+                return None
+            if keyLen + valLen > self.maxItemSize:
+                continue
+            start = off + SlotHeader.size
+            data = bytes(buf[start:start + keyLen + valLen])
+            if SeqField.unpack_from(buf, off)[0] != seq:
+                continue
+            if data[:keyLen] != key:
+                return None
+            return data[keyLen:]
+        return None
+
+    def _write(self, off, key, keyHash, val):
+        buf = self.buf
+        seq = SeqField.unpack_from(buf, off)[0]
+        SeqField.pack_into(buf, off, seq + 1)
+        start = off + SlotHeader.size
+        if key is None:
+            SlotHeader.pack_into(buf, off, seq + 1, 0, 0, 0)
+        else:
+            SlotHeader.pack_into(buf, off, seq + 1, len(key), len(val),
+                                 keyHash)
+            buf[start:start + len(key)] = key
+            buf[start + len(key):start + len(key) + len(val)] = val
+        SeqField.pack_into(buf, off, seq + 2)
+
+    def put(self, key, val):
+        """Put key's value in its slot if it fits; otherwise make sure the
+        slot does not hold an old value of key.  Server only."""
+
+        key = toBytes(key)
+        val = toBytes(val)
+        keyHash = hashKey(key)
+        off = self._slotOffset(keyHash)
+        if val is not None and len(key) + len(val) <= self.maxItemSize:
+            self._write(off, key, keyHash, val)
+        else:
+            self._clear(off, key, keyHash)
+
+    def remove(self, key):
+        """Drop key from the table.  Server only."""
+
+        key = toBytes(key)
+        keyHash = hashKey(key)
+        self._clear(self._slotOffset(keyHash), key, keyHash)
+
+    def _clear(self, off, key, keyHash):
+        seq, keyLen, valLen, slotHash = SlotHeader.unpack_from(self.buf, off)
+        if slotHash == keyHash and keyLen == len(key):
+            self._write(off, None, 0, None)
+
+    def close(self):
+        """Detach; the server also marks the table dead and removes it."""
+
+        if self.buf is None:
+            return
+        if self.create:
+            TableHeader.pack_into(self.buf, 0, Magic, self.slots,
+                                  self.slotSize, 0)
+        self.buf.release()
+        self.buf = None
+        self.shm.close()
+        if self.create:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def attachSharedMemory(name):
+    """Attach to an existing shared memory segment without registering it
+    with this process' resource tracker, which would remove it when this
+    process exits."""
+
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        pass
+
+    # before python 3.13 tracking cannot be turned off; skip the register
+    # call instead
+    tracker = shared_memory.resource_tracker
+    with _AttachLock:
+        register = tracker.register
+        tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name)
+        finally:
+            tracker.register = register
+
+
+def toBytes(s):
+    """Return s encoded as utf-8 if it is a str."""
+
+    if isinstance(s, str):
+        return s.encode('utf-8')
+    return s
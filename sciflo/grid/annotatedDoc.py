@@ -1,25 +1,53 @@
 import os
 import copy
 import re
+import time
+import json
 import socket
 import pwd
+import tempfile
 from lxml.etree import Element, SubElement, _Comment, tostring
 from string import Template
 
 from sciflo.utils.xmlUtils import isXml, getXmlEtree
 from sciflo.utils.timeUtils import getISODateTimeString
+from .resultStore import ResultRef
 
 XML_CHAR_CMP = re.compile(r'(?:<|>|&)')
 
+RESOLVE_CDATA_MAP = {'SCIFLO_CDATA_BEGIN': '<![CDATA[',
+                     'SCIFLO_CDATA_END': ']]>',
+                     '&lt;': '<',
+                     '&gt;': '>',
+                     '&amp;': '&'}
+RESOLVE_CDATA_RE = re.compile('|'.join(RESOLVE_CDATA_MAP))
+
+ANNOTATED_DOC_MODES = ('full', 'journal')
+
 
 class AnnotatedDocError(Exception):
     pass
 
 
 class AnnotatedDoc(object):
-    def __init__(self, sflDoc, outputDir):
+    """Annotated sciflo document recording provenance of an execution.
+
+    In 'full' mode the annotated document is rewritten after every event.
+    In 'journal' mode events are appended to a journal file and the document
+    is only written by materialize(), at the end of the execution, and every
+    snapshotInterval seconds if that is greater than 0."""
+
+    def __init__(self, sflDoc, outputDir, mode='full', snapshotInterval=0):
         """Constructor."""
 
+        if mode not in ANNOTATED_DOC_MODES:
+            raise AnnotatedDocError("Unknown annotated doc mode: %s" % mode)
+        self.mode = mode
+        self.snapshotInterval = snapshotInterval
+        self.lastWrite = None
+        self.dirty = False
+        self.journalFile = None
+        self.journalFh = None
         self.host = socket.getfqdn()
         self.user = pwd.getpwuid(os.getuid())[0]
         self.pid = os.getpid()
@@ -40,6 +68,7 @@ class AnnotatedDoc(object):
             ot = SubElement(self.resultsOutputsElt, otElt.tag)
         self.resultsProcessesElt = SubElement(self.resultsElt,
                                               self.sfEltTagTpl.substitute(tag='processes'))
+        self.resultProcEltDict = {}
         for thisProcId in [i.getId() for i in self.sflDoc.getWorkUnitConfigs()]:
             thisProcElt = self.rootElt.xpath(
                 'sf:flow/sf:processes/sf:process[@id="%s"]' % thisProcId,
@@ -51,6 +80,7 @@ class AnnotatedDoc(object):
             thisResProcElt = SubElement(self.resultsProcessesElt,
                                         self.sfEltTagTpl.substitute(tag='process'))
             thisResProcElt.set('procId', thisProcId)
+            self.resultProcEltDict.setdefault(thisProcId, thisResProcElt)
             thisResProcOutputElt = SubElement(thisResProcElt,
                                               self.sfEltTagTpl.substitute(tag='outputs'))
             if thisProcElt is None:
@@ -76,6 +106,9 @@ class AnnotatedDoc(object):
             self.resultsElt.set('version', self.version)
 
         self.file = os.path.join(self.outputDir, 'sciflo.sf.xml')
+        if self.mode == 'journal':
+            self.journalFile = os.path.join(self.outputDir, 'sciflo.sf.journal')
+            self.journalFh = open(self.journalFile, 'a')
         self.write()
 
     def update(self, elt, val, doCDATA=False):
@@ -99,41 +132,91 @@ class AnnotatedDoc(object):
     def write(self, resolveCDATA=True):
         """Write current annotated sciflo xml to file."""
 
-        with open(self.file, 'w') as f:
-            if resolveCDATA:
-                retVal = f.write('%s\n' %
-                                 tostring(self.rootElt, pretty_print=True, encoding='unicode').replace(
-                                     'SCIFLO_CDATA_BEGIN', '<![CDATA[').replace(
-                                     'SCIFLO_CDATA_END', ']]>').replace(
-                                     '&lt;', '<').replace(
-                                     '&gt;', '>').replace(
-                                     '&amp;', '&')
-                                 )
-            else:
-                retVal = f.write('%s\n' %
-                                 tostring(self.rootElt, pretty_print=True, encoding='unicode'))
+        xml = tostring(self.rootElt, pretty_print=True, encoding='unicode')
+        if resolveCDATA:
+            xml = RESOLVE_CDATA_RE.sub(
+                lambda m: RESOLVE_CDATA_MAP[m.group(0)], xml)
+        fd, tmpFile = tempfile.mkstemp(dir=self.outputDir,
+                                       prefix='.sciflo.sf.xml.')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                retVal = f.write('%s\n' % xml)
+            os.chmod(tmpFile, 0o644)
+            os.replace(tmpFile, self.file)
+        except:
+            # the last complete document is left in place
+            if os.path.exists(tmpFile):
+                os.unlink(tmpFile)
+            raise
+        self.lastWrite = time.time()
+        self.dirty = False
         return retVal
 
+    def materialize(self):
+        """Write annotated sciflo xml if it has events not yet written."""
+
+        if self.dirty:
+            self.write()
+        if self.journalFh is not None:
+            self.journalFh.flush()
+
+    def close(self):
+        """Materialize and close journal."""
+
+        self.materialize()
+        if self.journalFh is not None:
+            self.journalFh.close()
+            self.journalFh = None
+
+    def _event(self, event, **kargs):
+        """Record an event that changed the document."""
+
+        self.dirty = True
+        if self.mode == 'full':
+            self.write()
+            return
+        if self.journalFh is not None:
+            kargs['event'] = event
+            kargs['time'] = time.time()
+            self.journalFh.write('%s\n' % json.dumps(kargs))
+            self.journalFh.flush()
+        if self.snapshotInterval > 0 and \
+                time.time() - self.lastWrite >= self.snapshotInterval:
+            self.write()
+
+    def _getResultProcElt(self, procId):
+        """Return results process element for procId."""
+
+        try:
+            return self.resultProcEltDict[procId]
+        except KeyError:
+            raise AnnotatedDocError("No results element for '%s'." % procId)
+
+    def _getOutputsElt(self, procId):
+        """Return results outputs element for procId."""
+        return self._getResultProcElt(procId).find(
+            self.sfEltTagTpl.substitute(tag='outputs'))
+
     def addScifloStarted(self, executable):
         """Add info for startup of sciflo execution."""
 
         self.resultsElt.set('starttime', getISODateTimeString(True))
         self.resultsElt.set('executable', executable)
-        self.write()
+        self._event('scifloStarted', executable=executable)
 
     def addScifloFinished(self):
         """Add info for shutdown of sciflo execution."""
 
         self.resultsElt.set('endtime', getISODateTimeString(True))
-        self.write()
+        self._event('scifloFinished')
+        self.materialize()
 
     def addProcessStarted(self, procId):
         """Add info for startup of a processing step."""
 
-        xpath = 'sf:flow/sf:results/sf:processes/sf:process[@procId="%s"]' % procId
-        thisProcElt = self.rootElt.xpath(xpath, namespaces=self.nsDict)[0]
+        thisProcElt = self._getResultProcElt(procId)
         thisProcElt.set('starttime', getISODateTimeString(True))
-        self.write()
+        self._event('processStarted', procId=procId)
 
     def addProcessFinished(self, procId, pidFile):
         """Add info for a processing step that finished."""
@@ -143,11 +226,10 @@ class AnnotatedDoc(object):
                 pid = f.read()
         except:
             pid = 'unknown'
-        xpath = 'sf:flow/sf:results/sf:processes/sf:process[@procId="%s"]' % procId
-        thisProcElt = self.rootElt.xpath(xpath, namespaces=self.nsDict)[0]
+        thisProcElt = self._getResultProcElt(procId)
         thisProcElt.set('endtime', getISODateTimeString(True))
         thisProcElt.set('pid', pid.strip())
-        self.write()
+        self._event('processFinished', procId=procId, pid=pid.strip())
 
     def addResultForImplicitProcess(self, procId):
         """Add process to result section."""
@@ -155,44 +237,43 @@ class AnnotatedDoc(object):
         thisResProcElt = SubElement(self.resultsProcessesElt,
                                     self.sfEltTagTpl.substitute(tag='process'))
         thisResProcElt.set('procId', procId)
+        self.resultProcEltDict.setdefault(procId, thisResProcElt)
         thisResProcOutputElt = SubElement(thisResProcElt,
                                           self.sfEltTagTpl.substitute(tag='outputs'))
         resProcOutputElt = SubElement(thisResProcOutputElt, 'output')
-        self.write()
+        self._event('implicitProcessAdded', procId=procId)
 
     def addProcessResult(self, procId, result):
         """Annotate sciflo document with result."""
 
         # get result procid output elements
-        outputElts = self.rootElt.xpath(
-            "sf:flow/sf:results/sf:processes/sf:process[@procId='%s']/sf:outputs/*" %
-            procId, namespaces=self.nsDict)
+        outputElts = [i for i in self._getOutputsElt(procId)
+                      if not isinstance(i, _Comment)]
 
         # if only one, set result
         if len(outputElts) == 1:
             self.update(outputElts[0], result)
+        elif isinstance(result, ResultRef):
+            for i, otElt in enumerate(outputElts):
+                self.update(otElt, "%s[%d]" % (result, i))
         else:
             for i, otElt in enumerate(outputElts):
                 self.update(otElt, result[i])
-        self.write()
+        self._event('processResult', procId=procId, result=str(result))
 
     def addProcessException(self, procId, tracebackMessage):
         """Annotate sciflo document with exception."""
 
         # clean out outputs elements
-        outputElt = self.rootElt.xpath(
-            "sf:flow/sf:results/sf:processes/sf:process[@procId='%s']/sf:outputs" % procId,
-            namespaces=self.nsDict)
-        if len(outputElt) == 0:
+        if procId not in self.resultProcEltDict:
             self.addResultForImplicitProcess(procId)
-        outputElt = self.rootElt.xpath(
-            "sf:flow/sf:results/sf:processes/sf:process[@procId='%s']/sf:outputs" % procId,
-            namespaces=self.nsDict)[0]
+        outputElt = self._getOutputsElt(procId)
         outputElt.clear()
 
         # write error
         self.update(outputElt, tracebackMessage, doCDATA=True)
-        self.write()
+        self._event('processException', procId=procId,
+                    traceback=str(tracebackMessage))
 
     def addGlobalOutput(self, outputIdx, result):
         """Annotate sciflo document with a global output result."""
@@ -205,4 +286,4 @@ class AnnotatedDoc(object):
         else:
             ot = self.resultsOutputsElt[outputIdx]
             self.update(ot, result)
-        self.write()
+        self._event('globalOutput', index=outputIdx, result=str(result))
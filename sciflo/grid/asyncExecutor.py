@@ -0,0 +1,132 @@
+# -----------------------------------------------------------------------------
+# Name:        asyncExecutor.py
+# Purpose:     Sciflo executor driven by an asyncio event loop.
+#
+# Created:     Sat Oct 17 20:05:31 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import asyncio
+import threading
+
+from .utils import getTb, runLockedFunction
+from .executor import ScifloExecutor, ScifloExecutorError
+
+
+class LoopEvent(object):
+    """Event that can be set from any thread and waited on in an event loop.
+    The state is only changed on the loop thread."""
+
+    def __init__(self, loop):
+        """Constructor."""
+
+        self.loop = loop
+        self.thread = None
+        self._isSet = False
+        self._event = None
+
+    def _set(self):
+        self._isSet = True
+        if self._event is not None:
+            self._event.set()
+
+    def set(self):
+        if threading.current_thread() is self.thread:
+            self._set()
+        else:
+            self.loop.call_soon_threadsafe(self._set)
+
+    def is_set(self):
+        return self._isSet
+
+    async def wait(self):
+        self.thread = threading.current_thread()
+        self._event = asyncio.Event()
+        if not self._isSet:
+            await self._event.wait()
+
+
+class AsyncScifloExecutor(ScifloExecutor):
+    """Sciflo executor that dispatches work units and handles their results
+    from a single asyncio event loop.  Each dispatched work unit's result is
+    awaited as a future that the pool callback resolves, so results are
+    handled one at a time on the loop thread instead of in the pool's result
+    thread behind the executor lock.  No manager or waiter process is
+    started."""
+
+    def initCompletion(self):
+        """Set up the event loop and the event that is set once the sciflo
+        is done."""
+
+        self.loop = asyncio.new_event_loop()
+        self.event = LoopEvent(self.loop)
+        self.futures = {}
+        self.tasks = set()
+
+    def dispatchWorker(self, wu):
+        """Dispatch work unit and start a task awaiting its result."""
+
+        procId = wu.getProcId()
+        future = self.loop.create_future()
+        self.futures[procId] = future
+        task = self.loop.create_task(self.awaitResult(procId, future))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        super(AsyncScifloExecutor, self).dispatchWorker(wu)
+
+    async def awaitResult(self, procId, future):
+        """Wait for work unit result and handle it."""
+
+        callbackResult = await future
+        try:
+            self.handle(callbackResult)
+        except Exception as e:
+            emessage = "Error handling result for '%s' in sciflo '%s':%s\n%s" \
+                % (procId, self.scifloName, str(e), getTb())
+            self.logger.debug(emessage, extra={'id': self.scifloid})
+            self.executionError = ('callback', ScifloExecutorError(emessage),
+                                   getTb())
+            self.event.set()
+
+    def setResult(self, callbackResult):
+        """Resolve the future of the work unit that called back."""
+
+        future = self.futures.pop(callbackResult[0], None)
+        if future is not None and not future.done():
+            future.set_result(callbackResult)
+
+    def callback(self, callbackResult):
+        """Callback for work unit execution.  Runs in a pool thread; hands the
+        result to the event loop.  Results arriving after the loop is closed,
+        during shutdown, are handled directly."""
+
+        try:
+            self.loop.call_soon_threadsafe(self.setResult, callbackResult)
+        except RuntimeError:
+            runLockedFunction(self.lock, self.handle, callbackResult)
+
+    def waitForCompletion(self):
+        """Run the event loop until the sciflo is done."""
+
+        try:
+            self.loop.run_until_complete(self.event.wait())
+        finally:
+            self.closeLoop()
+
+    def closeLoop(self):
+        """Cancel tasks of work units still in flight and close the loop."""
+
+        if self.loop.is_closed():
+            return
+        for task in list(self.tasks):
+            task.cancel()
+        if self.tasks:
+            self.loop.run_until_complete(
+                asyncio.gather(*self.tasks, return_exceptions=True))
+        self.loop.close()
+
+    def shutdown(self):
+        """Shutdown execution."""
+
+        self.closeLoop()
+        super(AsyncScifloExecutor, self).shutdown()
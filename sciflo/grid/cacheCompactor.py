@@ -0,0 +1,193 @@
+# -----------------------------------------------------------------------------
+# Name:        cacheCompactor.py
+# Purpose:     Expire, evict and garbage collect work unit cache entries.
+#
+# Created:     Sat Oct 17 23:05:12 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import time
+import shutil
+import pickle as pickle
+
+from twisted.internet import task, threads
+from twisted.python import log
+
+from .config import GridServiceConfig
+from .cacheRecords import getEntryPath
+
+# eviction policies: sort key of an entry (lastHit, hits) to evict first
+EVICTION_POLICIES = {'lru': lambda lastHit, hits: lastHit,
+                     'lfu': lambda lastHit, hits: (hits, lastHit)}
+
+
+class CacheCompactorError(Exception):
+    pass
+
+
+class CacheEntryInfo(object):
+    """What the compactor knows about a cache entry."""
+
+    def __init__(self, key, entry, lastHit, hits):
+        """Constructor."""
+
+        self.key = key
+        self.path = getEntryPath(entry)
+        if isinstance(entry, dict):
+            self.workDir = entry.get('workDir', None)
+            self.bytes = entry.get('bytes', None) or 0
+        else:
+            self.workDir = None
+            self.bytes = 0
+        self.lastHit = lastHit
+        self.hits = hits
+
+
+class CacheCompactor(object):
+    """Compact the work unit cache (or one shard of it) served by a
+    PersistentDictFactory.  Each pass, run in the server's reactor a batch of
+    entries at a time, drops entries whose file is gone, entries not hit in
+    ttl seconds and then, least recently or least frequently used first,
+    entries until the bytes they reference fit in maxBytes.  If gcWorkDirs
+    is set, work dirs no remaining entry refers to are removed."""
+
+    def __init__(self, factory, ttl=0., maxBytes=0, policy='lru',
+                 interval=3600., gcWorkDirs=False, batchSize=1000):
+        """Constructor."""
+
+        if policy not in EVICTION_POLICIES:
+            raise CacheCompactorError("Unknown eviction policy: %s" % policy)
+        self.factory = factory
+        self.ttl = ttl
+        self.maxBytes = maxBytes
+        self.policy = policy
+        self.interval = interval
+        self.gcWorkDirs = gcWorkDirs
+        self.batchSize = batchSize
+        self.loop = None
+        self.running = None
+        self.lastStats = None
+
+    def start(self):
+        """Compact every interval seconds."""
+
+        self.loop = task.LoopingCall(self.compact)
+        self.loop.start(self.interval, now=False)
+
+    def stop(self):
+        """Stop compacting."""
+
+        if self.loop is not None and self.loop.running:
+            self.loop.stop()
+
+    def compact(self):
+        """Start a pass unless one is running.  Returns a Deferred that fires
+        with the pass' stats."""
+
+        if self.running is not None:
+            return self.running
+        stats = {}
+        d = task.cooperate(self._compactIter(stats)).whenDone()
+        d.addCallback(lambda ignore: self._finish(stats))
+        d.addErrback(self._failed)
+        self.running = d
+        return d
+
+    def _finish(self, stats):
+        self.running = None
+        self.lastStats = stats
+        log.msg("Compacted %s: %s" % (self.factory.dictName, stats))
+        return stats
+
+    def _failed(self, failure):
+        self.running = None
+        log.err(failure, "Error compacting %s" % self.factory.dictName)
+
+    def _compactIter(self, stats):
+        """Do a pass, yielding every batchSize entries so the server keeps
+        serving requests."""
+
+        dic = self.factory.dict
+        now = time.time()
+        live = []
+        dropped = []
+        stats.update({'entries': 0, 'stale': 0, 'expired': 0, 'evicted': 0,
+                      'bytes': 0, 'workDirs': 0})
+        for i, key in enumerate(list(dic.keys())):
+            if i and i % self.batchSize == 0:
+                yield None
+            try:
+                entry = pickle.loads(dic[key])
+                path = getEntryPath(entry)
+            except Exception:
+                # gone since the pass started or not a cache entry
+                continue
+            if not isinstance(path, str):
+                continue
+            stats['entries'] += 1
+            lastHit, hits = self.factory.getHitStats(key)
+            if lastHit is None:
+                # hits before the server started are unknown
+                created = entry.get('created', 0.) \
+                    if isinstance(entry, dict) else 0.
+                lastHit = max(created or 0., self.factory.started)
+            info = CacheEntryInfo(key, entry, lastHit, hits)
+            if not os.path.exists(info.path):
+                stats['stale'] += 1
+                dropped.append(info)
+            elif self.ttl and now - lastHit > self.ttl:
+                stats['expired'] += 1
+                dropped.append(info)
+            else:
+                live.append(info)
+
+        # evict
+        total = sum([info.bytes for info in live])
+        if self.maxBytes and total > self.maxBytes:
+            sortKey = EVICTION_POLICIES[self.policy]
+            live.sort(key=lambda info: sortKey(info.lastHit, info.hits))
+            evictCount = 0
+            while evictCount < len(live) and total > self.maxBytes:
+                total -= live[evictCount].bytes
+                evictCount += 1
+            stats['evicted'] = evictCount
+            dropped.extend(live[:evictCount])
+            live = live[evictCount:]
+        stats['bytes'] = total
+
+        for i, info in enumerate(dropped):
+            if i and i % self.batchSize == 0:
+                yield None
+            self.factory.remove(info.key)
+        if dropped and hasattr(dic, 'sync'):
+            dic.sync()
+
+        # remove work dirs that only dropped entries refer to
+        if self.gcWorkDirs:
+            keep = set([info.workDir for info in live])
+            workDirs = set([info.workDir for info in dropped
+                            if info.workDir is not None and
+                            info.workDir not in keep])
+            stats['workDirs'] = len(workDirs)
+            for workDir in workDirs:
+                yield threads.deferToThread(shutil.rmtree, workDir, True)
+
+
+def startCacheCompactor(factory, configFile=None):
+    """Start compacting the work unit cache served by factory as configured
+    in the sciflo config.  The byte budget is split evenly between shards.
+    Returns the CacheCompactor or None if compaction is disabled."""
+
+    gsc = GridServiceConfig(configFile)
+    if not gsc.getCacheCompactInterval():
+        return None
+    maxBytes = gsc.getCacheMaxBytes()
+    if factory.shard is not None:
+        maxBytes = maxBytes // factory.shards
+    compactor = CacheCompactor(factory, gsc.getCacheTtl(), maxBytes,
+                               gsc.getCacheEvictionPolicy(),
+                               gsc.getCacheCompactInterval(),
+                               gsc.getCacheGcWorkDirs())
+    compactor.start()
+    return compactor
@@ -0,0 +1,124 @@
+# -----------------------------------------------------------------------------
+# Name:        cachePolicy.py
+# Purpose:     Decide which work unit results are worth caching.
+#
+# Created:     Sun Oct 18 00:12:47 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import threading
+
+# thresholds a work unit has to meet to be cached:
+#   cache      - False never caches it
+#   minRuntime - seconds it has to have run for
+#   maxBytes   - max bytes its work dir may hold; 0 is unbounded
+TYPE_ATTRIBUTES = {'cache': 'cache', 'minRuntime': 'minRuntime',
+                   'maxBytes': 'maxBytes'}
+
+# the same thresholds as attributes of a sciflo process
+PROCESS_ATTRIBUTES = {'cache': 'cache', 'minRuntime': 'cacheMinRuntime',
+                      'maxBytes': 'cacheMaxBytes'}
+
+# thresholds of work unit types that are usually cheaper to rerun than to
+# look up
+DEFAULT_TYPE_THRESHOLDS = {'xpath': {'minRuntime': 1.},
+                           'template': {'minRuntime': 1.}}
+
+
+class CachePolicyError(Exception):
+    pass
+
+
+def parseThresholds(elt, attributes):
+    """Return dict of the thresholds set on elt, given a dict of threshold
+    name -> attribute name."""
+
+    thresholds = {}
+    for field, attr in list(attributes.items()):
+        val = elt.get(attr, None)
+        if val is None:
+            continue
+        try:
+            if field == 'cache':
+                thresholds[field] = val.strip().lower() in ('true', '1')
+            elif field == 'minRuntime':
+                thresholds[field] = float(val)
+            else:
+                thresholds[field] = int(val)
+        except ValueError:
+            raise CachePolicyError("Invalid %s: %s" % (attr, val))
+    return thresholds
+
+
+class CachePolicy(object):
+    """Admission policy of the work unit cache.  Thresholds set on a process
+    win over those of its work unit type, which win over the defaults.
+    Counts of admitted and rejected work units are kept for the flow."""
+
+    def __init__(self, minRuntime=0., maxBytes=0, typeThresholds=None,
+                 processThresholds=None):
+        """Constructor."""
+
+        self.defaults = {'cache': True, 'minRuntime': minRuntime,
+                         'maxBytes': maxBytes}
+        self.typeThresholds = {}
+        for typ, thresholds in list(DEFAULT_TYPE_THRESHOLDS.items()):
+            self.typeThresholds[typ] = dict(thresholds)
+        for typ, thresholds in list((typeThresholds or {}).items()):
+            self.typeThresholds.setdefault(typ, {}).update(thresholds)
+        self.processThresholds = dict(processThresholds or {})
+        self._lock = threading.Lock()
+        self.stats = {'admitted': 0, 'disabled': 0, 'tooFast': 0,
+                      'tooBig': 0}
+
+    def getThresholds(self, procId, typ):
+        """Return thresholds of a work unit."""
+
+        thresholds = dict(self.defaults)
+        thresholds.update(self.typeThresholds.get(typ, {}))
+        thresholds.update(self.processThresholds.get(procId, {}))
+        return thresholds
+
+    def admit(self, procId, typ, runtime, bytes):
+        """Return (True, None) if a work unit that ran runtime seconds and
+        whose work dir holds bytes should be cached, otherwise (False,
+        reason)."""
+
+        thresholds = self.getThresholds(procId, typ)
+        if not thresholds['cache']:
+            reason = 'disabled'
+        elif runtime is not None and runtime < thresholds['minRuntime']:
+            reason = 'tooFast'
+        elif thresholds['maxBytes'] and bytes is not None and \
+                bytes > thresholds['maxBytes']:
+            reason = 'tooBig'
+        else:
+            reason = None
+        with self._lock:
+            self.stats[reason or 'admitted'] += 1
+        return (reason is None, reason)
+
+    def getStats(self):
+        """Return dict of admission counts."""
+
+        with self._lock:
+            return dict(self.stats)
+
+
+def getCachePolicy(sciflo, gsc):
+    """Return CachePolicy of a Sciflo: the grid service config's thresholds,
+    per type thresholds from the type elements of the flow's cachePolicy and
+    per process thresholds from the cache, cacheMinRuntime and cacheMaxBytes
+    attributes of its processes."""
+
+    typeThresholds = {}
+    for typeElt in sciflo._flowCachePolicyTypes:
+        typeThresholds[typeElt.get('name')] = parseThresholds(
+            typeElt, TYPE_ATTRIBUTES)
+    processThresholds = {}
+    for procElt in sciflo._flowProcessesProcess:
+        thresholds = parseThresholds(procElt, PROCESS_ATTRIBUTES)
+        if thresholds:
+            processThresholds[procElt.get('id')] = thresholds
+    return CachePolicy(gsc.getCacheMinRuntime(), gsc.getCacheMaxResultBytes(),
+                       typeThresholds, processThresholds)
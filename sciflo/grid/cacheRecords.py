@@ -0,0 +1,325 @@
+# -----------------------------------------------------------------------------
+# Name:        cacheRecords.py
+# Purpose:     In-process LRU of decoded work unit cache records.
+#
+# Created:     Sat Oct 17 21:32:40 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import time
+import json
+import base64
+import pickle as pickle
+import threading
+from collections import OrderedDict
+
+from .utils import updatePdict
+from .status import doneStatus
+
+# fields of a cached work unit's json file kept in its record
+RECORD_FIELDS = ('status', 'exceptionMessage', 'tracebackMessage',
+                 'executionLog')
+
+# fields of a cache entry, the value stored under a work unit's hex digest
+ENTRY_FIELDS = ('path', 'workDir', 'created', 'bytes', 'runtime')
+
+# results of these types are shared by all hits on a record
+IMMUTABLE_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+class CacheRecord(object):
+    """Decoded cache record of a work unit: the fields of its json file that a
+    cache hit needs and its result.  Immutable results are kept unpickled;
+    others are kept pickled and unpickled on each access so every caller gets
+    its own copy.  The json file's mtime and size are kept so a record can be
+    checked against the file without reading it, and the time the cache
+    server last had its entry so the compactor's expiry is noticed."""
+
+    def __init__(self, jsonFile, stat, info, resultPickle):
+        """Constructor."""
+
+        self.jsonFile = jsonFile
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        self.size = stat.st_size
+        self.info = info
+        self.resultPickle = resultPickle
+        self.result = None
+        self.shared = False
+        self.touched = time.time()
+        self.checked = self.touched
+        self.pendingHits = 0
+        if resultPickle is not None:
+            result = pickle.loads(resultPickle)
+            if isinstance(result, IMMUTABLE_TYPES):
+                self.result = result
+                self.shared = True
+                self.resultPickle = None
+
+    def getResult(self):
+        """Return result; a fresh copy unless it is immutable."""
+
+        if self.shared or self.resultPickle is None:
+            return self.result
+        return pickle.loads(self.resultPickle)
+
+    def isCurrent(self):
+        """Return True if the json file is unchanged since it was decoded."""
+
+        try:
+            st = os.stat(self.jsonFile)
+        except OSError:
+            return False
+        return (st.st_mtime_ns, st.st_size) == self.stamp
+
+
+class CacheRecordLRU(object):
+    """Least recently used cache of CacheRecords keyed by work unit hex
+    digest, bounded by number of entries and by bytes (the size of the
+    records' json files).  Hits are reported to the cache server every
+    touchInterval seconds, and a record whose entry the server hasn't
+    confirmed for that long is checked with the server before it is served
+    again, so entries the server expired or evicted stop being served."""
+
+    def __init__(self, maxEntries=4096, maxBytes=67108864, touchInterval=60.):
+        """Constructor."""
+
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.touchInterval = touchInterval
+        self._records = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.checks = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, hex):
+        """Return current record for hex or None."""
+
+        with self._lock:
+            record = self._records.get(hex, None)
+            if record is not None:
+                self._records.move_to_end(hex)
+        if record is not None and not record.isCurrent():
+            self.invalidate(hex)
+            record = None
+        with self._lock:
+            if record is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return record
+
+    def put(self, hex, record):
+        """Add record for hex, evicting least recently used records to stay
+        within bounds.  Records bigger than maxBytes are not kept."""
+
+        if record.size > self.maxBytes:
+            return
+        with self._lock:
+            old = self._records.pop(hex, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._records[hex] = record
+            self._bytes += record.size
+            self._evict()
+
+    def _evict(self):
+        while len(self._records) > self.maxEntries or \
+                self._bytes > self.maxBytes:
+            hex, record = self._records.popitem(last=False)
+            self._bytes -= record.size
+            self.evictions += 1
+
+    def invalidate(self, hex):
+        """Drop record for hex."""
+
+        with self._lock:
+            record = self._records.pop(hex, None)
+            if record is not None:
+                self._bytes -= record.size
+                self.invalidations += 1
+
+    def resize(self, maxEntries=None, maxBytes=None, touchInterval=None):
+        """Change bounds and how often hits are reported."""
+
+        with self._lock:
+            if maxEntries is not None:
+                self.maxEntries = maxEntries
+            if maxBytes is not None:
+                self.maxBytes = maxBytes
+            if touchInterval is not None:
+                self.touchInterval = touchInterval
+            self._evict()
+
+    def needsCheck(self, record):
+        """Return True if record's entry should be checked with the cache
+        server before it is served."""
+
+        return time.time() - record.checked >= self.touchInterval
+
+    def confirm(self, record):
+        """Note that the cache server still has record's entry."""
+
+        with self._lock:
+            record.checked = time.time()
+            self.checks += 1
+
+    def countHit(self, record):
+        """Count a hit on record.  Return number of hits to report to the
+        cache server, or 0 if it is not time to report them yet."""
+
+        now = time.time()
+        with self._lock:
+            record.pendingHits += 1
+            if now - record.touched < self.touchInterval:
+                return 0
+            hits = record.pendingHits
+            record.pendingHits = 0
+            record.touched = now
+        return hits
+
+    def clear(self):
+        """Drop all records."""
+
+        with self._lock:
+            self._records.clear()
+            self._bytes = 0
+
+    def getStats(self):
+        """Return dict of counters."""
+
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions,
+                    'invalidations': self.invalidations,
+                    'checks': self.checks,
+                    'entries': len(self._records), 'bytes': self._bytes}
+
+
+# records of this process
+WorkUnitCacheRecords = CacheRecordLRU()
+
+
+def makeCacheEntry(path, workDir=None, bytes=None, runtime=None):
+    """Return cache entry for path: a dict of ENTRY_FIELDS.  The last hit
+    time and hit count of an entry are kept by the cache server."""
+
+    return {'path': path, 'workDir': workDir, 'created': time.time(),
+            'bytes': bytes, 'runtime': runtime}
+
+
+def getEntryPath(entry):
+    """Return path of cache entry.  Entries written before cache entries
+    had metadata are the path itself."""
+
+    if isinstance(entry, dict):
+        return entry['path']
+    return entry
+
+
+def decodeCacheRecord(jsonFile):
+    """Return CacheRecord for a cached work unit's json file or None if it is
+    gone.  The result is only unpickled if the work unit is done."""
+
+    try:
+        with open(jsonFile) as f:
+            st = os.fstat(f.fileno())
+            info = json.load(f)
+    except (IOError, OSError):
+        return None
+    resultPickle = None
+    if info.get('status', None) == doneStatus:
+        resultPickle = base64.b64decode(
+            info['unpublicizedResult'].encode('utf-8'))
+    return CacheRecord(jsonFile, st,
+                       dict((k, info.get(k, None)) for k in RECORD_FIELDS),
+                       resultPickle)
+
+
+def getCacheRecord(pdict, hex, records=WorkUnitCacheRecords):
+    """Return CacheRecord for work unit hex digest, from records if possible,
+    otherwise by looking it up in pdict.  Return None if not cached."""
+
+    return getCacheRecords(pdict, [hex], records).get(hex, None)
+
+
+def getCacheRecords(pdict, hexes, records=WorkUnitCacheRecords):
+    """Return dict of work unit hex digest -> CacheRecord for those of hexes
+    that are cached.  Records this process holds are used as is unless they
+    are due to be checked with the cache server; those and the rest are
+    looked up in pdict in one mget."""
+
+    found = {}
+    lookups = []
+    held = {}
+    seen = set()
+    for hex in hexes:
+        if hex in seen:
+            continue
+        seen.add(hex)
+        record = records.get(hex)
+        if record is not None and not records.needsCheck(record):
+            touchCacheRecord(pdict, hex, record, records)
+            found[hex] = record
+            continue
+        if record is not None:
+            held[hex] = record
+        lookups.append(hex)
+    if not lookups:
+        return found
+    for hex, entry in zip(lookups, pdict.mget(lookups)):
+        record = held.get(hex, None)
+        if entry is None:
+            if record is not None:
+                # expired or evicted by the server
+                records.invalidate(hex)
+            continue
+        jsonFile = getEntryPath(entry)
+        if record is not None and record.jsonFile == jsonFile:
+            records.confirm(record)
+            found[hex] = record
+            continue
+        record = decodeCacheRecord(jsonFile)
+        if record is None:
+            continue
+        records.put(hex, record)
+        found[hex] = record
+    return found
+
+
+def touchCacheRecord(pdict, hex, record, records=WorkUnitCacheRecords):
+    """Count a hit on a record this process holds, sending the hits to the
+    cache server every touch interval."""
+
+    hits = records.countHit(record)
+    if hits:
+        # hit counts are advisory; don't fail the lookup over them
+        try:
+            pdict.touch(hex, hits)
+        except Exception:
+            pass
+
+
+def setCacheRecord(pdict, hex, jsonFile, workDir=None, bytes=None,
+                   runtime=None, records=WorkUnitCacheRecords):
+    """Cache jsonFile, with the work unit's work dir, the bytes it
+    references and its runtime, under work unit hex digest in pdict, dropping
+    any record this process holds for it."""
+
+    records.invalidate(hex)
+    updatePdict(pdict, hex, makeCacheEntry(jsonFile, workDir, bytes, runtime))
+
+
+def deleteCacheRecord(pdict, hex, records=WorkUnitCacheRecords):
+    """Remove work unit hex digest from pdict and this process' records."""
+
+    records.invalidate(hex)
+    if pdict is not None:
+        del pdict[hex]
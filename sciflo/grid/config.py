@@ -8,6 +8,7 @@
 # Copyright:   (c) 2005, California Institute of Technology.
 #              U.S. Government Sponsorship acknowledged.
 # -----------------------------------------------------------------------------
+import os
 from socket import getfqdn
 
 from sciflo.utils import ScifloConfigParser, validateDirectory, SCIFLO_NAMESPACE
@@ -134,6 +135,112 @@ class GridServiceConfig(object):
             self._workerTimeout = 86400
         else:
             self._workerTimeout = int(self._workerTimeout)
+        self._workerMode = parserObj.getParameter('workerMode')
+        if self._workerMode is None:
+            self._workerMode = 'fork'
+        self._maxTasksPerWorker = parserObj.getParameter('maxTasksPerWorker')
+        if self._maxTasksPerWorker is not None:
+            self._maxTasksPerWorker = int(self._maxTasksPerWorker)
+        self._poolSizing = parserObj.getParameter('poolSizing')
+        if self._poolSizing is None:
+            self._poolSizing = 'fixed'
+        self._minWorkers = parserObj.getParameter('minWorkers')
+        if self._minWorkers is None:
+            self._minWorkers = 1
+        else:
+            self._minWorkers = int(self._minWorkers)
+        self._maxWorkers = parserObj.getParameter('maxWorkers')
+        if self._maxWorkers is not None:
+            self._maxWorkers = int(self._maxWorkers)
+        self._memoryPerWorker = parserObj.getParameter('memoryPerWorker')
+        if self._memoryPerWorker is None:
+            self._memoryPerWorker = 256
+        else:
+            self._memoryPerWorker = int(self._memoryPerWorker)
+        self._statusWriteInterval = parserObj.getParameter(
+            'statusWriteInterval')
+        if self._statusWriteInterval is None:
+            self._statusWriteInterval = 1.
+        else:
+            self._statusWriteInterval = float(self._statusWriteInterval)
+        self._annotatedDocMode = parserObj.getParameter('annotatedDocMode')
+        if self._annotatedDocMode is None:
+            self._annotatedDocMode = 'full'
+        self._annotatedDocSnapshotInterval = parserObj.getParameter(
+            'annotatedDocSnapshotInterval')
+        if self._annotatedDocSnapshotInterval is None:
+            self._annotatedDocSnapshotInterval = 0.
+        else:
+            self._annotatedDocSnapshotInterval = float(
+                self._annotatedDocSnapshotInterval)
+        self._resultStoreThreshold = parserObj.getParameter(
+            'resultStoreThreshold')
+        if self._resultStoreThreshold is not None:
+            self._resultStoreThreshold = int(self._resultStoreThreshold)
+        self._executionLogHeadSize = parserObj.getParameter(
+            'executionLogHeadSize')
+        if self._executionLogHeadSize is None:
+            self._executionLogHeadSize = 65536
+        else:
+            self._executionLogHeadSize = int(self._executionLogHeadSize)
+        self._executionLogTailSize = parserObj.getParameter(
+            'executionLogTailSize')
+        if self._executionLogTailSize is None:
+            self._executionLogTailSize = 65536
+        else:
+            self._executionLogTailSize = int(self._executionLogTailSize)
+        self._executorMode = parserObj.getParameter('executorMode')
+        if self._executorMode is None:
+            self._executorMode = 'waiter'
+        self._cacheRecordLimit = parserObj.getParameter('cacheRecordLimit')
+        if self._cacheRecordLimit is None:
+            self._cacheRecordLimit = 4096
+        else:
+            self._cacheRecordLimit = int(self._cacheRecordLimit)
+        self._cacheRecordBytes = parserObj.getParameter('cacheRecordBytes')
+        if self._cacheRecordBytes is None:
+            self._cacheRecordBytes = 67108864
+        else:
+            self._cacheRecordBytes = int(self._cacheRecordBytes)
+        self._cacheMinRuntime = parserObj.getParameter('cacheMinRuntime')
+        if self._cacheMinRuntime is None:
+            self._cacheMinRuntime = 0.
+        else:
+            self._cacheMinRuntime = float(self._cacheMinRuntime)
+        self._cacheMaxResultBytes = parserObj.getParameter(
+            'cacheMaxResultBytes')
+        if self._cacheMaxResultBytes is None:
+            self._cacheMaxResultBytes = 0
+        else:
+            self._cacheMaxResultBytes = int(self._cacheMaxResultBytes)
+        self._cacheTtl = parserObj.getParameter('cacheTtl')
+        if self._cacheTtl is None:
+            self._cacheTtl = 0.
+        else:
+            self._cacheTtl = float(self._cacheTtl)
+        self._cacheMaxBytes = parserObj.getParameter('cacheMaxBytes')
+        if self._cacheMaxBytes is None:
+            self._cacheMaxBytes = 0
+        else:
+            self._cacheMaxBytes = int(self._cacheMaxBytes)
+        self._cacheEvictionPolicy = parserObj.getParameter(
+            'cacheEvictionPolicy')
+        if self._cacheEvictionPolicy is None:
+            self._cacheEvictionPolicy = 'lru'
+        self._cacheCompactInterval = parserObj.getParameter(
+            'cacheCompactInterval')
+        if self._cacheCompactInterval is None:
+            self._cacheCompactInterval = 3600.
+        else:
+            self._cacheCompactInterval = float(self._cacheCompactInterval)
+        self._cacheGcWorkDirs = parserObj.getParameter('cacheGcWorkDirs')
+        self._cacheGcWorkDirs = True if self._cacheGcWorkDirs is not None \
+            and self._cacheGcWorkDirs.lower() == 'true' else False
+        self._cacheTouchInterval = parserObj.getParameter('cacheTouchInterval')
+        if self._cacheTouchInterval is None:
+            self._cacheTouchInterval = 60.
+        else:
+            self._cacheTouchInterval = float(self._cacheTouchInterval)
         self._addWorkUnitMethod = parserObj.getMandatoryParameterViaXPath(
             './/{%s}addWorkUnitMethod/{%s}exposedName' %
             (SCIFLO_NAMESPACE, SCIFLO_NAMESPACE))
@@ -158,6 +265,49 @@ class GridServiceConfig(object):
             './/{%s}callbackMethod/{%s}pythonFunction' % (SCIFLO_NAMESPACE, SCIFLO_NAMESPACE))
         self._workUnitWorkDir = parserObj.getMandatoryParameter(
             'workUnitRootWorkDir')
+        self._useStageCache = parserObj.getParameter('useStageCache')
+        self._useStageCache = False if self._useStageCache is not None \
+            and self._useStageCache.lower() == 'false' else True
+        self._stageCacheDir = parserObj.getParameter('stageCacheDir')
+        if self._stageCacheDir is None:
+            self._stageCacheDir = os.path.join(self._workUnitWorkDir,
+                                               'stageCache')
+        self._stageCacheHardlink = parserObj.getParameter(
+            'stageCacheHardlink')
+        self._stageCacheHardlink = True if self._stageCacheHardlink \
+            is not None and self._stageCacheHardlink.lower() == 'true' \
+            else False
+        self._stageCacheMaxBytes = parserObj.getParameter(
+            'stageCacheMaxBytes')
+        if self._stageCacheMaxBytes is None:
+            self._stageCacheMaxBytes = 10737418240
+        else:
+            self._stageCacheMaxBytes = int(self._stageCacheMaxBytes)
+        self._stageCacheMaxAge = parserObj.getParameter('stageCacheMaxAge')
+        if self._stageCacheMaxAge is None:
+            self._stageCacheMaxAge = 604800.
+        else:
+            self._stageCacheMaxAge = float(self._stageCacheMaxAge)
+        self._stageCachePruneInterval = parserObj.getParameter(
+            'stageCachePruneInterval')
+        if self._stageCachePruneInterval is None:
+            self._stageCachePruneInterval = 3600.
+        else:
+            self._stageCachePruneInterval = float(
+                self._stageCachePruneInterval)
+        self._useCompiledFlowCache = parserObj.getParameter(
+            'useCompiledFlowCache')
+        self._useCompiledFlowCache = False if self._useCompiledFlowCache \
+            is not None and self._useCompiledFlowCache.lower() == 'false' \
+            else True
+        self._compiledFlowCacheDir = parserObj.getParameter(
+            'compiledFlowCacheDir')
+        self._compiledFlowCacheSize = parserObj.getParameter(
+            'compiledFlowCacheSize')
+        if self._compiledFlowCacheSize is None:
+            self._compiledFlowCacheSize = 64
+        else:
+            self._compiledFlowCacheSize = int(self._compiledFlowCacheSize)
 
         # build wsdl
         if self._gridProtocol == 'gsi' or self._gridProtocol == 'ssl':
@@ -176,6 +326,49 @@ class GridServiceConfig(object):
         """Return the work unit work directory."""
         return self._workUnitWorkDir
 
+    def getUseStageCache(self):
+        """Return True if stage files are staged through the stage cache."""
+        return self._useStageCache
+
+    def getStageCacheDir(self):
+        """Return stage cache directory; it should be on the same file system
+        as the work unit work directory so staged files can be reflinked or
+        hardlinked."""
+        return self._stageCacheDir
+
+    def getStageCacheHardlink(self):
+        """Return True if staged files are hardlinked to the stage cache
+        instead of copied.  Work units then share one read-only inode, so
+        only set it when they never write to their staged files."""
+        return self._stageCacheHardlink
+
+    def getStageCacheMaxBytes(self):
+        """Return bytes the stage cache is pruned to; 0 is unbounded."""
+        return self._stageCacheMaxBytes
+
+    def getStageCacheMaxAge(self):
+        """Return seconds after their last use that stage cache files and
+        bundles are pruned; 0 keeps them."""
+        return self._stageCacheMaxAge
+
+    def getStageCachePruneInterval(self):
+        """Return seconds between prunes of the stage cache."""
+        return self._stageCachePruneInterval
+
+    def getUseCompiledFlowCache(self):
+        """Return True if validated and resolved sciflo documents are
+        cached."""
+        return self._useCompiledFlowCache
+
+    def getCompiledFlowCacheDir(self):
+        """Return directory of compiled sciflo documents; None is the
+        user's sciflo directory."""
+        return self._compiledFlowCacheDir
+
+    def getCompiledFlowCacheSize(self):
+        """Return number of compiled sciflo documents kept in memory."""
+        return self._compiledFlowCacheSize
+
     def getProtocol(self):
         """Return grid protocol: gsi, ssl, or http."""
         return self._gridProtocol
@@ -239,3 +432,109 @@ class GridServiceConfig(object):
     def getWorkerTimeout(self):
         """Return worker timeout."""
         return self._workerTimeout
+
+    def getWorkerMode(self):
+        """Return worker mode: fork or persistent."""
+        return self._workerMode
+
+    def getMaxTasksPerWorker(self):
+        """Return max number of work units a persistent worker runs before
+        it is recycled."""
+        return self._maxTasksPerWorker
+
+    def getPoolSizing(self):
+        """Return pool sizing mode: fixed or adaptive.  Adaptive sizing
+        needs worker mode persistent."""
+        return self._poolSizing
+
+    def getMinWorkers(self):
+        """Return adaptive pool floor."""
+        return self._minWorkers
+
+    def getMaxWorkers(self):
+        """Return adaptive pool ceiling; None means the cpu count."""
+        return self._maxWorkers
+
+    def getMemoryPerWorker(self):
+        """Return memory in MB to reserve per worker for adaptive sizing."""
+        return self._memoryPerWorker
+
+    def getStatusWriteInterval(self):
+        """Return seconds between writes of status JSON files; 0 writes them
+        synchronously."""
+        return self._statusWriteInterval
+
+    def getAnnotatedDocMode(self):
+        """Return annotated doc mode: full or journal."""
+        return self._annotatedDocMode
+
+    def getAnnotatedDocSnapshotInterval(self):
+        """Return seconds between snapshots of the annotated doc in journal
+        mode; 0 disables them."""
+        return self._annotatedDocSnapshotInterval
+
+    def getResultStoreThreshold(self):
+        """Return size in bytes at or above which work unit results are
+        handed off through the result store; None disables it."""
+        return self._resultStoreThreshold
+
+    def getExecutionLogHeadSize(self):
+        """Return bytes kept from the start of a work unit execution log."""
+        return self._executionLogHeadSize
+
+    def getExecutionLogTailSize(self):
+        """Return bytes kept from the end of a work unit execution log."""
+        return self._executionLogTailSize
+
+    def getExecutorMode(self):
+        """Return executor mode: waiter or asyncio."""
+        return self._executorMode
+
+    def getCacheRecordLimit(self):
+        """Return max number of decoded work unit cache records kept in
+        process."""
+        return self._cacheRecordLimit
+
+    def getCacheRecordBytes(self):
+        """Return max bytes of decoded work unit cache records kept in
+        process."""
+        return self._cacheRecordBytes
+
+    def getCacheMinRuntime(self):
+        """Return seconds a work unit has to run for to be cached."""
+        return self._cacheMinRuntime
+
+    def getCacheMaxResultBytes(self):
+        """Return max bytes a work unit's work dir may hold for it to be
+        cached; 0 is unbounded."""
+        return self._cacheMaxResultBytes
+
+    def getCacheTtl(self):
+        """Return seconds a work unit cache entry is kept after its last
+        hit; 0 keeps entries until they are evicted or go stale."""
+        return self._cacheTtl
+
+    def getCacheMaxBytes(self):
+        """Return max bytes referenced by work unit cache entries; 0 is
+        unbounded."""
+        return self._cacheMaxBytes
+
+    def getCacheEvictionPolicy(self):
+        """Return work unit cache eviction policy: lru or lfu."""
+        return self._cacheEvictionPolicy
+
+    def getCacheCompactInterval(self):
+        """Return seconds between compactions of the work unit cache; 0
+        disables them."""
+        return self._cacheCompactInterval
+
+    def getCacheGcWorkDirs(self):
+        """Return True if compaction removes the work dirs of dropped work
+        unit cache entries."""
+        return self._cacheGcWorkDirs
+
+    def getCacheTouchInterval(self):
+        """Return seconds between reports of in-process work unit cache
+        hits to the cache server; records held in process are also checked
+        with the server this often."""
+        return self._cacheTouchInterval
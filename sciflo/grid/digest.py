@@ -0,0 +1,158 @@
+# -----------------------------------------------------------------------------
+# Name:        digest.py
+# Purpose:     Canonical digests of work unit configs used as cache keys.
+#
+# Created:     Sun Oct 18 02:10:44 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import stat
+import hashlib
+import threading
+from collections import OrderedDict, UserList
+
+import lxml.etree
+
+# version of the encoding; bumping it changes every digest so cache entries
+# keyed by an older encoding are never reused
+DIGEST_VERSION = 2
+DIGEST_PERSON = ('sciflo-wu-v%d' % DIGEST_VERSION).encode('utf-8')
+
+# digest bytes; 16 keeps hex digests as long as the md5 ones they replace
+DIGEST_SIZE = 16
+
+# bytes read at a time when hashing a file arg
+CHUNK_SIZE = 1048576
+
+# longest str that is checked for being the path of a file arg
+MAX_PATH_LENGTH = 4096
+
+# content digests of file args by path, dropped when the file changes
+FILE_DIGEST_MEMO_SIZE = 4096
+_FileDigests = OrderedDict()
+_FileDigestsLock = threading.Lock()
+
+
+def newHasher():
+    """Return hasher of the current digest version."""
+
+    return hashlib.blake2b(digest_size=DIGEST_SIZE, person=DIGEST_PERSON)
+
+
+def getFileArgDigest(path, st=None):
+    """Return content digest of a file arg.  Digests are memoized by path
+    and kept while the file's mtime, inode and size stay the same, so a large
+    file is only read once."""
+
+    if st is None:
+        st = os.stat(path)
+    validators = (st.st_mtime_ns, st.st_ino, st.st_dev, st.st_size)
+    with _FileDigestsLock:
+        memo = _FileDigests.get(path, None)
+        if memo is not None and memo[0] == validators:
+            _FileDigests.move_to_end(path)
+            return memo[1]
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+    digest = h.digest()
+    with _FileDigestsLock:
+        _FileDigests[path] = (validators, digest)
+        _FileDigests.move_to_end(path)
+        while len(_FileDigests) > FILE_DIGEST_MEMO_SIZE:
+            _FileDigests.popitem(last=False)
+    return digest
+
+
+def _fileArgStat(s):
+    """Return stat of the file an absolute path arg names or None."""
+
+    if not s.startswith('/') or len(s) > MAX_PATH_LENGTH or '\n' in s or \
+            '\0' in s:
+        return None
+    try:
+        st = os.stat(s)
+    except (OSError, ValueError):
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return st
+
+
+def _feed(h, tag, data):
+    """Feed tagged, length-prefixed bytes to hasher."""
+
+    h.update(b'%s%d:' % (tag, len(data)))
+    h.update(data)
+
+
+def updateDigest(h, obj):
+    """Feed canonical encoding of obj to hasher h.  Every value is tagged
+    with its kind and length-prefixed so different structures never encode
+    the same.  Lists and tuples encode alike; dict items and set members are
+    encoded in a canonical order.  A str that is the absolute path of a file
+    is encoded by the file's contents."""
+
+    if obj is None:
+        h.update(b'N')
+    elif obj is True:
+        h.update(b'T')
+    elif obj is False:
+        h.update(b'F')
+    elif isinstance(obj, str):
+        st = _fileArgStat(obj)
+        if st is not None:
+            _feed(h, b'p', obj.encode('utf-8'))
+            h.update(getFileArgDigest(obj, st))
+        else:
+            _feed(h, b's', obj.encode('utf-8', 'surrogatepass'))
+    elif isinstance(obj, (bytes, bytearray)):
+        _feed(h, b'b', bytes(obj))
+    elif isinstance(obj, int):
+        _feed(h, b'i', str(int(obj)).encode('ascii'))
+    elif isinstance(obj, float):
+        _feed(h, b'f', repr(float(obj)).encode('ascii'))
+    elif isinstance(obj, (list, tuple, UserList)):
+        h.update(b'l%d:' % len(obj))
+        for item in obj:
+            updateDigest(h, item)
+    elif isinstance(obj, dict):
+        items = sorted([(getCanonicalDigest(k), v) for k, v in obj.items()],
+                       key=lambda item: item[0])
+        h.update(b'd%d:' % len(items))
+        for kDigest, v in items:
+            h.update(kDigest)
+            updateDigest(h, v)
+    elif isinstance(obj, (set, frozenset)):
+        digests = sorted([getCanonicalDigest(item) for item in obj])
+        h.update(b'e%d:' % len(digests))
+        for digest in digests:
+            h.update(digest)
+    elif isinstance(obj, lxml.etree._Element):
+        _feed(h, b'x', lxml.etree.tostring(obj, method='c14n'))
+    else:
+        cls = type(obj)
+        _feed(h, b'o', ('%s.%s' % (cls.__module__, cls.__name__)).encode(
+            'utf-8'))
+        _feed(h, b's', str(obj).encode('utf-8', 'surrogatepass'))
+
+
+def getCanonicalDigest(obj):
+    """Return canonical digest bytes of obj."""
+
+    h = newHasher()
+    updateDigest(h, obj)
+    return h.digest()
+
+
+def getCanonicalHexDigest(obj):
+    """Return canonical hex digest of obj."""
+
+    h = newHasher()
+    updateDigest(h, obj)
+    return h.hexdigest()
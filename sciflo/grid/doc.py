@@ -13,6 +13,7 @@ import os
 import re
 import types
 import copy
+import pickle as pickle
 import urllib.request
 import urllib.parse
 import urllib.error
@@ -26,7 +27,9 @@ from sciflo.utils import (validateXml, getXmlEtree, SCIFLO_NAMESPACE,
                           IMPLICIT_CONVERSIONS, runXpath, runDot)
 from .utils import (generateWorkUnitConfigId, getHexDigest, getFunction,
                     dotFlowChartFromDependencies)
-from .postExecution import getConversionFunctionString
+from .postExecution import (getConversionFunctionString,
+                            getUserConfigValidators)
+from .flowCache import getFlowKey, getGraphKey
 
 NS = {'sf': '{' + SCIFLO_NAMESPACE + '}',
       'xs': '{' + XSD_NAMESPACE + '}',
@@ -180,23 +183,40 @@ class Sciflo(object):
     embeddedAtPattern = re.compile(r'([^@]*)@(@[^@]+)@([^@]*)')
     twoPartNamePattern = re.compile(r'^([^\.]+)\.(.+)$')
 
-    def __init__(self, xmlDoc, globalInputArgs=[], globalInputDict={}, debugMode=False):
+    def __init__(self, xmlDoc, globalInputArgs=[], globalInputDict={}, debugMode=False,
+                 flowCache=None):
         self._xmlString = xmlDoc
         self._globalInputArgs = globalInputArgs
         self._globalInputDict = globalInputDict
         self._debugMode = debugMode
 
+        # compiled flow cache; debug mode evaluates inline python while
+        # resolving so those flows are always resolved
+        self._flowCache = None if debugMode else flowCache
+        self._flowKey = None
+        self._configValidators = None
+        self._compiledKey = None
+        flowEntry = None
+        if self._flowCache is not None:
+            self._configValidators = getUserConfigValidators()
+            self._flowKey = getFlowKey(self._xmlString, SCIFLO_SCHEMA_XML,
+                                       configValidators=self._configValidators)
+            flowEntry = self._flowCache.get(self._flowKey)
+
         # Make sure not both globalInputArgs and globalInputDict were specified
         if len(self._globalInputArgs) > 0 and len(self._globalInputDict) > 0:
             raise ScifloError(
                 "Cannot specify both globalInputArgs and globalInputDict args.")
 
-        # Validate sciflo xml with xsd
-        validated, validationError = validateXml(
-            self._xmlString, SCIFLO_SCHEMA_XML)
-        if not validated:
-            raise ScifloError(
-                "Validation of sciflo xml failed: %s" % str(validationError))
+        # Validate sciflo xml with xsd unless it was validated before
+        if flowEntry is None:
+            validated, validationError = validateXml(
+                self._xmlString, SCIFLO_SCHEMA_XML)
+            if not validated:
+                raise ScifloError(
+                    "Validation of sciflo xml failed: %s" % str(validationError))
+            if self._flowCache is not None:
+                self._flowCache.update(self._flowKey)
 
         # Parse XML doc
         self._eltDoc, self._namespacePrefixDict = getXmlEtree(xmlDoc)
@@ -210,12 +230,20 @@ class Sciflo(object):
         self._flowProcesses = doc.find(ns('sf:flow/sf:processes'))
         self._flowProcessesProcess = doc.findall(
             ns('sf:flow/sf:processes/sf:process'))
+        self._flowCachePolicyTypes = doc.findall(
+            ns('sf:flow/sf:cachePolicy/sf:type'))
 
         self._workUnitConfigs = []
         self._workUnitConfigsForDot = []
         self._implicitWorkUnitConfigs = []
         self._flowOutputConfigs = []
 
+        # where plain global inputs go in work unit args: (procId, arg index,
+        # input tag, input value); if some global input is used any other
+        # way the resolved flow can't be rebound to other global inputs
+        self._globalBindings = []
+        self._rebindable = True
+
         # Create input dict, making sure that a global input tagname is not used more than once
         if len(self._globalInputDict) > 0:
             self._inputDict = self._globalInputDict
@@ -576,6 +604,7 @@ This module may be a staged file or bundle: %s''' % str(e)))
                 # indicator to say if resolving input was from global inputs or
                 # another process
                 resolvedFrom = None
+                globalBinding = None
 
                 #resolve @-links
                 if inputVal.startswith('@#inputs.') or \
@@ -592,6 +621,13 @@ This module may be a staged file or bundle: %s''' % str(e)))
                     # append input index
                     globallyResolvedInputIdxsDict[inputEltIdx] = resolvedInputTag
 
+                    # only inputs passed as is can be rebound
+                    if root and inputsType == 'arglist' and \
+                            not inputVal.startswith('@#inputs?'):
+                        globalBinding = (inputTag, inputVal)
+                    else:
+                        self._rebindable = False
+
                 elif inputVal.startswith('@#previous.') or \
                         inputVal.startswith('@#previous?') or \
                         inputVal == '@#previous':
@@ -826,6 +862,13 @@ This module may be a staged file or bundle: %s''' % str(e)))
                     wuArgs.extend([inputTag, resolvedInputArg])
                 else:
                     wuArgs.append(resolvedInputArg)
+                if globalBinding is not None:
+                    if isinstance(resolvedInputArg, UnresolvedArgument):
+                        # converted by an implicit work unit
+                        self._rebindable = False
+                    else:
+                        self._globalBindings.append(
+                            (id, len(wuArgs) - 1) + globalBinding)
 
                 inputEltIdx += 1
 
@@ -842,9 +885,17 @@ This module may be a staged file or bundle: %s''' % str(e)))
         if self.resolved:
             return
 
+        # reuse a compiled flow
+        if self._loadCompiled():
+            self.resolved = True
+            return
+
         self._workUnitConfigs = []
         self._workUnitConfigsForDot = []
         self._implicitWorkUnitConfigs = []
+        self._globalBindings = []
+        self._rebindable = True
+        assignedProcIds = []
         procs = self._flowProcessesProcess
 
         # Loop over processes and create work unit configs
@@ -857,6 +908,7 @@ This module may be a staged file or bundle: %s''' % str(e)))
             if id is None:
                 id = 'process_%05d' % processCount
                 proc.set('id', id)
+                assignedProcIds.append((procs.index(proc), id))
 
             inputsElt = proc.find(ns('sf:inputs'))
             inputsType = inputsElt.get('type', 'arglist')
@@ -1018,6 +1070,77 @@ This module may be a staged file or bundle: %s''' % str(e)))
 
         # set resolve flag
         self.resolved = True
+        self._storeCompiled(assignedProcIds)
+
+    def _getCompiledKey(self, rebindable):
+        """Return key the resolved flow is cached under: the document's key
+        if it can be rebound to any global inputs, otherwise a key of the
+        document and its global inputs."""
+
+        if rebindable:
+            return self._flowKey
+        return getFlowKey(self._xmlString, SCIFLO_SCHEMA_XML,
+                          lxml.etree.tostring(self._flowInputs, method='c14n'),
+                          self._configValidators)
+
+    def _storeCompiled(self, assignedProcIds):
+        """Put resolved flow in the compiled flow cache."""
+
+        if self._flowCache is None:
+            return
+        try:
+            compiled = pickle.dumps((self._workUnitConfigs,
+                                     self._workUnitConfigsForDot,
+                                     self._implicitWorkUnitConfigs,
+                                     self._flowOutputConfigs,
+                                     assignedProcIds, self._globalBindings),
+                                    pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # args that can't be pickled; only the validation is cached
+            return
+        self._compiledKey = self._getCompiledKey(self._rebindable)
+        if self._compiledKey != self._flowKey:
+            self._flowCache.update(self._flowKey, rebindable=False)
+        self._flowCache.update(self._compiledKey, rebindable=self._rebindable,
+                               compiled=compiled)
+
+    def _loadCompiled(self):
+        """Load resolved flow from the compiled flow cache, rebinding the
+        global inputs it takes as is.  Return True if it was cached."""
+
+        if self._flowCache is None:
+            return False
+        entry = self._flowCache.get(self._flowKey)
+        if entry is None or entry['rebindable'] is None:
+            return False
+        compiledKey = self._getCompiledKey(entry['rebindable'])
+        if compiledKey != self._flowKey:
+            entry = self._flowCache.get(compiledKey)
+            if entry is None:
+                return False
+        if entry['compiled'] is None:
+            return False
+        try:
+            (workUnitConfigs, workUnitConfigsForDot, implicitWorkUnitConfigs,
+             flowOutputConfigs, assignedProcIds, globalBindings) = \
+                pickle.loads(entry['compiled'])
+        except Exception:
+            return False
+        for wuConfigs in (workUnitConfigs, workUnitConfigsForDot):
+            wuConfigsById = dict([(w.getId(), w) for w in wuConfigs])
+            for procId, argIdx, inputTag, inputVal in globalBindings:
+                wuConfigsById[procId].getArgs()[argIdx] = \
+                    self._resolveFromGlobalInputs(inputTag, inputVal)[2]
+        for procIdx, id in assignedProcIds:
+            self._flowProcessesProcess[procIdx].set('id', id)
+        self._workUnitConfigs = workUnitConfigs
+        self._workUnitConfigsForDot = workUnitConfigsForDot
+        self._implicitWorkUnitConfigs = implicitWorkUnitConfigs
+        self._flowOutputConfigs = flowOutputConfigs
+        self._globalBindings = globalBindings
+        self._rebindable = entry['rebindable']
+        self._compiledKey = compiledKey
+        return True
 
     def getDot(self):
         """Return GraphViz dot commands string for the sciflo."""
@@ -1203,7 +1326,7 @@ This module may be a staged file or bundle: %s''' % str(e)))
         sflDescElt.text = str(self._description).strip()
         sflInputsElt = lxml.etree.SubElement(flowElt, 'inputs')
         for inputElt in self._flowInputs:
-            sflInputsElt.append(inputElt)
+            sflInputsElt.append(copy.deepcopy(inputElt))
         return lxml.etree.tostring(svgElt, pretty_print=True, encoding='unicode')
 
     def getSvg(self):
@@ -1212,8 +1335,18 @@ This module may be a staged file or bundle: %s''' % str(e)))
         # return if already set
         if self.svg is not None:
             return self.svg
-        self.svg = self._annotateSvg(
-            runDot(self.getDot(), None))  # None forces svg
+        dot = self.getDot()
+        dotSvg = None
+        if self._flowCache is not None:
+            graphKey = getGraphKey(dot)
+            entry = self._flowCache.get(graphKey)
+            if entry is not None:
+                dotSvg = entry['dotSvg']
+        if dotSvg is None:
+            dotSvg = runDot(dot, None)  # None forces svg
+            if self._flowCache is not None:
+                self._flowCache.update(graphKey, dotSvg=dotSvg)
+        self.svg = self._annotateSvg(dotSvg)
         return self.svg
 
     def getFullSvg(self):
@@ -1231,8 +1364,10 @@ This module may be a staged file or bundle: %s''' % str(e)))
         the extension."""
 
         if outputFile.endswith('.svg') or outputFile is None:
+            # render first so a failure leaves no empty file behind
+            svg = self.getSvg()
             with open(outputFile, 'w') as f:
-                f.write(self.getSvg())
+                f.write(svg)
         else:
             runDot(self.getDot(), outputFile)
 
@@ -0,0 +1,189 @@
+# -----------------------------------------------------------------------------
+# Name:        executionService.py
+# Purpose:     Long-running service executing many sciflos per process.
+#
+# Created:     Sat Oct 17 20:48:10 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Listener, Client
+
+from sciflo.event.pdict import PooledPersistentDict
+from .utils import getTb
+from .config import GridServiceConfig
+from .workerPool import PersistentWorkerPool
+from .executor import (ScifloPool, ScifloExecutorError, getExecutorClass,
+                       notifyByEmail)
+
+SERVICE_LOGGER = logging.getLogger('ScifloExecutionService')
+
+# keyword args of runSciflo() a sciflo run through the service may pass
+RUN_KEYWORDS = ('timeout', 'workDir', 'outputDir', 'scifloid', 'publicize',
+                'lookupCache', 'configDict', 'writeGraph', 'statusUpdateFunc',
+                'emailNotify', 'outputUrl')
+
+
+class ScifloExecutionServiceError(Exception):
+    pass
+
+
+class ScifloExecutionService(object):
+    """Execute many sciflos in one long-running process.  The worker pool,
+    cache connection and grid service config are created once and shared by
+    all sciflos; each sciflo still gets its own executor, output dir,
+    execution log and failure handling.  Sciflos are run directly with
+    runSciflo()/submit() or sent over a local socket with
+    runScifloViaService()."""
+
+    def __init__(self, workers=4, maxFlows=8, configFile=None,
+                 cacheName="WorkUnitCache", workerMode=None,
+                 maxTasksPerWorker=None, executorMode='asyncio'):
+        """Constructor."""
+
+        self.workers = workers
+        self.configFile = configFile
+        self.gsc = GridServiceConfig(self.configFile)
+        self.executorClass = getExecutorClass(executorMode, configFile)
+
+        # shared worker pool
+        if workerMode is None:
+            workerMode = self.gsc.getWorkerMode()
+        if maxTasksPerWorker is None:
+            maxTasksPerWorker = self.gsc.getMaxTasksPerWorker()
+        if workerMode == 'persistent':
+            self.pool = PersistentWorkerPool(self.workers, maxTasksPerWorker)
+        elif workerMode == 'fork':
+            self.pool = ScifloPool(self.workers)
+        else:
+            raise ScifloExecutionServiceError("Unknown worker mode: %s" %
+                                              workerMode)
+
+        # shared cache connection
+        self.cacheName = cacheName
+        self.pdict = None
+        if self.cacheName is not None:
+            try:
+                self.pdict = PooledPersistentDict(self.cacheName,
+                                                  pickleVals=True)
+            except Exception as e:
+                SERVICE_LOGGER.debug("Got exception trying to get \
+PersistentDict '%s': %s.  No cache will be used." % (self.cacheName, e),
+                    extra={'id': 'service'})
+                self.cacheName = None
+
+        self.flowExecutor = ThreadPoolExecutor(maxFlows)
+        self.listener = None
+        self.closed = False
+
+    def runSciflo(self, sflStr, args={}, **kargs):
+        """Run sciflo and return its output; raise the error if it failed.
+        kargs are the keyword args of sciflo.grid.executor.runSciflo()."""
+
+        if self.closed:
+            raise ScifloExecutionServiceError("Service is closed.")
+        for k in kargs:
+            if k not in RUN_KEYWORDS:
+                raise ScifloExecutionServiceError("Unknown keyword arg for \
+runSciflo(): %s" % k)
+        if 'timeout' in kargs:
+            kargs['workerTimeout'] = kargs.pop('timeout')
+        cacheName = self.cacheName
+        if cacheName is None:
+            kargs['lookupCache'] = False
+        executor = self.executorClass(sflStr, args=args, workers=self.workers,
+                                      configFile=self.configFile,
+                                      cacheName=cacheName, pool=self.pool,
+                                      gsc=self.gsc, pdict=self.pdict, **kargs)
+        executor.execute()
+        notifyByEmail(kargs.get('emailNotify', None), executor.output,
+                      executor)
+        if isinstance(executor.output, Exception):
+            raise executor.output
+        return executor.output
+
+    def submit(self, sflStr, args={}, **kargs):
+        """Run sciflo in the background.  Return a concurrent.futures.Future
+        for its output."""
+
+        return self.flowExecutor.submit(self.runSciflo, sflStr, args, **kargs)
+
+    def serve(self, address):
+        """Accept sciflos on the unix socket at address until close() is
+        called."""
+
+        if os.path.exists(address):
+            os.unlink(address)
+        self.listener = Listener(address, family='AF_UNIX')
+        os.chmod(address, 0o600)
+        SERVICE_LOGGER.debug("Serving sciflos on %s." % address,
+                             extra={'id': 'service'})
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError):
+                SERVICE_LOGGER.debug("Got error accepting connection: %s" %
+                                     getTb(), extra={'id': 'service'})
+                continue
+            if self.closed:
+                conn.close()
+                break
+            t = threading.Thread(target=self._serveConnection, args=[conn],
+                                 name="ScifloServiceConnection")
+            t.daemon = True
+            t.start()
+        self.listener.close()
+        if os.path.exists(address):
+            os.unlink(address)
+
+    def _serveConnection(self, conn):
+        """Run sciflo sent over conn and send back ('ok', output) or
+        ('error', exception)."""
+
+        try:
+            sflStr, args, kargs = conn.recv()
+            try:
+                reply = ('ok', self.submit(sflStr, args, **kargs).result())
+            except Exception as e:
+                reply = ('error', e)
+            try:
+                conn.send(reply)
+            except Exception:
+                conn.send(('error', ScifloExecutorError(str(reply[1]))))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def close(self):
+        """Stop accepting sciflos, wait for running ones and stop the pool."""
+
+        self.closed = True
+
+        # wake up serve()
+        if self.listener is not None:
+            try:
+                Client(self.listener.address, family='AF_UNIX').close()
+            except (OSError, EOFError):
+                pass
+        self.flowExecutor.shutdown(wait=True)
+        self.pool.close()
+        self.pool.join()
+
+
+def runScifloViaService(address, sflStr, args={}, **kargs):
+    """Run sciflo in the execution service listening at address.  Returns
+    the output or raises the error like runSciflo()."""
+
+    conn = Client(address, family='AF_UNIX')
+    try:
+        conn.send((sflStr, args, kargs))
+        status, res = conn.recv()
+    finally:
+        conn.close()
+    if status == 'error':
+        raise res
+    return res
@@ -11,6 +11,7 @@ import urllib.request
 import urllib.parse
 import urllib.error
 import copy
+import collections
 import multiprocessing
 import multiprocessing.pool
 import pickle as pickle
@@ -19,17 +20,28 @@ from getpass import getuser
 
 from sciflo.utils import (validateDirectory, linkFile, UrlBaseTracker, isUrl,
                           getXmlEtree, isXml, send_email)
-from sciflo.event.pdict import PersistentDict
+from sciflo.event.pdict import PooledPersistentDict
 from .utils import (normalizeScifloArgs, generateScifloId, runLockedFunction,
-                    getTb, runFuncWithRetries, updatePdict, linkResult, updateJson,
-                    publicizeResultFiles, getAbsPathForResultFiles, statusUpdateJson)
+                    getTb, runFuncWithRetries, updatePdict, linkResult,
+                    publicizeResultFiles, getAbsPathForResultFiles, statusUpdateJson,
+                    getDirSize)
 from .postExecution import PostExecutionHandler
 from .doc import Sciflo, UnresolvedArgument, WorkUnitConfig, DocumentArgsList
 from .funcs import (getWorkUnit, executeWorkUnit, workUnitInfo, CancelledWorkUnit,
-                    DEBUG_PROCESSING, LOG_FMT)
+                    getCachedResult, DEBUG_PROCESSING, LOG_FMT)
 from .status import *
 from .annotatedDoc import AnnotatedDoc
+from .scheduler import DependencyIndex, ReadyQueue, RuntimeHistory
+from .cachePolicy import getCachePolicy
+from .flowCache import getCompiledFlowCache
 from .config import GridServiceConfig
+from .workerPool import PersistentWorkerPool, PersistentApplyResult
+from .poolSizer import AdaptivePoolSizer
+from .statusWriter import StatusWriter
+from .resultStore import ResultStore, ResultRef, loadResultRef
+from .logAggregator import LogAggregator
+from .cacheRecords import (setCacheRecord, makeCacheEntry, getEntryPath,
+                           getCacheRecords, WorkUnitCacheRecords)
 
 SCIFLO_INFO_FIELDS = ['scifloid', 'scifloName', 'call', 'args', 'workDir',
                       'startTime', 'endTime', 'result', 'exceptionMessage',
@@ -103,6 +115,17 @@ class ScifloExecutorError(Exception):
     pass
 
 
+class LogIdFilter(logging.Filter):
+    """Pass only records logged with extra={'id': logId}."""
+
+    def __init__(self, logId):
+        super(LogIdFilter, self).__init__()
+        self.logId = logId
+
+    def filter(self, record):
+        return getattr(record, 'id', None) == self.logId
+
+
 class ScifloExecutor(object):
     """Execution engine for sciflo."""
 
@@ -111,44 +134,51 @@ class ScifloExecutor(object):
                  cacheName="WorkUnitCache", outputDir=None, scifloid=None,
                  publicize=False, configFile=None, lookupCache=True,
                  configDict={}, writeGraph=True, statusUpdateFunc=None,
-                 emailNotify=None, outputUrl=None):
-        """Constructor."""
+                 emailNotify=None, outputUrl=None, workerMode=None,
+                 maxTasksPerWorker=None, poolSizing=None, minWorkers=None,
+                 maxWorkers=None, pool=None, gsc=None, pdict=None):
+        """Constructor.  A pool, grid service config and pdict may be passed
+        in to share them with other sciflos running in this process."""
 
         import multiprocessing as mp
 
+        # config file and GridServiceConfig
+        self.configFile = configFile
+        if gsc is None:
+            gsc = GridServiceConfig(self.configFile)
+        self.gsc = gsc
+
         self.sflString = sflString
         self.args = normalizeScifloArgs(args)
+        flowCache = getCompiledFlowCache(self.gsc)
         if isinstance(self.args, dict):
-            self.sciflo = Sciflo(self.sflString, globalInputDict=self.args)
+            self.sciflo = Sciflo(self.sflString, globalInputDict=self.args,
+                                 flowCache=flowCache)
         elif isinstance(self.args, (list, tuple)):
-            self.sciflo = Sciflo(self.sflString, self.args)
+            self.sciflo = Sciflo(self.sflString, self.args,
+                                 flowCache=flowCache)
         else:
             raise ScifloExecutorError("Unrecognized type for args: %s" %
                                       type(self.args))
         self.sciflo.resolve()
         self.scifloName = self.sciflo.getName()
         self.wuConfigs = self.sciflo.getWorkUnitConfigs()
+        self.depIndex = DependencyIndex(self.wuConfigs)
         if scifloid is None:
             self.scifloid = generateScifloId()
         else:
             self.scifloid = scifloid
-        self.manager = mp.Manager()
         self.procIds = []
         self.applyResultsDict = {}
         self.resultsDict = {}
         self.postExecResultsDict = {}
         self.doneDict = {}
+        self.noResultsYet = set()
         self.executionError = None
-        if workers > 50:
-            raise ScifloExecutorError("Cannot specify workers > 50.")
         self.workers = workers
-        self.pool = ScifloPool(self.workers)
         self.configDict = configDict
-        #self.lock = self.manager.RLock()
         self.lock = threading.RLock()
-        self.event = self.manager.Event()
-        self.waiterProcess = mp.Process(target=waiter, name="waiter",
-                                        args=[self.event])
+        self.initCompletion()
         self.logLevel = logLevel
         if DEBUG_PROCESSING:
             self.logger = mp.process.getLogger()
@@ -160,9 +190,62 @@ class ScifloExecutor(object):
         self.statusUpdateFunc = statusUpdateFunc
         self.emailNotify = emailNotify
 
-        # config file and GridServiceConfig
-        self.configFile = configFile
-        self.gsc = GridServiceConfig(self.configFile)
+        # worker pool; persistent mode reuses pre-forked workers across
+        # work units instead of forking per work unit
+        self.workerMode = workerMode
+        if self.workerMode is None:
+            self.workerMode = self.gsc.getWorkerMode()
+        self.maxTasksPerWorker = maxTasksPerWorker
+        if self.maxTasksPerWorker is None:
+            self.maxTasksPerWorker = self.gsc.getMaxTasksPerWorker()
+        self.poolSizing = poolSizing
+        if self.poolSizing is None:
+            self.poolSizing = self.gsc.getPoolSizing()
+        WorkUnitCacheRecords.resize(self.gsc.getCacheRecordLimit(),
+                                    self.gsc.getCacheRecordBytes(),
+                                    self.gsc.getCacheTouchInterval())
+        self.ownPool = pool is None
+        if not self.ownPool:
+            # shared pool is sized by its owner
+            self.poolSizer = None
+            poolProcesses = poolSize = self.workers
+        elif self.poolSizing == 'adaptive':
+            # a fork pool can't grow or shrink once started; it would have
+            # to fork the ceiling up front and hold it
+            if self.workerMode != 'persistent':
+                raise ScifloExecutorError("Adaptive pool sizing needs worker \
+mode 'persistent', not '%s'." % self.workerMode)
+            if minWorkers is None:
+                minWorkers = self.gsc.getMinWorkers()
+            if maxWorkers is None:
+                maxWorkers = self.gsc.getMaxWorkers()
+            self.poolSizer = AdaptivePoolSizer(minWorkers, maxWorkers,
+                                               self.gsc.getMemoryPerWorker())
+            poolProcesses = self.poolSizer.ceiling
+            poolSize = self.poolSizer.floor
+        elif self.poolSizing == 'fixed':
+            if self.workers > 50:
+                raise ScifloExecutorError("Cannot specify workers > 50.")
+            self.poolSizer = None
+            poolProcesses = poolSize = self.workers
+        else:
+            raise ScifloExecutorError("Unknown pool sizing: %s" %
+                                      self.poolSizing)
+        if not self.ownPool:
+            self.pool = pool
+        elif self.workerMode == 'persistent':
+            self.pool = PersistentWorkerPool(poolProcesses,
+                                             self.maxTasksPerWorker,
+                                             size=poolSize)
+        elif self.workerMode == 'fork':
+            self.pool = ScifloPool(poolProcesses)
+        else:
+            raise ScifloExecutorError("Unknown worker mode: %s" %
+                                      self.workerMode)
+
+        # work units ready to run but held back until a worker is free
+        self.readyQueue = ReadyQueue(window=poolSize)
+        self.poolTarget = poolSize
 
         # set worker timeout from config file and override
         self.workerTimeout = workerTimeout
@@ -184,19 +267,36 @@ class ScifloExecutor(object):
 
         # send logging messages to an execution log also (in addition to console)
         self.logFile = os.path.join(self.outputDir, 'sfl_execution.log')
-        fh = logging.FileHandler(self.logFile)
+        self.logFileHandler = fh = logging.FileHandler(self.logFile)
         fh.setLevel(self.logLevel)
         fh.setFormatter(logging.Formatter(LOG_FMT))
+        if not self.ownPool:
+            # sciflos sharing a process may have the same name and so the
+            # same logger; keep their execution logs apart by id
+            fh.addFilter(LogIdFilter(self.scifloid))
         self.logger.addHandler(fh)
 
+        # work unit execution logs are tailed while they run and copied into
+        # the execution log, capped, when they finish
+        self.logAggregator = LogAggregator(self.logger, self.scifloid,
+                                           self.gsc.getExecutionLogHeadSize(),
+                                           self.gsc.getExecutionLogTailSize())
+
+        # status json files are written in the background
+        self.statusWriter = StatusWriter(self.gsc.getStatusWriteInterval(),
+                                         self.logger, self.scifloid)
+
         # cache related attrs
         self.cacheName = cacheName
         self.lookupCache = lookupCache
         if self.cacheName is None:
             self.pdict = None
+        elif pdict is not None:
+            self.pdict = pdict
         else:
             try:
-                self.pdict = PersistentDict(self.cacheName, pickleVals=True)
+                self.pdict = PooledPersistentDict(self.cacheName,
+                                                  pickleVals=True)
             except Exception as e:
                 self.logger.debug("Got exception trying to get PersistentDict \
 for sciflo '%s': %s.  No cache will be used." % (self.scifloName, e),
@@ -205,16 +305,29 @@ for sciflo '%s': %s.  No cache will be used." % (self.scifloName, e),
                 self.pdict = None
         self.hexDict = {}
 
+        # work units whose cache entries were looked up before dispatch and
+        # those found cached, waiting to be completed inline
+        self.cacheChecked = set()
+        self.cachedQueue = collections.deque()
+        self.completingCached = False
+
         # annotated doc
-        self.annDoc = AnnotatedDoc(self.sciflo, self.outputDir)
+        self.annDoc = AnnotatedDoc(self.sciflo, self.outputDir,
+                                   mode=self.gsc.getAnnotatedDocMode(),
+                                   snapshotInterval=self.gsc.getAnnotatedDocSnapshotInterval())
 
         # json file
         self.jsonFile = os.path.join(self.outputDir, 'sciflo.json')
 
-        # svgfile
+        # svgfile; rendering the graph runs dot so it is written in the
+        # background instead of holding up the first work units
         self.svgFile = os.path.join(self.outputDir, 'scifloGraph.svg')
+        self.graphWriter = None
         if self.writeGraph:
-            self.sciflo.writeGraph(self.svgFile)
+            self.graphWriter = threading.Thread(target=self.writeGraphFile,
+                                                name='scifloGraphWriter')
+            self.graphWriter.daemon = True
+            self.graphWriter.start()
 
         # configFile, publicize, grid service config, base url and url base
         # tracker
@@ -231,15 +344,32 @@ for sciflo '%s': %s.  No cache will be used." % (self.scifloName, e),
         else:
             self.publicizeUbt = None
 
+        # large results are handed off through a content-addressed store;
+        # publicized results must stay inline so their files can be found
+        resultStoreThreshold = self.gsc.getResultStoreThreshold()
+        if resultStoreThreshold is not None and not self.publicize:
+            self.resultStore = ResultStore(os.path.join(self.outputDir,
+                                                        'results'),
+                                           resultStoreThreshold)
+        else:
+            self.resultStore = None
+
         # sciflo procId->wuid map
         self.procIdWuidMap = {}
 
+        # work unit types for the cache policy
+        self.wuTypeDict = {}
+
         # build deferred ids, dict, and results dict
         for w in self.wuConfigs:
             procId = w.getId()
 
-            # check if all args are resolved
-            resolved = self.resolveArgs(w)
+            # check if all args are resolved; work units waiting on other
+            # work units are resolved when their producers finish
+            if self.depIndex.isReady(procId):
+                resolved = self.resolveArgs(w)
+            else:
+                resolved = False
 
             # if all args are resolved, get work unit
             if resolved:
@@ -253,25 +383,60 @@ getWorkUnit(): %s\n%s" % (str(e), getTb()))
                 wuid = wu.getWuid()
                 appRes = WuReady(wu)
                 # update info in work unit json for monitoring
-                updateJson(wu.getJsonFile(), wu.getInfo(),
-                           stringifyKeys=STRINGIFY_FIELDS, ubt=self.publicizeUbt,
-                           publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
-                           pickleKeys=PICKLE_FIELDS)
+                self.statusWriter.update(wu.getJsonFile(), wu.getInfo(),
+                                         stringifyKeys=STRINGIFY_FIELDS,
+                                         ubt=self.publicizeUbt,
+                                         publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
+                                         pickleKeys=PICKLE_FIELDS)
                 self.updateStatus('WorkUnit status for "%s": %s' %
                                   (procId, readyStatus), wu.getInfo())
             else:
                 wuid = None
                 appRes = w
                 self.updateStatus('WorkUnit status for "%s": %s' %
-                                  (procId, waitingStatus), wu.getInfo())
+                                  (procId, waitingStatus),
+                                  {'procId': procId, 'status': waitingStatus})
             self.procIdWuidMap[procId] = wuid
             self.procIds.append(procId)
             self.applyResultsDict[procId] = appRes
             self.resultsDict[procId] = NoResult()
+            self.noResultsYet.add(procId)
             self.postExecResultsDict[procId] = w.getPostExecutionTypeList()
+            self.wuTypeDict[procId] = w.getType()
 
         self.output = self.sciflo.getFlowOutputConfigs()
 
+        # number of outputs and explicit priority for each process
+        self.numOutputsDict = {}
+        self.priorityDict = {}
+        for i in self.sciflo._flowProcessesProcess:
+            self.priorityDict[i.get('id')] = int(i.get('priority', 0))
+            outputElts = i.xpath('./sf:outputs',
+                                 namespaces=self.sciflo._namespacePrefixDict)
+            if len(outputElts) > 0:
+                self.numOutputsDict[i.get('id')] = \
+                    len(outputElts[0].getchildren())
+
+        # weight of the longest path from each work unit to the end of the
+        # flow using historical runtimes where we have them
+        try:
+            self.runtimeHistory = RuntimeHistory()
+        except Exception as e:
+            self.logger.debug("Got exception loading runtime history for \
+sciflo '%s': %s" % (self.scifloName, e), extra={'id': self.scifloid})
+            self.runtimeHistory = None
+        runtimes = {}
+        if self.runtimeHistory is not None:
+            for procId in self.procIds:
+                runtime = self.runtimeHistory.get(
+                    self.getRuntimeHistoryKey(procId))
+                if runtime is not None:
+                    runtimes[procId] = runtime
+        self.criticalPathDict = self.depIndex.getCriticalPathLengths(runtimes)
+
+        # which work units are worth caching
+        self.cachePolicy = getCachePolicy(self.sciflo, self.gsc)
+
         # sciflo info
         self.scifloInfo = scifloInfo(None, scifloid=self.scifloid,
                                      scifloName=self.scifloName,
@@ -286,10 +451,30 @@ getWorkUnit(): %s\n%s" % (str(e), getTb()))
                                      executionLog=self.logFile)
 
         # update json
-        updateJson(self.jsonFile, self.scifloInfo,
-                   stringifyKeys=STRINGIFY_FIELDS,
-                   ubt=self.publicizeUbt, publicizeKeys=SCIFLO_PUBLICIZE_FIELDS,
-                   pickleKeys=PICKLE_FIELDS)
+        self.statusWriter.update(self.jsonFile, self.scifloInfo,
+                                 stringifyKeys=STRINGIFY_FIELDS,
+                                 ubt=self.publicizeUbt,
+                                 publicizeKeys=SCIFLO_PUBLICIZE_FIELDS,
+                                 pickleKeys=PICKLE_FIELDS)
+
+    def writeGraphFile(self):
+        """Write svg graph of the sciflo."""
+
+        try:
+            self.sciflo.writeGraph(self.svgFile)
+        except Exception as e:
+            self.logger.debug("Got exception writing graph for sciflo '%s': \
+%s\n%s" % (self.scifloName, e, getTb()), extra={'id': self.scifloid})
+
+    def getRuntimeHistoryKey(self, procId):
+        """Return key for procId in runtime history."""
+        return "%s/%s" % (self.scifloName, procId)
+
+    def getPriority(self, procId):
+        """Return dispatch priority of procId.  Explicit priorities from the
+        sciflo doc win; ties go to the longest remaining downstream path."""
+        return (self.priorityDict.get(procId, 0),
+                self.criticalPathDict.get(procId, 0.))
 
     def updateStatus(self, message, info):
         """Update status via WebSockets."""
@@ -305,10 +490,11 @@ getWorkUnit(): %s\n%s" % (str(e), getTb()))
         """Update sciflo info, pdict, and json file."""
 
         self.scifloInfo = scifloInfo(self.scifloInfo, **kargs)
-        updateJson(self.jsonFile, self.scifloInfo,
-                   stringifyKeys=STRINGIFY_FIELDS,
-                   ubt=self.publicizeUbt, publicizeKeys=SCIFLO_PUBLICIZE_FIELDS,
-                   pickleKeys=PICKLE_FIELDS)
+        self.statusWriter.update(self.jsonFile, self.scifloInfo,
+                                 stringifyKeys=STRINGIFY_FIELDS,
+                                 ubt=self.publicizeUbt,
+                                 publicizeKeys=SCIFLO_PUBLICIZE_FIELDS,
+                                 pickleKeys=PICKLE_FIELDS)
 
     def resolveArgs(self, wuConfig):
         """Resolve all args of a work unit."""
@@ -349,7 +535,7 @@ getWorkUnit(): %s\n%s" % (str(e), getTb()))
 
             # resolve unresolved arg
             if isinstance(arg, UnresolvedArgument):
-                newArg = self.resolveArg(arg)
+                newArg = self.resolveArg(arg, lazy=True)
 
                 # If it is still an UnresolvedArgument instance, put it back
                 if isinstance(newArg, NoResult):
@@ -368,8 +554,9 @@ getWorkUnit(): %s\n%s" % (str(e), getTb()))
             wuConfig._args = newArgsList
         return isResolved
 
-    def resolveArg(self, unresArg):
-        """Resolve unresolved argument."""
+    def resolveArg(self, unresArg, lazy=False):
+        """Resolve unresolved argument.  If lazy, a reference to a stored
+        result is returned as is and loaded by the work unit that uses it."""
 
         try:
             # resolving id
@@ -389,7 +576,8 @@ getWorkUnit(): %s\n%s" % (str(e), getTb()))
             else:
                 resolvingIdx = unresArg.getOutputIndex()
                 if resolvingIdx is not None:
-                    resolvingRes = self.resultsDict[resolvingId][resolvingIdx]
+                    resolvingRes = loadResultRef(
+                        self.resultsDict[resolvingId])[resolvingIdx]
 
             # file rewrite?
             rewriteFile = unresArg.getRewriteFile()
@@ -397,7 +585,9 @@ getWorkUnit(): %s\n%s" % (str(e), getTb()))
                 if os.sep in rewriteFile:
                     rewriteFile = os.path.basename(rewriteFile)
                 rewriteFile = os.path.join(self.outputDir, rewriteFile)
-                if isUrl(resolvingRes) or os.path.exists(str(resolvingRes)):
+                if isinstance(resolvingRes, ResultRef):
+                    resolvingRes.writeText(rewriteFile)
+                elif isUrl(resolvingRes) or os.path.exists(str(resolvingRes)):
                     try:
                         localPath = self.ubt.getLocalPath(resolvingRes)
                     except:
@@ -422,6 +612,8 @@ getWorkUnit(): %s\n%s" % (str(e), getTb()))
                 else:
                     open(rewriteFile, 'w').write("%s\n" % str(resolvingRes))
                 resolvingRes = rewriteFile
+            if not lazy:
+                resolvingRes = loadResultRef(resolvingRes)
             return resolvingRes
         except Exception as e:
             self.logger.debug("Got error in resolveArg() method for '%s' in \
@@ -498,21 +690,102 @@ sciflo '%s': %s\n%s" % (resolvingId, self.scifloName, str(e), getTb()),
         else:
             return [doc]
 
-    def dispatchWorker(self, wu):
-        """Dispatch workUnitWorker to execute work unit."""
+    def getPoolTarget(self):
+        """Return number of work units allowed to run at once."""
+
+        if self.poolSizer is None:
+            return self.poolTarget
+        target, stats = self.poolSizer.getTarget(len(self.readyQueue),
+                                                 self.readyQueue.inFlight)
+        if target != self.poolTarget:
+            self.logger.debug("Resizing worker pool from %d to %d in sciflo \
+'%s': %s" % (self.poolTarget, target, self.scifloName, stats),
+                extra={'id': self.scifloid})
+            self.poolTarget = target
+            if hasattr(self.pool, 'resize'):
+                self.pool.resize(target)
+        return target
+
+    def dispatchReady(self):
+        """Dispatch ready work units while the pool has room for them."""
+
+        if len(self.readyQueue) == 0:
+            return
+        self.readyQueue.window = self.getPoolTarget()
+        for wu in self.readyQueue.popReady():
+            self.dispatchWorker(wu)
+
+    def queueReady(self, wus):
+        """Queue ready work units for dispatch.  Their cache entries are
+        looked up in one batch first and work units with cached results are
+        completed inline without taking a pool slot."""
+
+        for wu in self.prefetchCached(wus):
+            self.readyQueue.push(wu, self.getPriority(wu.getProcId()))
+        self.completeCached()
+
+    def prefetchCached(self, wus):
+        """Look up the cache entries of work units in one batch, queueing
+        the results of those that are cached for completeCached().  Return
+        list of work units that have to be run."""
+
+        if not self.lookupCache or self.pdict is None or len(wus) == 0:
+            return wus
+        try:
+            records = getCacheRecords(self.pdict,
+                                      [wu.getHexDigest() for wu in wus])
+        except Exception as e:
+            # workers look them up themselves
+            self.logger.debug("Got error prefetching cached results in sciflo \
+'%s': %s\n%s" % (self.scifloName, str(e), getTb()),
+                extra={'id': self.scifloid})
+            return wus
+        uncached = []
+        for wu in wus:
+            self.cacheChecked.add(wu.getProcId())
+            record = records.get(wu.getHexDigest(), None)
+            callbackResult = None
+            if record is not None and not wu.getInfoItem('cancelFlag'):
+                callbackResult = getCachedResult(wu, record)
+            if callbackResult is None:
+                uncached.append(wu)
+            else:
+                self.cachedQueue.append((wu, callbackResult))
+        return uncached
+
+    def completeCached(self):
+        """Complete work units with cached results inline.  Dependents they
+        make ready are queued by resolveAndSpawn() and, if cached, completed
+        by this same loop instead of recursing."""
+
+        if self.completingCached:
+            return
+        self.completingCached = True
+        try:
+            while self.cachedQueue and self.executionError is None:
+                wu, callbackResult = self.cachedQueue.popleft()
+                self.logger.debug("Completing '%s' from cached result in \
+sciflo '%s'." % (wu.getProcId(), self.scifloName),
+                    extra={'id': self.scifloid})
+                self.startWorker(wu)
+                self.handle(callbackResult, inFlight=False)
+        finally:
+            self.completingCached = False
+
+    def startWorker(self, wu):
+        """Mark work unit sent and link its work dir into the output dir."""
 
         procId = wu.getProcId()
         wu.setInfoItem('status', sentStatus)
-        updateJson(wu.getJsonFile(), wu.getInfo(),
-                   stringifyKeys=STRINGIFY_FIELDS, ubt=self.publicizeUbt,
-                   publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
-                   pickleKeys=PICKLE_FIELDS)  # for monitoring
+        wu.setResultStore(self.resultStore)
+        self.logAggregator.watch(procId, wu.getInfoItem('executionLog'))
+        self.statusWriter.update(wu.getJsonFile(), wu.getInfo(),
+                                 stringifyKeys=STRINGIFY_FIELDS,
+                                 ubt=self.publicizeUbt,
+                                 publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
+                                 pickleKeys=PICKLE_FIELDS)  # for monitoring
         self.updateStatus('WorkUnit status for "%s": %s' %
                           (procId, sentStatus), wu.getInfo())
-        self.logger.debug("Dispatched workUnitWorker for '%s' in sciflo '%s'." %
-                          (procId, self.scifloName),
-                          extra={'id': self.scifloid})
-
         # link work unit work dir
         workDir = wu.getWorkDir()
         linkDir = os.path.join(self.outputDir, "%05d-%s" %
@@ -524,8 +797,20 @@ sciflo '%s': %s\n%s" % (resolvingId, self.scifloName, str(e), getTb()),
 for '%s' in sciflo '%s': %s\n%s" % (workDir, linkDir, procId, self.scifloName,
                                     str(e), getTb()), extra={'id': self.scifloid})
 
-        # lookup cache?
-        if self.lookupCache:
+        # add provenance info for workUnit execution started
+        self.annDoc.addProcessStarted(procId)
+
+    def dispatchWorker(self, wu):
+        """Dispatch workUnitWorker to execute work unit."""
+
+        procId = wu.getProcId()
+        self.startWorker(wu)
+        self.logger.debug("Dispatched workUnitWorker for '%s' in sciflo '%s'." %
+                          (procId, self.scifloName),
+                          extra={'id': self.scifloid})
+
+        # lookup cache unless it was prefetched
+        if self.lookupCache and procId not in self.cacheChecked:
             cacheName = self.cacheName
         else:
             cacheName = None
@@ -536,9 +821,6 @@ for '%s' in sciflo '%s': %s\n%s" % (workDir, linkDir, procId, self.scifloName,
                             callback=self.callback, cacheName=cacheName,
                             cancelFlag=wu.getInfoItem('cancelFlag'))
 
-        # add provenance info for workUnit execution started
-        self.annDoc.addProcessStarted(wu.getProcId())
-
     def spawn(self):
         """Spawn starter work units."""
 
@@ -548,21 +830,43 @@ for '%s' in sciflo '%s': %s\n%s" % (workDir, linkDir, procId, self.scifloName,
         self.updateScifloInfo(startTime=time.time(), status=workingStatus)
 
         # go loop over ids
+        wus = []
         for procId in self.procIds:
             # skip if not yet resolved
             if isinstance(self.applyResultsDict[procId],
-                          (WorkUnitConfig, mp.pool.ApplyResult)):
+                          (WorkUnitConfig, mp.pool.ApplyResult,
+                           PersistentApplyResult)):
                 pass
             # execute work unit using pool
             elif isinstance(self.applyResultsDict[procId], WuReady):
-                wu = self.applyResultsDict[procId].val
-                self.dispatchWorker(wu)
+                wus.append(self.applyResultsDict[procId].val)
             else:
                 raise ScifloExecutorError("Unknown type for applyResultsDict \
 item: %s" % type(self.applyResultsDict[procId]))
+        self.queueReady(wus)
+        if self.executionError is None:
+            self.dispatchReady()
         self.logger.debug("Finished spawning starter work units for sciflo \
 '%s'." % self.scifloName, extra={'id': self.scifloid})
 
+    def initCompletion(self):
+        """Set up the event that is set once the sciflo is done and the
+        waiter process that blocks on it."""
+
+        import multiprocessing as mp
+
+        self.manager = mp.Manager()
+        #self.lock = self.manager.RLock()
+        self.event = self.manager.Event()
+        self.waiterProcess = mp.Process(target=waiter, name="waiter",
+                                        args=[self.event])
+
+    def waitForCompletion(self):
+        """Block until the sciflo is done."""
+
+        self.waiterProcess.start()
+        self.waiterProcess.join()
+
     def execute(self):
         """Execute sciflo."""
 
@@ -585,8 +889,7 @@ in runLockedFunction() for sciflo '%s': %s\n%s" %
         # block
         self.logger.debug("Waiting for work units to complete for sciflo \
 '%s'..." % self.scifloName, extra={'id': self.scifloid})
-        self.waiterProcess.start()
-        self.waiterProcess.join()
+        self.waitForCompletion()
         self.logger.debug("Finished waiting in sciflo '%s'." % self.scifloName,
                           extra={'id': self.scifloid})
 
@@ -603,9 +906,10 @@ in runLockedFunction() for sciflo '%s': %s\n%s" %
             startTime = time.time()
 
             if self.executionError is not None:
-                self.logger.debug("Calling terminate() for sciflo '%s'..." %
-                                  self.scifloName, extra={'id': self.scifloid})
-                self.pool.terminate()
+                if self.ownPool:
+                    self.logger.debug("Calling terminate() for sciflo '%s'..." %
+                                      self.scifloName, extra={'id': self.scifloid})
+                    self.pool.terminate()
                 self.output = ScifloExecutorError("Error result for '%s': \
 %s\n%s" % self.executionError)
                 self.annDoc.addGlobalOutput(
@@ -620,10 +924,25 @@ in runLockedFunction() for sciflo '%s': %s\n%s" %
                 self.logger.debug("Calling close() for sciflo '%s'..." %
                                   self.scifloName, extra={'id': self.scifloid})
                 finalStatus = doneStatus
-            self.logger.debug("Calling join() for sciflo '%s'..." %
-                              self.scifloName, extra={'id': self.scifloid})
-            self.pool.close()
-            self.pool.join()
+            # work units still running in a shared pool are left to finish
+            if self.ownPool:
+                self.logger.debug("Calling join() for sciflo '%s'..." %
+                                  self.scifloName, extra={'id': self.scifloid})
+                self.pool.close()
+                self.pool.join()
+            self.logAggregator.close()
+            self.logger.debug("Work unit cache records for sciflo '%s': %s" %
+                              (self.scifloName, WorkUnitCacheRecords.getStats()),
+                              extra={'id': self.scifloid})
+            self.logger.debug("Work unit cache admissions for sciflo '%s': %s" %
+                              (self.scifloName, self.cachePolicy.getStats()),
+                              extra={'id': self.scifloid})
+            if self.runtimeHistory is not None:
+                try:
+                    self.runtimeHistory.save()
+                except Exception as e:
+                    self.logger.debug("Got exception saving runtime history \
+for sciflo '%s': %s" % (self.scifloName, e), extra={'id': self.scifloid})
             endTime = time.time()
             self.logger.debug("done.  Shutdown took %s seconds for sciflo \
 '%s'." % ((endTime - startTime), self.scifloName), extra={'id': self.scifloid})
@@ -632,6 +951,7 @@ in runLockedFunction() for sciflo '%s': %s\n%s" %
             self.updateScifloInfo(endTime=time.time(), status=finalStatus,
                                   result=self.output,
                                   exceptionMessage=self.executionError)
+            self.statusWriter.close()
 
             # write inidividual results to result files
             if isinstance(self.output, ScifloExecutorError):
@@ -648,6 +968,13 @@ in runLockedFunction() for sciflo '%s': %s\n%s" %
                                            'workunit_result-%d.txt' % i)
                     with open(resFile, 'w') as f:
                         f.write("%s\n" % self.output[i])
+
+            # write out annotated doc if it is behind
+            self.annDoc.close()
+
+            # wait for graph
+            if self.graphWriter is not None:
+                self.graphWriter.join()
         except OSError as oe:
             # When disk space fills up during the middle of a Sciflo run, catch it
             # here and return a non-0 exit code. To achieve backwards compatability,
@@ -656,6 +983,8 @@ in runLockedFunction() for sciflo '%s': %s\n%s" %
             self.logger.debug("Got OSError in shutdown() for sciflo '%s':%s\n%s" %
                               (self.scifloName, str(oe), getTb()),
                               extra={'id': self.scifloid})
+            if not self.ownPool:
+                raise
             if oe.errno == errno.ENOSPC:
                 os._exit(1)
             else:
@@ -665,7 +994,13 @@ in runLockedFunction() for sciflo '%s': %s\n%s" %
             self.logger.debug("Got error in shutdown() for sciflo '%s':%s\n%s" %
                               (self.scifloName, str(e), getTb()),
                               extra={'id': self.scifloid})
+            if not self.ownPool:
+                raise
             os._exit(0)
+        finally:
+            if not self.ownPool:
+                self.logger.removeHandler(self.logFileHandler)
+                self.logFileHandler.close()
 
     def callback(self, callbackResult):
         """Callback for work unit execution."""
@@ -685,15 +1020,17 @@ in sciflo '%s': %s\n%s" % (self.scifloName, str(e), getTb())
                 self.logger.debug(emessage, extra={'id': self.scifloid})
                 raise ScifloExecutorError(emessage)
 
-    def handle(self, callbackResult):
-        """Handle callback results."""
+    def handle(self, callbackResult, inFlight=True):
+        """Handle callback results.  inFlight is False for work units
+        completed inline that never took a pool slot."""
 
         procId, info = callbackResult
         info = workUnitInfo(info, status=calledBackStatus)
-        updateJson(info['jsonFile'], info, stringifyKeys=STRINGIFY_FIELDS,
-                   ubt=self.publicizeUbt,
-                   publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
-                   pickleKeys=PICKLE_FIELDS)
+        self.statusWriter.update(info['jsonFile'], info,
+                                 stringifyKeys=STRINGIFY_FIELDS,
+                                 ubt=self.publicizeUbt,
+                                 publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
+                                 pickleKeys=PICKLE_FIELDS)
         self.updateStatus('WorkUnit status for "%s": %s' %
                           (procId, calledBackStatus), info)
         self.logger.debug("workUnitWorker for '%s' called back in sciflo '%s' \
@@ -701,6 +1038,8 @@ with status '%s'.  Handling result." %
                           (procId, self.scifloName, info['workerStatus']),
                           extra={'id': self.scifloid})
         self.doneDict[procId] = True
+        if inFlight:
+            self.readyQueue.taskDone()
 
         # continue if no error happened elsewhere
         if self.executionError is None:
@@ -712,6 +1051,10 @@ with status '%s'.  Handling result." %
                                               exceptionMessage=str(e),
                                               tracebackMessage=getTb()))
 
+        # fill the room this work unit left in the pool
+        if self.executionError is None:
+            self.dispatchReady()
+
     def _handle(self, procId, info):
         """Handle results."""
 
@@ -721,36 +1064,39 @@ with status '%s'.  Handling result." %
                 info['result'], self.ubt)
         else:
             self.resultsDict[procId] = info['result']
+        self.noResultsYet.discard(procId)
 
         # append work unit's execution log to sciflo's execution log
-        f = open(info['executionLog'])
-        wuLog = f.read()
-        f.close()
-        self.logger.debug("Execution log for '%s': %s" % (
-            procId, wuLog), extra={'id': self.scifloid})
+        self.logAggregator.finish(procId, info['executionLog'])
 
         # add provenance info for workUnit execution started
         self.annDoc.addProcessFinished(procId, info['pidFile'])
 
+        # record runtime for future scheduling
+        if self.runtimeHistory is not None and \
+                info['workerStatus'] == doneStatus:
+            self.runtimeHistory.update(self.getRuntimeHistoryKey(procId),
+                                       info['endTime'] - info['startTime'])
+
         # write inidividual results to result files
         numOutputs = 1
         if not isinstance(info['result'], Exception):
-            for i in self.sciflo._flowProcessesProcess:
-                if procId == i.get('id'):
-                    outputElt = i.xpath('./sf:outputs',
-                                        namespaces=self.sciflo._namespacePrefixDict)[0]
-                    numOutputs = len(outputElt.getchildren())
+            numOutputs = self.numOutputsDict.get(procId, 1)
         if numOutputs == 1:
             resFile = os.path.join(info['workDir'], 'workunit_result-0.txt')
-            f = open(resFile, 'w')
-            f.write("%s\n" % info['result'])
-            f.close()
+            if isinstance(info['result'], ResultRef):
+                info['result'].writeText(resFile)
+            else:
+                f = open(resFile, 'w')
+                f.write("%s\n" % info['result'])
+                f.close()
         else:
+            result = loadResultRef(info['result'])
             for i in range(numOutputs):
                 resFile = os.path.join(info['workDir'],
                                        'workunit_result-%d.txt' % i)
                 f = open(resFile, 'w')
-                f.write("%s\n" % info['result'][i])
+                f.write("%s\n" % result[i])
                 f.close()
 
         # handle errors otherwise handle results
@@ -763,29 +1109,14 @@ with status '%s'.  Handling result." %
         # update global outputs
         self.updateGlobalOutputs(procId)
 
-        # resolve and spawn waiting work units
-        self.resolveAndSpawn()
-
-        # log what's still waiting
-        waitingProcs = [i for i in self.procIds
-                        if isinstance(self.applyResultsDict[i], WorkUnitConfig)]
-        self.logger.debug("'%s' detects %i work units that are waiting to run \
-in sciflo '%s': %s" % (procId, len(waitingProcs), self.scifloName,
-                       waitingProcs), extra={'id': self.scifloid})
-
-        # check to see if a result has been set for all work units;
-        # if so, set done flag
-        allResultsSet = True
-        noResultsYet = []
-        for thisProcId in self.procIds:
-            if isinstance(self.resultsDict[thisProcId], NoResult):
-                allResultsSet = False
-                noResultsYet.append(thisProcId)
-                # break
-        self.logger.debug("No results yet in sciflo '%s': %s" %
-                          (self.scifloName, noResultsYet),
-                          extra={'id': self.scifloid})
-        if allResultsSet:
+        # resolve and spawn work units waiting on this one
+        self.resolveAndSpawn(procId)
+
+        # if a result has been set for all work units, set done flag
+        self.logger.debug("'%s' detects %i work units without results in \
+sciflo '%s'." % (procId, len(self.noResultsYet), self.scifloName),
+            extra={'id': self.scifloid})
+        if len(self.noResultsYet) == 0:
             self.event.set()
             return
 
@@ -799,17 +1130,8 @@ in sciflo '%s': %s" % (procId, len(waitingProcs), self.scifloName,
     def handleResult(self, procId, info):
         """Handle result."""
 
-        # get our own pdict
-        if self.cacheName is None:
-            pdict = None
-        else:
-            try:
-                pdict = PersistentDict(self.cacheName, pickleVals=True)
-            except Exception as e:
-                self.logger.debug("Got exception trying to get PersistentDict \
-for handleResult() for procId '%s' in sciflo '%s': %s.  No cache will be used."
-                                  % (procId, self.scifloName, e), extra={'id': self.scifloid})
-                pdict = None
+        # pooled connections are safe to share with the callback threads
+        pdict = self.pdict
 
         # get res
         res = info['result']
@@ -830,13 +1152,16 @@ for handleResult() for procId '%s' in sciflo '%s': %s.  No cache will be used."
 
         # run post exec
         info = workUnitInfo(info, status=postExecutionStatus)
-        updateJson(info['jsonFile'], info, stringifyKeys=STRINGIFY_FIELDS,
-                   ubt=self.publicizeUbt,
-                   publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
-                   pickleKeys=PICKLE_FIELDS)
+        self.statusWriter.update(info['jsonFile'], info,
+                                 stringifyKeys=STRINGIFY_FIELDS,
+                                 ubt=self.publicizeUbt,
+                                 publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
+                                 pickleKeys=PICKLE_FIELDS)
         self.updateStatus('WorkUnit status for "%s": %s' %
                           (procId, postExecutionStatus), info)
         postExecList = self.postExecResultsDict[procId]
+        if len(postExecList) > 0:
+            res = loadResultRef(res)
         for i, (resIdx, funcStr) in enumerate(postExecList):
             postExecHex = hashlib.md5('{}_{}_{}'.format(info['hex'], resIdx,
                                                         funcStr).encode('utf-8')).hexdigest()
@@ -845,7 +1170,7 @@ for handleResult() for procId '%s' in sciflo '%s': %s.  No cache will be used."
             # get from cache
             if self.lookupCache and pdict is not None:
                 try:
-                    pePklFile = pdict[postExecHex]
+                    pePklFile = getEntryPath(pdict[postExecHex])
                 except Exception as e:
                     self.logger.debug("Got error trying to retrieve cached \
 post execution for '%s' in sciflo '%s': %s\n%s" % (procId, self.scifloName,
@@ -863,6 +1188,7 @@ post execution for '%s' in sciflo '%s': %s\n%s" % (procId, self.scifloName,
 '%s': %s" % (procId, self.scifloName, (resIdx, funcStr)),
                     extra={'id': self.scifloid})
                 try:
+                    postExecStart = time.time()
                     postExecHandler = PostExecutionHandler(resIdx, funcStr,
                                                            info['workDir'])
                     postExecResult = PostExecResult(
@@ -871,8 +1197,14 @@ post execution for '%s' in sciflo '%s': %s\n%s" % (procId, self.scifloName,
                     # write post exec result to cache
                     if pdict is not None:
                         try:
-                            updatePdict(pdict, postExecHex,
-                                        os.path.join(info['workDir'], "%s.pkl" % postExecHex))
+                            pePklFile = os.path.join(info['workDir'],
+                                                     "%s.pkl" % postExecHex)
+                            peBytes = None
+                            if os.path.exists(pePklFile):
+                                peBytes = os.path.getsize(pePklFile)
+                            updatePdict(pdict, postExecHex, makeCacheEntry(
+                                pePklFile, info['workDir'], peBytes,
+                                time.time() - postExecStart))
                             self.logger.debug("Wrote post execution results \
 for '%s' to cache under '%s' in sciflo '%s'." %
                                               (procId, postExecHex,
@@ -916,28 +1248,44 @@ post execution results for '%s' to cache under '%s' in sciflo '%s': %s\n%s" %
             thisInfo = workUnitInfo(copy.deepcopy(info),
                                     result=publicizeResultFiles(info['result'],
                                                                 self.ubt))
-            updateJson(thisInfo['jsonFile'], thisInfo,
-                       stringifyKeys=STRINGIFY_FIELDS, ubt=self.publicizeUbt,
-                       publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
-                       pickleKeys=PICKLE_FIELDS)
+            self.statusWriter.update(thisInfo['jsonFile'], thisInfo,
+                                     stringifyKeys=STRINGIFY_FIELDS,
+                                     ubt=self.publicizeUbt,
+                                     publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
+                                     pickleKeys=PICKLE_FIELDS)
             self.updateStatus('WorkUnit status for "%s": %s' %
                               (procId, thisInfo['workerStatus']), thisInfo)
         else:
-            self.annDoc.addProcessResult(procId, res)
-            updateJson(info['jsonFile'], info, stringifyKeys=STRINGIFY_FIELDS,
-                       ubt=self.publicizeUbt,
-                       publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
-                       pickleKeys=PICKLE_FIELDS)
+            self.annDoc.addProcessResult(procId, info['result'])
+            self.statusWriter.update(info['jsonFile'], info,
+                                     stringifyKeys=STRINGIFY_FIELDS,
+                                     ubt=self.publicizeUbt,
+                                     publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
+                                     pickleKeys=PICKLE_FIELDS)
             self.updateStatus('WorkUnit status for "%s": %s' %
                               (procId, info['workerStatus']), info)
 
-        # write to cache if defined and not cached
+        # write to cache if defined, not cached and worth caching; the cache
+        # points at the json file so it has to be on disk first
         if pdict is not None and info['workerStatus'] == doneStatus:
             try:
-                updatePdict(pdict, self.hexDict[procId], info['jsonFile'])
-                self.logger.debug("Wrote info for '%s' to cache under '%s' \
-in sciflo '%s'." % (procId, self.hexDict[procId], self.scifloName),
-                    extra={'id': self.scifloid})
+                self.statusWriter.flush(info['jsonFile'])
+                runtime = info['endTime'] - info['startTime']
+                wuBytes = getDirSize(info['workDir'])
+                admitted, reason = self.cachePolicy.admit(
+                    procId, self.wuTypeDict.get(procId, None), runtime,
+                    wuBytes)
+                if admitted:
+                    setCacheRecord(pdict, self.hexDict[procId],
+                                   info['jsonFile'], info['workDir'],
+                                   wuBytes, runtime)
+                    self.logger.debug("Wrote info for '%s' to cache under \
+'%s' in sciflo '%s'." % (procId, self.hexDict[procId], self.scifloName),
+                        extra={'id': self.scifloid})
+                else:
+                    self.logger.debug("Not caching '%s' in sciflo '%s': %s." %
+                                      (procId, self.scifloName, reason),
+                                      extra={'id': self.scifloid})
             except Exception as e:
                 self.logger.debug("Got exception trying to write info for \
 '%s' to cache under '%s' in sciflo '%s': %s\n%s" % (procId,
@@ -966,10 +1314,11 @@ in sciflo '%s'." % (procId, self.hexDict[procId], self.scifloName),
             else:
                 status = exceptionStatus
             info = workUnitInfo(info, status=status)
-            updateJson(info['jsonFile'], info, stringifyKeys=STRINGIFY_FIELDS,
-                       ubt=self.publicizeUbt,
-                       publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
-                       pickleKeys=PICKLE_FIELDS)
+            self.statusWriter.update(info['jsonFile'], info,
+                                     stringifyKeys=STRINGIFY_FIELDS,
+                                     ubt=self.publicizeUbt,
+                                     publicizeKeys=WORK_UNIT_PUBLICIZE_FIELDS,
+                                     pickleKeys=PICKLE_FIELDS)
             self.updateStatus('WorkUnit status for "%s": %s' %
                               (procId, status), info)
         except Exception as e:
@@ -1012,16 +1361,20 @@ for '%s' in sciflo '%s': %s\n%s" % (procId, self.scifloName, str(e), getTb()),
                     #set in output
                     self.output[i] = resolvingRes
 
-    def resolveAndSpawn(self):
-        """Resolve and spawn waiting work units."""
+    def resolveAndSpawn(self, procId):
+        """Resolve and spawn work units that were waiting on procId."""
 
-        for thisProcId in self.procIds:
+        wus = []
+        for thisProcId in self.depIndex.markDone(procId):
             wuConfig = self.applyResultsDict[thisProcId]
             if not isinstance(wuConfig, WorkUnitConfig):
                 continue
 
             # resolve args
             resolved = self.resolveArgs(wuConfig)
+            if not resolved:
+                raise ScifloExecutorError("Failed to resolve args for '%s' \
+after all its dependencies completed." % thisProcId)
 
             # if resolved execute work unit using pool
             if resolved:
@@ -1031,28 +1384,52 @@ for '%s' in sciflo '%s': %s\n%s" % (procId, self.scifloName, str(e), getTb()),
                 self.procIdWuidMap[thisProcId] = wu.getWuid()
                 self.updateStatus('WorkUnit status for "%s": %s' %
                                   (thisProcId, readyStatus), wu.getInfo())
-                self.dispatchWorker(wu)
+                wus.append(wu)
 
-                # update sciflo info
-                self.updateScifloInfo(procIdWuidMap=self.procIdWuidMap)
+        # update sciflo info
+        if wus:
+            self.updateScifloInfo(procIdWuidMap=self.procIdWuidMap)
+            self.queueReady(wus)
+
+
+def getExecutorClass(executorMode=None, configFile=None):
+    """Return executor class for executor mode; waiter blocks in a waiter
+    process and asyncio runs an event loop."""
+
+    if executorMode is None:
+        executorMode = GridServiceConfig(configFile).getExecutorMode()
+    if executorMode == 'waiter':
+        return ScifloExecutor
+    elif executorMode == 'asyncio':
+        from .asyncExecutor import AsyncScifloExecutor
+        return AsyncScifloExecutor
+    else:
+        raise ScifloExecutorError("Unknown executor mode: %s" % executorMode)
 
 
 def _runSciflo(sflStr, args={}, workers=4, timeout=None, workDir=None,
                outputDir=None, scifloid=None, publicize=False,
                configFile=None, lookupCache=True, configDict={},
                writeGraph=True, statusUpdateFunc=None, emailNotify=None,
-               outputUrl=None):
+               outputUrl=None, workerMode=None, maxTasksPerWorker=None,
+               poolSizing=None, minWorkers=None, maxWorkers=None,
+               executorMode=None):
     """Run sciflo in a forked process."""
 
     s = None
     try:
-        s = ScifloExecutor(sflStr, args=args, workers=workers,
+        executorClass = getExecutorClass(executorMode, configFile)
+        s = executorClass(sflStr, args=args, workers=workers,
                            workerTimeout=timeout, workDir=workDir,
                            outputDir=outputDir, scifloid=scifloid,
                            publicize=publicize, configFile=configFile,
                            lookupCache=lookupCache, configDict=configDict,
                            writeGraph=writeGraph, statusUpdateFunc=statusUpdateFunc,
-                           emailNotify=emailNotify, outputUrl=outputUrl)
+                           emailNotify=emailNotify, outputUrl=outputUrl,
+                           workerMode=workerMode,
+                           maxTasksPerWorker=maxTasksPerWorker,
+                           poolSizing=poolSizing, minWorkers=minWorkers,
+                           maxWorkers=maxWorkers)
         s.execute()
         result = s.output
     except Exception as e:
@@ -1067,13 +1444,16 @@ def runSciflo(sflStr, args={}, workers=4, timeout=None, workDir=None,
               outputDir=None, scifloid=None, publicize=False,
               configFile=None, lookupCache=True, configDict={},
               writeGraph=True, statusUpdateFunc=None, emailNotify=None,
-              outputUrl=None):
+              outputUrl=None, workerMode=None, maxTasksPerWorker=None,
+              poolSizing=None, minWorkers=None, maxWorkers=None,
+              executorMode=None):
     """Garbage collect after running _runSciflo."""
 
     res = _runSciflo(sflStr, args, workers, timeout, workDir, outputDir,
                      scifloid, publicize, configFile, lookupCache,
                      configDict, writeGraph, statusUpdateFunc,
-                     emailNotify, outputUrl)
+                     emailNotify, outputUrl, workerMode, maxTasksPerWorker,
+                     poolSizing, minWorkers, maxWorkers, executorMode)
     gc.collect()
     if isinstance(res, Exception):
         raise res
@@ -0,0 +1,186 @@
+# -----------------------------------------------------------------------------
+# Name:        flowCache.py
+# Purpose:     Cache of validated and resolved sciflo documents.
+#
+# Created:     Sun Oct 18 03:04:26 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import hashlib
+import tempfile
+import threading
+import pickle as pickle
+from collections import OrderedDict
+
+from sciflo.utils import getUserInfo, validateDirectory
+
+# version of the compiled flow format; bumping it changes every key so
+# flows compiled by an older sciflo are never reused
+COMPILED_FLOW_VERSION = 1
+
+# compiled flow caches of this process by cache dir
+_FlowCaches = {}
+_FlowCachesLock = threading.Lock()
+
+
+def getFlowKey(xmlString, schemaXml, inputsXml=None, configValidators=None):
+    """Return cache key of a sciflo document validated against schemaXml.
+    Flows whose resolution depends on more than where global inputs go are
+    also keyed by inputsXml, the serialized global inputs.  Resolution
+    writes conversion functions from the user config into the flow, so
+    configValidators, the user config file's path, mtime and size, are part
+    of the key too."""
+
+    h = hashlib.sha256(b'sciflo-compiled-flow-v%d\0' % COMPILED_FLOW_VERSION)
+    if configValidators is not None:
+        configValidators = repr(configValidators)
+    for part in (schemaXml, xmlString, inputsXml, configValidators):
+        if part is None:
+            h.update(b'N')
+            continue
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        h.update(b'%d:' % len(part))
+        h.update(part)
+    return h.hexdigest()
+
+
+def getGraphKey(dot):
+    """Return cache key of the svg rendering of a resolved flow's dot
+    commands string."""
+
+    h = hashlib.sha256(b'sciflo-flow-graph-v%d\0' % COMPILED_FLOW_VERSION)
+    h.update(dot.encode('utf-8'))
+    return h.hexdigest()
+
+
+class CompiledFlowCache(object):
+    """Cache of compiled sciflo documents, kept in an in-process LRU and,
+    if cacheDir is set, in pickle files there shared by all processes of the
+    user.  An entry is a dict:
+
+      validated   - True; the document passed schema validation
+      rebindable  - True if a resolved flow can be reused for any global
+                    inputs, False if it has to be keyed by them too and None
+                    if it was never resolved
+      compiled    - pickled resolution state or None
+      dotSvg      - svg rendering of the flow graph or None
+
+    Entries keyed by getGraphKey only hold a dotSvg so flows that resolve to
+    the same graph share its rendering.
+    """
+
+    def __init__(self, cacheDir=None, maxEntries=64, maxFiles=1024):
+        """Constructor."""
+
+        self.cacheDir = cacheDir
+        if self.cacheDir is not None:
+            validateDirectory(self.cacheDir, noExceptionRaise=True)
+            if not os.access(self.cacheDir, os.W_OK):
+                # memory only
+                self.cacheDir = None
+        self.maxEntries = maxEntries
+        self.maxFiles = maxFiles
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def getStats(self):
+        """Return dict of counters."""
+
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits,
+                    'misses': self.misses}
+
+    def _file(self, key):
+        return os.path.join(self.cacheDir, '%s.pkl' % key)
+
+    def get(self, key):
+        """Return entry for key or None."""
+
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        if self.cacheDir is not None:
+            try:
+                with open(self._file(key), 'rb') as f:
+                    entry = pickle.load(f)
+            except Exception:
+                entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._put(key, entry)
+        return entry
+
+    def _put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxEntries:
+            self._entries.popitem(last=False)
+
+    def update(self, key, **fields):
+        """Set fields of key's entry, creating it if needed, and write it
+        through to the cache dir.  Returns the entry."""
+
+        with self._lock:
+            entry = dict(self._entries.get(key, None) or
+                         {'validated': True, 'rebindable': None,
+                          'compiled': None, 'dotSvg': None})
+            entry.update(fields)
+            self._put(key, entry)
+        if self.cacheDir is not None:
+            self._write(key, entry)
+        return entry
+
+    def _write(self, key, entry):
+        """Write entry atomically, then prune the oldest files past
+        maxFiles."""
+
+        try:
+            fd, tmpFile = tempfile.mkstemp(dir=self.cacheDir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpFile, self._file(key))
+        except (IOError, OSError):
+            return
+        try:
+            files = [os.path.join(self.cacheDir, i)
+                     for i in os.listdir(self.cacheDir) if i.endswith('.pkl')]
+            if len(files) <= self.maxFiles:
+                return
+            files.sort(key=lambda i: os.path.getmtime(i))
+            for file in files[:len(files) - self.maxFiles]:
+                os.unlink(file)
+        except (IOError, OSError):
+            pass
+
+    def clear(self):
+        """Drop all entries of this process."""
+
+        with self._lock:
+            self._entries.clear()
+
+
+def getCompiledFlowCache(gsc):
+    """Return this process' CompiledFlowCache configured by grid service
+    config gsc or None if it is disabled."""
+
+    if not gsc.getUseCompiledFlowCache():
+        return None
+    cacheDir = gsc.getCompiledFlowCacheDir()
+    if cacheDir is None:
+        cacheDir = os.path.join(getUserInfo()[2], 'compiledFlows')
+    with _FlowCachesLock:
+        flowCache = _FlowCaches.get(cacheDir, None)
+        if flowCache is None:
+            flowCache = _FlowCaches[cacheDir] = CompiledFlowCache(
+                cacheDir, gsc.getCompiledFlowCacheSize())
+        return flowCache
@@ -4,20 +4,23 @@ import traceback
 import pwd
 import logging
 import time
-import json
 import pickle as pickle
 from random import Random
 from queue import Empty
 from lxml.etree import _ElementStringResult, _Element, tostring, fromstring
 from celery.exceptions import SoftTimeLimitExceeded
 
-from sciflo.utils import copyToDir, validateDirectory, getTempfileName
-from sciflo.event.pdict import PersistentDict
+from sciflo.utils import (copyToDir, validateDirectory, getTempfileName,
+                          getStageCache)
+from sciflo.event.pdict import PooledPersistentDict
 from .config import GridServiceConfig
 from .utils import (generateWorkUnitId, getTb, getThreadSafeRandomObject,
-                    getAbsPathForResultFiles, generateScifloId)
+                    getAbsPathForResultFiles, generateScifloId,
+                    unpickleThis)
 from .workUnitTypeMapping import WorkUnitTypeMapping
 from .workUnit import workUnitInfo
+from .cacheRecords import getCacheRecord, WorkUnitCacheRecords
+from .resultStore import loadResultRefs, isResultAvailable
 from .status import *
 
 DEBUG_PROCESSING = False
@@ -77,6 +80,36 @@ class CelerySoftTimeLimitExceeded(Exception):
     pass
 
 
+def normalizeChildResult(res):
+    """Convert a (result, traceback) tuple returned by a work unit into
+    something that can be pickled back to the parent."""
+
+    # catch SoftTimeLimitExceeded from celery since it can't be pickled
+    if isinstance(res[0], SoftTimeLimitExceeded):
+        res = (CelerySoftTimeLimitExceeded(str(res[0])), res[1])
+
+    if isinstance(res[0], _Element):
+        tres = tostring(res[0], encoding='unicode')
+    elif isinstance(res[0], _ElementStringResult):
+        tres = str(res[0])
+    else:
+        tres = res[0]
+    return (tres, res[1])
+
+
+def getChildDiedResult(exitStatus):
+    """Return the (result, traceback) tuple for a child that died without
+    returning a result.  A SIGKILL means a seg fault or an explicit kill;
+    anything else is assumed to be a user cancellation through SIGINT."""
+
+    import signal
+    if exitStatus == signal.SIGKILL:
+        return (ForkedChildDied(FORKED_CHILD_DIED_MESSAGE),
+                FORKED_CHILD_DIED_MESSAGE)
+    else:
+        return (CancelledWorkUnit(CANCELLED_MESSAGE), CANCELLED_MESSAGE)
+
+
 def forkChildAndRun(q, func, *args, **kargs):
     """Fork a child and run function.  Detects if process was killed or
     segfaulted.  If q is None, return results.  Otherwise, q is an output
@@ -87,19 +120,7 @@ def forkChildAndRun(q, func, *args, **kargs):
     if not pid:
         os.setpgid(0, 0)
         try:
-            res = func(*args, **kargs)
-
-            # catch SoftTimeLimitExceeded from celery since it can't be pickled
-            if isinstance(res[0], SoftTimeLimitExceeded):
-                res = (CelerySoftTimeLimitExceeded(str(res[0])), res[1])
-
-            if isinstance(res[0], _Element):
-                tres = tostring(res[0], encoding='unicode')
-            elif isinstance(res[0], _ElementStringResult):
-                tres = str(res[0])
-            else:
-                tres = res[0]
-            res = (tres, res[1])
+            res = normalizeChildResult(func(*args, **kargs))
             with open(pickleFile, 'wb') as p:
                 try:
                     pickle.dump(res, p)
@@ -135,14 +156,7 @@ def forkChildAndRun(q, func, *args, **kargs):
             if os.path.exists(pickleFile):
                 os.unlink(pickleFile)
         else:
-            # child died with SIGKILL (seg fault or explicitly killed)
-            if exitStatus == signal.SIGKILL:
-                res = (ForkedChildDied(FORKED_CHILD_DIED_MESSAGE),
-                       FORKED_CHILD_DIED_MESSAGE)
-            # otherwise assume user cancelled explicitly through SIGINT
-            else:
-                res = (CancelledWorkUnit(CANCELLED_MESSAGE),
-                       CANCELLED_MESSAGE)
+            res = getChildDiedResult(exitStatus)
     except Exception as e:
         res = (RuntimeError("Got exception in forChildAndRun: %s" % e),
                getTb())
@@ -156,13 +170,55 @@ def forkChildAndRun(q, func, *args, **kargs):
 
 def runWorkUnit(wu):
     """Run work unit.  Returns a tuple contain (result, traceback).  If result
-    is not an Exception, traceback will be None."""
-    return wu.run()
+    is not an Exception, traceback will be None.  Args that refer to stored
+    results are loaded first and a large result is put in the work unit's
+    result store, if it has one, and returned as a reference."""
+
+    wu.setArgs(loadResultRefs(wu.getArgs()))
+    res = wu.run()
+    store = wu.getResultStore()
+    if store is not None:
+        res = normalizeChildResult(res)
+        res = (store.put(res[0]), res[1])
+    return res
+
 
+def getCachedResult(wu, record):
+    """Return the (procId, info) result of work unit wu from its cache
+    record, or None if the record is not of a work unit that finished or
+    refers to a stored result that was cleaned up."""
 
-def workUnitWorker(wu, cacheName, timeout):
+    wuid = wu.getWuid()
+    procId = wu.getProcId()
+    hex = wu.getHexDigest()
+    info = record.info
+    if info['status'] != doneStatus:
+        return None
+    result = record.getResult()
+
+    # a cached reference to a stored result that was cleaned up is a miss
+    if not isResultAvailable(result):
+        WORKER_LOGGER.debug("Cached result for '%s' under key '%s' refers to \
+a missing stored result: %s" % (procId, hex, result), extra={'id': wuid})
+        WorkUnitCacheRecords.invalidate(hex)
+        return None
+    WORKER_LOGGER.debug("Returning cached results for '%s' under key '%s'." %
+                        (procId, hex), extra={'id': wuid})
+    if not os.path.exists(wu._logFile):
+        with open(wu._logFile, 'w') as logFh:
+            logFh.write("This work unit's result was retrieved from a \
+previously cached execution: %s" % info['executionLog'])
+    return (procId, workUnitInfo(wu.getInfo(),
+                                 workerStatus=cachedStatus, startTime=0., endTime=0.,
+                                 result=result,
+                                 exceptionMessage=info['exceptionMessage'],
+                                 tracebackMessage=info['tracebackMessage']))
+
+
+def workUnitWorker(wu, cacheName, timeout, runner=None):
     """Worker function that runs a work unit accounting for a timeout.
-    Return the results.  Possible 'workerStatus' values: ['working', 'done',
+    If runner is defined, it is called with the work unit and timeout to
+    execute it instead of runWorkUnitInProcess().  Return the results.  Possible 'workerStatus' values: ['working', 'done',
     'cached', 'exception'].  Possible 'status' values: ['ready', 'sent',
     'called back', 'finalizing', 'done', 'exception']."""
 
@@ -176,7 +232,7 @@ def workUnitWorker(wu, cacheName, timeout):
             pdict = None
         else:
             try:
-                pdict = PersistentDict(cacheName, pickleVals=True)
+                pdict = PooledPersistentDict(cacheName, pickleVals=True)
             except Exception as e:
                 WORKER_LOGGER.debug("Caught exception trying to create pdict \
 for '%s': %s\n%s" % (procId, str(e), getTb()), extra={'id': wuid})
@@ -186,31 +242,16 @@ for '%s': %s\n%s" % (procId, str(e), getTb()), extra={'id': wuid})
         # just run the work unit
         if pdict is not None:
             try:
-                jsonFile = pdict[hex]
+                record = getCacheRecord(pdict, hex)
             except Exception as e:
                 WORKER_LOGGER.debug("Caught exception for '%s' trying to query \
 pdict with key '%s': %s\n%s" % (procId, hex, str(e), getTb()),
                     extra={'id': wuid})
-                jsonFile = None
-            if jsonFile is not None and os.path.exists(jsonFile):
-                with open(jsonFile) as jfh:
-                    val = jfh.read()
-                info = json.loads(val)
-            else:
-                info = None
-            if info is not None and info['status'] == doneStatus:
-                WORKER_LOGGER.debug("Returning cached results for '%s' under \
-key '%s'." % (procId, hex), extra={'id': wuid})
-                if not os.path.exists(wu._logFile):
-                    with open(wu._logFile, 'w') as logFh:
-                        logFh.write("This work unit's result was retrieved from a \
-previously cached execution: %s" % info['executionLog'])
-                return (procId, workUnitInfo(wu.getInfo(),
-                                             workerStatus=cachedStatus, startTime=0., endTime=0.,
-                                             result=pickle.loads(
-                                                 str(info['unpublicizedResult'])),
-                                             exceptionMessage=info['exceptionMessage'],
-                                             tracebackMessage=info['tracebackMessage']))
+                record = None
+            if record is not None:
+                cachedResult = getCachedResult(wu, record)
+                if cachedResult is not None:
+                    return cachedResult
 
     except Exception as e:
         WORKER_LOGGER.debug("Got error in workUnitWorker for '%s': %s\n%s" %
@@ -220,6 +261,43 @@ previously cached execution: %s" % info['executionLog'])
     # get info
     info = wu.getInfo()
 
+    # run in a forked process unless a persistent worker was handed to us
+    if runner is None:
+        runner = runWorkUnitInProcess
+
+    info = workUnitInfo(info, workerStatus=workingStatus,
+                        startTime=time.time())
+    gotError = True
+    try:
+        tmpRes = runner(wu, timeout)
+        # get abs paths
+        res = (getAbsPathForResultFiles(tmpRes[0], dir=wu.getWorkDir()),
+               tmpRes[1])
+        gotError = False
+    except ExecuteWorkUnitTimeoutError as e:
+        res = (e, None)
+    except Exception as e:
+        res = (e, getTb())
+    info = workUnitInfo(info, endTime=time.time())
+    if gotError or isinstance(res[0], Exception):
+        status = exceptionStatus
+        exceptionMessage = str(res[0])
+    else:
+        status = doneStatus
+        exceptionMessage = None
+    return (procId, workUnitInfo(info, workerStatus=status, result=res[0],
+                                 exceptionMessage=exceptionMessage,
+                                 tracebackMessage=res[1])
+            )
+
+
+def runWorkUnitInProcess(wu, timeout):
+    """Run work unit in a new process that forks a child to do the work.
+    Return the (result, traceback) tuple or raise ExecuteWorkUnitTimeoutError."""
+
+    wuid = wu.getWuid()
+    procId = wu.getProcId()
+
     # create process and queue for work unit execution
     import multiprocessing as mp
     q = mp.Queue()
@@ -239,47 +317,31 @@ previously cached execution: %s" % info['executionLog'])
 
     WORKER_LOGGER.debug("Starting process for '%s'." % procId,
                         extra={'id': wuid})
-    info = workUnitInfo(info, workerStatus=workingStatus,
-                        startTime=time.time())
     p.start()
     gotError = True
     try:
-        tmpRes = q.get(timeout=timeout)
-        # get abs paths
-        res = (getAbsPathForResultFiles(tmpRes[0], dir=wu.getWorkDir()),
-               tmpRes[1])
+        res = q.get(timeout=timeout)
         gotError = False
     except Empty as e:
-        res = (ExecuteWorkUnitTimeoutError("Got timeout error executing work \
-unit %s: %s" % (procId, e)), None)
-    except Exception as e:
-        res = (e, getTb())
-    WORKER_LOGGER.debug("Finished waiting on process for '%s'." % procId,
-                        extra={'id': wuid})
-    info = workUnitInfo(info, endTime=time.time())
-    if gotError:
-        WORKER_LOGGER.debug("Calling terminate() for '%s'." % procId,
+        raise ExecuteWorkUnitTimeoutError("Got timeout error executing work \
+unit %s: %s" % (procId, e))
+    finally:
+        WORKER_LOGGER.debug("Finished waiting on process for '%s'." % procId,
                             extra={'id': wuid})
-        if p.is_alive():
-            p.terminate()
-    WORKER_LOGGER.debug("Calling join() for '%s'." %
-                        procId, extra={'id': wuid})
-    p.join(timeout=0)
-    WORKER_LOGGER.debug("Finished join() for '%s'." % procId,
-                        extra={'id': wuid})
-    if gotError or isinstance(res[0], Exception):
-        status = exceptionStatus
-        exceptionMessage = str(res[0])
-    else:
-        status = doneStatus
-        exceptionMessage = None
-    return (procId, workUnitInfo(info, workerStatus=status, result=res[0],
-                                 exceptionMessage=exceptionMessage,
-                                 tracebackMessage=res[1])
-            )
+        if gotError:
+            WORKER_LOGGER.debug("Calling terminate() for '%s'." % procId,
+                                extra={'id': wuid})
+            if p.is_alive():
+                p.terminate()
+        WORKER_LOGGER.debug("Calling join() for '%s'." %
+                            procId, extra={'id': wuid})
+        p.join(timeout=0)
+        WORKER_LOGGER.debug("Finished join() for '%s'." % procId,
+                            extra={'id': wuid})
+    return res
 
 
-def workUnitCanceller(wu, cacheName, timeout):
+def workUnitCanceller(wu, cacheName, timeout, runner=None):
     """Worker function that cancels a work unit."""
 
     wuid = wu.getWuid()
@@ -325,14 +387,24 @@ def getWorkUnit(wuConfig, configFile=None, configDict={}):
     """Return work unit id and WorkUnit object from wuConfig.  Localizes
     any stage files."""
 
-    workDir = GridServiceConfig(configFile).getWorkUnitWorkDir()
+    gsc = GridServiceConfig(configFile)
+    workDir = gsc.getWorkUnitWorkDir()
     validateDirectory(workDir)
     procId = wuConfig.getId()
     wuType = wuConfig.getType()
     wuClass = WorkUnitTypeMapping.get(wuType, None)
     wuid = generateWorkUnitId()
     wuWorkDir = os.path.join(workDir, wuid)
-    copyToDir(wuConfig.getStageFiles(), wuWorkDir, unpackBundles=True)
+    if gsc.getUseStageCache():
+        stageCache = getStageCache(gsc.getStageCacheDir(),
+                                   gsc.getStageCacheHardlink(),
+                                   gsc.getStageCacheMaxBytes(),
+                                   gsc.getStageCacheMaxAge(),
+                                   gsc.getStageCachePruneInterval())
+    else:
+        stageCache = None
+    copyToDir(wuConfig.getStageFiles(), wuWorkDir, unpackBundles=True,
+              stageCache=stageCache)
     hex = wuConfig.getHexDigest()
     if wuClass is None:
         raise RuntimeError("Unimplemented WorkUnit subclass: %s" % wuType)
@@ -0,0 +1,156 @@
+# -----------------------------------------------------------------------------
+# Name:        logAggregator.py
+# Purpose:     Incremental aggregation of work unit execution logs.
+#
+# Created:     Sat Oct 17 19:40:22 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import threading
+
+from .utils import getTb
+
+READ_SIZE = 65536
+
+
+class CappedLog(object):
+    """Keep the first headSize and last tailSize bytes of a log file, reading
+    it a chunk at a time from where the last read stopped."""
+
+    def __init__(self, file, headSize=65536, tailSize=65536):
+        """Constructor."""
+
+        self.file = file
+        self.headSize = headSize
+        self.tailSize = tailSize
+        self.offset = 0
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.omitted = 0
+
+    def read(self):
+        """Read whatever was appended to the log file since the last read."""
+
+        try:
+            f = open(self.file, 'rb')
+        except (IOError, OSError):
+            return
+        with f:
+            # log was truncated or replaced; start over
+            if os.fstat(f.fileno()).st_size < self.offset:
+                self.offset = 0
+                self.head = bytearray()
+                self.tail = bytearray()
+                self.omitted = 0
+            f.seek(self.offset)
+            while True:
+                chunk = f.read(READ_SIZE)
+                if not chunk:
+                    break
+                self.offset += len(chunk)
+                room = self.headSize - len(self.head)
+                if room > 0:
+                    self.head += chunk[:room]
+                    chunk = chunk[room:]
+                self.tail += chunk
+                excess = len(self.tail) - self.tailSize
+                if excess > 0:
+                    del self.tail[:excess]
+                    self.omitted += excess
+
+    def getText(self):
+        """Return retained log text."""
+
+        if self.omitted:
+            text = b"%s\n... [%d bytes omitted] ...\n%s" % (
+                bytes(self.head), self.omitted, bytes(self.tail))
+        else:
+            text = bytes(self.head + self.tail)
+        return text.decode('utf-8', 'replace')
+
+
+class LogAggregator(object):
+    """Tail work unit execution logs in the background while the work units
+    run and write each one to logger, capped to its head and tail, once the
+    work unit is finished.  Logs are polled every interval seconds."""
+
+    def __init__(self, logger, logId, headSize=65536, tailSize=65536,
+                 interval=1.):
+        """Constructor."""
+
+        self.logger = logger
+        self.logId = logId
+        self.headSize = headSize
+        self.tailSize = tailSize
+        self.interval = interval
+        self._logs = {}
+        self._finished = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run,
+                                        name="LogAggregator")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def watch(self, procId, logFile):
+        """Start tailing procId's log file."""
+
+        with self._lock:
+            self._logs[procId] = CappedLog(logFile, self.headSize,
+                                           self.tailSize)
+
+    def finish(self, procId, logFile):
+        """Mark procId finished; its log is read to the end and written to the
+        logger by the background thread."""
+
+        with self._lock:
+            log = self._logs.pop(procId, None)
+            if log is None or log.file != logFile:
+                log = CappedLog(logFile, self.headSize, self.tailSize)
+            self._finished.append((procId, log))
+        self._wake.set()
+
+    def _emit(self, procId, log):
+        """Read rest of log and write it to the logger."""
+
+        log.read()
+        self.logger.debug("Execution log for '%s': %s" % (procId,
+                                                           log.getText()),
+                          extra={'id': self.logId})
+
+    def _poll(self):
+        """Read running logs and emit finished ones."""
+
+        with self._lock:
+            running = list(self._logs.values())
+            finished, self._finished = self._finished, []
+        for procId, log in finished:
+            try:
+                self._emit(procId, log)
+            except Exception as e:
+                self.logger.debug("Got error aggregating execution log for \
+'%s': %s\n%s" % (procId, str(e), getTb()), extra={'id': self.logId})
+        for log in running:
+            try:
+                log.read()
+            except Exception:
+                pass
+
+    def _run(self):
+        """Background loop."""
+
+        while not self._stop:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._poll()
+
+    def close(self):
+        """Stop background thread after writing finished logs.  Logs of work
+        units that never finished are dropped."""
+
+        self._stop = True
+        self._wake.set()
+        self._thread.join()
+        self._poll()
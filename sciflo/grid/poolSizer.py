@@ -0,0 +1,107 @@
+# -----------------------------------------------------------------------------
+# Name:        poolSizer.py
+# Purpose:     Resource-aware sizing of the sciflo worker pool.
+#
+# Created:     Sat Oct 17 11:20:15 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import time
+
+
+def getCpuCount():
+    """Return number of cpus usable by this process."""
+
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def getLoadAverage():
+    """Return 1 minute load average or None if unavailable."""
+
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+def getAvailableMemory(meminfo='/proc/meminfo'):
+    """Return available memory in bytes or None if unavailable."""
+
+    try:
+        with open(meminfo) as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class AdaptivePoolSizerError(Exception):
+    pass
+
+
+class AdaptivePoolSizer(object):
+    """Compute how many work units may run at once from the ready queue depth,
+    cpu count, load average and available memory, bounded by floor and
+    ceiling.  Resources are sampled at most once per interval seconds."""
+
+    def __init__(self, floor=1, ceiling=None, memoryPerWorker=256,
+                 interval=1.):
+        """Constructor.  memoryPerWorker is in MB."""
+
+        self.cpuCount = getCpuCount()
+        self.floor = max(1, int(floor))
+        if ceiling is None:
+            ceiling = self.cpuCount
+        self.ceiling = int(ceiling)
+        if self.ceiling < self.floor:
+            raise AdaptivePoolSizerError("Pool ceiling %d is less than floor \
+%d." % (self.ceiling, self.floor))
+        self.memoryPerWorker = memoryPerWorker * 1024 * 1024
+        self.interval = interval
+        self._lastSample = None
+        self._load = None
+        self._availMem = None
+        self.target = self.floor
+
+    def _sample(self):
+        """Sample load average and available memory if interval elapsed."""
+
+        now = time.time()
+        if self._lastSample is None or now - self._lastSample >= self.interval:
+            self._load = getLoadAverage()
+            self._availMem = getAvailableMemory()
+            self._lastSample = now
+
+    def getTarget(self, readyCount, inFlight):
+        """Return tuple of (target number of running work units, dict of the
+        inputs that went into the decision)."""
+
+        self._sample()
+        demand = inFlight + readyCount
+
+        # cpu: our running work units already count towards the load
+        if self._load is None:
+            cpuLimit = self.cpuCount
+        else:
+            cpuLimit = inFlight + int(max(0., self.cpuCount - self._load))
+
+        # memory: running work units already hold theirs
+        if self._availMem is None or self.memoryPerWorker <= 0:
+            memLimit = self.ceiling
+        else:
+            memLimit = inFlight + int(self._availMem // self.memoryPerWorker)
+
+        target = max(self.floor, min(self.ceiling, demand, cpuLimit,
+                                     memLimit))
+        self.target = target
+        return target, {'ready': readyCount, 'inFlight': inFlight,
+                        'cpus': self.cpuCount, 'load': self._load,
+                        'availMem': self._availMem, 'cpuLimit': cpuLimit,
+                        'memLimit': memLimit, 'floor': self.floor,
+                        'ceiling': self.ceiling}
@@ -17,6 +17,7 @@ import urllib.parse
 import os
 from string import Template
 import types
+import threading
 
 from sciflo.utils import (SCIFLO_NAMESPACE, XSD_NAMESPACE, PY_NAMESPACE,
                           FileConversionFunction, validateDirectory, getXmlEtree,
@@ -24,6 +25,15 @@ from sciflo.utils import (SCIFLO_NAMESPACE, XSD_NAMESPACE, PY_NAMESPACE,
                           LocalizingFunctionWrapper)
 from .utils import getFunction
 
+# conversion function registries by user config file, its validators and
+# the namespace prefixes of the xml doc
+_ConversionRegistries = {}
+_ConversionRegistriesLock = threading.Lock()
+
+# the working directory is shared by all flows running as threads of an
+# execution service; conversions that run in their output dir hold this
+_ChdirLock = threading.Lock()
+
 
 def parseNamespacePrefixAndTypeString(typeString):
     """Parse type string and return namespace key and type."""
@@ -40,15 +50,11 @@ def parseNamespacePrefixAndTypeString(typeString):
     return (nsprefix, val)
 
 
-def getConversionFunctionString(fromType, toType, namespacePrefixDict={}):
-    """Return a string indicating the proper conversion function.
-    Namespace prefixes are resolved from the namespacePrefixDict of the
-    xml doc."""
-
-    # force xpath type coersion
-    if isinstance(fromType, str) and \
-            re.search(r'^(sf:)?(xpath:)', fromType, re.IGNORECASE):
-        fromType = '*:*'
+def buildConversionFunctionRegistry(namespacePrefixDict, userConfigFile):
+    """Return (registry, convNsToPrefixDict) where registry maps
+    (from, to) type strings of the conversion functions config, overwritten
+    by the user config's conversion operators, to the conversion function
+    string."""
 
     # get conv func xml elt and ns prefix dict
     convFuncElt, convNsDict = getXmlEtree(CONVERSION_FUNCTIONS_CONFIG)
@@ -56,7 +62,6 @@ def getConversionFunctionString(fromType, toType, namespacePrefixDict={}):
         list(zip(list(convNsDict.values()), list(convNsDict.keys()))))
 
     # get overwrite conv funcs from user config
-    (userName, homeDir, userScifloDir, userConfigFile) = getUserInfo()
     userConfElt, userConfNsDict = getXmlEtree(userConfigFile)
     userConfNsToPrefixDict = dict(
         list(zip(list(userConfNsDict.values()), list(userConfNsDict.keys()))))
@@ -91,6 +96,63 @@ def getConversionFunctionString(fromType, toType, namespacePrefixDict={}):
         else:
             raise RuntimeError("Found more than one match.")
 
+    # index ops in document order; the first match wins as with xpath
+    registry = {}
+    for op in convFuncElt.xpath('.//_default:op', namespaces=convNsDict):
+        registry.setdefault((op.get('from'), op.get('to')), str(op.text))
+    return registry, convNsToPrefixDict
+
+
+def getUserConfigValidators():
+    """Return (userConfigFile, validators) where validators are the mtime and
+    size of the user config file or None if it doesn't exist."""
+
+    (userName, homeDir, userScifloDir, userConfigFile) = getUserInfo()
+    try:
+        st = os.stat(userConfigFile)
+        validators = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        validators = None
+    return userConfigFile, validators
+
+
+def getConversionFunctionRegistry(namespacePrefixDict):
+    """Return (registry, convNsToPrefixDict) for the namespace prefixes of a
+    xml doc, building it the first time and again whenever the user config
+    file changes."""
+
+    userConfigFile, validators = getUserConfigValidators()
+    key = (userConfigFile, validators,
+           frozenset(list(namespacePrefixDict.items())))
+    with _ConversionRegistriesLock:
+        registry = _ConversionRegistries.get(key, None)
+    if registry is not None:
+        return registry
+    registry = buildConversionFunctionRegistry(namespacePrefixDict,
+                                               userConfigFile)
+    with _ConversionRegistriesLock:
+        # drop registries built from an older user config
+        for k in [k for k in _ConversionRegistries
+                  if k[0] == userConfigFile and k[1] != validators]:
+            del _ConversionRegistries[k]
+        _ConversionRegistries[key] = registry
+    return registry
+
+
+def getConversionFunctionString(fromType, toType, namespacePrefixDict={}):
+    """Return a string indicating the proper conversion function.
+    Namespace prefixes are resolved from the namespacePrefixDict of the
+    xml doc."""
+
+    # force xpath type coersion
+    if isinstance(fromType, str) and \
+            re.search(r'^(sf:)?(xpath:)', fromType, re.IGNORECASE):
+        fromType = '*:*'
+
+    # get conversion function registry and ns prefix dict
+    registry, convNsToPrefixDict = getConversionFunctionRegistry(
+        namespacePrefixDict)
+
     # get fromType namespace prefix, type, and namespace
     (fromNsPrefix, fromTypeVal) = parseNamespacePrefixAndTypeString(fromType)
     if fromNsPrefix is None:
@@ -114,16 +176,15 @@ def getConversionFunctionString(fromType, toType, namespacePrefixDict={}):
     if namespacePrefixDict.get(toNsPrefix, None) == SCIFLO_NAMESPACE and toTypeVal.startswith('xpath:'):
         return toTypeVal
 
-    # xpath to find match
-    matches = convFuncElt.xpath(".//_default:op[@from='%s:%s' and @to='%s:%s']" %
-                                (fromNs, fromTypeVal, toNs, toTypeVal), namespaces=convNsDict)
-    if len(matches) == 0:
-        matches = convFuncElt.xpath(".//_default:op[@from='*:*' and @to='%s:%s']" %
-                                    (toNs, toTypeVal), namespaces=convNsDict)
-        if len(matches) == 0:
+    # look up match
+    to = '%s:%s' % (toNs, toTypeVal)
+    match = registry.get(('%s:%s' % (fromNs, fromTypeVal), to), None)
+    if match is None:
+        match = registry.get(('*:*', to), None)
+        if match is None:
             raise RuntimeError("Cannot find conversion function for %s:%s -> %s:%s." %
                                (fromNs, fromTypeVal, toNs, toTypeVal))
-    return str(matches[0].text)
+    return match
 
 
 # conversion functions config xml
@@ -164,18 +225,19 @@ class PostExecutionHandler(object):
         return '|'.join(map(str, [self._resultIndex, self._conversionFuncStr]))
 
     def execute(self, result, workDir):
-        """Wrapper for execute()."""
+        """Wrapper for execute().  Conversion functions may write files
+        relative to the working directory, so with an output dir they run
+        there one at a time."""
 
-        curDir = None
-        if self._outputDir is not None:
+        if self._outputDir is None:
+            return self._execute(result, workDir)
+        with _ChdirLock:
             curDir = os.getcwd()
             os.chdir(self._outputDir)
-        try:
-            retVal = self._execute(result, workDir)
-        finally:
-            if curDir:
+            try:
+                return self._execute(result, workDir)
+            finally:
                 os.chdir(curDir)
-        return retVal
 
     def _execute(self, result, workDir):
         """Perform the post execution function.  Pass in the entire result
@@ -0,0 +1,171 @@
+# -----------------------------------------------------------------------------
+# Name:        resultStore.py
+# Purpose:     Content-addressed store for large work unit results.
+#
+# Created:     Sat Oct 17 14:31:09 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import mmap
+import shutil
+import hashlib
+import tempfile
+import pickle as pickle
+
+from sciflo.utils import validateDirectory
+
+RESULT_REF_PREFIX = 'sciflo-result:sha256:'
+
+
+class ResultStoreError(Exception):
+    pass
+
+
+class ResultRef(str):
+    """Reference to a result held in a ResultStore.  It is a str, of the form
+    sciflo-result:sha256:<digest>, so that it can go anywhere a result is
+    stringified (JSON, annotated doc, logs, hex digests) without loading the
+    result.  Call load() to get the result itself."""
+
+    def __new__(cls, digest, path, size, kind):
+        obj = str.__new__(cls, "%s%s" % (RESULT_REF_PREFIX, digest))
+        obj.digest = digest
+        obj.path = path
+        obj.size = size
+        obj.kind = kind
+        return obj
+
+    def __getnewargs__(self):
+        return (self.digest, self.path, self.size, self.kind)
+
+    def exists(self):
+        """Return True if the stored result is still on disk."""
+        return os.path.isfile(self.path)
+
+    def load(self):
+        """Return stored result.  The file is memory-mapped and decoded in
+        place."""
+
+        if not self.exists():
+            raise ResultStoreError("Stored result %s is missing: %s" %
+                                   (self, self.path))
+        with open(self.path, 'rb') as f:
+            if self.size == 0:
+                return ''
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                if self.kind == 'str':
+                    return str(mm, 'utf-8')
+                else:
+                    return pickle.loads(mm)
+            finally:
+                mm.close()
+
+    def writeText(self, file):
+        """Write stored result followed by a newline to file, the same as
+        writing "%s\\n" % result.  Text results are copied without decoding."""
+
+        with open(file, 'w') as f:
+            if self.kind == 'str':
+                f.flush()
+                with open(self.path, 'rb') as src:
+                    shutil.copyfileobj(src, f.buffer)
+                f.write("\n")
+            else:
+                f.write("%s\n" % (self.load(),))
+
+
+def loadResultRef(result):
+    """Return result, loading it first if it is a ResultRef."""
+
+    if isinstance(result, ResultRef):
+        return result.load()
+    return result
+
+
+def loadResultRefs(args):
+    """Return args with any ResultRef items loaded, descending one level into
+    lists and tuples."""
+
+    if isinstance(args, ResultRef):
+        return args.load()
+    if isinstance(args, (list, tuple)) and \
+            any(isinstance(i, ResultRef) for i in args):
+        newArgs = [loadResultRef(i) for i in args]
+        if isinstance(args, tuple):
+            return tuple(newArgs)
+        elif type(args) is list:
+            return newArgs
+        else:
+            args = copyList(args)
+            args[:] = newArgs
+            return args
+    return args
+
+
+def copyList(l):
+    """Return shallow copy of list subclass, keeping instance attributes."""
+
+    newList = l.__class__.__new__(l.__class__)
+    newList.__dict__.update(l.__dict__)
+    newList.extend(l)
+    return newList
+
+
+def isResultAvailable(result):
+    """Return False if result refers to a stored result that is gone."""
+
+    if isinstance(result, ResultRef):
+        return result.exists()
+    return True
+
+
+class ResultStore(object):
+    """Store of results at or above threshold bytes, addressed by the sha256 of
+    their content.  Text results are stored as UTF-8; anything else is
+    pickled."""
+
+    def __init__(self, dir, threshold=1048576):
+        """Constructor."""
+
+        self.dir = os.path.abspath(dir)
+        self.threshold = threshold
+
+    def put(self, result):
+        """Store result if it is large enough and return a ResultRef to it.
+        Otherwise return result."""
+
+        if isinstance(result, (ResultRef, Exception)) or result is None:
+            return result
+        if isinstance(result, str):
+            kind = 'str'
+            try:
+                data = result.encode('utf-8')
+            except UnicodeError:
+                return result
+        else:
+            kind = 'pickle'
+            try:
+                data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                return result
+        if len(data) < self.threshold:
+            return result
+        digest = hashlib.sha256(kind.encode('utf-8') + b'\0' +
+                                data).hexdigest()
+        path = os.path.join(self.dir, digest[:2], digest)
+        if not os.path.isfile(path):
+            validateDirectory(os.path.dirname(path))
+            fd, tmpFile = tempfile.mkstemp(dir=os.path.dirname(path),
+                                           prefix='.%s.' % digest)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.chmod(tmpFile, 0o644)
+                os.replace(tmpFile, path)
+            except:
+                if os.path.exists(tmpFile):
+                    os.unlink(tmpFile)
+                raise
+        return ResultRef(digest, path, len(data), kind)
@@ -0,0 +1,250 @@
+# -----------------------------------------------------------------------------
+# Name:        scheduler.py
+# Purpose:     Dependency tracking for sciflo work unit scheduling.
+#
+# Created:     Sat Oct 17 09:14:02 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import json
+import time
+import heapq
+import itertools
+from tempfile import mkstemp
+
+from sciflo.utils import getUserInfo
+from .doc import UnresolvedArgument, DocumentArgsList
+
+
+def getProducerIds(argsList):
+    """Return the set of procIds that an args list depends on.  Descends one
+    level into DocumentArgsList args, the same as ScifloExecutor.resolveArgs()."""
+
+    producers = set()
+    for arg in argsList:
+        if isinstance(arg, DocumentArgsList) and \
+                not isinstance(argsList, DocumentArgsList):
+            for arg2 in arg:
+                if isinstance(arg2, UnresolvedArgument):
+                    producers.add(arg2.getId())
+        elif isinstance(arg, UnresolvedArgument):
+            producers.add(arg.getId())
+    return producers
+
+
+class DependencyIndexError(Exception):
+    pass
+
+
+class DependencyIndex(object):
+    """Reverse-dependency index of a resolved sciflo.  Maps each producer
+    procId to the work units consuming its output and keeps a per-consumer
+    count of producers that have not yet completed."""
+
+    def __init__(self, wuConfigs):
+        """Constructor."""
+
+        self._consumers = {}
+        self._unresolvedCounts = {}
+        for w in wuConfigs:
+            procId = w.getId()
+            producers = getProducerIds(w.getArgs())
+            if procId in producers:
+                raise DependencyIndexError("Work unit '%s' depends on its own \
+output." % procId)
+            self._unresolvedCounts[procId] = len(producers)
+            for producer in producers:
+                self._consumers.setdefault(producer, []).append(procId)
+
+    def getCriticalPathLengths(self, weights={}, defaultWeight=1.):
+        """Return dict of procId to the weight of the heaviest path from
+        procId to the end of the flow, procId included.  Must be called before
+        any markDone()."""
+
+        # order producers after all their consumers (reverse topological)
+        order = []
+        visited = set()
+        for root in self._unresolvedCounts:
+            if root in visited:
+                continue
+            visited.add(root)
+            stack = [(root, iter(self._consumers.get(root, [])))]
+            while stack:
+                procId, consumers = stack[-1]
+                for consumer in consumers:
+                    if consumer not in visited:
+                        visited.add(consumer)
+                        stack.append((consumer,
+                                      iter(self._consumers.get(consumer, []))))
+                        break
+                else:
+                    stack.pop()
+                    order.append(procId)
+
+        lengths = {}
+        for procId in order:
+            downstream = [lengths.get(c, 0.)
+                          for c in self._consumers.get(procId, [])]
+            lengths[procId] = weights.get(procId, defaultWeight) + \
+                max(downstream + [0.])
+        return lengths
+
+    def getConsumers(self, procId):
+        """Return list of procIds consuming the output of procId."""
+        return self._consumers.get(procId, [])
+
+    def getUnresolvedCount(self, procId):
+        """Return number of producers procId is still waiting on."""
+        return self._unresolvedCounts[procId]
+
+    def isReady(self, procId):
+        """Return True if procId is not waiting on any producer."""
+        return self._unresolvedCounts[procId] == 0
+
+    def markDone(self, procId):
+        """Record that procId produced its result.  Return list of consumer
+        procIds that became ready as a result, in flow order."""
+
+        ready = []
+        for consumer in self._consumers.pop(procId, []):
+            self._unresolvedCounts[consumer] -= 1
+            if self._unresolvedCounts[consumer] == 0:
+                ready.append(consumer)
+        return ready
+
+
+class ReadyQueue(object):
+    """Queue of ready work units ordered by priority with a bounded number of
+    work units in flight.  Higher priorities pop first; equal priorities pop
+    in the order they were pushed."""
+
+    def __init__(self, window=4):
+        """Constructor."""
+
+        self._heap = []
+        self._counter = itertools.count()
+        self.window = window
+        self.inFlight = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, item, priority=()):
+        """Add ready item.  priority is a number or tuple of numbers."""
+
+        if not isinstance(priority, tuple):
+            priority = (priority,)
+        key = tuple(-i for i in priority)
+        heapq.heappush(self._heap, (key, next(self._counter), item))
+
+    def popReady(self):
+        """Pop and return list of items that fit in the in-flight window.
+        They are counted as in flight until taskDone() is called."""
+
+        items = []
+        while self._heap and self.inFlight < self.window:
+            items.append(heapq.heappop(self._heap)[2])
+            self.inFlight += 1
+        return items
+
+    def taskDone(self):
+        """Record that an item that was in flight finished."""
+        self.inFlight -= 1
+
+
+class RuntimeHistory(object):
+    """Exponentially weighted moving averages of work unit runtimes persisted
+    to a JSON file in the user's sciflo directory.  Each key maps to its
+    average and when it was last updated; keys not updated for maxAge
+    seconds are pruned on save and at most maxEntries of the most recently
+    updated are kept."""
+
+    def __init__(self, file=None, alpha=.3, maxEntries=4096,
+                 maxAge=90 * 86400.):
+        """Constructor."""
+
+        if file is None:
+            file = os.path.join(getUserInfo()[2], 'runtimeHistory.json')
+        self.file = file
+        self.alpha = alpha
+        self.maxEntries = maxEntries
+        self.maxAge = maxAge
+        self._runtimes = self._load()
+        self._updates = {}
+
+    def _load(self):
+        """Return runtimes in history file: dict of key -> [average, last
+        update time]."""
+
+        try:
+            with open(self.file) as f:
+                mtime = os.fstat(f.fileno()).st_mtime
+                runtimes = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if not isinstance(runtimes, dict):
+            return {}
+        for key, val in list(runtimes.items()):
+            if isinstance(val, (int, float)):
+                # written before entries had update times
+                runtimes[key] = [val, mtime]
+            elif not isinstance(val, list) or len(val) != 2:
+                del runtimes[key]
+        return runtimes
+
+    def get(self, key, default=None):
+        """Return average runtime for key."""
+
+        val = self._runtimes.get(key, None)
+        if val is None:
+            return default
+        return val[0]
+
+    def update(self, key, runtime):
+        """Fold runtime into the average for key."""
+
+        self._runtimes[key] = [self._fold(self.get(key), [runtime]),
+                               time.time()]
+        self._updates.setdefault(key, []).append(runtime)
+
+    def _fold(self, average, runtimes):
+        """Return average with runtimes folded in."""
+
+        for runtime in runtimes:
+            if average is None:
+                average = runtime
+            else:
+                average = self.alpha * runtime + (1. - self.alpha) * average
+        return average
+
+    def _prune(self, runtimes, now):
+        """Drop stale keys and the least recently updated ones over
+        maxEntries."""
+
+        for key in [key for key, val in runtimes.items()
+                    if now - val[1] > self.maxAge]:
+            del runtimes[key]
+        if len(runtimes) > self.maxEntries:
+            keys = sorted(runtimes, key=lambda key: runtimes[key][1])
+            for key in keys[:len(runtimes) - self.maxEntries]:
+                del runtimes[key]
+
+    def save(self):
+        """Merge our updates into history file on disk."""
+
+        if len(self._updates) == 0:
+            return
+        now = time.time()
+        runtimes = self._load()
+        for key, keyRuntimes in self._updates.items():
+            average = runtimes.get(key, [None])[0]
+            runtimes[key] = [self._fold(average, keyRuntimes), now]
+        self._prune(runtimes, now)
+        fd, tmpFile = mkstemp(dir=os.path.dirname(self.file),
+                              prefix='.runtimeHistory')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(runtimes, f)
+        os.replace(tmpFile, self.file)
+        self._runtimes = runtimes
+        self._updates = {}
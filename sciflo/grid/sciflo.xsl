@@ -23,11 +23,30 @@
         <xs:element ref="sf:inputs"/>
         <xs:element ref="sf:outputs"/>
         <xs:element ref="sf:processes"/>
+        <xs:element ref="sf:cachePolicy" minOccurs="0" maxOccurs="1"/>
       </xs:sequence>
       <xs:attribute name="id" type="xs:string" use="required"/>
       <xs:attribute name="version" type="xs:string" use="optional"/>
     </xs:complexType>
   </xs:element>
+  <xs:element name="cachePolicy">
+    <xs:annotation>
+      <xs:documentation>Work unit cache thresholds per work unit type.</xs:documentation>
+    </xs:annotation>
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element ref="sf:type" minOccurs="0" maxOccurs="unbounded"/>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+  <xs:element name="type">
+    <xs:complexType>
+      <xs:attribute name="name" type="xs:string" use="required"/>
+      <xs:attribute name="cache" type="xs:boolean" use="optional"/>
+      <xs:attribute name="minRuntime" type="xs:decimal" use="optional"/>
+      <xs:attribute name="maxBytes" type="xs:integer" use="optional"/>
+    </xs:complexType>
+  </xs:element>
   <xs:element name="title" type="xs:string"/>
   <xs:element name="icon" type="xs:string"/>
   <xs:element name="description" type="xs:string"/>
@@ -67,6 +86,10 @@
       <xs:attribute name="group" type="xs:string" use="optional"/>
       <xs:attribute name="optional" type="xs:string" use="optional"/>
       <xs:attribute name="paletteIcon" type="xs:string" use="optional"/>
+      <xs:attribute name="priority" type="xs:integer" use="optional"/>
+      <xs:attribute name="cache" type="xs:boolean" use="optional"/>
+      <xs:attribute name="cacheMinRuntime" type="xs:decimal" use="optional"/>
+      <xs:attribute name="cacheMaxBytes" type="xs:integer" use="optional"/>
     </xs:complexType>
   </xs:element>
   <xs:element name="operator">
@@ -0,0 +1,102 @@
+# -----------------------------------------------------------------------------
+# Name:        statusWriter.py
+# Purpose:     Coalescing background writer for sciflo status JSON files.
+#
+# Created:     Sat Oct 17 13:05:48 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import threading
+import logging
+
+from .utils import updateJson, getTb
+
+
+def snapshot(obj):
+    """Return a copy of obj that later in-place changes to obj, or to the
+    dicts and lists directly inside it, do not show up in."""
+
+    if not isinstance(obj, dict):
+        return obj
+    snap = {}
+    for k, v in obj.items():
+        if isinstance(v, dict):
+            v = dict(v)
+        elif isinstance(v, list):
+            v = list(v)
+        snap[k] = v
+    return snap
+
+
+class StatusWriter(object):
+    """Write status JSON files in the background.  Only the latest update for
+    each file is kept and files are written every interval seconds.  If
+    interval is 0, updates are written immediately."""
+
+    def __init__(self, interval=1., logger=None, logId='StatusWriter'):
+        """Constructor."""
+
+        self.interval = interval
+        if logger is None:
+            logger = logging.getLogger('StatusWriter')
+        self.logger = logger
+        self.logId = logId
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._writeLock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run,
+                                            name="StatusWriter")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def update(self, jsonFile, obj, **kargs):
+        """Queue obj to be written to jsonFile.  kargs are passed on to
+        updateJson()."""
+
+        if self._thread is None:
+            with self._writeLock:
+                updateJson(jsonFile, obj, **kargs)
+            return
+        with self._lock:
+            self._pending[jsonFile] = (snapshot(obj), kargs)
+
+    def _write(self, batch):
+        """Write batch of pending updates."""
+
+        for jsonFile, (obj, kargs) in batch.items():
+            try:
+                updateJson(jsonFile, obj, **kargs)
+            except Exception as e:
+                self.logger.debug("Got error writing status to '%s': %s\n%s" %
+                                  (jsonFile, str(e), getTb()),
+                                  extra={'id': self.logId})
+
+    def flush(self, jsonFile=None):
+        """Write pending updates now; all of them or only jsonFile's."""
+
+        with self._writeLock:
+            with self._lock:
+                if jsonFile is None:
+                    batch, self._pending = self._pending, {}
+                elif jsonFile in self._pending:
+                    batch = {jsonFile: self._pending.pop(jsonFile)}
+                else:
+                    batch = {}
+            self._write(batch)
+
+    def _run(self):
+        """Background loop."""
+
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def close(self):
+        """Stop background thread and write anything pending."""
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
@@ -18,10 +18,10 @@ import traceback
 import sys
 import json
 import copy
+import tempfile
 from random import Random
 from socket import getfqdn
 import pickle as pickle
-from collections import UserList
 from urllib.parse import urlparse
 from io import StringIO
 import lxml.etree
@@ -38,6 +38,7 @@ from sciflo.utils import (getListFromUnknownObject, ScifloConfigParser, SCIFLO_N
                           linkFile, runDot, getXmlEtree, validateDirectory,
                           getThreadSafeRandomObject)
 import sciflo.grid
+from .digest import getCanonicalHexDigest
 
 # fqdn digest
 FQDN_DIGEST = hashlib.md5(getfqdn().encode('utf-8')).hexdigest()
@@ -75,36 +76,35 @@ def publicizeResultFiles(result, ubt, dir=None):
 
 def getAbsPathForResultFiles(result, dir=None):
     """Recursively loop through result and check for filenames.  If detected,
-    replace with abs path to that file.  Return the converted result."""
+    replace with abs path to that file.  Return the converted result.
+    Relative paths are resolved against dir; the working directory is left
+    alone since this can run in threads of the executor process.  Empty and
+    '.' results are not paths and are returned unchanged."""
 
-    # store curdir
-    try:
-        curDir = os.getcwd()
-    except:
-        curDir = None
-
-    # change dir if need be
-    if dir is not None:
-        os.chdir(dir)
-
-    try:
-        # if string, try to get url
-        if isinstance(result, (bytes, str)):
-            if os.path.exists(result):
-                result = os.path.abspath(result)
-        elif isinstance(result, (tuple, list)):
-            newResult = []
-            for r1 in result:
-                newResult.append(getAbsPathForResultFiles(r1))
-            if isinstance(result, tuple):
-                result = tuple(newResult)
+    # if string, try to get abs path
+    if isinstance(result, (bytes, str)):
+        if result in ('', '.', b'', b'.'):
+            return result
+        path = result
+        if dir is not None:
+            if isinstance(result, bytes):
+                path = os.path.join(os.fsencode(dir), result)
             else:
-                result = newResult
+                path = os.path.join(dir, result)
+        try:
+            exists = os.path.exists(path)
+        except (TypeError, ValueError):
+            exists = False
+        if exists:
+            result = os.path.abspath(path)
+    elif isinstance(result, (tuple, list)):
+        newResult = []
+        for r1 in result:
+            newResult.append(getAbsPathForResultFiles(r1, dir=dir))
+        if isinstance(result, tuple):
+            result = tuple(newResult)
         else:
-            pass
-    finally:
-        if dir and curDir:
-            os.chdir(curDir)
+            result = newResult
     return result
 
 
@@ -134,37 +134,48 @@ def loadJson(jsonFile, unpickleKeys=[]):
 
 def updateJson(jsonFile, obj, stringifyKeys=[], ubt=None, publicizeKeys=[],
                pickleKeys=[]):
-    """Write obj in JSON format to file or update it."""
+    """Write obj in JSON format to file or update it.  The file is replaced
+    atomically so readers never see a partial write."""
 
-    # publicize
-    if isinstance(obj, dict) and ubt is not None and \
-            len(publicizeKeys) > 0:
-        obj = copy.deepcopy(obj)
-        for k in publicizeKeys:
-            obj[k] = publicizeResultFiles(obj[k], ubt)
+    # work on a copy; converted values replace, never modify, the originals
+    if isinstance(obj, dict) and (len(stringifyKeys) > 0 or
+                                  len(pickleKeys) > 0 or
+                                  (ubt is not None and len(publicizeKeys) > 0)):
+        obj = dict(obj)
 
-    # make sure result is stringified
-    if isinstance(obj, dict) and len(stringifyKeys) > 0:
-        obj = copy.deepcopy(obj)
+        # publicize
+        if ubt is not None:
+            for k in publicizeKeys:
+                obj[k] = publicizeResultFiles(obj[k], ubt)
+
+        # make sure result is stringified
         for k in stringifyKeys:
             if obj.get(k, None) is not None:
                 obj[k] = str(obj[k])
 
-    # pickle keys
-    if isinstance(obj, dict) and len(pickleKeys) > 0:
-        obj = copy.deepcopy(obj)
+        # pickle keys
         for k in pickleKeys:
             if obj.get(k, None) is not None:
                 obj[k] = pickleThis(obj[k])
 
-    validateDirectory(os.path.dirname(jsonFile))
-    with open(jsonFile, 'w') as f:
-        try:
-            json.dump(obj, f)
-        except:
-            print("Got exception dumping json:\n{}".format(
-                pformat(obj, indent=2)))
-            raise
+    jsonDir = os.path.dirname(jsonFile)
+    validateDirectory(jsonDir)
+    fd, tmpFile = tempfile.mkstemp(dir=jsonDir, prefix='.%s.' %
+                                   os.path.basename(jsonFile))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            try:
+                json.dump(obj, f)
+            except:
+                print("Got exception dumping json:\n{}".format(
+                    pformat(obj, indent=2)))
+                raise
+        os.chmod(tmpFile, 0o644)
+        os.replace(tmpFile, jsonFile)
+    except:
+        if os.path.exists(tmpFile):
+            os.unlink(tmpFile)
+        raise
 
 
 def updatePdict(pdict, k, v):
@@ -177,6 +188,19 @@ def updatePdict(pdict, k, v):
         print(("Got exception trying to update pdict key '%s': %s" % (k, str(e))))
 
 
+def getDirSize(path):
+    """Return total bytes of the files under a directory."""
+
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for f in files:
+            try:
+                size += os.lstat(os.path.join(root, f)).st_size
+            except OSError:
+                pass
+    return size
+
+
 def runFuncWithRetriesAndSleep(retries, sleep, f, *args, **kargs):
     """Run a function in a retry loop with sleeps."""
 
@@ -263,44 +287,18 @@ def generateScifloId(): return generateUniqueId('scifloid')
 def generateWorkUnitConfigId(): return generateUniqueId('workunitconfigid')
 
 
-def getArgsString(args):
-    """Return string representation of args."""
-
-    retString = ''
-    if isinstance(args, (list, tuple, set, UserList)):
-        for arg in args:
-            retString += getArgsString(arg)
-        return retString
-    elif isinstance(args, dict):
-        keys = list(args.keys())
-        keys.sort()
-        for key in keys:
-            retString += "%s|%s" % (key, getArgsString(args[key]))
-        return retString
-    else:
-        return str(args)
-
-
-def getStageFilesString(stageFiles):
-    """Return stage files basenames."""
+def generateWorkUnitHexDigest(owner, type, call, args, stageFiles, postExecIds):
+    """Return a canonical hex digest of the objects passed in.  Stage files
+    count by basename."""
 
-    stageFilesStr = ''
-    for file in stageFiles:
+    stageFileNames = []
+    for file in getListFromUnknownObject(stageFiles):
         if file is None:
-            stageFilesStr += 'None'
+            stageFileNames.append(None)
         else:
-            stageFilesStr += os.path.basename(urlparse(file)[2])
-    return stageFilesStr
-
-
-def generateWorkUnitHexDigest(owner, type, call, args, stageFiles, postExecIds):
-    """Return a md5 hex digest of the objects passed in."""
-
-    # get md5 hex digest
-    return hashlib.md5("%s %s %s %s %s %s" % (owner, type, call, getArgsString(args),
-                                              getStageFilesString(
-                                                  getListFromUnknownObject(stageFiles)),
-                                              getArgsString(postExecIds))).hexdigest()
+            stageFileNames.append(os.path.basename(urlparse(file)[2]))
+    return getCanonicalHexDigest([owner, type, call, args, stageFileNames,
+                                  postExecIds])
 
 
 def verifyExecutable(path):
@@ -344,13 +342,9 @@ def unpickleThis(this):
 
 
 def getHexDigest(args):
-    """Return a md5 hex digest of the objects passed in."""
-
-    # create string from args
-    argsString = str(getArgsString(getListFromUnknownObject(args)))
+    """Return a canonical hex digest of the objects passed in."""
 
-    # get md5 hex digest
-    return hashlib.md5(argsString.encode('utf-8')).hexdigest()
+    return getCanonicalHexDigest(getListFromUnknownObject(args))
 
 
 def getFunction(funcStr, addToSysPath=None):
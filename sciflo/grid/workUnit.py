@@ -75,6 +75,7 @@ class WorkUnit(object):
         self._hexDigest = hexDigest
         self._configDict = configDict
         self._cancelFlag = False
+        self._resultStore = None
         if not validateDirectory(self._workDir):  # make sure workDir exists
             raise WorkUnitError(
                 "Couldn't create work unit work directory: %s." % self._workDir)
@@ -97,6 +98,10 @@ class WorkUnit(object):
     def getInfo(self): return self._info
     def setInfoItem(self, k, v): self._info[k] = v
     def getInfoItem(self, k): return self._info[k]
+    def getArgs(self): return self._args
+    def setArgs(self, args): self._args = args
+    def getResultStore(self): return self._resultStore
+    def setResultStore(self, store): self._resultStore = store
 
     def run(self):
         """Fork and execute the work unit."""
@@ -0,0 +1,323 @@
+# -----------------------------------------------------------------------------
+# Name:        workerPool.py
+# Purpose:     Pool of long-lived, pre-forked work unit worker processes.
+#
+# Created:     Sat Oct 17 10:02:37 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import sys
+import signal
+import threading
+import multiprocessing as mp
+from queue import Queue
+
+from .utils import getTb
+from .funcs import (runWorkUnit, normalizeChildResult, getChildDiedResult,
+                    ExecuteWorkUnitTimeoutError, WORKER_LOGGER)
+
+
+class PersistentWorkerPoolError(Exception):
+    pass
+
+
+def persistentWorkerLoop(conn):
+    """Main loop of a persistent worker process.  Receive work units over
+    conn, run them and send back the (result, traceback) tuple.  Exit when
+    None is received or the parent goes away."""
+
+    # put ourselves and any executables we run in our own process group
+    os.setpgid(0, 0)
+    while True:
+        try:
+            wu = conn.recv()
+        except (EOFError, OSError):
+            break
+        if wu is None:
+            break
+
+        # work units change cwd, PATH and sys.path; restore them so that
+        # the next work unit starts clean
+        cwd = os.getcwd()
+        envPath = os.environ.get('PATH', '')
+        sysPath = list(sys.path)
+        try:
+            res = normalizeChildResult(runWorkUnit(wu))
+        except Exception as e:
+            res = (e, getTb())
+        finally:
+            os.chdir(cwd)
+            os.environ['PATH'] = envPath
+            sys.path[:] = sysPath
+        try:
+            conn.send(res)
+        except (EOFError, OSError):
+            break
+        except Exception:
+            conn.send((RuntimeError(str(res[0])), res[1]))
+    os._exit(0)
+
+
+class PersistentWorker(object):
+    """A long-lived worker process that runs work units sent over a pipe.
+    The process is started on demand and recycled after it dies or after
+    maxTasks work units."""
+
+    def __init__(self, maxTasks=None):
+        """Constructor."""
+
+        self._maxTasks = maxTasks
+        self._process = None
+        self._conn = None
+        self._taskCount = 0
+
+    def start(self):
+        """Start worker process."""
+
+        parentConn, childConn = mp.Pipe()
+        self._process = mp.Process(target=persistentWorkerLoop,
+                                   name="PersistentWorker", args=[childConn])
+        self._process.start()
+        childConn.close()
+        self._conn = parentConn
+        self._taskCount = 0
+
+    def isAlive(self):
+        """Return True if worker process is running."""
+        return self._process is not None and self._process.is_alive()
+
+    def sendSignal(self, signum=signal.SIGKILL):
+        """Send signal to worker process group without reaping it."""
+
+        process = self._process
+        if process is None:
+            return
+        try:
+            os.killpg(process.pid, signum)
+        except OSError:
+            pass
+
+    def kill(self):
+        """Kill worker process and anything it spawned."""
+
+        if self._process is None:
+            return
+        self.sendSignal(signal.SIGKILL)
+        self._reap()
+
+    def stop(self):
+        """Ask worker process to exit."""
+
+        if self._process is None:
+            return
+        try:
+            self._conn.send(None)
+        except (EOFError, OSError):
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self.kill()
+        else:
+            self._reap()
+
+    def _reap(self):
+        """Join worker process and return its exit code."""
+
+        self._process.join()
+        exitCode = self._process.exitcode
+        self._conn.close()
+        self._process = None
+        self._conn = None
+        return exitCode
+
+    def run(self, wu, timeout):
+        """Run work unit in worker process.  Return the (result, traceback)
+        tuple or raise ExecuteWorkUnitTimeoutError."""
+
+        if not self.isAlive() or (self._maxTasks is not None and
+                                  self._taskCount >= self._maxTasks):
+            self.stop()
+            self.start()
+        wuid = wu.getWuid()
+        procId = wu.getProcId()
+        WORKER_LOGGER.debug("Sending '%s' to persistent worker %d." %
+                            (procId, self._process.pid), extra={'id': wuid})
+        self._taskCount += 1
+        try:
+            self._conn.send(wu)
+        except (EOFError, OSError):
+            # worker went away between tasks; replace it and try once more
+            self._reap()
+            self.start()
+            self._taskCount += 1
+            self._conn.send(wu)
+        if not self._conn.poll(timeout):
+            self.kill()
+            raise ExecuteWorkUnitTimeoutError("Got timeout error executing \
+work unit %s after %s seconds." % (procId, timeout))
+        try:
+            return self._conn.recv()
+        except (EOFError, OSError):
+            # worker died; same detection as forkChildAndRun()
+            exitCode = self._reap()
+            WORKER_LOGGER.debug("Persistent worker died with exit code %s \
+running '%s'." % (exitCode, procId), extra={'id': wuid})
+            if exitCode is not None and exitCode < 0:
+                exitCode = -exitCode
+            return getChildDiedResult(exitCode)
+
+
+class PersistentApplyResult(object):
+    """Result of PersistentWorkerPool.apply_async().  Mirrors the parts of
+    multiprocessing.pool.ApplyResult used by sciflo."""
+
+    def __init__(self, callback=None):
+        """Constructor."""
+
+        self._callback = callback
+        self._event = threading.Event()
+        self._success = None
+        self._value = None
+
+    def ready(self):
+        return self._event.is_set()
+
+    def successful(self):
+        if not self.ready():
+            raise ValueError("%r not ready" % self)
+        return self._success
+
+    def wait(self, timeout=None):
+        self._event.wait(timeout)
+
+    def get(self, timeout=None):
+        self.wait(timeout)
+        if not self.ready():
+            raise mp.TimeoutError
+        if self._success:
+            return self._value
+        else:
+            raise self._value
+
+    def _set(self, success, value):
+        self._success, self._value = success, value
+        if self._callback and self._success:
+            self._callback(self._value)
+        self._event.set()
+
+
+class PersistentWorkerPool(object):
+    """Pool of persistent work unit workers.  Each slot is a thread owning one
+    PersistentWorker.  Functions submitted with apply_async() run in the
+    slot thread and are passed the worker's run() method as the 'runner'
+    keyword argument.  Only the first size slots take tasks; resize() grows
+    or shrinks that number up to processes."""
+
+    def __init__(self, processes=4, maxTasksPerWorker=None, size=None):
+        """Constructor."""
+
+        if processes < 1:
+            raise PersistentWorkerPoolError("Number of processes must be at \
+least 1.")
+        if size is None:
+            size = processes
+        self._processes = processes
+        self._size = max(1, min(size, processes))
+        self._sizeCond = threading.Condition()
+        self._taskQueue = Queue()
+        self._state = 'running'
+        self._workers = []
+        self._threads = []
+
+        # fork the initial workers before starting any threads; the rest are
+        # started when their slot is first used
+        for i in range(processes):
+            worker = PersistentWorker(maxTasksPerWorker)
+            if i < self._size:
+                worker.start()
+            self._workers.append(worker)
+        for i, worker in enumerate(self._workers):
+            t = threading.Thread(target=self._slotLoop, args=[i, worker],
+                                 name="PersistentWorkerSlot-%d" % i)
+            t.daemon = True
+            t.start()
+            self._threads.append(t)
+
+    def _slotLoop(self, slot, worker):
+        """Run tasks from the task queue using worker."""
+
+        while True:
+            # idle slots beyond the current size give up their worker
+            if slot >= self._size and self._state == 'running':
+                worker.stop()
+            with self._sizeCond:
+                while slot >= self._size and self._state == 'running':
+                    self._sizeCond.wait()
+            task = self._taskQueue.get()
+            if task is None:
+                break
+            func, args, kwds, result = task
+            if self._state == 'terminated':
+                result._set(False, PersistentWorkerPoolError("Pool was \
+terminated."))
+                continue
+            kwds = dict(kwds, runner=worker.run)
+            try:
+                value = (True, func(*args, **kwds))
+            except Exception as e:
+                value = (False, e)
+            try:
+                result._set(*value)
+            except Exception as e:
+                WORKER_LOGGER.debug("Got error running callback: %s\n%s" %
+                                    (str(e), getTb()), extra={'id': 'pool'})
+        worker.stop()
+
+    def resize(self, size):
+        """Set number of slots taking tasks, between 1 and processes."""
+
+        with self._sizeCond:
+            self._size = max(1, min(size, self._processes))
+            self._sizeCond.notify_all()
+
+    def getSize(self):
+        """Return number of slots taking tasks."""
+        return self._size
+
+    def apply_async(self, func, args=(), kwds={}, callback=None):
+        """Run func(*args, **kwds) in the next free slot."""
+
+        if self._state != 'running':
+            raise ValueError("Pool not running")
+        result = PersistentApplyResult(callback)
+        self._taskQueue.put((func, args, kwds, result))
+        return result
+
+    def close(self):
+        """Stop accepting tasks; slots exit once queued tasks are done."""
+
+        with self._sizeCond:
+            if self._state == 'running':
+                self._state = 'closed'
+                for t in self._threads:
+                    self._taskQueue.put(None)
+                self._sizeCond.notify_all()
+
+    def terminate(self):
+        """Stop accepting tasks and kill worker processes."""
+
+        self.close()
+        self._state = 'terminated'
+
+        # slot threads reap their own workers
+        for worker in self._workers:
+            worker.sendSignal(signal.SIGKILL)
+
+    def join(self):
+        """Wait for slots to exit."""
+
+        if self._state == 'running':
+            raise ValueError("Pool is still running")
+        for t in self._threads:
+            t.join()
@@ -10,3 +10,4 @@ from .bundler import *
 from . import validators
 from . import interfaceUtils
 from .mail import *
+from .stageCache import StageCache, StageCacheError, getStageCache
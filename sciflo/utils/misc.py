@@ -154,31 +154,28 @@ def extractZipfile(file, dir=".", verbose=False):
     namelist = z.namelist()
     dirlist = [x for x in namelist if x.endswith('/')]
     filelist = [x for x in namelist if not x.endswith('/')]
-    pushd = os.getcwd()
     if not os.path.isdir(dir):
         os.mkdir(dir)
-    os.chdir(dir)
     # create directory structure
     dirlist.sort()
     for dirs in dirlist:
         dirs = dirs.split('/')
-        prefix = ''
-        for dir in dirs:
-            dirname = os.path.join(prefix, dir)
-            if dir and not os.path.isdir(dirname):
+        prefix = dir
+        for d in dirs:
+            dirname = os.path.join(prefix, d)
+            if d and not os.path.isdir(dirname):
                 os.mkdir(dirname)
             prefix = dirname
     # extract files
     for fn in filelist:
         try:
-            fnDir = os.path.dirname(fn)
-            if fnDir not in ['', '.'] and not os.path.isdir(fnDir):
+            fnDir = os.path.join(dir, os.path.dirname(fn))
+            if not os.path.isdir(fnDir):
                 os.makedirs(fnDir)
-            z.extract(fn)
+            z.extract(fn, dir)
         finally:
             if verbose:
                 print(fn)
-    os.chdir(pushd)
     return namelist
 
 
@@ -236,70 +233,64 @@ def unpackBundle(bundleFile, dir=None, forceError=False, loc=None):
     configuration.  Return True upon success.
     """
 
+    if not dir:
+        dir = '.'
     cmd = isBundle(bundleFile, returnCmd=True)
-    if dir:
-        curDir = os.getcwd()
-    else:
-        curDir = None
     if cmd:
-        try:
-            if dir:
-                os.chdir(dir)
-            namelist = cmd(bundleFile)
-
-            # install if this is a python package
-            packageDir = isPythonPackageInstaller(namelist)
-            if packageDir:
-                if loc is not None and not installFromAllowed(loc):
-                    raise FetchNotAllowedError("Install from %s not allowed.  Modify the 'allowCodeInstallFrom' entry \
+        namelist = cmd(bundleFile, dir)
+
+        # install if this is a python package
+        packageDir = isPythonPackageInstaller(namelist)
+        if packageDir:
+            if loc is not None and not installFromAllowed(loc):
+                raise FetchNotAllowedError("Install from %s not allowed.  Modify the 'allowCodeInstallFrom' entry \
 in your sciflo configuration." % loc)
-                # special directories
-                userPubPackageDir = getUserPubPackagesDir()
-                md5dir = os.path.join(userPubPackageDir, 'MD5SUMS')
-                if not os.path.isdir(md5dir):
-                    os.makedirs(md5dir)
-
-                # get md5sum and check if it is already here
-                with open(bundleFile) as f:
-                    bundleMd5 = hashlib.md5(f.read()).hexdigest()
-                md5file = os.path.join(md5dir, bundleMd5)
-                if not os.path.exists(md5file):
-                    # create install script
-                    os.chdir(packageDir)
-                    installScriptFile = './sflInstall.sh'
-                    with open(installScriptFile, 'w') as installScript:
-                        installCmdList = ["python setup.py install", "--install-purelib=%s" % userPubPackageDir,
-                                          "--install-platlib=%s" % userPubPackageDir]
-                        installScript.write('''#!/bin/sh\n%s\nif [ "$?" -eq "0" ]; then echo $? > SFL_INSTALL_SUCCESS; fi'''
-                                            % ' '.join(installCmdList))
-                    os.chmod(installScriptFile, 0o755)
-
-                    # run install script
-                    p = Popen(installScriptFile, shell=True, env=os.environ)
-                    try:
-                        sts = p.wait()  # wait for child to terminate and get status
-                    except Exception as e:
-                        pass
-
-                    # check if install failed
-                    if not os.path.exists('SFL_INSTALL_SUCCESS'):
-                        raise RuntimeError(
-                            "Failed to install %s." % packageDir)
-
-                    # write to package db
-                    with open(md5file, 'w') as f:
-                        f.write("%s\n" % packageDir)
-
-                    # cleanup
-                    os.chdir('..')
-                    shutil.rmtree(packageDir)
+            # special directories
+            userPubPackageDir = getUserPubPackagesDir()
+            md5dir = os.path.join(userPubPackageDir, 'MD5SUMS')
+            if not os.path.isdir(md5dir):
+                os.makedirs(md5dir)
+
+            # get md5sum and check if it is already here
+            with open(bundleFile, 'rb') as f:
+                bundleMd5 = hashlib.md5(f.read()).hexdigest()
+            md5file = os.path.join(md5dir, bundleMd5)
+            packagePath = os.path.join(dir, packageDir)
+            if not os.path.exists(md5file):
+                # create install script
+                installScriptFile = os.path.join(packagePath, 'sflInstall.sh')
+                with open(installScriptFile, 'w') as installScript:
+                    installCmdList = ["python setup.py install", "--install-purelib=%s" % userPubPackageDir,
+                                      "--install-platlib=%s" % userPubPackageDir]
+                    installScript.write('''#!/bin/sh\n%s\nif [ "$?" -eq "0" ]; then echo $? > SFL_INSTALL_SUCCESS; fi'''
+                                        % ' '.join(installCmdList))
+                os.chmod(installScriptFile, 0o755)
+
+                # run install script in the package dir; the process' cwd
+                # is shared by all flows of an execution service
+                p = Popen('./sflInstall.sh', shell=True, env=os.environ,
+                          cwd=packagePath)
+                try:
+                    sts = p.wait()  # wait for child to terminate and get status
+                except Exception as e:
+                    pass
 
-                else:
-                    print(
-                        ("Package %s already installed and is the latest version." % packageDir))
-        finally:
-            if dir:
-                os.chdir(curDir)
+                # check if install failed
+                if not os.path.exists(os.path.join(packagePath,
+                                                   'SFL_INSTALL_SUCCESS')):
+                    raise RuntimeError(
+                        "Failed to install %s." % packageDir)
+
+                # write to package db
+                with open(md5file, 'w') as f:
+                    f.write("%s\n" % packageDir)
+
+                # cleanup
+                shutil.rmtree(packagePath)
+
+            else:
+                print(
+                    ("Package %s already installed and is the latest version." % packageDir))
         return True
     if forceError:
         raise RuntimeError(
@@ -308,10 +299,11 @@ in your sciflo configuration." % loc)
         return False
 
 
-def copyToDir(fileList, destDir, unpackBundles=False):
+def copyToDir(fileList, destDir, unpackBundles=False, stageCache=None):
     """Generic function to stage a list of files/dirs to the specified directory.
     Generalized to handle urls.  If unpackBundles is set, will look for any
-    '.tar', '.tar.gz', '.tgz', '.zip', '.tar.bz2', or '.tbz2' and unpack them."""
+    '.tar', '.tar.gz', '.tgz', '.zip', '.tar.bz2', or '.tbz2' and unpack them.
+    Files and urls are staged through stageCache (a StageCache) if given."""
 
     # validate destination directory
     if not validateDirectory(destDir, noExceptionRaise=True):
@@ -332,6 +324,14 @@ def copyToDir(fileList, destDir, unpackBundles=False):
                 raise FetchNotAllowedError("Fetch from %s not allowed.  Modify the 'allowCodeFetchFrom' entry \
 in your sciflo configuration." % loc)
 
+            if stageCache is not None:
+                try:
+                    stageCache.stage(item, destDir, unpackBundles, loc)
+                except Exception as e:
+                    print(("Got exception trying to retrieve url %s to %s: %s" %
+                           (item, destDir, e)))
+                continue
+
             try:
                 # get urllib filehandle
                 f = urllib.request.urlopen(item)
@@ -355,6 +355,9 @@ in your sciflo configuration." % loc)
                 print(("Got exception trying to retrieve url %s to %s: %s" %
                        (item, destDir, e)))
                 continue
+        elif stageCache is not None and not os.path.isdir(item):
+            stageCache.stage(item, destDir, unpackBundles, loc)
+            continue
         else:
             dest = os.path.join(destDir, os.path.basename(item))
             if os.path.isdir(item):
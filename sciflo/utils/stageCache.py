@@ -0,0 +1,501 @@
+# -----------------------------------------------------------------------------
+# Name:        stageCache.py
+# Purpose:     Content-addressed local cache of stage files and bundles.
+#
+# Created:     Sun Oct 18 01:02:19 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import re
+import time
+import json
+import stat
+import fcntl
+import shutil
+import hashlib
+import tempfile
+import threading
+import urllib.request
+import urllib.parse
+import urllib.error
+
+from .misc import isBundle, isPythonPackageInstaller, unpackBundle
+
+# bytes read at a time when hashing or downloading
+CHUNK_SIZE = 1048576
+
+# ioctl asking the file system for a copy-on-write clone (linux FICLONE)
+FICLONE = 0x40049409
+
+# seconds an object or bundle is kept after it was last used, whatever the
+# limits, so pruning never removes one that is being staged
+PRUNE_GRACE = 300.
+
+# seconds after which leftovers of interrupted downloads and extractions are
+# removed
+TMP_MAX_AGE = 86400.
+
+# stage caches of this process by cache dir
+_StageCaches = {}
+_StageCachesLock = threading.Lock()
+
+
+class StageCacheError(RuntimeError):
+    pass
+
+
+def getUrlHost(url):
+    """Return host of url without port."""
+
+    return urllib.parse.urlparse(url)[1].split(':')[0]
+
+
+def cloneOrCopy(src, dest):
+    """Give dest a private copy of src: a reflink sharing blocks
+    copy-on-write where the file system supports it, else a plain copy.
+    The copy is writable by its owner."""
+
+    try:
+        with open(src, 'rb') as s, open(dest, 'wb') as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    except (IOError, OSError):
+        shutil.copyfile(src, dest)
+    shutil.copystat(src, dest)
+    os.chmod(dest, stat.S_IMODE(os.stat(dest).st_mode) | stat.S_IWUSR)
+
+
+def linkOrCopy(src, dest):
+    """Hardlink src to dest, copying it if they are on different file
+    systems."""
+
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+def placeFile(src, dest, hardlink=False):
+    """Place cached file src at dest: hardlinked if hardlink is set,
+    otherwise as a private copy."""
+
+    if hardlink:
+        linkOrCopy(src, dest)
+    else:
+        cloneOrCopy(src, dest)
+
+
+def linkTree(srcDir, destDir, hardlink=False):
+    """Recreate the tree under srcDir in destDir, placing files with
+    placeFile()."""
+
+    for root, dirs, files in os.walk(srcDir):
+        relDir = os.path.relpath(root, srcDir)
+        thisDestDir = os.path.normpath(os.path.join(destDir, relDir))
+        if not os.path.isdir(thisDestDir):
+            os.makedirs(thisDestDir)
+        for name in dirs + files:
+            src = os.path.join(root, name)
+            dest = os.path.join(thisDestDir, name)
+            if os.path.islink(src):
+                if not os.path.lexists(dest):
+                    os.symlink(os.readlink(src), dest)
+            elif name in files and not os.path.lexists(dest):
+                placeFile(src, dest, hardlink)
+
+
+class StageCache(object):
+    """Content-addressed cache of stage files shared by the work units of a
+    host.  Contents are stored once under their sha256 digest and placed in
+    work dirs as private copies (reflinks where the file system supports
+    them), so a work unit may rewrite its inputs without touching the cache
+    or other work dirs.  If hardlink is set they are hardlinked instead,
+    which saves space and time but shares one inode among all work dirs:
+    only use it when work units never write to their staged files.  An
+    index maps each local path or url to the digest of its
+    contents along with validators (mtime, inode and size of a file; ETag,
+    Last-Modified and Content-Length of a url) that tell when it changed.
+    Unpacked bundles are kept by archive digest.  Cached files are
+    read-only.
+
+    The mtime of an object or bundle dir is the time it was last staged.
+    Every pruneInterval seconds one process of the host prunes the cache:
+    objects and bundles not used in maxAge seconds are removed, then the
+    least recently used ones until the cache holds at most maxBytes.  A
+    limit of 0 is unbounded.
+
+    Layout of cacheDir:
+      objects/<digest>           contents
+      index/<sha256 of key>.json key, validators and digest
+      bundles/<digest>/          unpacked contents of an archive
+      tmp/                       partial downloads and extractions
+      prune.lock                 held while pruning; its mtime is the time
+                                 of the last prune
+    """
+
+    def __init__(self, cacheDir, hardlink=False, maxBytes=0, maxAge=0.,
+                 pruneInterval=3600.):
+        """Constructor."""
+
+        self.cacheDir = cacheDir
+        self.hardlink = hardlink
+        self.maxBytes = maxBytes
+        self.maxAge = maxAge
+        self.pruneInterval = pruneInterval
+        self.pruneFile = os.path.join(cacheDir, 'prune.lock')
+        self.objectsDir = os.path.join(cacheDir, 'objects')
+        self.indexDir = os.path.join(cacheDir, 'index')
+        self.bundlesDir = os.path.join(cacheDir, 'bundles')
+        self.tmpDir = os.path.join(cacheDir, 'tmp')
+        for d in (self.objectsDir, self.indexDir, self.bundlesDir,
+                  self.tmpDir):
+            if not os.path.isdir(d):
+                os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bundleHits = 0
+        self.bundleMisses = 0
+        self.evictions = 0
+
+    def getStats(self):
+        """Return dict of counters."""
+
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'bundleHits': self.bundleHits,
+                    'bundleMisses': self.bundleMisses,
+                    'evictions': self.evictions}
+
+    def _count(self, name, n=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def _indexFile(self, key):
+        return os.path.join(self.indexDir, '%s.json' %
+                            hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+    def _readIndex(self, key):
+        try:
+            with open(self._indexFile(key)) as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if entry.get('key', None) != key or \
+                not os.path.exists(self.getObject(entry['digest'])):
+            return None
+        return entry
+
+    def _writeIndex(self, key, validators, digest):
+        indexFile = self._indexFile(key)
+        fd, tmpFile = tempfile.mkstemp(dir=self.tmpDir, suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'key': key, 'validators': validators,
+                       'digest': digest}, f)
+        os.replace(tmpFile, indexFile)
+
+    def getObject(self, digest):
+        """Return path of contents with digest."""
+
+        return os.path.join(self.objectsDir, digest)
+
+    def _storeStream(self, stream, mode=0o644):
+        """Store contents read from a file object; return digest."""
+
+        h = hashlib.sha256()
+        fd, tmpFile = tempfile.mkstemp(dir=self.tmpDir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    h.update(chunk)
+                    f.write(chunk)
+            digest = h.hexdigest()
+            obj = self.getObject(digest)
+            if os.path.exists(obj):
+                os.unlink(tmpFile)
+            else:
+                os.chmod(tmpFile, mode & ~0o222)
+                os.replace(tmpFile, obj)
+        except:
+            if os.path.exists(tmpFile):
+                os.unlink(tmpFile)
+            raise
+        return digest
+
+    def getFileDigest(self, path):
+        """Return digest of a local file's contents, caching them."""
+
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        validators = {'mtime': st.st_mtime_ns, 'inode': st.st_ino,
+                      'dev': st.st_dev, 'size': st.st_size}
+        entry = self._readIndex(key)
+        if entry is not None and entry['validators'] == validators:
+            self._count('hits')
+            return entry['digest']
+        self._count('misses')
+        with open(path, 'rb') as f:
+            digest = self._storeStream(f, stat.S_IMODE(st.st_mode))
+        self._writeIndex(key, validators, digest)
+        return digest
+
+    def getUrlDigest(self, url):
+        """Return digest of a url's contents, caching them.  A cached url is
+        revalidated with a conditional request; it is only downloaded again
+        if the server says it changed or gives no validators.  Redirects to
+        another host are refused."""
+
+        entry = self._readIndex(url)
+        req = urllib.request.Request(url)
+        if entry is not None:
+            if entry['validators'].get('etag', None):
+                req.add_header('If-None-Match', entry['validators']['etag'])
+            if entry['validators'].get('lastModified', None):
+                req.add_header('If-Modified-Since',
+                               entry['validators']['lastModified'])
+        try:
+            f = urllib.request.urlopen(req)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and entry is not None:
+                self._count('hits')
+                return entry['digest']
+            raise
+        try:
+            if getUrlHost(f.geturl()) != getUrlHost(url):
+                raise StageCacheError(
+                    "Redirection was detected for url %s." % url)
+            validators = {'etag': f.headers.get('ETag', None),
+                          'lastModified': f.headers.get('Last-Modified', None),
+                          'size': f.headers.get('Content-Length', None)}
+            if entry is not None and entry['validators'] == validators and \
+                    (validators['etag'] or validators['lastModified']):
+                # server ignored the conditional request but has the same
+                # version
+                self._count('hits')
+                return entry['digest']
+            self._count('misses')
+            digest = self._storeStream(f)
+        finally:
+            f.close()
+        self._writeIndex(url, validators, digest)
+        return digest
+
+    def getBundleDir(self, digest):
+        """Return dir holding the unpacked contents of the archive with
+        digest, unpacking it the first time."""
+
+        bundleDir = os.path.join(self.bundlesDir, digest)
+        if os.path.isdir(bundleDir):
+            self._count('bundleHits')
+            touch(bundleDir)
+            return bundleDir
+        self._count('bundleMisses')
+        extract = isBundle(self.getObject(digest), returnCmd=True)
+        if not extract:
+            raise StageCacheError("Not a bundle: %s" % digest)
+        tmpDir = tempfile.mkdtemp(dir=self.tmpDir)
+        try:
+            extract(self.getObject(digest), tmpDir)
+            for root, dirs, files in os.walk(tmpDir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    if not os.path.islink(path):
+                        os.chmod(path, stat.S_IMODE(
+                            os.lstat(path).st_mode) & ~0o222)
+            try:
+                os.rename(tmpDir, bundleDir)
+            except OSError:
+                # another process unpacked it first
+                if not os.path.isdir(bundleDir):
+                    raise
+                shutil.rmtree(tmpDir, True)
+        except:
+            shutil.rmtree(tmpDir, True)
+            raise
+        return bundleDir
+
+    def stage(self, item, destDir, unpackBundles=False, loc=None):
+        """Stage local file or url item into destDir, unpacking it there if
+        it is a bundle and unpackBundles is set.  Returns staged path."""
+
+        self.maybePrune()
+        if re.search(r'^\w+://', item):
+            getDigest = self.getUrlDigest
+            name = os.path.basename(urllib.parse.urlparse(item)[2])
+        else:
+            getDigest = self.getFileDigest
+            name = os.path.basename(item)
+        digest = getDigest(item)
+        dest = os.path.join(destDir, name or digest)
+        if os.path.lexists(dest):
+            os.unlink(dest)
+        touch(self.getObject(digest))
+        try:
+            placeFile(self.getObject(digest), dest, self.hardlink)
+        except FileNotFoundError:
+            # pruned by another process; store it again
+            digest = getDigest(item)
+            placeFile(self.getObject(digest), dest, self.hardlink)
+        if unpackBundles and isBundle(dest):
+            bundleDir = self.getBundleDir(digest)
+
+            # python packages are installed, not staged
+            names = [os.path.relpath(os.path.join(root, name), bundleDir)
+                     for root, dirs, files in os.walk(bundleDir)
+                     for name in files]
+            if isPythonPackageInstaller(names):
+                unpackBundle(dest, dir=destDir, loc=loc)
+            else:
+                linkTree(bundleDir, destDir, self.hardlink)
+        return dest
+
+    def maybePrune(self):
+        """Prune the cache if it has limits and no process of the host
+        pruned it in the last pruneInterval seconds.  Returns the prune's
+        stats or None."""
+
+        if not self.maxBytes and not self.maxAge:
+            return None
+        try:
+            if time.time() - os.stat(self.pruneFile).st_mtime < \
+                    self.pruneInterval:
+                return None
+        except OSError:
+            pass
+        return self.prune()
+
+    def prune(self, now=None):
+        """Remove objects and bundles past maxAge, then least recently used
+        ones until the cache fits in maxBytes, along with index entries of
+        removed objects and stale temporary files.  Returns dict of stats
+        or None if another process is pruning."""
+
+        with open(self.pruneFile, 'a') as lockFile:
+            try:
+                fcntl.flock(lockFile.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except (IOError, OSError):
+                return None
+            try:
+                os.utime(self.pruneFile)
+                return self._prune(time.time() if now is None else now)
+            finally:
+                fcntl.flock(lockFile.fileno(), fcntl.LOCK_UN)
+
+    def _prune(self, now):
+        items = []
+        for parent in (self.objectsDir, self.bundlesDir):
+            for name in os.listdir(parent):
+                path = os.path.join(parent, name)
+                try:
+                    lastUse = os.lstat(path).st_mtime
+                    size = getTreeSize(path)
+                except OSError:
+                    continue
+                items.append((lastUse, size, path))
+        items.sort()
+        total = sum([size for lastUse, size, path in items])
+        stats = {'entries': len(items), 'evicted': 0, 'bytes': 0}
+        for lastUse, size, path in items:
+            if now - lastUse < PRUNE_GRACE:
+                break
+            expired = self.maxAge and now - lastUse > self.maxAge
+            if not expired and (not self.maxBytes or total <= self.maxBytes):
+                break
+            self._remove(path)
+            total -= size
+            stats['evicted'] += 1
+        stats['bytes'] = total
+        self._count('evictions', stats['evicted'])
+
+        # index entries of removed objects
+        if stats['evicted']:
+            for name in os.listdir(self.indexDir):
+                indexFile = os.path.join(self.indexDir, name)
+                try:
+                    with open(indexFile) as f:
+                        digest = json.load(f)['digest']
+                except (IOError, OSError, ValueError, KeyError):
+                    digest = None
+                if digest is None or \
+                        not os.path.exists(self.getObject(digest)):
+                    removeFile(indexFile)
+
+        # leftovers of interrupted downloads and extractions
+        for name in os.listdir(self.tmpDir):
+            path = os.path.join(self.tmpDir, name)
+            try:
+                if now - os.lstat(path).st_mtime > TMP_MAX_AGE:
+                    self._remove(path)
+            except OSError:
+                pass
+        return stats
+
+    def _remove(self, path):
+        """Remove an object or dir, moving dirs aside first so they
+        disappear at once."""
+
+        if os.path.isdir(path) and not os.path.islink(path):
+            trash = tempfile.mkdtemp(dir=self.tmpDir)
+            os.rename(path, os.path.join(trash, 'old'))
+            makeWritable(trash)
+            shutil.rmtree(trash, True)
+        else:
+            removeFile(path)
+
+
+def touch(path):
+    """Mark path as used now."""
+
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def removeFile(path):
+    """Remove file if it exists."""
+
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def makeWritable(dir):
+    """Make dirs under dir writable so their contents can be removed."""
+
+    for root, dirs, files in os.walk(dir):
+        for name in dirs:
+            path = os.path.join(root, name)
+            os.chmod(path, stat.S_IMODE(os.stat(path).st_mode) |
+                     stat.S_IWUSR)
+
+
+def getTreeSize(path):
+    """Return bytes of files under path, or of path if it is a file."""
+
+    if not os.path.isdir(path) or os.path.islink(path):
+        return os.lstat(path).st_size
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return size
+
+
+def getStageCache(cacheDir, hardlink=False, maxBytes=0, maxAge=0.,
+                  pruneInterval=3600.):
+    """Return this process' StageCache for cacheDir and settings."""
+
+    key = (cacheDir, hardlink, maxBytes, maxAge, pruneInterval)
+    with _StageCachesLock:
+        stageCache = _StageCaches.get(key, None)
+        if stageCache is None:
+            stageCache = _StageCaches[key] = StageCache(*key)
+        return stageCache
@@ -9,7 +9,7 @@
 #              U.S. Government Sponsorship acknowledged.
 # Licence:
 # -----------------------------------------------------------------------------
-from io import StringIO
+from io import StringIO, BytesIO
 from xml.dom.minidom import getDOMImplementation, parseString, Document
 import types
 import sys
@@ -24,12 +24,36 @@ from urllib.parse import urlparse
 import http.client
 import traceback
 import socket
+import hashlib
+import threading
+from collections import OrderedDict
 
 import sciflo
 from .misc import (getListFromUnknownObject, getUserScifloConfig,
                    getDictFromUnknownObject, getTempfileName)
 from .namespaces import *
 
+# compiled schemas by sha256 of their xml, each with a lock since a schema
+# can't validate in two threads at once
+_XmlSchemas = {}
+_XmlSchemasLock = threading.Lock()
+
+# compiled xpaths and parsed docs kept by the xpath evaluator, and chars of
+# xml the kept docs may add up to; docs over XML_STREAMING_THRESHOLD are
+# never kept
+XPATH_CACHE_SIZE = 1024
+XPATH_DOC_CACHE_SIZE = 32
+XPATH_DOC_CACHE_BYTES = 33554432
+
+# xml longer than this many chars (bytes for files) is parsed incrementally
+# by functions with a streaming variant; lists longer than this many rows
+# are serialized incrementally
+XML_STREAMING_THRESHOLD = 16777216
+LIST_STREAMING_THRESHOLD = 100000
+
+# chars read at a time from an xml string being parsed incrementally
+XML_STREAMING_CHUNK_SIZE = 262144
+
 
 def isXml(obj):
     """Return True if xml is detect and False otherwise."""
@@ -70,14 +94,19 @@ def getXmlEtree(xml):
     """
 
     parser = lxml.etree.XMLParser(remove_blank_text=True)
+    xmlStr = getXmlString(xml)
+    return (lxml.etree.parse(StringIO(xmlStr), parser).getroot(), getNamespacePrefixDict(xmlStr))
+
+
+def getXmlString(xml):
+    """Return xml string of an xml string, file or url."""
+
     if xml.startswith('<?xml') or xml.startswith('<'):
-        return (lxml.etree.parse(StringIO(xml), parser).getroot(), getNamespacePrefixDict(xml))
-    else:
-        protocol, netloc, path, params, query, frag = urlparse(xml)
-        if protocol == '':
-            xml = "file://{}".format(xml)
-        xmlStr = urlopen(xml).read().decode('utf-8')
-        return (lxml.etree.parse(StringIO(xmlStr), parser).getroot(), getNamespacePrefixDict(xmlStr))
+        return xml
+    protocol, netloc, path, params, query, frag = urlparse(xml)
+    if protocol == '':
+        xml = "file://{}".format(xml)
+    return urlopen(xml).read().decode('utf-8')
 
 
 def getNamespacePrefixDict(xmlString):
@@ -111,51 +140,254 @@ def addDefaultPrefixToXpath(xpathStr):
     return xpathStr
 
 
-def runXpath(xml, xpathStr, nsDict={}):
-    """Run XPath on xml and return result."""
+class XmlStringReader(object):
+    """File-like object reading an xml string as utf-8 bytes a chunk at a
+    time so it can be parsed incrementally without encoding it all.  The
+    encoding of an xml declaration is changed to utf-8 to match."""
 
-    lxml.etree.clear_error_log()
-    if isinstance(xml, lxml.etree._Element):
-        root = xml
-    else:
-        root, nsDict = getXmlEtree(xml)
+    def __init__(self, xmlString):
+        """Constructor."""
 
-    # add '_' as default namespace prefix also
-    if '_default' in nsDict:
-        nsDict['_'] = nsDict['_default']
+        self.xmlString = xmlString
+        self.pos = 0
+        self.declaration = b''
+        match = re.match(r'<\?xml[^>]*\?>', xmlString)
+        if match:
+            self.declaration = re.sub(r'''encoding\s*=\s*(['"]).*?\1''',
+                                      'encoding="utf-8"',
+                                      match.group(0)).encode('utf-8')
+            self.pos = match.end()
+
+    def read(self, size=-1):
+        """Return at most size bytes."""
+
+        if self.declaration:
+            data, self.declaration = self.declaration, b''
+            return data
+        if size is None or size < 0:
+            chars = len(self.xmlString) - self.pos
+        else:
+            # a char is at most 4 bytes in utf-8
+            chars = max(1, min(size // 4, XML_STREAMING_CHUNK_SIZE))
+        data = self.xmlString[self.pos:self.pos + chars]
+        self.pos += len(data)
+        return data.encode('utf-8')
 
-    gotException = False
-    if re.search(r'(?:/|\[|@){.*}', xpathStr):
-        expr = lxml.etree.ETXPath(xpathStr)
-        res = expr.evaluate(root)
+
+def isLargeXml(xml):
+    """Return True if xml string or file is over XML_STREAMING_THRESHOLD."""
+
+    if not isinstance(xml, str):
+        return False
+    if xml.startswith('<'):
+        return len(xml) > XML_STREAMING_THRESHOLD
+    if os.path.isfile(xml):
+        return os.path.getsize(xml) > XML_STREAMING_THRESHOLD
+    return False
+
+
+def iterXmlRecords(xml, isRecord, tag=None, removeBlankText=False):
+    """Parse xml string, file or url incrementally and yield (element, depth)
+    for each outermost element for which isRecord(element, depth) is true;
+    the root is at depth 0.  isRecord sees an element when it starts, before
+    its children are parsed, and only sees elements matching tag if set.
+    Each yielded element is complete; it and the elements before it are
+    freed once the next one is requested so memory use is bounded by the
+    largest record."""
+
+    if xml.startswith('<?xml') or xml.startswith('<'):
+        source = XmlStringReader(xml)
     else:
+        protocol, netloc, path, params, query, frag = urlparse(xml)
+        source = xml if protocol == '' else urlopen(xml)
+    recordElt = None
+    try:
+        for event, elt in lxml.etree.iterparse(source, events=('start', 'end'),
+                                               tag=tag,
+                                               remove_blank_text=removeBlankText):
+            if event == 'start':
+                if recordElt is None:
+                    depth = sum(1 for i in elt.iterancestors())
+                    if isRecord(elt, depth):
+                        recordElt, recordDepth = elt, depth
+            elif elt is recordElt:
+                recordElt = None
+                yield elt, recordDepth
+                elt.clear()
+                parent = elt.getparent()
+                if parent is not None:
+                    while elt.getprevious() is not None:
+                        del parent[0]
+    finally:
+        if hasattr(source, 'close'):
+            source.close()
+
+
+class XpathEvaluator(object):
+    """Evaluates XPaths the way runXpath does, memoizing compiled XPaths by
+    (expression, namespaces) and parsed docs by the sha256 of their xml in
+    LRUs.  The doc LRU is bounded by the length of the docs' xml too, and
+    docs too large to stream are parsed on each call instead of kept.
+
+    An expression without a {namespace} is evaluated with the doc's
+    namespaces; it only uses prefixes that are undefined without them, so
+    this matches evaluating it without namespaces first.  If it selects
+    nothing it is evaluated again with the default prefix added to its
+    unprefixed steps.  Both XPaths are compiled once per expression.
+    """
+
+    def __init__(self, maxXpaths=XPATH_CACHE_SIZE,
+                 maxDocs=XPATH_DOC_CACHE_SIZE,
+                 maxDocBytes=XPATH_DOC_CACHE_BYTES):
+        """Constructor."""
+
+        self.maxXpaths = maxXpaths
+        self.maxDocs = maxDocs
+        self.maxDocBytes = maxDocBytes
+        self._xpaths = OrderedDict()
+        self._docs = OrderedDict()
+        self._docBytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.docHits = 0
+        self.docMisses = 0
+
+    def getStats(self):
+        """Return dict of counters."""
+
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'docHits': self.docHits, 'docMisses': self.docMisses,
+                    'docs': len(self._docs), 'docBytes': self._docBytes}
+
+    def _get(self, cache, key, maxItems, build, counters):
+        """Return cached item for key, building and caching it if needed.
+        Counts a hit or miss on the (hits, misses) attribute names in
+        counters."""
+
+        with self._lock:
+            item = cache.get(key, None)
+            if item is not None:
+                cache.move_to_end(key)
+                setattr(self, counters[0], getattr(self, counters[0]) + 1)
+                return item
+            setattr(self, counters[1], getattr(self, counters[1]) + 1)
+        item = build()
+        with self._lock:
+            cache[key] = item
+            cache.move_to_end(key)
+            while len(cache) > maxItems:
+                cache.popitem(last=False)
+        return item
+
+    def _getDoc(self, xmlStr):
+        """Return (root, nsDict) of xmlStr from the doc LRU, parsing and
+        keeping it if it fits."""
+
+        key = hashlib.sha256(xmlStr.encode('utf-8')).digest()
+        size = len(xmlStr)
+        with self._lock:
+            entry = self._docs.get(key, None)
+            if entry is not None:
+                self._docs.move_to_end(key)
+                self.docHits += 1
+                return entry[0]
+            self.docMisses += 1
+        doc = getXmlEtree(xmlStr)
+        if size > XML_STREAMING_THRESHOLD or size > self.maxDocBytes:
+            return doc
+        with self._lock:
+            if key not in self._docs:
+                self._docs[key] = (doc, size)
+                self._docBytes += size
+            self._docs.move_to_end(key)
+            while len(self._docs) > self.maxDocs or \
+                    self._docBytes > self.maxDocBytes:
+                self._docBytes -= self._docs.popitem(last=False)[1][1]
+        return doc
+
+    def getDoc(self, xml):
+        """Return a tuple of [lxml etree element, prefix->namespace dict] for
+        an xml string, file or url.  The element is shared by every caller
+        passing the same xml and must not be modified."""
+
+        root, nsDict = self._getDoc(getXmlString(xml))
+        return root, dict(nsDict)
+
+    def getXpath(self, xpathStr, nsDict):
+        """Return compiled XPath for xpathStr and namespaces nsDict; an
+        ETXPath if xpathStr uses {namespace} notation."""
+
+        if re.search(r'(?:/|\[|@){.*}', xpathStr):
+            key = (xpathStr, None)
+            build = lambda: lxml.etree.ETXPath(xpathStr)
+        else:
+            key = (xpathStr, tuple(sorted(nsDict.items())))
+            build = lambda: lxml.etree.XPath(xpathStr, namespaces=nsDict)
+        return self._get(self._xpaths, key, self.maxXpaths, build,
+                         ('hits', 'misses'))
+
+    def _evaluate(self, root, xpathStr, nsDict):
+        """Evaluate compiled XPath.  An expression that doesn't compile is
+        left to lxml uncompiled so it fails as it always has."""
+
         try:
-            res = root.xpath(xpathStr)
-        except Exception as e:
-            if isinstance(e, lxml.etree.XPathSyntaxError):
-                if re.search(r'XPATH_UNDEF_PREFIX_ERROR', str(e.error_log)):
-                    pass
-                else:
-                    raise RuntimeError(
-                        "Error in xpath expression %s: %s" % (xpathStr, e.error_log))
-            try:
-                res = root.xpath(xpathStr, namespaces=nsDict)
-            except lxml.etree.XPathSyntaxError as e:
-                raise RuntimeError(
-                    "Error in xpath expression %s: %s" % (xpathStr, e.error_log))
-            except:
-                gotException = True
-                res = []
+            xpath = self.getXpath(xpathStr, nsDict)
+        except lxml.etree.XPathSyntaxError:
+            return root.xpath(xpathStr, namespaces=nsDict)
+        return xpath(root)
+
+    def evaluate(self, root, xpathStr, nsDict):
+        """Return raw result of xpathStr on root."""
+
+        if re.search(r'(?:/|\[|@){.*}', xpathStr):
+            return self.getXpath(xpathStr, nsDict)(root)
+        gotException = False
+        try:
+            res = self._evaluate(root, xpathStr, nsDict)
+        except lxml.etree.XPathSyntaxError as e:
+            raise RuntimeError(
+                "Error in xpath expression %s: %s" % (xpathStr, e.error_log))
+        except:
+            gotException = True
+            res = []
         if isinstance(res, (list, tuple)) and (gotException or len(res) == 0):
             xpathStr = addDefaultPrefixToXpath(xpathStr)
             lxml.etree.clear_error_log()
             try:
-                res = root.xpath(xpathStr, namespaces=nsDict)
+                res = self._evaluate(root, xpathStr, nsDict)
             except lxml.etree.XPathSyntaxError as e:
                 raise RuntimeError(
                     "Error in xpath expression %s: %s" % (xpathStr, e.error_log))
-            except:
-                raise
+        return res
+
+
+# xpath evaluator of this process
+_XpathEvaluator = XpathEvaluator()
+
+
+def getXpathEvaluator():
+    """Return this process' XpathEvaluator."""
+
+    return _XpathEvaluator
+
+
+def runXpath(xml, xpathStr, nsDict={}):
+    """Run XPath on xml and return result."""
+
+    lxml.etree.clear_error_log()
+    if isinstance(xml, lxml.etree._Element):
+        root = xml
+        nsDict = dict(nsDict)
+    else:
+        root, nsDict = _XpathEvaluator.getDoc(xml)
+
+    # add '_' as default namespace prefix also
+    if '_default' in nsDict:
+        nsDict['_'] = nsDict['_default']
+
+    res = _XpathEvaluator.evaluate(root, xpathStr, nsDict)
     if isinstance(res, (list, tuple)):
         for i in range(len(res)):
             if isinstance(res[i], lxml.etree._Element):
@@ -282,6 +514,15 @@ def simpleList2Xml(LL, rootElement="Rows", rowElement="row", rootAttribsDict=Non
                    rootAttribsDictNonNS=None):
     """Return xml from a simple list."""
 
+    # serialize long lists of rows without a namespace incrementally
+    if not rowElement.startswith('{') and (not hasattr(LL, '__len__') or
+                                           len(LL) > LIST_STREAMING_THRESHOLD):
+        f = BytesIO()
+        writeSimpleList2Xml(LL, f, rootElement, rowElement, rootAttribsDict,
+                            defaultNamespace, xsdNamespace, schemaUrl,
+                            xsiNamespace, xslPath, rootAttribsDictNonNS)
+        return f.getvalue().decode('utf-8')
+
     # get xml doc and root element
     # xmlDoc = getMinidomXmlDocument(rootElement,defaultNamespace,xsdNamespace,
     #                              schemaUrl,xsiNamespace,rootAttribsDict,xslPath)
@@ -338,6 +579,68 @@ def simpleList2Xml(LL, rootElement="Rows", rowElement="row", rootAttribsDict=Non
     return lxml.etree.tostring(rootElem, pretty_print=True, encoding='unicode')
 
 
+def writeSimpleList2Xml(LL, outputFile, rootElement="Rows", rowElement="row",
+                        rootAttribsDict=None, defaultNamespace=SCIFLO_NAMESPACE,
+                        xsdNamespace=XSD_NAMESPACE, schemaUrl=None,
+                        xsiNamespace=XSI_NAMESPACE, xslPath=None,
+                        rootAttribsDictNonNS=None):
+    """Write xml from a simple list or iterable to an output file path or
+    binary file object one row at a time.  Writes the same xml
+    simpleList2Xml returns for a rowElement without a namespace."""
+
+    if not isinstance(rootAttribsDict, dict):
+        rootAttribsDict = {}
+    if defaultNamespace is not None:
+        rootAttribsDict[None] = defaultNamespace
+    else:
+        rootAttribsDict[None] = SCIFLO_NAMESPACE
+    if xsdNamespace is not None:
+        rootAttribsDict['xs'] = xsdNamespace
+    if schemaUrl is not None:
+        rootAttribsDict['schemaLocation'] = schemaUrl
+    if xsiNamespace is not None:
+        rootAttribsDict['xsi'] = xsiNamespace
+    attribs = {}
+    if isinstance(rootAttribsDictNonNS, dict):
+        for k in rootAttribsDictNonNS:
+            attribs[k] = str(rootAttribsDictNonNS[k])
+
+    rootElem = lxml.etree.Element(rootElement, attribs, nsmap=rootAttribsDict)
+    if isinstance(outputFile, str):
+        f = open(outputFile, 'wb')
+    else:
+        f = outputFile
+    try:
+        rows = iter(LL)
+        row = next(rows, rows)
+        if row is rows:
+            # empty root is self-closing
+            f.write(lxml.etree.tostring(rootElem, pretty_print=True,
+                                        encoding='utf-8'))
+            return
+
+        # write root start tag, then each row as it comes
+        rootStr = lxml.etree.tostring(rootElem, encoding='utf-8')
+        f.write(rootStr[:-2] + b'>')
+        while row is not rows:
+            recElem = lxml.etree.Element(rowElement)
+            recElem.text = str(row)
+
+            # set type
+            if isinstance(row, float):
+                recElem.set('type', 'xs:float')
+            elif isinstance(row, int):
+                recElem.set('type', 'xs:int')
+            elif isinstance(row, bool):
+                recElem.set('type', 'xs:boolean')
+            f.write(b'\n  ' + lxml.etree.tostring(recElem, encoding='utf-8'))
+            row = next(rows, rows)
+        f.write(b'\n</' + re.match(br'<([^\s/>]+)', rootStr).group(1) + b'>\n')
+    finally:
+        if f is not outputFile:
+            f.close()
+
+
 def xml2SimpleList(xmlString):
     """Return a simple list from xml."""
 
@@ -465,6 +768,10 @@ def addChildTextNodeToParentNode(parentNode, childTag, childValue):
 def xml2List(xmlString):
     """Return an equal length list of lists from xml."""
 
+    # parse large xml incrementally
+    if isLargeXml(xmlString):
+        return list(iterXml2List(xmlString))
+
     # create dom object
     domObj = parseString(xmlString)
 
@@ -530,10 +837,106 @@ def xml2List(xmlString):
     return finalList
 
 
+def getQualifiedTagName(elt):
+    """Return tag name of an element as written, with its prefix."""
+
+    localName = lxml.etree.QName(elt).localname
+    if elt.prefix:
+        return '%s:%s' % (elt.prefix, localName)
+    return localName
+
+
+def iterXml2List(xmlString):
+    """Incremental xml2List.  Yields the list of tagnames, then the list of
+    values of each record."""
+
+    tagNames = None
+    for node, depth in iterXmlRecords(xmlString,
+                                      lambda elt, depth: depth == 1):
+
+        # we'll get tagnames from the elements of the first child that
+        # start with text
+        if tagNames is None:
+            tagNames = [getQualifiedTagName(i) for i in node
+                        if isinstance(i.tag, str) and i.text is not None]
+            yield tagNames
+
+        # get values of the first element with each tagname
+        datalist = []
+        for tagName in tagNames:
+            for thisTagNode in node.iterdescendants():
+                if isinstance(thisTagNode.tag, str) and \
+                        getQualifiedTagName(thisTagNode) == tagName:
+                    break
+            else:
+                raise RuntimeError("No %s element in record." % tagName)
+            if thisTagNode.text is None:
+                raise RuntimeError("No data for %s element in record." %
+                                   tagName)
+            datalist.append(thisTagNode.text)
+        yield datalist
+
+
+def getListDictRecord(result, namespaceString, keyTag):
+    """Return (objectid, list of typed values) of a record element."""
+
+    # get subresults
+    subresults = result.findall('*')
+
+    # make sure first subresult is 'objectid'
+    if subresults[0].tag == namespaceString+keyTag:
+        objectid = subresults[0].text
+    else:
+        raise RuntimeError('''Error parsing xml into metadata dict.  First record
+is not 'objectid' tag: %''' % subresult[0].tag)
+
+    # metadata list
+    list = []
+
+    # loop over the rest
+    for subresult in subresults[1:]:
+
+        # get tag
+        tag = subresult.tag
+        value = subresult.text
+
+        # get the type so that we can type it accordingly
+        type = subresult.get('type', 'xs:string')
+        if type == 'xs:int':
+            value = int(value)
+        elif type == 'xs:float':
+            value = float(value)
+        elif type == 'xs:boolean':
+            value = bool(value)
+        else:
+            pass
+
+        # append to list
+        list.append(value)
+
+    return objectid, list
+
+
+def iterListDictFromXml(xml, recordTag='Result', keyTag='objectid',
+                        defaultNamespace=SCIFLO_NAMESPACE):
+    """Incremental getListDictFromXml.  Yields (objectid, list) of each
+    record."""
+
+    recordTag = '{%s}%s' % (defaultNamespace, recordTag)
+    for result, depth in iterXmlRecords(xml, lambda elt, depth: depth == 1,
+                                        tag=recordTag):
+        yield getListDictRecord(result, '{%s}' % defaultNamespace, keyTag)
+
+
 def getListDictFromXml(xml, recordTag='Result', keyTag='objectid',
                        defaultNamespace=SCIFLO_NAMESPACE):
     """Return a dict of lists indexed by tagnames from xml."""
 
+    # parse large xml incrementally
+    if isLargeXml(xml):
+        return dict(iterListDictFromXml(xml, recordTag, keyTag,
+                                        defaultNamespace))
+
     # get elementtree doc
     doc = lxml.etree.parse(StringIO(xml))
 
@@ -548,41 +951,7 @@ def getListDictFromXml(xml, recordTag='Result', keyTag='objectid',
 
     # loop over results
     for result in results:
-
-        # get subresults
-        subresults = result.findall('*')
-
-        # make sure first subresult is 'objectid'
-        if subresults[0].tag == namespaceString+keyTag:
-            objectid = subresults[0].text
-        else:
-            raise RuntimeError('''Error parsing xml into metadata dict.  First record
-is not 'objectid' tag: %''' % subresult[0].tag)
-
-        # metadata list
-        list = []
-
-        # loop over the rest
-        for subresult in subresults[1:]:
-
-            # get tag
-            tag = subresult.tag
-            value = subresult.text
-
-            # get the type so that we can type it accordingly
-            type = subresult.get('type', 'xs:string')
-            if type == 'xs:int':
-                value = int(value)
-            elif type == 'xs:float':
-                value = float(value)
-            elif type == 'xs:boolean':
-                value = bool(value)
-            else:
-                pass
-
-            # append to list
-            list.append(value)
-
+        objectid, list = getListDictRecord(result, namespaceString, keyTag)
         metadataDict[objectid] = list
 
     # return metadataDict
@@ -651,10 +1020,44 @@ def pyDoL2XmlList(infoDict, rootElement="resultSet", rowElement="objectid"):
     return simpleList2Xml(keys, rootElement=rootElement, rowElement=rowElement)
 
 
+def iterXmlList2PyLoD(xml, recordTag):
+    """Incremental xmlList2PyLoD.  Yields the dict of each record.  Records
+    are looked up in the default namespace of the root element."""
+
+    tags = {}
+
+    def isRecord(elt, depth):
+        if depth == 0:
+            return elt.tag == recordTag
+        if 'record' not in tags:
+            defaultNs = elt.getroottree().getroot().nsmap.get(None, None)
+            if defaultNs is None:
+                tags['record'] = recordTag
+            else:
+                tags['record'] = '{%s}%s' % (defaultNs, recordTag)
+        return elt.tag == tags['record']
+
+    for node, depth in iterXmlRecords(xml, isRecord, tag='{*}%s' % recordTag,
+                                      removeBlankText=True):
+        if depth == 0:
+            recElts = [node]
+        else:
+            recElts = node.iter(tags['record'])
+        for recElt in recElts:
+            recDict = {}
+            for subElt in recElt:
+                recDict[subElt.tag] = subElt.text
+            yield recDict
+
+
 def xmlList2PyLoD(xml, recordTag):
     """Return list of dict from xml.  Specify recordTag to specify tag that enumerates
     each record."""
 
+    # parse large xml incrementally
+    if isLargeXml(xml):
+        return list(iterXmlList2PyLoD(xml, recordTag))
+
     root, nsDict = getXmlEtree(xml)
     if root.tag == recordTag:
         recElts = [root]
@@ -698,35 +1101,52 @@ class XmlValidationError(Exception):
     pass
 
 
+def getXmlSchema(schemaXml):
+    """Return (XMLSchema, lock) for a schema file/string, compiling it the
+    first time its contents are seen.  Raises XMLSyntaxError if the schema
+    can't be parsed."""
+
+    baseUrl = None
+    if os.path.isfile(schemaXml):
+        baseUrl = os.path.abspath(schemaXml)
+        with open(schemaXml, 'rb') as f:
+            schemaBytes = f.read()
+    else:
+        schemaBytes = schemaXml.encode('utf-8') \
+            if isinstance(schemaXml, str) else schemaXml
+    key = hashlib.sha256(schemaBytes).hexdigest()
+    with _XmlSchemasLock:
+        compiled = _XmlSchemas.get(key, None)
+    if compiled is not None:
+        return compiled
+    lxml.etree.clear_error_log()
+    schemaDoc = lxml.etree.parse(BytesIO(schemaBytes), base_url=baseUrl)
+    compiled = (lxml.etree.XMLSchema(schemaDoc), threading.Lock())
+    with _XmlSchemasLock:
+        return _XmlSchemas.setdefault(key, compiled)
+
+
 def validateXml(inputXml, schemaXml):
     """Return a 2-item tuple of (validationPassed, exception).  Upon successful
     validation of an xml file/string against a schema file/string, tuple
     (True, None) is returned.  Otherwise, returns (False, exception instance).
     """
 
-    f = s = None
+    f = None
     try:
         if os.path.isfile(inputXml):
             f = open(inputXml)
         else:
             f = StringIO(inputXml)
-        if os.path.isfile(schemaXml):
-            s = open(schemaXml)
-        else:
-            s = StringIO(schemaXml)
-        lxml.etree.clear_error_log()
         try:
-            schemaDoc = lxml.etree.parse(s)
+            xmlSchema, schemaLock = getXmlSchema(schemaXml)
         except lxml.etree.XMLSyntaxError as e:
             if str(e) == '':
                 e = lxml.etree.XMLSyntaxError("Error in schema xml: %s" %
                                               str(e.error_log.filter_levels(lxml.etree.ErrorLevels.FATAL)))
             if hasattr(f, 'close'):
                 f.close()
-            if hasattr(s, 'close'):
-                s.close()
             return (False, e)
-        xmlSchema = lxml.etree.XMLSchema(schemaDoc)
         lxml.etree.clear_error_log()
         try:
             doc = lxml.etree.parse(f)
@@ -736,29 +1156,24 @@ def validateXml(inputXml, schemaXml):
                                               str(e.error_log.filter_levels(lxml.etree.ErrorLevels.FATAL)))
             if hasattr(f, 'close'):
                 f.close()
-            if hasattr(s, 'close'):
-                s.close()
             return (False, e)
-        ret = xmlSchema.validate(doc)
+        with schemaLock:
+            ret = xmlSchema.validate(doc)
+            if ret == 0:
+                validationError = XmlValidationError("Failed to validate \
+xml: %s" % xmlSchema.error_log.filter_from_errors())
     except Exception as e:
         if hasattr(f, 'close'):
             f.close()
-        if hasattr(s, 'close'):
-            s.close()
         return (False, e)
 
     if ret == 0:
         if hasattr(f, 'close'):
             f.close()
-        if hasattr(s, 'close'):
-            s.close()
-        return (False, XmlValidationError("Failed to validate xml: %s" %
-                                          xmlSchema.error_log.filter_from_errors()))
+        return (False, validationError)
     else:
         if hasattr(f, 'close'):
             f.close()
-        if hasattr(s, 'close'):
-            s.close()
         return (True, None)
 
 
@@ -33,7 +33,8 @@ def usage():
 
     print(("""%s [-c|--configFile <config file>] [-i|--init] [-o|--outputDir <output dir>]\
 [-s|--status] [-f|--force] [-d|--debug] [--nocache] [-t|--timeout <seconds>]\
-[-a|--args <input1=val1,input2=val2,...>] [-v|--verbose] [-h|--help] <sciflo doc>""" % sys.argv[0]))
+[-a|--args <input1=val1,input2=val2,...>] [-v|--verbose] [--service <socket path>]\
+[-h|--help] <sciflo doc>""" % sys.argv[0]))
 
 
 def main():
@@ -43,7 +44,7 @@ def main():
         opts, args = getopt.getopt(sys.argv[1:], "c:o:sdhifva:t:",
                                    ["configFile=", "outputDir=", "status", "debug", "help",
                                     "init", "force", "verbose", "nocache", "args=",
-                                    "timeout="])
+                                    "timeout=", "service="])
 
     except getopt.GetoptError:
         usage()
@@ -60,6 +61,7 @@ def main():
     nocache = False
     argsMod = None
     timeout = None
+    service = None
 
     # flags to prevent multiple specifications of options
     configFileSet = False
@@ -91,6 +93,10 @@ def main():
         if o in ("--nocache"):
             nocache = True
 
+        # run in execution service
+        if o == "--service":
+            service = os.path.abspath(a)
+
         # check if do init
         if o in ("-i", "--init"):
             doInit = True
@@ -203,8 +209,13 @@ def main():
     #                                   localExecutionMode=True, debug=debug,
     #                                   showStatus=showStatus, verbose=verbose,
     #                                   returnScifloManager=True, noLookCache=nocache)
-    results = sciflo.grid.executor.runSciflo(xml, argsDict, timeout=timeout,
-                                             outputDir=outputDir, configDict={'isLocal': True})
+    if service is None:
+        results = sciflo.grid.executor.runSciflo(xml, argsDict, timeout=timeout,
+                                                 outputDir=outputDir, configDict={'isLocal': True})
+    else:
+        from sciflo.grid.executionService import runScifloViaService
+        results = runScifloViaService(service, xml, argsDict, timeout=timeout,
+                                      outputDir=outputDir, configDict={'isLocal': True})
     '''
     #get url base tracker
     ubtObj = m._urlBaseTrackerObj
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# Name:        sflService.py
+# Purpose:     Run the sciflo execution service.
+#
+# Created:     Sat Oct 17 21:12:40 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import os
+import sys
+import getopt
+import signal
+import logging
+
+import sciflo
+from sciflo.grid.executionService import ScifloExecutionService
+
+
+def usage():
+    """Print usage info."""
+
+    print(("""%s [-c|--configFile <config file>] [-w|--workers <num workers>]\
+[-m|--maxFlows <num concurrent sciflos>] [--nocache] [-h|--help] <socket path>""" %
+           sys.argv[0]))
+
+
+def main():
+
+    # get opts
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "c:w:m:h",
+                                   ["configFile=", "workers=", "maxFlows=",
+                                    "nocache", "help"])
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+
+    # set defaults
+    configFile = None
+    workers = 4
+    maxFlows = 8
+    cacheName = "WorkUnitCache"
+
+    # process opts
+    for o, a in opts:
+        if o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        if o in ("-c", "--configFile"):
+            configFile = os.path.abspath(a)
+        if o in ("-w", "--workers"):
+            workers = int(a)
+        if o in ("-m", "--maxFlows"):
+            maxFlows = int(a)
+        if o == "--nocache":
+            cacheName = None
+
+    # make sure socket path was specified
+    if len(args) != 1:
+        print("Please specify the socket path to listen on.")
+        usage()
+        sys.exit(2)
+
+    service = ScifloExecutionService(workers=workers, maxFlows=maxFlows,
+                                     configFile=configFile,
+                                     cacheName=cacheName)
+
+    # stop on SIGTERM/SIGINT after running sciflos finish
+    def handler(signum, frame):
+        service.close()
+    signal.signal(signal.SIGTERM, handler)
+    signal.signal(signal.SIGINT, handler)
+    service.serve(os.path.abspath(args[0]))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    main()
@@ -6,6 +6,7 @@ sys.path.append('test')
 packages = find_packages()
 
 scripts = [os.path.join('scripts', 'sflExec.py'),
+           os.path.join('scripts', 'sflService.py'),
            os.path.join('scripts', 'ldapSearch.py'),
            os.path.join('scripts', 'ldapAuth.py'),
            os.path.join('scripts', 'insertDataFromXml.py'),
@@ -0,0 +1,222 @@
+# -----------------------------------------------------------------------------
+# Name:        pdictTest.py
+# Purpose:     Unittest for pdict.
+#
+# Created:     Sat Oct 17 13:04:37 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import shutil
+import socket
+import multiprocessing as mp
+from tempfile import mkdtemp
+from unittest import mock
+
+from sciflo.event import pdict
+from sciflo.event.pdict import (encodeFrame, decodeFrame, FrameHeader,
+                                ShardRing, getShardFile,
+                                PersistentDictClient,
+                                runPersistentDictServer)
+from sciflo.event.HammerKlavier import waitForPort
+
+
+def getFreePort():
+    """Return a local port nothing listens on."""
+    soc = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        soc.bind(('127.0.0.1', 0))
+        return soc.getsockname()[1]
+    finally:
+        soc.close()
+
+
+def serveDict(dictName, dictRegistry, oldProtocol=False):
+    """Serve dict; an old protocol server ignores the v2 hello."""
+    if oldProtocol:
+        pdict.V2Hello = 'not a command'
+    runPersistentDictServer(dictName, dictRegistry)
+
+
+class pdictTestCase(unittest.TestCase):
+    """Test case for pdict frames and protocol fallback."""
+
+    def setUp(self):
+        """Create temporary dir and registry."""
+        self.tmpDir = mkdtemp()
+        self.registry = {'PdictTest': {
+            'dbFile': None, 'port': getFreePort(),
+            'logFile': os.path.join(self.tmpDir, 'pdictTest.log')}}
+        self.proc = None
+
+    def tearDown(self):
+        """Stop server and remove temporary dir."""
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.join()
+        shutil.rmtree(self.tmpDir)
+
+    def startServer(self, oldProtocol=False):
+        """Serve the test dict in a child process."""
+        ctx = mp.get_context('fork')
+        self.proc = ctx.Process(target=serveDict, args=('PdictTest',
+                                self.registry, oldProtocol))
+        self.proc.start()
+        waitForPort(self.registry['PdictTest']['port'])
+
+    def testFrames(self):
+        """Test that frames decode to the fields they were encoded from."""
+        for fields in ([], [b''], [None], [b'get', b'key', None, b'\r\n' * 3],
+                       [bytes(bytearray(range(256))) * 100]):
+            frame = encodeFrame(fields)
+            length = FrameHeader.unpack_from(frame, 0)[0]
+            self.assertEqual(length, len(frame) - FrameHeader.size)
+            self.assertEqual(decodeFrame(frame[FrameHeader.size:]), fields)
+
+        # back to back frames split at their lengths
+        stream = encodeFrame([b'a', None]) + encodeFrame([b'bc'])
+        length = FrameHeader.unpack_from(stream, 0)[0]
+        end = FrameHeader.size + length
+        self.assertEqual(decodeFrame(stream[FrameHeader.size:end]),
+                         [b'a', None])
+        self.assertEqual(decodeFrame(stream[end + FrameHeader.size:]),
+                         [b'bc'])
+
+    def testV2(self):
+        """Test that a client talks v2 to a current server."""
+        self.startServer()
+        client = PersistentDictClient('PdictTest', self.registry)
+        try:
+            self.assertEqual(client.protocolVersion, 2)
+            client.insert('k1', 'v1')
+            client.mset([('k2', 'v2'), ('k3', 'line1\r\nline2')])
+            self.assertEqual(client.mget(['k1', 'k2', 'k3', 'missing']),
+                             ['v1', 'v2', 'line1\r\nline2', None])
+            client.delete('k1')
+            self.assertEqual(client.get('k1'), None)
+        finally:
+            client.close()
+
+    def testV1Fallback(self):
+        """Test that a client falls back to the text protocol with a server
+        that doesn't answer the v2 hello, or when asked to."""
+        self.startServer(oldProtocol=True)
+        client = PersistentDictClient('PdictTest', self.registry, timeout=1.)
+        try:
+            self.assertEqual(client.protocolVersion, 1)
+            self.assertTrue(client.ping())
+            client.insert('k1', 'v1')
+            self.assertEqual(client.get('k1'), 'v1')
+            self.assertEqual(client.get('missing'), None)
+        finally:
+            client.close()
+        client = PersistentDictClient('PdictTest', self.registry,
+                                      protocolVersion=1)
+        try:
+            self.assertEqual(client.protocolVersion, 1)
+            self.assertEqual(client.get('k1'), 'v1')
+            client.delete('k1')
+            self.assertEqual(client.get('k1'), None)
+        finally:
+            client.close()
+
+    def testShmHits(self):
+        """Test that gets served from the shared memory table are sent to
+        the server in one touch."""
+        self.registry['PdictTest'].update({
+            'shmSlots': 64, 'shmSlotSize': 128, 'shmTouchInterval': 3600.,
+            'shmName': 'sciflo-pdictTest-%d' % os.getpid()})
+        self.startServer()
+        client = PersistentDictClient('PdictTest', self.registry)
+        try:
+            client.mset([('k1', 'v1'), ('k2', 'v2')])
+            with mock.patch.object(client, '_request',
+                                   wraps=client._request) as request:
+                self.assertEqual(client.get('k1'), 'v1')
+                self.assertEqual(client.mget(['k1', 'k2']), ['v1', 'v2'])
+                self.assertEqual(request.call_count, 0)
+                self.assertEqual(client.pendingHits, {'k1': 2, 'k2': 1})
+                client.flushHits()
+                self.assertEqual(client.pendingHits, {})
+                self.assertEqual(request.call_count, 1)
+                self.assertEqual(request.call_args[0],
+                                 ('touch', 'k1', '2', 'k2', '1'))
+        finally:
+            client.close()
+
+
+class shardRingTestCase(unittest.TestCase):
+    """Test case for ShardRing."""
+
+    def setUp(self):
+        """Create keys."""
+        self.keys = ['key-%d' % i for i in range(4000)]
+
+    def testUnsharded(self):
+        """Test that an unsharded dict has the single shard None."""
+        ring = ShardRing(1)
+        self.assertEqual(ring.getShards(), [None])
+        self.assertEqual(ring.getShard('foo'), None)
+        self.assertEqual(ring.groupKeys(['a', 'b']), {None: [0, 1]})
+        self.assertEqual(getShardFile('/data/cache.db', None),
+                         '/data/cache.db')
+        self.assertEqual(getShardFile('/data/cache.db', 2),
+                         '/data/cache.2.db')
+        self.assertEqual(getShardFile(None, 2), None)
+
+    def testSpread(self):
+        """Test that keys are spread over all shards and map the same way
+        for every ring."""
+        ring = ShardRing(4)
+        self.assertEqual(ring.getShards(), [0, 1, 2, 3])
+        groups = ring.groupKeys(self.keys)
+        self.assertEqual(sorted(groups), [0, 1, 2, 3])
+        for shard, indexes in groups.items():
+            self.assertTrue(len(indexes) > len(self.keys) / 4 / 2)
+            for i in indexes:
+                self.assertEqual(ring.getShard(self.keys[i]), shard)
+        self.assertEqual(sorted(sum(list(groups.values()), [])),
+                         list(range(len(self.keys))))
+        other = ShardRing(4)
+        self.assertEqual([other.getShard(k) for k in self.keys],
+                         [ring.getShard(k) for k in self.keys])
+
+    def testResharding(self):
+        """Test that adding a shard only moves keys to the new shard."""
+        ring4 = ShardRing(4)
+        ring5 = ShardRing(5)
+        moved = 0
+        for key in self.keys:
+            shard = ring5.getShard(key)
+            if shard != ring4.getShard(key):
+                self.assertEqual(shard, 4)
+                moved += 1
+        self.assertTrue(0 < moved < len(self.keys) / 3)
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    pdictTestSuite = unittest.TestSuite()
+    pdictTestSuite.addTest(pdictTestCase("testFrames"))
+    pdictTestSuite.addTest(pdictTestCase("testV2"))
+    pdictTestSuite.addTest(pdictTestCase("testV1Fallback"))
+    pdictTestSuite.addTest(pdictTestCase("testShmHits"))
+    pdictTestSuite.addTest(shardRingTestCase("testUnsharded"))
+    pdictTestSuite.addTest(shardRingTestCase("testSpread"))
+    pdictTestSuite.addTest(shardRingTestCase("testResharding"))
+
+    # return
+    return pdictTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
@@ -0,0 +1,110 @@
+# -----------------------------------------------------------------------------
+# Name:        shmTableTest.py
+# Purpose:     Unittest for shmTable.
+#
+# Created:     Sat Oct 17 13:21:50 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+
+from sciflo.event.shmTable import (SharedValueTable, SharedValueTableError,
+                                   SeqField, hashKey)
+
+
+class shmTableTestCase(unittest.TestCase):
+    """Test case for SharedValueTable."""
+
+    def setUp(self):
+        """Create table and attach to it."""
+        self.name = 'sciflo-test-%d' % os.getpid()
+        self.table = SharedValueTable(self.name, 4, 64, create=True)
+        self.client = SharedValueTable(self.name)
+
+    def tearDown(self):
+        """Detach and remove table."""
+        self.client.close()
+        self.table.close()
+
+    def testPutGet(self):
+        """Test that values put by the server are seen by clients."""
+        self.assertEqual((self.client.slots, self.client.slotSize), (4, 64))
+        self.assertEqual(self.client.get('foo'), None)
+        self.table.put('foo', 'bar')
+        self.assertEqual(self.client.get('foo'), b'bar')
+        self.table.put('foo', b'')
+        self.assertEqual(self.client.get('foo'), b'')
+        self.table.remove('foo')
+        self.assertEqual(self.client.get('foo'), None)
+        self.assertTrue(self.client.isLive())
+
+    def testCollision(self):
+        """Test that a key replaces another in its slot and removing the
+        replaced key leaves the slot alone."""
+        slot = hashKey(b'k0') % 4
+        other = [k for k in ('k%d' % i for i in range(1, 100))
+                 if hashKey(k.encode()) % 4 == slot][0]
+        self.table.put('k0', 'v0')
+        self.table.put(other, 'v1')
+        self.assertEqual(self.client.get('k0'), None)
+        self.assertEqual(self.client.get(other), b'v1')
+        self.table.remove('k0')
+        self.assertEqual(self.client.get(other), b'v1')
+
+    def testTooBig(self):
+        """Test that a value too big for a slot clears the key's old
+        value."""
+        self.table.put('foo', 'bar')
+        self.table.put('foo', 'x' * 64)
+        self.assertEqual(self.client.get('foo'), None)
+        self.table.put('foo', None)
+        self.assertEqual(self.client.get('foo'), None)
+
+    def testWriteInProgress(self):
+        """Test that a slot being written is not read."""
+        self.table.put('foo', 'bar')
+        off = self.table._slotOffset(hashKey(b'foo'))
+        seq = SeqField.unpack_from(self.table.buf, off)[0]
+        SeqField.pack_into(self.table.buf, off, seq + 1)
+        self.assertEqual(self.client.get('foo'), None)
+        SeqField.pack_into(self.table.buf, off, seq + 2)
+        self.assertEqual(self.client.get('foo'), b'bar')
+
+    def testClosed(self):
+        """Test that clients see a closed table as dead and can't attach to
+        a removed one."""
+        self.table.close()
+        self.assertFalse(self.client.isLive())
+        self.assertRaises(FileNotFoundError, SharedValueTable, self.name)
+
+    def testBadMagic(self):
+        """Test that attaching to a segment that isn't a table fails."""
+        self.table.buf[:8] = b'NOTATABL'
+        self.assertRaises(SharedValueTableError, SharedValueTable, self.name)
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    shmTableTestSuite = unittest.TestSuite()
+    shmTableTestSuite.addTest(shmTableTestCase("testPutGet"))
+    shmTableTestSuite.addTest(shmTableTestCase("testCollision"))
+    shmTableTestSuite.addTest(shmTableTestCase("testTooBig"))
+    shmTableTestSuite.addTest(shmTableTestCase("testWriteInProgress"))
+    shmTableTestSuite.addTest(shmTableTestCase("testClosed"))
+    shmTableTestSuite.addTest(shmTableTestCase("testBadMagic"))
+
+    # return
+    return shmTableTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
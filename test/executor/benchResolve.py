@@ -0,0 +1,34 @@
+import sys
+import time
+
+from sciflo.grid.doc import Sciflo
+from sciflo.grid import postExecution
+from sciflo.utils import xmlUtils
+
+if len(sys.argv) == 3:
+    sflFile = sys.argv[1]
+    iterations = int(sys.argv[2])
+elif len(sys.argv) == 2:
+    sflFile = sys.argv[1]
+    iterations = 20
+else:
+    sflFile = 'test_many.sf.xml'
+    iterations = 20
+
+sflString = open(sflFile).read()
+
+
+def resolve(cold):
+    if cold:
+        xmlUtils._XmlSchemas.clear()
+        postExecution._ConversionRegistries.clear()
+    t = time.time()
+    Sciflo(sflString).resolve()
+    return time.time() - t
+
+
+for cold in (True, False):
+    times = sorted([resolve(cold) for i in range(iterations)])
+    print(("%s: median %.2f ms, min %.2f ms" % ('cold' if cold else 'warm',
+                                                times[len(times) // 2] * 1000,
+                                                times[0] * 1000)))
@@ -0,0 +1,186 @@
+# -----------------------------------------------------------------------------
+# Name:        annotatedDocTest.py
+# Purpose:     Unittest for annotatedDoc.
+#
+# Created:     Sat Oct 17 21:24:50 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import json
+import shutil
+import multiprocessing as mp
+from tempfile import mkdtemp
+from unittest import mock
+from lxml.etree import parse
+
+from sciflo.grid import annotatedDoc
+from sciflo.grid.annotatedDoc import AnnotatedDoc, AnnotatedDocError
+from sciflo.grid.doc import Sciflo
+
+EXECUTOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                            'executor')
+
+
+def getSciflo():
+    """Return resolved test_globaloutput.sf.xml sciflo."""
+    with open(os.path.join(EXECUTOR_DIR, 'test_globaloutput.sf.xml')) as f:
+        sciflo = Sciflo(f.read())
+    sciflo.resolve()
+    return sciflo
+
+
+def addEvents(doc, crash=False):
+    """Record the events of a run of test_globaloutput.sf.xml with a failing
+    work unit.  With crash the process exits before the run finishes."""
+    doc.addScifloStarted('/usr/bin/sflExec.py')
+    doc.addProcessStarted('add1')
+    doc.addProcessFinished('add1', '/missing/pid')
+    doc.addProcessResult('add1', 101.)
+    doc.addProcessStarted('add2')
+    if crash:
+        os._exit(1)
+    doc.addProcessException('add2', 'Traceback: 1 < 2 & KABOOM!')
+    doc.addGlobalOutput(0, 1502.4)
+    doc.addGlobalOutput(3, '/tmp/add3.txt')
+    doc.addScifloFinished()
+    doc.close()
+
+
+def crashRun(sciflo, outputDir):
+    """Run events in journal mode and exit mid-run."""
+    addEvents(AnnotatedDoc(sciflo, outputDir, mode='journal'), crash=True)
+
+
+class annotatedDocTestCase(unittest.TestCase):
+    """Test case for AnnotatedDoc."""
+
+    def setUp(self):
+        """Create temporary dirs and sciflo; fix event times so documents
+        can be compared."""
+        self.tmpDir = mkdtemp()
+        self.fullDir = os.path.join(self.tmpDir, 'full')
+        self.journalDir = os.path.join(self.tmpDir, 'journal')
+        os.makedirs(self.fullDir)
+        os.makedirs(self.journalDir)
+        self.sciflo = getSciflo()
+        self.patcher = mock.patch.object(annotatedDoc, 'getISODateTimeString',
+                                         return_value='2026-10-17T21:00:00Z')
+        self.patcher.start()
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        self.patcher.stop()
+        shutil.rmtree(self.tmpDir)
+
+    def readDoc(self, outputDir):
+        """Return annotated doc written to outputDir."""
+        with open(os.path.join(outputDir, 'sciflo.sf.xml')) as f:
+            return f.read()
+
+    def readJournal(self, outputDir):
+        """Return events in journal written to outputDir."""
+        with open(os.path.join(outputDir, 'sciflo.sf.journal')) as f:
+            return [json.loads(line) for line in f]
+
+    def testMode(self):
+        """Test that unknown modes are rejected and full mode keeps no
+        journal."""
+        self.assertRaises(AnnotatedDocError, AnnotatedDoc, self.sciflo,
+                          self.fullDir, mode='lazy')
+        doc = AnnotatedDoc(self.sciflo, self.fullDir)
+        doc.close()
+        self.assertEqual(os.listdir(self.fullDir), ['sciflo.sf.xml'])
+
+    def testJournalMatchesFull(self):
+        """Test that the journal mode document materialized at the end of a
+        run is the same as the full mode one."""
+        addEvents(AnnotatedDoc(self.sciflo, self.fullDir))
+        journalDoc = AnnotatedDoc(self.sciflo, self.journalDir,
+                                  mode='journal')
+        initial = self.readDoc(self.journalDir)
+        journalDoc.addScifloStarted('/usr/bin/sflExec.py')
+        self.assertEqual(self.readDoc(self.journalDir), initial)
+        addEvents(journalDoc)
+        self.assertEqual(self.readDoc(self.journalDir),
+                         self.readDoc(self.fullDir))
+        self.assertTrue('<![CDATA[\nTraceback: 1 < 2 & KABOOM!]]>' in
+                        self.readDoc(self.journalDir))
+        events = [i['event'] for i in self.readJournal(self.journalDir)]
+        self.assertEqual(events, ['scifloStarted', 'scifloStarted',
+                                  'processStarted', 'processFinished',
+                                  'processResult', 'processStarted',
+                                  'processException', 'globalOutput',
+                                  'globalOutput', 'scifloFinished'])
+
+    def testSnapshots(self):
+        """Test that journal mode writes the document every snapshot
+        interval."""
+        doc = AnnotatedDoc(self.sciflo, self.journalDir, mode='journal',
+                           snapshotInterval=60)
+        doc.addProcessStarted('add1')
+        self.assertTrue(doc.dirty)
+        doc.lastWrite -= 60
+        doc.addProcessResult('add1', 101.)
+        self.assertFalse(doc.dirty)
+        self.assertTrue('>101.0<' in self.readDoc(self.journalDir))
+        doc.close()
+
+    def testCrash(self):
+        """Test that a run dying mid-journal leaves a readable document and
+        journal."""
+        proc = mp.get_context('fork').Process(target=crashRun,
+                                              args=(self.sciflo,
+                                                    self.journalDir))
+        proc.start()
+        proc.join()
+        self.assertEqual(proc.exitcode, 1)
+        root = parse(os.path.join(self.journalDir, 'sciflo.sf.xml')).getroot()
+        self.assertEqual(len(root.xpath('//sf:results/sf:processes/sf:process',
+                                        namespaces={'sf': root.nsmap['sf']})),
+                         3)
+        self.assertEqual([i['event'] for i in
+                          self.readJournal(self.journalDir)],
+                         ['scifloStarted', 'processStarted',
+                          'processFinished', 'processResult',
+                          'processStarted'])
+        self.assertEqual(sorted(os.listdir(self.journalDir)),
+                         ['sciflo.sf.journal', 'sciflo.sf.xml'])
+
+    def testFailedWrite(self):
+        """Test that a failed write leaves the last document in place and no
+        temporary files."""
+        doc = AnnotatedDoc(self.sciflo, self.fullDir)
+        initial = self.readDoc(self.fullDir)
+        with mock.patch.object(annotatedDoc.os, 'replace',
+                               side_effect=OSError('disk full')):
+            self.assertRaises(OSError, doc.addProcessStarted, 'add1')
+        self.assertEqual(self.readDoc(self.fullDir), initial)
+        self.assertEqual(os.listdir(self.fullDir), ['sciflo.sf.xml'])
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    annotatedDocTestSuite = unittest.TestSuite()
+    annotatedDocTestSuite.addTest(annotatedDocTestCase("testMode"))
+    annotatedDocTestSuite.addTest(
+        annotatedDocTestCase("testJournalMatchesFull"))
+    annotatedDocTestSuite.addTest(annotatedDocTestCase("testSnapshots"))
+    annotatedDocTestSuite.addTest(annotatedDocTestCase("testCrash"))
+    annotatedDocTestSuite.addTest(annotatedDocTestCase("testFailedWrite"))
+
+    # return
+    return annotatedDocTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
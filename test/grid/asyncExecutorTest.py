@@ -0,0 +1,105 @@
+# -----------------------------------------------------------------------------
+# Name:        asyncExecutorTest.py
+# Purpose:     Unittest for asyncExecutor.
+#
+# Created:     Sat Oct 17 20:52:16 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import shutil
+import threading
+from tempfile import mkdtemp
+from unittest import mock
+
+from sciflo.grid.executor import runSciflo, getExecutorClass
+from sciflo.grid.asyncExecutor import AsyncScifloExecutor
+
+EXECUTOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                            'executor')
+
+
+def readFlow(name):
+    """Return sciflo xml of a flow in the executor test dir."""
+    with open(os.path.join(EXECUTOR_DIR, name)) as f:
+        return f.read()
+
+
+class asyncExecutorTestCase(unittest.TestCase):
+    """Test case for AsyncScifloExecutor."""
+
+    def setUp(self):
+        """Create temporary dir."""
+        self.tmpDir = mkdtemp()
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        shutil.rmtree(self.tmpDir)
+
+    def testExecutorClass(self):
+        """Test that asyncio mode picks the async executor."""
+        self.assertTrue(getExecutorClass('asyncio') is AsyncScifloExecutor)
+
+    def testOutputs(self):
+        """Test that a flow run on the event loop gives its outputs."""
+        result = runSciflo(readFlow('test_globaloutput.sf.xml'), {},
+                           outputDir=self.tmpDir, lookupCache=False,
+                           configDict={'isLocal': True}, writeGraph=False,
+                           executorMode='asyncio')
+        self.assertAlmostEqual(result[0], 1502.3999994)
+        self.assertAlmostEqual(result[1], 1002.3999994)
+        self.assertEqual(result[2], 1502)
+        self.assertEqual(result[3], os.path.join(self.tmpDir, 'add3.txt'))
+        with open(result[3]) as f:
+            self.assertAlmostEqual(float(f.read()), 1502.3999994)
+
+    def testError(self):
+        """Test that a work unit error is raised from the run."""
+        with self.assertRaisesRegex(Exception, r"'add2': KABOOM!"):
+            runSciflo(readFlow('test_error.sf.xml'), {},
+                      outputDir=self.tmpDir, lookupCache=False,
+                      configDict={'isLocal': True}, writeGraph=False,
+                      executorMode='asyncio')
+
+    def testLateCallback(self):
+        """Test that a callback arriving after the loop is closed is handled
+        directly instead of hanging."""
+        executor = AsyncScifloExecutor(
+            readFlow('test_globaloutput.sf.xml'), outputDir=self.tmpDir,
+            lookupCache=False, configDict={'isLocal': True},
+            writeGraph=False)
+        executor.execute()
+        self.assertTrue(executor.loop.is_closed())
+        self.assertEqual(executor.output[2], 1502)
+        with mock.patch.object(executor, 'handle') as handle:
+            thread = threading.Thread(target=executor.callback,
+                                      args=(('add1', {}),))
+            thread.start()
+            thread.join(10.)
+            self.assertFalse(thread.is_alive())
+            handle.assert_called_once_with(('add1', {}))
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    asyncExecutorTestSuite = unittest.TestSuite()
+    asyncExecutorTestSuite.addTest(asyncExecutorTestCase("testExecutorClass"))
+    asyncExecutorTestSuite.addTest(asyncExecutorTestCase("testOutputs"))
+    asyncExecutorTestSuite.addTest(asyncExecutorTestCase("testError"))
+    asyncExecutorTestSuite.addTest(asyncExecutorTestCase("testLateCallback"))
+
+    # return
+    return asyncExecutorTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
@@ -0,0 +1,172 @@
+# -----------------------------------------------------------------------------
+# Name:        cacheCompactorTest.py
+# Purpose:     Unittest for cacheCompactor.
+#
+# Created:     Sat Oct 17 13:47:26 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import time
+import shutil
+import pickle as pickle
+from tempfile import mkdtemp
+from unittest import mock
+
+from sciflo.grid import cacheCompactor
+from sciflo.grid.cacheCompactor import CacheCompactor, CacheCompactorError
+from sciflo.grid.cacheRecords import makeCacheEntry
+
+
+class FakeFactory(object):
+    """PersistentDictFactory with only what the compactor uses."""
+
+    def __init__(self):
+        self.dictName = 'CacheCompactorTest'
+        self.dict = {}
+        self.hitStats = {}
+        self.started = time.time()
+
+    def getHitStats(self, key):
+        return tuple(self.hitStats.get(key, (None, 0)))
+
+    def remove(self, key):
+        self.hitStats.pop(key, None)
+        self.dict.pop(key, None)
+
+
+class FakeThreads(object):
+    """Run thread calls inline."""
+
+    @staticmethod
+    def deferToThread(func, *args):
+        return func(*args)
+
+
+class cacheCompactorTestCase(unittest.TestCase):
+    """Test case for CacheCompactor passes."""
+
+    def setUp(self):
+        """Create temporary dir and factory."""
+        self.tmpDir = mkdtemp()
+        self.factory = FakeFactory()
+        self.patcher = mock.patch.object(cacheCompactor, 'threads',
+                                         FakeThreads)
+        self.patcher.start()
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        self.patcher.stop()
+        shutil.rmtree(self.tmpDir)
+
+    def addEntry(self, key, bytes=100, lastHit=None, hits=0, workDir=None):
+        """Cache a work unit with its own work dir, or workDir."""
+        if workDir is None:
+            workDir = os.path.join(self.tmpDir, key)
+        if not os.path.isdir(workDir):
+            os.makedirs(workDir)
+        path = os.path.join(workDir, '%s.json' % key)
+        with open(path, 'w') as f:
+            f.write('{}')
+        self.factory.dict[key] = pickle.dumps(
+            makeCacheEntry(path, workDir, bytes, 1.))
+        if lastHit is not None:
+            self.factory.hitStats[key] = [lastHit, hits]
+        return workDir
+
+    def compact(self, **kargs):
+        """Run a compactor pass to completion and return its stats."""
+        compactor = CacheCompactor(self.factory, batchSize=2, **kargs)
+        stats = {}
+        for i in compactor._compactIter(stats):
+            pass
+        return stats
+
+    def testStaleAndExpired(self):
+        """Test that entries whose file is gone or not hit within ttl are
+        dropped and others, including old style entries, are kept."""
+        now = time.time()
+        self.addEntry('fresh', lastHit=now)
+        self.addEntry('old', lastHit=now - 1000)
+        self.addEntry('unhit')
+        self.factory.dict['legacy'] = pickle.dumps(
+            os.path.join(self.tmpDir, 'fresh', 'fresh.json'))
+        self.factory.dict['gone'] = pickle.dumps(
+            makeCacheEntry(os.path.join(self.tmpDir, 'x', 'x.json')))
+        self.factory.dict['junk'] = b'not a pickle'
+        stats = self.compact(ttl=500)
+        self.assertEqual(sorted(self.factory.dict),
+                         ['fresh', 'junk', 'legacy', 'unhit'])
+        self.assertEqual((stats['entries'], stats['stale'], stats['expired'],
+                          stats['evicted']), (5, 1, 1, 0))
+
+    def testEvictLru(self):
+        """Test that least recently hit entries are evicted to fit
+        maxBytes."""
+        now = time.time()
+        for i in range(5):
+            self.addEntry('k%d' % i, lastHit=now - 100 + i, hits=10 - i)
+        stats = self.compact(maxBytes=250, policy='lru')
+        self.assertEqual(sorted(self.factory.dict), ['k3', 'k4'])
+        self.assertEqual((stats['evicted'], stats['bytes']), (3, 200))
+
+    def testEvictLfu(self):
+        """Test that least frequently hit entries are evicted to fit
+        maxBytes."""
+        now = time.time()
+        for i in range(5):
+            self.addEntry('k%d' % i, lastHit=now - 100 + i, hits=10 - i)
+        stats = self.compact(maxBytes=250, policy='lfu')
+        self.assertEqual(sorted(self.factory.dict), ['k0', 'k1'])
+        self.assertEqual(stats['evicted'], 3)
+
+    def testGcWorkDirs(self):
+        """Test that only work dirs no kept entry refers to are removed."""
+        now = time.time()
+        dropped = self.addEntry('dropped', lastHit=now - 1000)
+        shared = self.addEntry('shared1', lastHit=now - 1000)
+        self.addEntry('shared2', lastHit=now, workDir=shared)
+        kept = self.addEntry('kept', lastHit=now)
+        stats = self.compact(ttl=500, gcWorkDirs=True)
+        self.assertEqual(stats['workDirs'], 1)
+        self.assertFalse(os.path.exists(dropped))
+        self.assertTrue(os.path.isdir(shared))
+        self.assertTrue(os.path.isdir(kept))
+
+        # without gcWorkDirs work dirs stay
+        self.addEntry('old', lastHit=now - 1000)
+        stats = self.compact(ttl=500)
+        self.assertTrue(os.path.isdir(os.path.join(self.tmpDir, 'old')))
+        self.assertEqual(stats['workDirs'], 0)
+
+    def testBadPolicy(self):
+        """Test that an unknown eviction policy is refused."""
+        self.assertRaises(CacheCompactorError, CacheCompactor, self.factory,
+                          policy='random')
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    cacheCompactorTestSuite = unittest.TestSuite()
+    cacheCompactorTestSuite.addTest(
+        cacheCompactorTestCase("testStaleAndExpired"))
+    cacheCompactorTestSuite.addTest(cacheCompactorTestCase("testEvictLru"))
+    cacheCompactorTestSuite.addTest(cacheCompactorTestCase("testEvictLfu"))
+    cacheCompactorTestSuite.addTest(cacheCompactorTestCase("testGcWorkDirs"))
+    cacheCompactorTestSuite.addTest(cacheCompactorTestCase("testBadPolicy"))
+
+    # return
+    return cacheCompactorTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
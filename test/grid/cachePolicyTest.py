@@ -0,0 +1,124 @@
+# -----------------------------------------------------------------------------
+# Name:        cachePolicyTest.py
+# Purpose:     Unittest for cachePolicy.
+#
+# Created:     Sat Oct 17 14:02:09 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+from lxml.etree import XML
+
+from sciflo.grid.cachePolicy import (CachePolicy, CachePolicyError,
+                                     parseThresholds, getCachePolicy,
+                                     TYPE_ATTRIBUTES, PROCESS_ATTRIBUTES)
+
+
+class FakeConfig(object):
+    """Grid service config with only the cache thresholds."""
+
+    def getCacheMinRuntime(self): return 2.
+    def getCacheMaxResultBytes(self): return 1000
+
+
+class FakeSciflo(object):
+    """Sciflo with only the elements the cache policy reads."""
+
+    def __init__(self):
+        self._flowCachePolicyTypes = [
+            XML('<type name="python" minRuntime="5"/>'),
+            XML('<type name="soap" cache="false"/>')]
+        self._flowProcessesProcess = [
+            XML('<process id="fast" cacheMinRuntime="0"/>'),
+            XML('<process id="big" cacheMaxBytes="0"/>'),
+            XML('<process id="plain"/>')]
+
+
+class cachePolicyTestCase(unittest.TestCase):
+    """Test case for CachePolicy."""
+
+    def testPrecedence(self):
+        """Test that process thresholds win over type thresholds, which win
+        over the defaults."""
+        policy = CachePolicy(minRuntime=2., maxBytes=1000,
+                             typeThresholds={'python': {'minRuntime': 5.},
+                                             'xpath': {'maxBytes': 10}},
+                             processThresholds={'p1': {'minRuntime': 0.}})
+        self.assertEqual(policy.getThresholds('p2', 'soap'),
+                         {'cache': True, 'minRuntime': 2., 'maxBytes': 1000})
+        self.assertEqual(policy.getThresholds('p2', 'python'),
+                         {'cache': True, 'minRuntime': 5., 'maxBytes': 1000})
+        self.assertEqual(policy.getThresholds('p1', 'python'),
+                         {'cache': True, 'minRuntime': 0., 'maxBytes': 1000})
+
+        # configured type thresholds add to the built in ones
+        self.assertEqual(policy.getThresholds('p2', 'xpath'),
+                         {'cache': True, 'minRuntime': 1., 'maxBytes': 10})
+
+    def testAdmit(self):
+        """Test admission decisions and their counts."""
+        policy = CachePolicy(minRuntime=2., maxBytes=1000,
+                             processThresholds={'off': {'cache': False}})
+        self.assertEqual(policy.admit('p', 'python', 3., 10), (True, None))
+        self.assertEqual(policy.admit('p', 'python', None, None),
+                         (True, None))
+        self.assertEqual(policy.admit('p', 'python', 1., 10),
+                         (False, 'tooFast'))
+        self.assertEqual(policy.admit('p', 'python', 3., 1001),
+                         (False, 'tooBig'))
+        self.assertEqual(policy.admit('off', 'python', 3., 10),
+                         (False, 'disabled'))
+        self.assertEqual(CachePolicy().admit('p', 'python', 0., 10 ** 12),
+                         (True, None))
+        self.assertEqual(policy.getStats(), {'admitted': 2, 'disabled': 1,
+                                             'tooFast': 1, 'tooBig': 1})
+
+    def testParseThresholds(self):
+        """Test parsing thresholds from attributes."""
+        elt = XML('<process cache="True" cacheMinRuntime="1.5" '
+                  'cacheMaxBytes="20"/>')
+        self.assertEqual(parseThresholds(elt, PROCESS_ATTRIBUTES),
+                         {'cache': True, 'minRuntime': 1.5, 'maxBytes': 20})
+        self.assertEqual(parseThresholds(XML('<type cache="no"/>'),
+                                         TYPE_ATTRIBUTES), {'cache': False})
+        self.assertRaises(CachePolicyError, parseThresholds,
+                          XML('<type maxBytes="lots"/>'), TYPE_ATTRIBUTES)
+
+    def testGetCachePolicy(self):
+        """Test building a flow's policy from its config and elements."""
+        policy = getCachePolicy(FakeSciflo(), FakeConfig())
+        self.assertEqual(policy.processThresholds,
+                         {'fast': {'minRuntime': 0.}, 'big': {'maxBytes': 0}})
+        self.assertEqual(policy.admit('fast', 'python', 1., 10), (True, None))
+        self.assertEqual(policy.admit('other', 'python', 3., 10),
+                         (False, 'tooFast'))
+        self.assertEqual(policy.admit('other', 'soap', 100., 10),
+                         (False, 'disabled'))
+        self.assertEqual(policy.admit('big', 'local', 3., 10 ** 6),
+                         (True, None))
+        self.assertEqual(policy.admit('plain', 'local', 3., 10 ** 6),
+                         (False, 'tooBig'))
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    cachePolicyTestSuite = unittest.TestSuite()
+    cachePolicyTestSuite.addTest(cachePolicyTestCase("testPrecedence"))
+    cachePolicyTestSuite.addTest(cachePolicyTestCase("testAdmit"))
+    cachePolicyTestSuite.addTest(cachePolicyTestCase("testParseThresholds"))
+    cachePolicyTestSuite.addTest(cachePolicyTestCase("testGetCachePolicy"))
+
+    # return
+    return cachePolicyTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
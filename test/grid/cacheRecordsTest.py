@@ -0,0 +1,204 @@
+# -----------------------------------------------------------------------------
+# Name:        cacheRecordsTest.py
+# Purpose:     Unittest for cacheRecords.
+#
+# Created:     Sat Oct 17 13:33:12 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import json
+import time
+import base64
+import shutil
+import pickle as pickle
+from tempfile import mkdtemp
+
+from sciflo.grid.status import doneStatus
+from sciflo.grid.cacheRecords import (CacheRecordLRU, decodeCacheRecord,
+                                      getCacheRecord, getCacheRecords,
+                                      makeCacheEntry)
+
+
+class FakePdict(dict):
+    """Dict with the cache server calls cache records make, counting
+    lookups and hits reported."""
+
+    def __init__(self):
+        dict.__init__(self)
+        self.lookups = 0
+        self.touches = {}
+
+    def mget(self, keys):
+        self.lookups += 1
+        return [self.get(k, None) for k in keys]
+
+    def touch(self, key, hits):
+        self.touches[key] = self.touches.get(key, 0) + hits
+
+
+class cacheRecordsTestCase(unittest.TestCase):
+    """Test case for CacheRecordLRU and cache record lookups."""
+
+    def setUp(self):
+        """Create temporary dir."""
+        self.tmpDir = mkdtemp()
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        shutil.rmtree(self.tmpDir)
+
+    def writeJson(self, name, result, padding=0):
+        """Write a done work unit's json file and return its path."""
+        path = os.path.join(self.tmpDir, '%s.json' % name)
+        with open(path, 'w') as f:
+            json.dump({'status': doneStatus, 'padding': 'x' * padding,
+                       'unpublicizedResult': base64.b64encode(
+                           pickle.dumps(result)).decode('utf-8')}, f)
+        return path
+
+    def testDecode(self):
+        """Test that immutable results are shared and others copied."""
+        record = decodeCacheRecord(self.writeJson('a', 'text'))
+        self.assertEqual(record.info['status'], doneStatus)
+        self.assertEqual(record.getResult(), 'text')
+        self.assertTrue(record.shared)
+        record = decodeCacheRecord(self.writeJson('b', [1, 2]))
+        result = record.getResult()
+        self.assertEqual(result, [1, 2])
+        result.append(3)
+        self.assertEqual(record.getResult(), [1, 2])
+        self.assertEqual(decodeCacheRecord(os.path.join(self.tmpDir, 'x')),
+                         None)
+
+    def testMaxEntries(self):
+        """Test that least recently used records are evicted first."""
+        lru = CacheRecordLRU(maxEntries=2)
+        records = [decodeCacheRecord(self.writeJson(str(i), i))
+                   for i in range(3)]
+        lru.put('0', records[0])
+        lru.put('1', records[1])
+        self.assertTrue(lru.get('0') is records[0])
+        lru.put('2', records[2])
+        self.assertEqual(len(lru), 2)
+        self.assertEqual(lru.get('1'), None)
+        self.assertTrue(lru.get('0') is records[0])
+        self.assertEqual(lru.getStats()['evictions'], 1)
+        lru.resize(maxEntries=1)
+        self.assertEqual(len(lru), 1)
+        self.assertTrue(lru.get('0') is records[0])
+
+    def testMaxBytes(self):
+        """Test that records are evicted to stay within maxBytes and a record
+        bigger than that is not kept."""
+        small = decodeCacheRecord(self.writeJson('small', 1))
+        big = decodeCacheRecord(self.writeJson('big', 2, padding=1000))
+        lru = CacheRecordLRU(maxBytes=small.size * 2 + 10)
+        lru.put('big', big)
+        self.assertEqual(len(lru), 0)
+        lru.put('s1', small)
+        lru.put('s2', decodeCacheRecord(self.writeJson('s2', 2)))
+        lru.put('s3', decodeCacheRecord(self.writeJson('s3', 3)))
+        self.assertEqual(len(lru), 2)
+        self.assertEqual(lru.get('s1'), None)
+        self.assertTrue(lru.getStats()['bytes'] <= lru.maxBytes)
+
+    def testInvalidation(self):
+        """Test that a record whose json file changed or is gone is
+        dropped."""
+        lru = CacheRecordLRU()
+        path = self.writeJson('a', 1)
+        lru.put('a', decodeCacheRecord(path))
+        self.writeJson('a', 2, padding=10)
+        self.assertEqual(lru.get('a'), None)
+        lru.put('a', decodeCacheRecord(path))
+        self.assertEqual(lru.get('a').getResult(), 2)
+        os.unlink(path)
+        self.assertEqual(lru.get('a'), None)
+        stats = lru.getStats()
+        self.assertEqual((stats['invalidations'], stats['entries']), (2, 0))
+
+    def testLookup(self):
+        """Test that records are looked up in one mget and then served
+        from the LRU."""
+        pdict = FakePdict()
+        pdict['a'] = makeCacheEntry(self.writeJson('a', 'A'))
+        pdict['b'] = self.writeJson('b', 'B')
+        lru = CacheRecordLRU()
+        found = getCacheRecords(pdict, ['a', 'b', 'c', 'a'], lru)
+        self.assertEqual(sorted(found), ['a', 'b'])
+        self.assertEqual(found['b'].getResult(), 'B')
+        self.assertEqual(pdict.lookups, 1)
+        self.assertTrue(getCacheRecord(pdict, 'a', lru) is found['a'])
+        self.assertEqual(getCacheRecord(pdict, 'c', lru), None)
+        self.assertEqual(pdict.lookups, 2)
+
+    def testTouch(self):
+        """Test that hits on held records are sent to the cache server
+        every touchInterval."""
+        pdict = FakePdict()
+        pdict['a'] = makeCacheEntry(self.writeJson('a', 'A'))
+        lru = CacheRecordLRU(touchInterval=3600.)
+        record = getCacheRecord(pdict, 'a', lru)
+        for i in range(3):
+            getCacheRecord(pdict, 'a', lru)
+        self.assertEqual(pdict.touches, {})
+        record.touched -= 3600.
+        record.checked = time.time()
+        getCacheRecord(pdict, 'a', lru)
+        self.assertEqual(pdict.touches, {'a': 4})
+        self.assertEqual(pdict.lookups, 1)
+
+    def testServerCheck(self):
+        """Test that held records are checked with the cache server every
+        touchInterval and dropped once the server no longer has them."""
+        pdict = FakePdict()
+        pdict['a'] = makeCacheEntry(self.writeJson('a', 'A'))
+        pdict['b'] = makeCacheEntry(self.writeJson('b', 'B'))
+        lru = CacheRecordLRU(touchInterval=3600.)
+        records = getCacheRecords(pdict, ['a', 'b'], lru)
+        for record in records.values():
+            record.checked -= 3600.
+        self.assertEqual(getCacheRecords(pdict, ['a', 'b'], lru), records)
+        self.assertEqual((pdict.lookups, lru.getStats()['checks']), (2, 2))
+        self.assertEqual(getCacheRecords(pdict, ['a', 'b'], lru), records)
+        self.assertEqual(pdict.lookups, 2)
+
+        # expired by the server, and recached under another file
+        del pdict['a']
+        pdict['b'] = makeCacheEntry(self.writeJson('b2', 'B2'))
+        for record in records.values():
+            record.checked -= 3600.
+        found = getCacheRecords(pdict, ['a', 'b'], lru)
+        self.assertEqual(list(found), ['b'])
+        self.assertEqual(found['b'].getResult(), 'B2')
+        self.assertEqual(len(lru), 1)
+        self.assertEqual(lru.getStats()['invalidations'], 1)
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    cacheRecordsTestSuite = unittest.TestSuite()
+    cacheRecordsTestSuite.addTest(cacheRecordsTestCase("testDecode"))
+    cacheRecordsTestSuite.addTest(cacheRecordsTestCase("testMaxEntries"))
+    cacheRecordsTestSuite.addTest(cacheRecordsTestCase("testMaxBytes"))
+    cacheRecordsTestSuite.addTest(cacheRecordsTestCase("testInvalidation"))
+    cacheRecordsTestSuite.addTest(cacheRecordsTestCase("testLookup"))
+    cacheRecordsTestSuite.addTest(cacheRecordsTestCase("testTouch"))
+    cacheRecordsTestSuite.addTest(cacheRecordsTestCase("testServerCheck"))
+
+    # return
+    return cacheRecordsTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
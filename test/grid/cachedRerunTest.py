@@ -0,0 +1,121 @@
+# -----------------------------------------------------------------------------
+# Name:        cachedRerunTest.py
+# Purpose:     Unittest for completing cached work units inline.
+#
+# Created:     Sat Oct 17 21:41:08 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import shutil
+from tempfile import mkdtemp
+from unittest import mock
+
+from sciflo.grid import executor
+from sciflo.grid.executor import ScifloExecutor
+from sciflo.grid.cacheRecords import WorkUnitCacheRecords
+
+EXECUTOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                            'executor')
+
+
+class FakePdict(dict):
+    """Dict with the cache server calls the executor makes."""
+
+    def mget(self, keys):
+        return [self.get(k, None) for k in keys]
+
+    def touch(self, key, hits):
+        pass
+
+
+class cachedRerunTestCase(unittest.TestCase):
+    """Test case for prefetchCached() and completeCached()."""
+
+    def setUp(self):
+        """Create temporary dir, flow and cache."""
+        self.tmpDir = mkdtemp()
+        with open(os.path.join(EXECUTOR_DIR,
+                               'test_globaloutput.sf.xml')) as f:
+            self.flow = f.read()
+        self.pdict = FakePdict()
+        WorkUnitCacheRecords.clear()
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        WorkUnitCacheRecords.clear()
+        shutil.rmtree(self.tmpDir)
+
+    def execute(self, name):
+        """Run flow with the fake cache.  Return the executor, the procIds
+        of the work units sent to the pool and the handle() calls."""
+        sciflo = ScifloExecutor(self.flow, workers=2,
+                                workDir=os.path.join(self.tmpDir, 'work'),
+                                outputDir=os.path.join(self.tmpDir, name),
+                                configDict={'isLocal': True},
+                                writeGraph=False, pdict=self.pdict)
+        with mock.patch.object(executor, 'executeWorkUnit',
+                               wraps=executor.executeWorkUnit) as dispatch, \
+                mock.patch.object(sciflo, 'handle',
+                                  wraps=sciflo.handle) as handle:
+            sciflo.execute()
+        return (sciflo, [c[0][0].getProcId() for c in dispatch.call_args_list],
+                [(c[0][0][0], c[1].get('inFlight', True))
+                 for c in handle.call_args_list])
+
+    def checkOutput(self, sciflo):
+        """Check output of test_globaloutput.sf.xml."""
+        self.assertAlmostEqual(sciflo.output[0], 1502.3999994)
+        self.assertEqual(sciflo.output[2], 1502)
+
+    def testCachedRerun(self):
+        """Test that a fully cached rerun completes without dispatching to
+        the pool, releasing dependents inline."""
+        first, dispatched, handled = self.execute('first')
+        self.checkOutput(first)
+        self.assertEqual(sorted(dispatched), ['add1', 'add2', 'add3'])
+        for procId in dispatched:
+            self.assertTrue(first.hexDict[procId] in self.pdict)
+
+        second, dispatched, handled = self.execute('second')
+        self.checkOutput(second)
+        self.assertEqual(dispatched, [])
+        self.assertEqual(sorted(handled[:2]), [('add1', False),
+                                               ('add2', False)])
+        self.assertEqual(handled[2:], [('add3', False)])
+        self.assertEqual(second.readyQueue.inFlight, 0)
+        self.assertEqual(len(second.cachedQueue), 0)
+
+    def testPartlyCached(self):
+        """Test that only work units missing from the cache are
+        dispatched."""
+        first = self.execute('first')[0]
+        del self.pdict[first.hexDict['add3']]
+        WorkUnitCacheRecords.clear()
+        second, dispatched, handled = self.execute('second')
+        self.checkOutput(second)
+        self.assertEqual(dispatched, ['add3'])
+        self.assertEqual(handled[2:], [('add3', True)])
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    cachedRerunTestSuite = unittest.TestSuite()
+    cachedRerunTestSuite.addTest(cachedRerunTestCase("testCachedRerun"))
+    cachedRerunTestSuite.addTest(cachedRerunTestCase("testPartlyCached"))
+
+    # return
+    return cachedRerunTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
@@ -0,0 +1,110 @@
+# -----------------------------------------------------------------------------
+# Name:        digestTest.py
+# Purpose:     Unittest for digest.
+#
+# Created:     Sat Oct 17 14:10:55 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import shutil
+from collections import UserList
+from tempfile import mkdtemp
+from lxml.etree import XML
+
+from sciflo.grid import digest
+from sciflo.grid.digest import getCanonicalHexDigest
+
+
+class digestTestCase(unittest.TestCase):
+    """Test case for canonical digests."""
+
+    def setUp(self):
+        """Create temporary dir."""
+        self.tmpDir = mkdtemp()
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        shutil.rmtree(self.tmpDir)
+
+    def assertDistinct(self, objs):
+        """Assert that objs all have different digests."""
+        digests = [getCanonicalHexDigest(obj) for obj in objs]
+        self.assertEqual(len(set(digests)), len(objs))
+
+    def testCollisions(self):
+        """Test that values that used to encode alike digest differently."""
+        self.assertDistinct([['ab', 'c'], ['a', 'bc'], ['abc'], 'abc'])
+        self.assertDistinct([1, '1', 1., b'1', True, None, 'None', [1]])
+        self.assertDistinct([[], [[]], {}, set(), '', b''])
+        self.assertDistinct([{'a': 'b,c'}, {'a,b': 'c'}, {'a': 'b', 'c': ''}])
+        self.assertDistinct([[None], [None, None], ['N']])
+
+    def testCanonical(self):
+        """Test that equal values digest alike however they were built."""
+        self.assertEqual(getCanonicalHexDigest({'a': 1, 'b': [2, 3]}),
+                         getCanonicalHexDigest({'b': [2, 3], 'a': 1}))
+        self.assertEqual(getCanonicalHexDigest(set(['x', 'y', 'z'])),
+                         getCanonicalHexDigest(set(['z', 'y', 'x'])))
+        self.assertEqual(getCanonicalHexDigest([1, 2]),
+                         getCanonicalHexDigest((1, 2)))
+        self.assertEqual(getCanonicalHexDigest([1, 2]),
+                         getCanonicalHexDigest(UserList([1, 2])))
+        self.assertEqual(getCanonicalHexDigest(XML('<a  x="1" y="2"/>')),
+                         getCanonicalHexDigest(XML('<a y="2" x="1"></a>')))
+        self.assertEqual(len(getCanonicalHexDigest('x')),
+                         digest.DIGEST_SIZE * 2)
+
+    def testFileArgs(self):
+        """Test that file args digest by path and content."""
+        path = os.path.join(self.tmpDir, 'input.txt')
+        with open(path, 'w') as f:
+            f.write('first')
+        first = getCanonicalHexDigest([path])
+        self.assertEqual(getCanonicalHexDigest([path]), first)
+        with open(path, 'w') as f:
+            f.write('second version')
+        self.assertNotEqual(getCanonicalHexDigest([path]), first)
+
+        # dirs and missing paths digest as strs
+        missing = os.path.join(self.tmpDir, 'missing')
+        self.assertNotEqual(getCanonicalHexDigest(missing),
+                            getCanonicalHexDigest(path))
+        self.assertEqual(getCanonicalHexDigest(self.tmpDir),
+                         getCanonicalHexDigest(self.tmpDir))
+
+    def testVersion(self):
+        """Test that bumping the digest version changes digests."""
+        old = getCanonicalHexDigest(['a', 1])
+        oldPerson = digest.DIGEST_PERSON
+        digest.DIGEST_PERSON = b'sciflo-wu-v99'
+        try:
+            self.assertNotEqual(getCanonicalHexDigest(['a', 1]), old)
+        finally:
+            digest.DIGEST_PERSON = oldPerson
+        self.assertEqual(getCanonicalHexDigest(['a', 1]), old)
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    digestTestSuite = unittest.TestSuite()
+    digestTestSuite.addTest(digestTestCase("testCollisions"))
+    digestTestSuite.addTest(digestTestCase("testCanonical"))
+    digestTestSuite.addTest(digestTestCase("testFileArgs"))
+    digestTestSuite.addTest(digestTestCase("testVersion"))
+
+    # return
+    return digestTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
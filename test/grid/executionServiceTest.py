@@ -0,0 +1,171 @@
+# -----------------------------------------------------------------------------
+# Name:        executionServiceTest.py
+# Purpose:     Unittest for executionService.
+#
+# Created:     Sat Oct 17 21:03:27 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import sys
+import time
+import shutil
+import signal
+import threading
+import subprocess
+from tempfile import mkdtemp
+from unittest import mock
+
+from sciflo.grid.executionService import (ScifloExecutionService,
+                                          ScifloExecutionServiceError,
+                                          runScifloViaService)
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+EXECUTOR_DIR = os.path.join(TEST_DIR, '..', 'executor')
+SERVICE_SCRIPT = os.path.join(TEST_DIR, '..', '..', 'scripts',
+                              'sflService.py')
+
+
+def readFlow(name):
+    """Return sciflo xml of a flow in the executor test dir."""
+    with open(os.path.join(EXECUTOR_DIR, name)) as f:
+        return f.read()
+
+
+def waitForFile(path, timeout=30.):
+    """Wait for path to exist."""
+    end = time.time() + timeout
+    while not os.path.exists(path):
+        if time.time() > end:
+            raise RuntimeError("Timed out waiting for %s." % path)
+        time.sleep(.1)
+
+
+class executionServiceTestCase(unittest.TestCase):
+    """Test case for ScifloExecutionService."""
+
+    def setUp(self):
+        """Create temporary dir, flows and service."""
+        self.tmpDir = mkdtemp()
+        self.address = os.path.join(self.tmpDir, 'sflService.sock')
+        self.flow = readFlow('test_globaloutput.sf.xml')
+        self.errorFlow = readFlow('test_error.sf.xml')
+        self.service = ScifloExecutionService(workers=2, cacheName=None)
+
+    def tearDown(self):
+        """Stop service and remove temporary dir."""
+        if not self.service.closed:
+            self.service.close()
+        shutil.rmtree(self.tmpDir)
+
+    def getRunArgs(self, name):
+        """Return keyword args running a sciflo into its own output dir."""
+        return {'outputDir': os.path.join(self.tmpDir, name),
+                'configDict': {'isLocal': True}, 'writeGraph': False}
+
+    def checkOutput(self, output, name):
+        """Check output of test_globaloutput.sf.xml."""
+        self.assertAlmostEqual(output[0], 1502.3999994)
+        self.assertEqual(output[2], 1502)
+        self.assertEqual(output[3], os.path.join(self.tmpDir, name,
+                                                 'add3.txt'))
+
+    def testSharedPool(self):
+        """Test that concurrent sciflos run their work units in the one
+        pool."""
+        pool = self.service.pool
+        with mock.patch.object(pool, 'apply_async',
+                               wraps=pool.apply_async) as applyAsync:
+            futures = [self.service.submit(self.flow, **self.getRunArgs(name))
+                       for name in ('flow1', 'flow2')]
+            for future, name in zip(futures, ('flow1', 'flow2')):
+                self.checkOutput(future.result(60.), name)
+        self.assertEqual(applyAsync.call_count, 6)
+        self.assertRaises(ScifloExecutionServiceError, self.service.runSciflo,
+                          self.flow, workers=3)
+
+    def testFailureIsolated(self):
+        """Test that a failing sciflo doesn't affect one running beside
+        it."""
+        failed = self.service.submit(self.errorFlow,
+                                     **self.getRunArgs('failed'))
+        ok = self.service.submit(self.flow, **self.getRunArgs('ok'))
+        with self.assertRaisesRegex(Exception, r"'add2': KABOOM!"):
+            failed.result(60.)
+        self.checkOutput(ok.result(60.), 'ok')
+        self.checkOutput(self.service.runSciflo(self.flow,
+                                                **self.getRunArgs('after')),
+                         'after')
+
+    def testServe(self):
+        """Test running sciflos over the unix socket and that close()
+        unblocks serve()."""
+        server = threading.Thread(target=self.service.serve,
+                                  args=[self.address])
+        server.start()
+        try:
+            waitForFile(self.address)
+            self.checkOutput(runScifloViaService(self.address, self.flow,
+                                                 **self.getRunArgs('flow1')),
+                             'flow1')
+            with self.assertRaisesRegex(Exception, r"'add2': KABOOM!"):
+                runScifloViaService(self.address, self.errorFlow,
+                                    **self.getRunArgs('failed'))
+            with self.assertRaisesRegex(ScifloExecutionServiceError,
+                                        'workers'):
+                runScifloViaService(self.address, self.flow, workers=3)
+        finally:
+            self.service.close()
+            server.join(30.)
+        self.assertFalse(server.is_alive())
+        self.assertFalse(os.path.exists(self.address))
+        self.assertRaises(ScifloExecutionServiceError, self.service.runSciflo,
+                          self.flow)
+
+    def testScript(self):
+        """Test that sflService.py serves sciflos until it is sent
+        SIGTERM."""
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        proc = subprocess.Popen([sys.executable, SERVICE_SCRIPT, '--nocache',
+                                 '-w', '2', self.address], env=env,
+                                stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL)
+        try:
+            waitForFile(self.address)
+            self.checkOutput(runScifloViaService(self.address, self.flow,
+                                                 **self.getRunArgs('flow1')),
+                             'flow1')
+            proc.send_signal(signal.SIGTERM)
+            self.assertEqual(proc.wait(30.), 0)
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+        self.assertFalse(os.path.exists(self.address))
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    executionServiceTestSuite = unittest.TestSuite()
+    executionServiceTestSuite.addTest(
+        executionServiceTestCase("testSharedPool"))
+    executionServiceTestSuite.addTest(
+        executionServiceTestCase("testFailureIsolated"))
+    executionServiceTestSuite.addTest(executionServiceTestCase("testServe"))
+    executionServiceTestSuite.addTest(executionServiceTestCase("testScript"))
+
+    # return
+    return executionServiceTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
@@ -0,0 +1,162 @@
+# -----------------------------------------------------------------------------
+# Name:        flowCacheTest.py
+# Purpose:     Unittest for flowCache.
+#
+# Created:     Sat Oct 17 14:22:38 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import shutil
+from tempfile import mkdtemp
+from unittest import mock
+
+from sciflo.grid import doc
+from sciflo.grid.doc import Sciflo, UnresolvedArgument, SCIFLO_SCHEMA_XML
+from sciflo.grid.flowCache import CompiledFlowCache, getFlowKey
+
+EXECUTOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                            'executor')
+
+
+def readFlow(name):
+    """Return sciflo xml of a flow in the executor test dir."""
+    with open(os.path.join(EXECUTOR_DIR, name)) as f:
+        return f.read()
+
+
+def describeArg(arg):
+    """Return comparable description of a work unit arg."""
+    if isinstance(arg, UnresolvedArgument):
+        return ('unresolved', arg.getId(), arg.getOutputIndex())
+    if isinstance(arg, (list, tuple)):
+        return [type(arg).__name__] + [describeArg(i) for i in arg]
+    return (type(arg).__name__, repr(arg))
+
+
+def describeFlow(sciflo):
+    """Return comparable description of a resolved sciflo."""
+    return [(wu.getId(), wu.getType(), wu.getCall(),
+             describeArg(wu.getArgs()), wu.getStageFiles())
+            for wu in sciflo.getWorkUnitConfigs()] + \
+        [describeArg(sciflo.getFlowOutputConfigs()), sciflo.getDot()]
+
+
+def resolve(xml, inputs, flowCache=None):
+    """Return resolved sciflo."""
+    sciflo = Sciflo(xml, globalInputDict=dict(inputs), flowCache=flowCache)
+    sciflo.resolve()
+    return sciflo
+
+
+class flowCacheTestCase(unittest.TestCase):
+    """Test case for CompiledFlowCache."""
+
+    def setUp(self):
+        """Create temporary dir."""
+        self.tmpDir = mkdtemp()
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        shutil.rmtree(self.tmpDir)
+
+    def testFlowKey(self):
+        """Test that keys change with the document, global inputs and user
+        config."""
+        key = getFlowKey('<sf/>', SCIFLO_SCHEMA_XML)
+        self.assertEqual(getFlowKey('<sf/>', SCIFLO_SCHEMA_XML), key)
+        self.assertNotEqual(getFlowKey('<sf />', SCIFLO_SCHEMA_XML), key)
+        self.assertNotEqual(getFlowKey('<sf/>', SCIFLO_SCHEMA_XML, '<i/>'),
+                            key)
+        config = ('/home/user/.sciflo/sciflo.conf', (1, 100))
+        configKey = getFlowKey('<sf/>', SCIFLO_SCHEMA_XML,
+                               configValidators=config)
+        self.assertNotEqual(configKey, key)
+        self.assertNotEqual(getFlowKey(
+            '<sf/>', SCIFLO_SCHEMA_XML,
+            configValidators=(config[0], (2, 100))), configKey)
+
+    def testEntries(self):
+        """Test that entries are bounded in memory and shared through the
+        cache dir."""
+        cache = CompiledFlowCache(self.tmpDir, maxEntries=2, maxFiles=3)
+        for key in 'abcd':
+            cache.update(key, compiled=key)
+        self.assertEqual(cache.getStats()['entries'], 2)
+        self.assertEqual(len(os.listdir(self.tmpDir)), 3)
+        other = CompiledFlowCache(self.tmpDir)
+        self.assertEqual(other.get('d')['compiled'], 'd')
+        self.assertEqual(other.get('missing'), None)
+        self.assertEqual(other.getStats(),
+                         {'entries': 1, 'hits': 1, 'misses': 1})
+        memOnly = CompiledFlowCache()
+        memOnly.update('a', rebindable=True)
+        self.assertEqual(memOnly.get('a')['rebindable'], True)
+
+    def testRebind(self):
+        """Test that a cached flow resolved with other global inputs is the
+        same as one resolved without the cache.  Run from the executor test
+        dir since test_all calls flows there by relative path."""
+        cwd = os.getcwd()
+        os.chdir(EXECUTOR_DIR)
+        try:
+            self.checkRebind()
+        finally:
+            os.chdir(cwd)
+
+    def checkRebind(self):
+        """Check rebinding of a rebindable and a non-rebindable flow."""
+        for name, inputs, rebindable in (
+                ('test_globaloutput.sf.xml', {'var1': '2', 'var2': '101',
+                                              'var5': '400'}, True),
+                ('test_all.sf.xml', {}, False)):
+            xml = readFlow(name)
+            resolve(xml, {}, CompiledFlowCache(self.tmpDir))
+            cache = CompiledFlowCache(self.tmpDir)
+            sciflo = resolve(xml, inputs, cache)
+            self.assertEqual(describeFlow(sciflo),
+                             describeFlow(resolve(xml, inputs)))
+            if inputs:
+                self.assertNotEqual(describeFlow(sciflo),
+                                    describeFlow(resolve(xml, {})))
+            self.assertTrue(cache.getStats()['hits'] > 0)
+            self.assertEqual(cache.get(sciflo._flowKey)['rebindable'],
+                             rebindable)
+
+    def testUserConfigChange(self):
+        """Test that a flow is compiled again when the user config
+        changes."""
+        xml = readFlow('test_globaloutput.sf.xml')
+        cache = CompiledFlowCache(self.tmpDir)
+        with mock.patch.object(doc, 'getUserConfigValidators',
+                               return_value=('sciflo.conf', (1, 100))):
+            key = resolve(xml, {}, cache)._flowKey
+            self.assertEqual(resolve(xml, {}, cache)._flowKey, key)
+        with mock.patch.object(doc, 'getUserConfigValidators',
+                               return_value=('sciflo.conf', (2, 100))):
+            self.assertNotEqual(resolve(xml, {}, cache)._flowKey, key)
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    flowCacheTestSuite = unittest.TestSuite()
+    flowCacheTestSuite.addTest(flowCacheTestCase("testFlowKey"))
+    flowCacheTestSuite.addTest(flowCacheTestCase("testEntries"))
+    flowCacheTestSuite.addTest(flowCacheTestCase("testRebind"))
+    flowCacheTestSuite.addTest(flowCacheTestCase("testUserConfigChange"))
+
+    # return
+    return flowCacheTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
@@ -0,0 +1,113 @@
+# -----------------------------------------------------------------------------
+# Name:        graphWriterTest.py
+# Purpose:     Unittest for writing sciflo graphs in the background.
+#
+# Created:     Sat Oct 17 22:14:05 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import shutil
+from tempfile import mkdtemp
+from unittest import mock
+
+from sciflo.grid import doc, executor
+from sciflo.grid.executor import ScifloExecutor
+from sciflo.grid.flowCache import CompiledFlowCache, getGraphKey
+
+EXECUTOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                            'executor')
+
+# svg rendered by the fake dot
+DOT_SVG = '<svg xmlns="http://www.w3.org/2000/svg"><g id="graph0"/></svg>'
+
+
+class graphWriterTestCase(unittest.TestCase):
+    """Test case for the graph writer thread and the svg cache."""
+
+    def setUp(self):
+        """Create temporary dir, flow and compiled flow cache."""
+        self.tmpDir = mkdtemp()
+        with open(os.path.join(EXECUTOR_DIR,
+                               'test_globaloutput.sf.xml')) as f:
+            self.flow = f.read()
+        self.flowCache = CompiledFlowCache(os.path.join(self.tmpDir,
+                                                        'flowCache'))
+        self.patcher = mock.patch.object(executor, 'getCompiledFlowCache',
+                                         return_value=self.flowCache)
+        self.patcher.start()
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        self.patcher.stop()
+        shutil.rmtree(self.tmpDir)
+
+    def execute(self, name, runDot):
+        """Run flow writing its graph with runDot; return the executor."""
+        with mock.patch.object(doc, 'runDot', runDot):
+            sciflo = ScifloExecutor(self.flow, workers=2,
+                                    workDir=os.path.join(self.tmpDir, 'work'),
+                                    outputDir=os.path.join(self.tmpDir, name),
+                                    configDict={'isLocal': True},
+                                    lookupCache=False, cacheName=None)
+            sciflo.execute()
+        self.assertEqual(sciflo.output[2], 1502)
+        return sciflo
+
+    def readSvg(self, sciflo):
+        """Return svg graph written by sciflo."""
+        with open(sciflo.svgFile) as f:
+            return f.read()
+
+    def testSvgCache(self):
+        """Test that a second run of the flow takes its svg from the cache
+        instead of running dot."""
+        runDot = mock.Mock(return_value=DOT_SVG)
+        first = self.execute('first', runDot)
+        self.assertEqual(runDot.call_count, 1)
+        svg = self.readSvg(first)
+        self.assertTrue('<desc>Test sciflo.</desc>' in svg)
+        self.assertEqual(self.flowCache.get(getGraphKey(
+            first.sciflo.getDot()))['dotSvg'], DOT_SVG)
+
+        second = self.execute('second', runDot)
+        self.assertEqual(runDot.call_count, 1)
+        self.assertEqual(self.readSvg(second), svg)
+
+    def testGraphFailure(self):
+        """Test that a graph that can't be rendered is logged and doesn't
+        fail the run."""
+        runDot = mock.Mock(side_effect=RuntimeError('dot not found'))
+        sciflo = self.execute('failed', runDot)
+        self.assertEqual(runDot.call_count, 1)
+        self.assertFalse(os.path.exists(sciflo.svgFile))
+        with open(sciflo.logFile) as f:
+            log = f.read()
+        self.assertTrue("Got exception writing graph for sciflo 'TestSciflo'"
+                        in log)
+        self.assertTrue('dot not found' in log)
+        self.assertEqual(self.flowCache.get(getGraphKey(
+            sciflo.sciflo.getDot())), None)
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    graphWriterTestSuite = unittest.TestSuite()
+    graphWriterTestSuite.addTest(graphWriterTestCase("testSvgCache"))
+    graphWriterTestSuite.addTest(graphWriterTestCase("testGraphFailure"))
+
+    # return
+    return graphWriterTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
@@ -0,0 +1,83 @@
+# -----------------------------------------------------------------------------
+# Name:        gridUtilsTest.py
+# Purpose:     Unittest for grid utils.
+#
+# Created:     Sat Oct 17 15:02:41 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import shutil
+from tempfile import mkdtemp
+
+from sciflo.grid.utils import getAbsPathForResultFiles
+
+
+class gridUtilsTestCase(unittest.TestCase):
+    """Test case for grid utils."""
+
+    def setUp(self):
+        """Create temporary dir with a result file."""
+        self.tmpDir = mkdtemp()
+        self.resultFile = os.path.join(self.tmpDir, 'out.txt')
+        with open(self.resultFile, 'w') as f:
+            f.write('result')
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        shutil.rmtree(self.tmpDir)
+
+    def testAbsPath(self):
+        """Test that relative result files are resolved against dir without
+        changing the working directory."""
+        cwd = os.getcwd()
+        self.assertEqual(getAbsPathForResultFiles('out.txt', dir=self.tmpDir),
+                         self.resultFile)
+        self.assertEqual(getAbsPathForResultFiles(b'out.txt',
+                                                  dir=self.tmpDir),
+                         os.fsencode(self.resultFile))
+        self.assertEqual(getAbsPathForResultFiles('missing.txt',
+                                                  dir=self.tmpDir),
+                         'missing.txt')
+        self.assertEqual(getAbsPathForResultFiles(self.resultFile),
+                         self.resultFile)
+        self.assertEqual(getAbsPathForResultFiles(
+            ('out.txt', ['out.txt', 1]), dir=self.tmpDir),
+            (self.resultFile, [self.resultFile, 1]))
+        self.assertEqual(os.getcwd(), cwd)
+
+    def testNotPaths(self):
+        """Test that empty and '.' results are left alone."""
+        for result in ('', '.', b'', b'.'):
+            self.assertEqual(getAbsPathForResultFiles(result,
+                                                      dir=self.tmpDir),
+                             result)
+        self.assertEqual(getAbsPathForResultFiles(['', '.', 'out.txt'],
+                                                  dir=self.tmpDir),
+                         ['', '.', self.resultFile])
+        self.assertEqual(getAbsPathForResultFiles(('', ('.',)),
+                                                  dir=self.tmpDir),
+                         ('', ('.',)))
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    gridUtilsTestSuite = unittest.TestSuite()
+    gridUtilsTestSuite.addTest(gridUtilsTestCase("testAbsPath"))
+    gridUtilsTestSuite.addTest(gridUtilsTestCase("testNotPaths"))
+
+    # return
+    return gridUtilsTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
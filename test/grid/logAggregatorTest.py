@@ -0,0 +1,135 @@
+# -----------------------------------------------------------------------------
+# Name:        logAggregatorTest.py
+# Purpose:     Unittest for logAggregator.
+#
+# Created:     Sat Oct 17 11:55:02 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import shutil
+import logging
+from tempfile import mkdtemp
+
+from sciflo.grid import logAggregator
+from sciflo.grid.logAggregator import CappedLog, LogAggregator
+
+
+class RecordingHandler(logging.Handler):
+    """Handler keeping the records it gets."""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class logAggregatorTestCase(unittest.TestCase):
+    """Test case for CappedLog and LogAggregator."""
+
+    def setUp(self):
+        """Create temporary dir."""
+        self.tmpDir = mkdtemp()
+        self.logFile = os.path.join(self.tmpDir, 'wu_execution.log')
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        shutil.rmtree(self.tmpDir)
+
+    def append(self, text, mode='ab'):
+        """Append text to the log file."""
+        with open(self.logFile, mode) as f:
+            f.write(text)
+
+    def testUncapped(self):
+        """Test that a short log is kept whole across reads."""
+        log = CappedLog(self.logFile, 10, 10)
+        log.read()
+        self.assertEqual(log.getText(), '')
+        self.append(b'hello ')
+        log.read()
+        self.append(b'world')
+        log.read()
+        self.assertEqual(log.getText(), 'hello world')
+        self.assertEqual(log.omitted, 0)
+
+    def testCapped(self):
+        """Test that only the head and tail of a long log are kept, however
+        it is read."""
+        data = bytes(bytearray(ord('a') + i % 26 for i in range(1000)))
+        for readSize in (7, 64, 4096):
+            oldSize = logAggregator.READ_SIZE
+            logAggregator.READ_SIZE = readSize
+            try:
+                self.append(b'', 'wb')
+                log = CappedLog(self.logFile, 100, 50)
+                for i in range(0, len(data), 300):
+                    self.append(data[i:i + 300])
+                    log.read()
+            finally:
+                logAggregator.READ_SIZE = oldSize
+            self.assertEqual(bytes(log.head), data[:100])
+            self.assertEqual(bytes(log.tail), data[-50:])
+            self.assertEqual(log.omitted, 850)
+            self.assertEqual(log.getText(), "%s\n... [850 bytes omitted] \
+...\n%s" % (data[:100].decode(), data[-50:].decode()))
+
+    def testTruncated(self):
+        """Test that a truncated log is read from the start again."""
+        log = CappedLog(self.logFile, 100, 100)
+        self.append(b'first run output')
+        log.read()
+        self.append(b'second', 'wb')
+        log.read()
+        self.assertEqual(log.getText(), 'second')
+
+    def testAggregator(self):
+        """Test that finished logs are written to the logger with the
+        aggregator's id and unfinished ones are dropped."""
+        logger = logging.getLogger('logAggregatorTest')
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        handler = RecordingHandler()
+        logger.addHandler(handler)
+        try:
+            aggregator = LogAggregator(logger, 'flowid', 100, 100,
+                                       interval=.05)
+            otherLog = os.path.join(self.tmpDir, 'other.log')
+            aggregator.watch('proc1', self.logFile)
+            aggregator.watch('proc2', otherLog)
+            self.append(b'proc1 output')
+            aggregator.finish('proc1', self.logFile)
+            aggregator.close()
+        finally:
+            logger.removeHandler(handler)
+        self.assertEqual(len(handler.records), 1)
+        self.assertEqual(handler.records[0].getMessage(),
+                         "Execution log for 'proc1': proc1 output")
+        self.assertEqual(handler.records[0].id, 'flowid')
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    logAggregatorTestSuite = unittest.TestSuite()
+    logAggregatorTestSuite.addTest(logAggregatorTestCase("testUncapped"))
+    logAggregatorTestSuite.addTest(logAggregatorTestCase("testCapped"))
+    logAggregatorTestSuite.addTest(logAggregatorTestCase("testTruncated"))
+    logAggregatorTestSuite.addTest(logAggregatorTestCase("testAggregator"))
+
+    # return
+    return logAggregatorTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
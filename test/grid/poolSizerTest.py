@@ -0,0 +1,112 @@
+# -----------------------------------------------------------------------------
+# Name:        poolSizerTest.py
+# Purpose:     Unittest for poolSizer.
+#
+# Created:     Sat Oct 17 11:12:48 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import time
+import shutil
+from tempfile import mkdtemp
+
+from sciflo.grid.poolSizer import (AdaptivePoolSizer, AdaptivePoolSizerError,
+                                   getAvailableMemory)
+
+MB = 1024 * 1024
+
+
+def makeSizer(floor, ceiling, load, availMem, cpuCount=8):
+    """Return sizer that sees the given load and available memory."""
+    sizer = AdaptivePoolSizer(floor, ceiling, memoryPerWorker=100,
+                              interval=3600.)
+    sizer.cpuCount = cpuCount
+    sizer._lastSample = time.time()
+    sizer._load = load
+    sizer._availMem = availMem
+    return sizer
+
+
+class poolSizerTestCase(unittest.TestCase):
+    """Test case for AdaptivePoolSizer."""
+
+    def testBounds(self):
+        """Test that the target stays between floor and ceiling."""
+        sizer = makeSizer(2, 6, 0., 10000 * MB)
+        self.assertEqual(sizer.getTarget(0, 0)[0], 2)
+        self.assertEqual(sizer.getTarget(100, 0)[0], 6)
+        self.assertEqual(sizer.getTarget(3, 1)[0], 4)
+        self.assertEqual(sizer.target, 4)
+
+        # an overloaded, out of memory host still gets the floor
+        sizer = makeSizer(2, 6, 50., 0)
+        self.assertEqual(sizer.getTarget(100, 0)[0], 2)
+
+    def testCpuLimit(self):
+        """Test that load from others leaves fewer cpus to use and our own
+        running work units are not counted twice."""
+        sizer = makeSizer(1, 16, 5., 10000 * MB)
+        target, stats = sizer.getTarget(100, 0)
+        self.assertEqual(target, 3)
+        self.assertEqual(stats['cpuLimit'], 3)
+        self.assertEqual(sizer.getTarget(100, 3)[0], 6)
+
+    def testMemoryLimit(self):
+        """Test that each work unit needs memoryPerWorker."""
+        sizer = makeSizer(1, 16, 0., 250 * MB)
+        target, stats = sizer.getTarget(100, 0)
+        self.assertEqual(target, 2)
+        self.assertEqual(stats['memLimit'], 2)
+
+    def testUnknownResources(self):
+        """Test that cpu count and ceiling bound the target when load and
+        memory can't be read."""
+        sizer = makeSizer(1, 16, None, None, cpuCount=4)
+        self.assertEqual(sizer.getTarget(100, 0)[0], 4)
+
+    def testBadBounds(self):
+        """Test that a ceiling below the floor is refused."""
+        self.assertRaises(AdaptivePoolSizerError, AdaptivePoolSizer, 4, 2)
+        self.assertEqual(AdaptivePoolSizer(0, 2).floor, 1)
+
+    def testGetAvailableMemory(self):
+        """Test reading MemAvailable from a meminfo file."""
+        tmpDir = mkdtemp()
+        try:
+            meminfo = os.path.join(tmpDir, 'meminfo')
+            with open(meminfo, 'w') as f:
+                f.write("MemTotal:       16000000 kB\n"
+                        "MemAvailable:    2048 kB\n")
+            self.assertEqual(getAvailableMemory(meminfo), 2048 * 1024)
+            self.assertEqual(getAvailableMemory(os.path.join(tmpDir, 'x')),
+                             None)
+        finally:
+            shutil.rmtree(tmpDir)
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    poolSizerTestSuite = unittest.TestSuite()
+    poolSizerTestSuite.addTest(poolSizerTestCase("testBounds"))
+    poolSizerTestSuite.addTest(poolSizerTestCase("testCpuLimit"))
+    poolSizerTestSuite.addTest(poolSizerTestCase("testMemoryLimit"))
+    poolSizerTestSuite.addTest(poolSizerTestCase("testUnknownResources"))
+    poolSizerTestSuite.addTest(poolSizerTestCase("testBadBounds"))
+    poolSizerTestSuite.addTest(poolSizerTestCase("testGetAvailableMemory"))
+
+    # return
+    return poolSizerTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
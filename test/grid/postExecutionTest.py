@@ -0,0 +1,156 @@
+# -----------------------------------------------------------------------------
+# Name:        postExecutionTest.py
+# Purpose:     Unittest for the conversion function registry.
+#
+# Created:     Sat Oct 17 21:58:33 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import shutil
+from tempfile import mkdtemp
+from unittest import mock
+
+from sciflo.utils import SCIFLO_NAMESPACE, XSD_NAMESPACE, PY_NAMESPACE
+from sciflo.grid import postExecution
+from sciflo.grid.postExecution import (getConversionFunctionRegistry,
+                                       getConversionFunctionString)
+
+# user config overriding one conversion function and adding another
+USER_CONFIG = '''<?xml version="1.0"?>
+<myConfig xmlns="%s" xmlns:sf="%s" xmlns:xs="%s" xmlns:py="%s">
+    <conversionOperators>
+      <op from="*:*" to="xs:float">%s</op>
+      <op from="sf:xmlList" to="sf:pythonList">mymod.toList</op>
+    </conversionOperators>
+</myConfig>'''
+
+# namespace prefixes of a sciflo doc
+NS_DICT = {'_default': SCIFLO_NAMESPACE, 'sf': SCIFLO_NAMESPACE,
+           'xs': XSD_NAMESPACE, 'py': PY_NAMESPACE}
+
+
+class postExecutionTestCase(unittest.TestCase):
+    """Test case for the conversion function registry."""
+
+    def setUp(self):
+        """Create temporary dir with a user config and use it."""
+        self.tmpDir = mkdtemp()
+        self.configFile = os.path.join(self.tmpDir, 'myconfig.xml')
+        self.writeConfig('mymod.toFloat')
+        self.patcher = mock.patch.object(
+            postExecution, 'getUserInfo', return_value=(
+                'user', self.tmpDir, self.tmpDir, self.configFile))
+        self.patcher.start()
+        postExecution._ConversionRegistries.clear()
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        self.patcher.stop()
+        postExecution._ConversionRegistries.clear()
+        shutil.rmtree(self.tmpDir)
+
+    def writeConfig(self, floatFunc):
+        """Write user config with floatFunc as the xs:float conversion."""
+        with open(self.configFile, 'w') as f:
+            f.write(USER_CONFIG % (SCIFLO_NAMESPACE, SCIFLO_NAMESPACE,
+                                   XSD_NAMESPACE, PY_NAMESPACE, floatFunc))
+
+    def testLookups(self):
+        """Test that lookups return the same functions and raise the same
+        errors as the xpath lookups did."""
+        for fromType, toType, func in (
+                ('xs:string', 'xs:float', 'mymod.toFloat'),
+                ('sf:xmlList', 'sf:pythonList', 'mymod.toList'),
+                ('sf:list', 'sf:xmlList', 'sciflo.utils.iter2Xml'),
+                ('list', 'xmlList', 'sciflo.utils.iter2Xml'),
+                ('xs:string', 'xs:integer', 'int'),
+                (None, 'xs:int', 'int'),
+                ('sf:xpath://a', 'xs:int', 'int'),
+                ('xs:string', 'sf:xpath:/a/b', 'xpath:/a/b'),
+                ('xs:string', 'xs:dateTime', 'None')):
+            self.assertEqual(getConversionFunctionString(fromType, toType,
+                                                         NS_DICT), func)
+        self.assertRaisesRegex(RuntimeError, r'^Cannot find conversion '
+                               r'function for xs:string -> xs:unknown\.$',
+                               getConversionFunctionString, 'xs:string',
+                               'xs:unknown', NS_DICT)
+        self.assertRaisesRegex(RuntimeError, 'unspecified namespace prefix',
+                               getConversionFunctionString, 'xs:string',
+                               '*:float', NS_DICT)
+        self.assertRaises(KeyError, getConversionFunctionString,
+                          'xs:string', 'zz:float', NS_DICT)
+
+    def testNamespacePrefixes(self):
+        """Test that registries are kept per set of namespace prefixes and
+        resolve the doc's own prefixes."""
+        nsDict = dict(NS_DICT, xsd=XSD_NAMESPACE)
+        with mock.patch.object(
+                postExecution, 'buildConversionFunctionRegistry',
+                wraps=postExecution.buildConversionFunctionRegistry) as build:
+            registry = getConversionFunctionRegistry(NS_DICT)
+            self.assertTrue(getConversionFunctionRegistry(dict(NS_DICT)) is
+                            registry)
+            self.assertFalse(getConversionFunctionRegistry(nsDict) is
+                             registry)
+            self.assertEqual(build.call_count, 2)
+        self.assertEqual(len(postExecution._ConversionRegistries), 2)
+        self.assertEqual(getConversionFunctionString('xsd:string', 'xsd:float',
+                                                     nsDict), 'mymod.toFloat')
+
+    def testUserConfigChange(self):
+        """Test that the registry is rebuilt when the user config's size or
+        mtime changes."""
+        with mock.patch.object(
+                postExecution, 'buildConversionFunctionRegistry',
+                wraps=postExecution.buildConversionFunctionRegistry) as build:
+            self.assertEqual(getConversionFunctionString(
+                'xs:string', 'xs:float', NS_DICT), 'mymod.toFloat')
+            self.assertEqual(getConversionFunctionString(
+                'xs:string', 'xs:float', NS_DICT), 'mymod.toFloat')
+            self.assertEqual(build.call_count, 1)
+
+            # size changes
+            self.writeConfig('mymod.toDouble')
+            self.assertEqual(getConversionFunctionString(
+                'xs:string', 'xs:float', NS_DICT), 'mymod.toDouble')
+            self.assertEqual(build.call_count, 2)
+
+            # only mtime changes
+            st = os.stat(self.configFile)
+            self.writeConfig('mymod.toSingle')
+            os.utime(self.configFile,
+                     ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+            self.assertEqual(os.path.getsize(self.configFile), st.st_size)
+            self.assertEqual(getConversionFunctionString(
+                'xs:string', 'xs:float', NS_DICT), 'mymod.toSingle')
+            self.assertEqual(build.call_count, 3)
+
+        # registries of older configs are dropped
+        self.assertEqual(len(postExecution._ConversionRegistries), 1)
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    postExecutionTestSuite = unittest.TestSuite()
+    postExecutionTestSuite.addTest(postExecutionTestCase("testLookups"))
+    postExecutionTestSuite.addTest(
+        postExecutionTestCase("testNamespacePrefixes"))
+    postExecutionTestSuite.addTest(
+        postExecutionTestCase("testUserConfigChange"))
+
+    # return
+    return postExecutionTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
@@ -0,0 +1,128 @@
+# -----------------------------------------------------------------------------
+# Name:        resultStoreTest.py
+# Purpose:     Unittest for resultStore.
+#
+# Created:     Sat Oct 17 11:41:19 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import shutil
+import pickle as pickle
+from tempfile import mkdtemp
+
+from sciflo.grid.doc import DocumentArgsList
+from sciflo.grid.resultStore import (ResultStore, ResultRef, ResultStoreError,
+                                     loadResultRefs, isResultAvailable,
+                                     RESULT_REF_PREFIX)
+
+
+class resultStoreTestCase(unittest.TestCase):
+    """Test case for ResultStore and ResultRef."""
+
+    def setUp(self):
+        """Create store."""
+        self.tmpDir = mkdtemp()
+        self.store = ResultStore(self.tmpDir, threshold=100)
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        shutil.rmtree(self.tmpDir)
+
+    def testThreshold(self):
+        """Test that only results at or above threshold are stored."""
+        self.assertEqual(self.store.put('small'), 'small')
+        self.assertEqual(self.store.put(None), None)
+        e = RuntimeError('x' * 200)
+        self.assertTrue(self.store.put(e) is e)
+        ref = self.store.put('x' * 100)
+        self.assertTrue(isinstance(ref, ResultRef))
+        self.assertTrue(ref.startswith(RESULT_REF_PREFIX))
+        self.assertTrue(self.store.put(ref) is ref)
+
+    def testLoad(self):
+        """Test that text and pickled results load back unchanged and equal
+        results share a file."""
+        text = u'résult ' * 50
+        obj = {'a': list(range(100))}
+        textRef = self.store.put(text)
+        objRef = self.store.put(obj)
+        self.assertEqual(textRef.kind, 'str')
+        self.assertEqual(objRef.kind, 'pickle')
+        self.assertEqual(textRef.load(), text)
+        self.assertEqual(objRef.load(), obj)
+        self.assertEqual(self.store.put(text).path, textRef.path)
+
+        # a text and a pickle of the same bytes don't collide
+        self.assertNotEqual(self.store.put(text.encode('utf-8')).digest,
+                            textRef.digest)
+
+    def testPickle(self):
+        """Test that a pickled ResultRef keeps its attributes."""
+        ref = self.store.put('y' * 200)
+        ref2 = pickle.loads(pickle.dumps(ref, pickle.HIGHEST_PROTOCOL))
+        self.assertTrue(isinstance(ref2, ResultRef))
+        self.assertEqual(ref2, ref)
+        self.assertEqual((ref2.digest, ref2.path, ref2.size, ref2.kind),
+                         (ref.digest, ref.path, ref.size, ref.kind))
+        self.assertEqual(ref2.load(), 'y' * 200)
+
+    def testWriteText(self):
+        """Test that writeText writes the same as writing the result."""
+        outFile = os.path.join(self.tmpDir, 'out.txt')
+        for result in ['z' * 200, list(range(100))]:
+            self.store.put(result).writeText(outFile)
+            with open(outFile) as f:
+                self.assertEqual(f.read(), "%s\n" % (result,))
+
+    def testLoadResultRefs(self):
+        """Test that refs are loaded one level into args, keeping the type
+        of the args list."""
+        ref = self.store.put('w' * 200)
+        self.assertEqual(loadResultRefs(ref), 'w' * 200)
+        self.assertEqual(loadResultRefs([1, ref]), [1, 'w' * 200])
+        self.assertEqual(loadResultRefs((ref,)), ('w' * 200,))
+        nested = [[ref]]
+        self.assertTrue(loadResultRefs(nested) is nested)
+        docArgs = DocumentArgsList('<doc/>', [ref, 2])
+        loaded = loadResultRefs(docArgs)
+        self.assertTrue(isinstance(loaded, DocumentArgsList))
+        self.assertEqual(loaded.docStr, '<doc/>')
+        self.assertEqual(list(loaded), ['w' * 200, 2])
+        self.assertEqual(docArgs[0], ref)
+
+    def testMissing(self):
+        """Test that a removed stored result is reported and can't load."""
+        ref = self.store.put('v' * 200)
+        self.assertTrue(isResultAvailable(ref))
+        os.unlink(ref.path)
+        self.assertFalse(isResultAvailable(ref))
+        self.assertTrue(isResultAvailable('plain'))
+        self.assertRaises(ResultStoreError, ref.load)
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    resultStoreTestSuite = unittest.TestSuite()
+    resultStoreTestSuite.addTest(resultStoreTestCase("testThreshold"))
+    resultStoreTestSuite.addTest(resultStoreTestCase("testLoad"))
+    resultStoreTestSuite.addTest(resultStoreTestCase("testPickle"))
+    resultStoreTestSuite.addTest(resultStoreTestCase("testWriteText"))
+    resultStoreTestSuite.addTest(resultStoreTestCase("testLoadResultRefs"))
+    resultStoreTestSuite.addTest(resultStoreTestCase("testMissing"))
+
+    # return
+    return resultStoreTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
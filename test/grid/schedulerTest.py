@@ -0,0 +1,192 @@
+# -----------------------------------------------------------------------------
+# Name:        schedulerTest.py
+# Purpose:     Unittest for scheduler.
+#
+# Created:     Sat Oct 17 10:40:12 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import json
+import time
+import shutil
+from tempfile import mkdtemp
+
+from sciflo.grid.doc import UnresolvedArgument, DocumentArgsList
+from sciflo.grid.scheduler import (DependencyIndex, DependencyIndexError,
+                                   ReadyQueue, RuntimeHistory, getProducerIds)
+
+
+class FakeWorkUnitConfig(object):
+    """Work unit config with only what DependencyIndex reads."""
+
+    def __init__(self, procId, args):
+        self._procId = procId
+        self._args = args
+
+    def getId(self): return self._procId
+    def getArgs(self): return self._args
+
+
+def makeConfigs(deps):
+    """Return configs for list of (procId, [producer procIds])."""
+    return [FakeWorkUnitConfig(procId, [UnresolvedArgument(p) for p in ps])
+            for procId, ps in deps]
+
+
+# a -> b -> d, a -> c -> d, e alone
+DIAMOND = [('a', []), ('b', ['a']), ('c', ['a']), ('d', ['b', 'c']),
+           ('e', [])]
+
+
+class schedulerTestCase(unittest.TestCase):
+    """Test case for scheduler."""
+
+    def testGetProducerIds(self):
+        """Test that producers are found one level into document args."""
+        args = [UnresolvedArgument('a'), 1,
+                DocumentArgsList('<doc/>', [UnresolvedArgument('b'), 'x'])]
+        self.assertEqual(getProducerIds(args), set(['a', 'b']))
+
+    def testMarkDone(self):
+        """Test that consumers become ready once all producers are done."""
+        index = DependencyIndex(makeConfigs(DIAMOND))
+        self.assertEqual([p for p, ps in DIAMOND if index.isReady(p)],
+                         ['a', 'e'])
+        self.assertEqual(index.getUnresolvedCount('d'), 2)
+        self.assertEqual(index.markDone('a'), ['b', 'c'])
+        self.assertEqual(index.markDone('b'), [])
+        self.assertEqual(index.getUnresolvedCount('d'), 1)
+        self.assertEqual(index.markDone('c'), ['d'])
+        self.assertTrue(index.isReady('d'))
+
+        # a producer is only counted once
+        self.assertEqual(index.markDone('a'), [])
+        self.assertEqual(index.markDone('e'), [])
+
+    def testSelfDependency(self):
+        """Test that a work unit consuming its own output is refused."""
+        self.assertRaises(DependencyIndexError, DependencyIndex,
+                          makeConfigs([('a', ['a'])]))
+
+    def testCriticalPathLengths(self):
+        """Test that path lengths take the heaviest downstream branch."""
+        index = DependencyIndex(makeConfigs(DIAMOND))
+        self.assertEqual(index.getCriticalPathLengths(),
+                         {'a': 3., 'b': 2., 'c': 2., 'd': 1., 'e': 1.})
+        lengths = index.getCriticalPathLengths({'c': 10., 'e': 5.})
+        self.assertEqual(lengths['a'], 12.)
+        self.assertEqual(lengths['b'], 2.)
+        self.assertEqual(lengths['e'], 5.)
+
+    def testCriticalPathLengthsLongChain(self):
+        """Test that a long chain doesn't hit the recursion limit."""
+        deps = [('p0', [])] + [('p%d' % i, ['p%d' % (i - 1)])
+                               for i in range(1, 5000)]
+        lengths = DependencyIndex(makeConfigs(deps)).getCriticalPathLengths()
+        self.assertEqual(lengths['p0'], 5000.)
+
+    def testReadyQueueOrder(self):
+        """Test that higher priorities pop first, ties in push order."""
+        queue = ReadyQueue(window=10)
+        for item, priority in [('a', (0, 1.)), ('b', (0, 3.)), ('c', (1, 0.)),
+                               ('d', (0, 3.)), ('e', (0, 0.))]:
+            queue.push(item, priority)
+        self.assertEqual(queue.popReady(), ['c', 'b', 'd', 'a', 'e'])
+
+    def testReadyQueueWindow(self):
+        """Test that no more than window items are in flight."""
+        queue = ReadyQueue(window=2)
+        for i in range(5):
+            queue.push(i)
+        self.assertEqual(queue.popReady(), [0, 1])
+        self.assertEqual(queue.popReady(), [])
+        self.assertEqual(len(queue), 3)
+        queue.taskDone()
+        self.assertEqual(queue.popReady(), [2])
+        queue.window = 4
+        self.assertEqual(queue.popReady(), [3, 4])
+        self.assertEqual(queue.inFlight, 4)
+
+
+class runtimeHistoryTestCase(unittest.TestCase):
+    """Test case for RuntimeHistory."""
+
+    def setUp(self):
+        """Create temporary dir."""
+        self.tmpDir = mkdtemp()
+        self.file = os.path.join(self.tmpDir, 'runtimeHistory.json')
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        shutil.rmtree(self.tmpDir)
+
+    def testUpdateAndSave(self):
+        """Test that averages are folded in and merged with the file."""
+        history = RuntimeHistory(self.file, alpha=.5)
+        history.update('f/a', 4.)
+        history.update('f/a', 2.)
+        self.assertEqual(history.get('f/a'), 3.)
+        other = RuntimeHistory(self.file, alpha=.5)
+        other.update('f/b', 1.)
+        history.save()
+        other.save()
+        merged = RuntimeHistory(self.file)
+        self.assertEqual(merged.get('f/a'), 3.)
+        self.assertEqual(merged.get('f/b'), 1.)
+        self.assertEqual(merged.get('f/c', 7.), 7.)
+
+    def testOldFormat(self):
+        """Test that bare averages written before update times are read."""
+        with open(self.file, 'w') as f:
+            json.dump({'f/a': 5.}, f)
+        history = RuntimeHistory(self.file)
+        self.assertEqual(history.get('f/a'), 5.)
+        history.update('f/b', 1.)
+        history.save()
+        with open(self.file) as f:
+            self.assertEqual(json.load(f)['f/a'][0], 5.)
+
+    def testPrune(self):
+        """Test that stale and least recently updated keys are dropped."""
+        now = time.time()
+        with open(self.file, 'w') as f:
+            json.dump({'f/old': [1., now - 1000.], 'f/a': [1., now - 30.],
+                       'f/b': [1., now - 20.], 'f/c': [1., now - 10.]}, f)
+        history = RuntimeHistory(self.file, maxEntries=3, maxAge=100.)
+        history.update('f/d', 1.)
+        history.save()
+        with open(self.file) as f:
+            self.assertEqual(sorted(json.load(f)), ['f/b', 'f/c', 'f/d'])
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    schedulerTestSuite = unittest.TestSuite()
+    schedulerTestSuite.addTest(schedulerTestCase("testGetProducerIds"))
+    schedulerTestSuite.addTest(schedulerTestCase("testMarkDone"))
+    schedulerTestSuite.addTest(schedulerTestCase("testSelfDependency"))
+    schedulerTestSuite.addTest(schedulerTestCase("testCriticalPathLengths"))
+    schedulerTestSuite.addTest(schedulerTestCase(
+        "testCriticalPathLengthsLongChain"))
+    schedulerTestSuite.addTest(schedulerTestCase("testReadyQueueOrder"))
+    schedulerTestSuite.addTest(schedulerTestCase("testReadyQueueWindow"))
+    schedulerTestSuite.addTest(runtimeHistoryTestCase("testUpdateAndSave"))
+    schedulerTestSuite.addTest(runtimeHistoryTestCase("testOldFormat"))
+    schedulerTestSuite.addTest(runtimeHistoryTestCase("testPrune"))
+
+    # return
+    return schedulerTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
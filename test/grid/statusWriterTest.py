@@ -0,0 +1,127 @@
+# -----------------------------------------------------------------------------
+# Name:        statusWriterTest.py
+# Purpose:     Unittest for statusWriter.
+#
+# Created:     Sat Oct 17 11:26:30 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import json
+import shutil
+from tempfile import mkdtemp
+from unittest import mock
+
+from sciflo.grid import statusWriter
+from sciflo.grid.statusWriter import StatusWriter, snapshot
+
+
+def readJson(path):
+    """Return decoded json file."""
+    with open(path) as f:
+        return json.load(f)
+
+
+class statusWriterTestCase(unittest.TestCase):
+    """Test case for StatusWriter."""
+
+    def setUp(self):
+        """Create temporary dir and count writes."""
+        self.tmpDir = mkdtemp()
+        self.jsonFile = os.path.join(self.tmpDir, 'status.json')
+        self.otherFile = os.path.join(self.tmpDir, 'other.json')
+        self.patcher = mock.patch.object(statusWriter, 'updateJson',
+                                         wraps=statusWriter.updateJson)
+        self.updateJson = self.patcher.start()
+
+    def tearDown(self):
+        """Remove temporary dir."""
+        self.patcher.stop()
+        shutil.rmtree(self.tmpDir)
+
+    def testCoalesce(self):
+        """Test that only the latest update of a file is written."""
+        writer = StatusWriter(interval=3600.)
+        try:
+            for i in range(10):
+                writer.update(self.jsonFile, {'status': i})
+            writer.update(self.otherFile, {'status': 'other'})
+            self.assertFalse(os.path.exists(self.jsonFile))
+            writer.flush(self.jsonFile)
+            self.assertEqual(readJson(self.jsonFile), {'status': 9})
+            self.assertFalse(os.path.exists(self.otherFile))
+            self.assertEqual(self.updateJson.call_count, 1)
+        finally:
+            writer.close()
+        self.assertEqual(readJson(self.otherFile), {'status': 'other'})
+        self.assertEqual(self.updateJson.call_count, 2)
+
+    def testSnapshot(self):
+        """Test that changes made after an update are not written."""
+        info = {'status': 'running', 'result': [1]}
+        writer = StatusWriter(interval=3600.)
+        writer.update(self.jsonFile, info, stringifyKeys=['result'])
+        info['status'] = 'done'
+        info['result'].append(2)
+        writer.close()
+        self.assertEqual(readJson(self.jsonFile),
+                         {'status': 'running', 'result': '[1]'})
+        self.assertEqual(snapshot('x'), 'x')
+
+    def testImmediate(self):
+        """Test that with interval 0 updates are written right away."""
+        writer = StatusWriter(interval=0)
+        writer.update(self.jsonFile, {'status': 1})
+        self.assertEqual(readJson(self.jsonFile), {'status': 1})
+        writer.close()
+
+    def testBackground(self):
+        """Test that pending updates are written by the background
+        thread."""
+        writer = StatusWriter(interval=.05)
+        try:
+            writer.update(self.jsonFile, {'status': 1})
+            for i in range(100):
+                if os.path.exists(self.jsonFile):
+                    break
+                writer._stop.wait(.05)
+            self.assertEqual(readJson(self.jsonFile), {'status': 1})
+        finally:
+            writer.close()
+
+    def testWriteError(self):
+        """Test that a failed write is logged and doesn't stop others."""
+        writer = StatusWriter(interval=3600.)
+        blocker = os.path.join(self.tmpDir, 'file')
+        with open(blocker, 'w') as f:
+            f.write('')
+        writer.update(os.path.join(blocker, 'status.json'), {'status': 1})
+        writer.update(self.jsonFile, {'status': 2})
+        writer.close()
+        self.assertEqual(readJson(self.jsonFile), {'status': 2})
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    statusWriterTestSuite = unittest.TestSuite()
+    statusWriterTestSuite.addTest(statusWriterTestCase("testCoalesce"))
+    statusWriterTestSuite.addTest(statusWriterTestCase("testSnapshot"))
+    statusWriterTestSuite.addTest(statusWriterTestCase("testImmediate"))
+    statusWriterTestSuite.addTest(statusWriterTestCase("testBackground"))
+    statusWriterTestSuite.addTest(statusWriterTestCase("testWriteError"))
+
+    # return
+    return statusWriterTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
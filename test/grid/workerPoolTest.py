@@ -0,0 +1,159 @@
+# -----------------------------------------------------------------------------
+# Name:        workerPoolTest.py
+# Purpose:     Unittest for workerPool.
+#
+# Created:     Sat Oct 17 10:58:05 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import time
+import signal
+
+from sciflo.grid.funcs import ForkedChildDied, ExecuteWorkUnitTimeoutError
+from sciflo.grid.workerPool import (PersistentWorker, PersistentWorkerPool,
+                                    PersistentWorkerPoolError)
+
+
+class FakeWorkUnit(object):
+    """Work unit with only what a persistent worker calls.  action is one
+    of 'pid' (return the worker's pid), 'kill' (die by SIGKILL), 'sleep'
+    (sleep arg seconds) or 'chdir' (change to dir arg and return cwd)."""
+
+    def __init__(self, action, arg=None):
+        self.action = action
+        self.arg = arg
+        self.args = []
+
+    def getWuid(self): return 'wuid-%s' % self.action
+    def getProcId(self): return self.action
+    def getArgs(self): return self.args
+    def setArgs(self, args): self.args = args
+    def getResultStore(self): return None
+
+    def run(self):
+        if self.action == 'kill':
+            os.kill(os.getpid(), signal.SIGKILL)
+        elif self.action == 'sleep':
+            time.sleep(self.arg)
+        elif self.action == 'chdir':
+            os.chdir(self.arg)
+        return ((os.getpid(), os.getcwd()), None)
+
+
+def runTask(wu, timeout=10, runner=None):
+    """Pool task running wu on its slot's worker."""
+    return runner(wu, timeout)
+
+
+class workerPoolTestCase(unittest.TestCase):
+    """Test case for PersistentWorker and PersistentWorkerPool."""
+
+    def setUp(self):
+        """Create worker."""
+        self.worker = PersistentWorker(maxTasks=2)
+
+    def tearDown(self):
+        """Stop worker."""
+        self.worker.stop()
+
+    def testReuse(self):
+        """Test that a worker runs work units in the same process and
+        restores its cwd between them."""
+        (pid1, cwd1), tb = self.worker.run(FakeWorkUnit('chdir', '/'), 10)
+        self.assertEqual(tb, None)
+        self.assertEqual(cwd1, '/')
+        (pid2, cwd2), tb = self.worker.run(FakeWorkUnit('pid'), 10)
+        self.assertEqual(pid1, pid2)
+        self.assertNotEqual(pid1, os.getpid())
+        self.assertEqual(cwd2, os.getcwd())
+
+    def testRecycle(self):
+        """Test that a worker is replaced after maxTasks work units."""
+        pids = [self.worker.run(FakeWorkUnit('pid'), 10)[0][0]
+                for i in range(4)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertEqual(pids[2], pids[3])
+        self.assertNotEqual(pids[0], pids[2])
+
+    def testCrash(self):
+        """Test that a worker killed mid work unit gives a ForkedChildDied
+        result and is replaced for the next one."""
+        res, tb = self.worker.run(FakeWorkUnit('kill'), 10)
+        self.assertTrue(isinstance(res, ForkedChildDied))
+        self.assertFalse(self.worker.isAlive())
+        (pid, cwd), tb = self.worker.run(FakeWorkUnit('pid'), 10)
+        self.assertEqual(tb, None)
+
+    def testTimeout(self):
+        """Test that a work unit running past its timeout raises and its
+        worker is killed."""
+        pid = self.worker.run(FakeWorkUnit('pid'), 10)[0][0]
+        self.assertRaises(ExecuteWorkUnitTimeoutError, self.worker.run,
+                          FakeWorkUnit('sleep', 30), .5)
+        self.assertFalse(self.worker.isAlive())
+        self.assertRaises(OSError, os.kill, pid, 0)
+        self.assertNotEqual(self.worker.run(FakeWorkUnit('pid'), 10)[0][0],
+                            pid)
+
+    def testPool(self):
+        """Test that pool tasks run on persistent workers and call back."""
+        pool = PersistentWorkerPool(2, maxTasksPerWorker=None)
+        try:
+            done = []
+            results = [pool.apply_async(runTask, [FakeWorkUnit('pid')],
+                                        callback=done.append)
+                       for i in range(6)]
+            pids = set([r.get(10)[0][0] for r in results])
+            self.assertTrue(1 <= len(pids) <= 2)
+            self.assertEqual(len(done), 6)
+            res = pool.apply_async(runTask, [FakeWorkUnit('kill')]).get(10)
+            self.assertTrue(isinstance(res[0], ForkedChildDied))
+        finally:
+            pool.terminate()
+            pool.join()
+        self.assertRaises(ValueError, pool.apply_async, runTask,
+                          [FakeWorkUnit('pid')])
+
+    def testPoolResize(self):
+        """Test that pool size stays between 1 and processes."""
+        self.assertRaises(PersistentWorkerPoolError, PersistentWorkerPool, 0)
+        pool = PersistentWorkerPool(3, size=1)
+        try:
+            self.assertEqual(pool.getSize(), 1)
+            pool.resize(10)
+            self.assertEqual(pool.getSize(), 3)
+            pool.resize(0)
+            self.assertEqual(pool.getSize(), 1)
+            res = pool.apply_async(runTask, [FakeWorkUnit('pid')]).get(10)
+            self.assertEqual(res[1], None)
+        finally:
+            pool.close()
+            pool.join()
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    workerPoolTestSuite = unittest.TestSuite()
+    workerPoolTestSuite.addTest(workerPoolTestCase("testReuse"))
+    workerPoolTestSuite.addTest(workerPoolTestCase("testRecycle"))
+    workerPoolTestSuite.addTest(workerPoolTestCase("testCrash"))
+    workerPoolTestSuite.addTest(workerPoolTestCase("testTimeout"))
+    workerPoolTestSuite.addTest(workerPoolTestCase("testPool"))
+    workerPoolTestSuite.addTest(workerPoolTestCase("testPoolResize"))
+
+    # return
+    return workerPoolTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
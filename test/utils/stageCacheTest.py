@@ -0,0 +1,219 @@
+# -----------------------------------------------------------------------------
+# Name:        stageCacheTest.py
+# Purpose:     Unittest for stageCache.
+#
+# Created:     Sat Oct 17 10:12:41 2026
+# Copyright:   (c) 2026, California Institute of Technology.
+#              U.S. Government Sponsorship acknowledged.
+# -----------------------------------------------------------------------------
+import unittest
+import os
+import shutil
+import time
+import tarfile
+from tempfile import mkdtemp
+
+from sciflo.utils.stageCache import StageCache, getStageCache
+
+
+def writeFile(path, contents):
+    """Write contents to path."""
+    with open(path, 'w') as f:
+        f.write(contents)
+
+
+def readFile(path):
+    """Return contents of path."""
+    with open(path) as f:
+        return f.read()
+
+
+class stageCacheTestCase(unittest.TestCase):
+    """Test case for StageCache."""
+
+    def setUp(self):
+        """Create source files, cache and work dirs."""
+        self.tmpDir = mkdtemp()
+        self.srcDir = os.path.join(self.tmpDir, 'src')
+        os.makedirs(self.srcDir)
+        self.inFile = os.path.join(self.srcDir, 'in.txt')
+        writeFile(self.inFile, 'original')
+        self.cacheDir = os.path.join(self.tmpDir, 'cache')
+        self.wu1 = os.path.join(self.tmpDir, 'wu1')
+        self.wu2 = os.path.join(self.tmpDir, 'wu2')
+        os.makedirs(self.wu1)
+        os.makedirs(self.wu2)
+
+    def tearDown(self):
+        """Remove temporary dirs."""
+        for root, dirs, files in os.walk(self.tmpDir):
+            for name in dirs + files:
+                path = os.path.join(root, name)
+                if not os.path.islink(path):
+                    os.chmod(path, 0o755)
+        shutil.rmtree(self.tmpDir)
+
+    def makeBundle(self):
+        """Create a tar bundle of one data file and return its path."""
+        dataDir = os.path.join(self.tmpDir, 'bundleSrc', 'data')
+        os.makedirs(dataDir)
+        writeFile(os.path.join(dataDir, 'table.txt'), 'rows')
+        bundle = os.path.join(self.srcDir, 'data.tar.gz')
+        with tarfile.open(bundle, 'w:gz') as t:
+            t.add(dataDir, arcname='data')
+        return bundle
+
+    def testHitAndRevalidate(self):
+        """Test that an unchanged file is a hit and a changed one a miss."""
+        cache = StageCache(self.cacheDir)
+        digest = cache.getFileDigest(self.inFile)
+        self.assertEqual(cache.getFileDigest(self.inFile), digest)
+        self.assertEqual(cache.getStats()['misses'], 1)
+        self.assertEqual(cache.getStats()['hits'], 1)
+        writeFile(self.inFile, 'changed!')
+        newDigest = cache.getFileDigest(self.inFile)
+        self.assertNotEqual(newDigest, digest)
+        self.assertEqual(cache.getStats()['misses'], 2)
+        self.assertEqual(readFile(cache.getObject(newDigest)), 'changed!')
+
+        # a new cache on the same dir reuses the index
+        cache2 = StageCache(self.cacheDir)
+        self.assertEqual(cache2.getFileDigest(self.inFile), newDigest)
+        self.assertEqual(cache2.getStats()['hits'], 1)
+
+    def testStagedFilesArePrivate(self):
+        """Test that a write in one work dir leaves the cache and other
+        work dirs unchanged."""
+        cache = StageCache(self.cacheDir)
+        staged1 = cache.stage(self.inFile, self.wu1)
+        staged2 = cache.stage(self.inFile, self.wu2)
+        obj = cache.getObject(cache.getFileDigest(self.inFile))
+        self.assertNotEqual(os.stat(staged1).st_ino, os.stat(obj).st_ino)
+        with open(staged1, 'a') as f:
+            f.write(' appended')
+        self.assertEqual(readFile(staged1), 'original appended')
+        self.assertEqual(readFile(staged2), 'original')
+        self.assertEqual(readFile(obj), 'original')
+
+    def testStagedBundlesArePrivate(self):
+        """Test that a write to an unpacked bundle file in one work dir
+        leaves the cache and other work dirs unchanged."""
+        bundle = self.makeBundle()
+        cache = StageCache(self.cacheDir)
+        cache.stage(bundle, self.wu1, unpackBundles=True)
+        cache.stage(bundle, self.wu2, unpackBundles=True)
+        stats = cache.getStats()
+        self.assertEqual(stats['bundleMisses'], 1)
+        self.assertEqual(stats['bundleHits'], 1)
+        table1 = os.path.join(self.wu1, 'data', 'table.txt')
+        table2 = os.path.join(self.wu2, 'data', 'table.txt')
+        writeFile(table1, 'rewritten')
+        self.assertEqual(readFile(table2), 'rows')
+        bundleDir = cache.getBundleDir(cache.getFileDigest(bundle))
+        self.assertEqual(readFile(os.path.join(bundleDir, 'data',
+                                               'table.txt')), 'rows')
+
+    def testHardlinkOptIn(self):
+        """Test that staged files are hardlinked only when asked to."""
+        cache = getStageCache(self.cacheDir, hardlink=True)
+        self.assertTrue(cache.hardlink)
+        self.assertFalse(getStageCache(self.cacheDir).hardlink)
+        staged = cache.stage(self.inFile, self.wu1)
+        obj = cache.getObject(cache.getFileDigest(self.inFile))
+        self.assertEqual(os.stat(staged).st_ino, os.stat(obj).st_ino)
+
+    def backdate(self, path, age):
+        """Set last use of path to age seconds ago."""
+        t = time.time() - age
+        os.utime(path, (t, t))
+
+    def testPruneAge(self):
+        """Test that objects, bundles and index entries unused for maxAge
+        are pruned and recently used ones kept."""
+        bundle = self.makeBundle()
+        cache = StageCache(self.cacheDir, maxAge=86400.)
+        cache.stage(bundle, self.wu1, unpackBundles=True)
+        cache.stage(self.inFile, self.wu1)
+        bundleDigest = cache.getFileDigest(bundle)
+        inDigest = cache.getFileDigest(self.inFile)
+        bundleDir = cache.getBundleDir(bundleDigest)
+        self.backdate(cache.getObject(bundleDigest), 2 * 86400)
+        self.backdate(bundleDir, 2 * 86400)
+        stats = cache.prune()
+        self.assertEqual((stats['entries'], stats['evicted']), (3, 2))
+        self.assertFalse(os.path.exists(bundleDir))
+        self.assertFalse(os.path.exists(cache.getObject(bundleDigest)))
+        self.assertTrue(os.path.exists(cache.getObject(inDigest)))
+        self.assertEqual(len(os.listdir(cache.indexDir)), 1)
+
+        # staged files are private, so work dirs keep theirs
+        self.assertEqual(readFile(os.path.join(self.wu1, 'data',
+                                               'table.txt')), 'rows')
+
+        # a pruned file is stored again when it is next staged
+        cache.stage(bundle, self.wu2, unpackBundles=True)
+        self.assertEqual(readFile(os.path.join(self.wu2, 'data',
+                                               'table.txt')), 'rows')
+
+    def testPruneSize(self):
+        """Test that least recently used objects are pruned until the cache
+        fits in maxBytes and ones used within the grace period are kept."""
+        cache = StageCache(self.cacheDir, maxBytes=25)
+        digests = []
+        for i in range(4):
+            path = os.path.join(self.srcDir, 'f%d.txt' % i)
+            writeFile(path, '%d' % i * 10)
+            cache.stage(path, self.wu1)
+            digests.append(cache.getFileDigest(path))
+            self.backdate(cache.getObject(digests[-1]), 4000 - i * 1000)
+        stats = cache.prune()
+        self.assertEqual((stats['evicted'], stats['bytes']), (2, 20))
+        self.assertEqual([os.path.exists(cache.getObject(d))
+                          for d in digests], [False, False, True, True])
+
+        # recently used objects are never pruned
+        cache.maxBytes = 1
+        os.utime(cache.getObject(digests[3]))
+        stats = cache.prune()
+        self.assertEqual((stats['evicted'], stats['bytes']), (1, 10))
+        self.assertEqual(cache.getStats()['evictions'], 3)
+
+    def testPruneInterval(self):
+        """Test that a cache is pruned at most every pruneInterval by the
+        processes sharing it and not at all without limits."""
+        self.assertEqual(StageCache(self.cacheDir).maybePrune(), None)
+        cache = StageCache(self.cacheDir, maxAge=86400., pruneInterval=3600.)
+        self.assertNotEqual(cache.maybePrune(), None)
+        other = StageCache(self.cacheDir, maxAge=86400., pruneInterval=3600.)
+        self.assertEqual(other.maybePrune(), None)
+        self.backdate(other.pruneFile, 4000)
+        self.assertNotEqual(other.maybePrune(), None)
+
+
+def getTestSuite():
+    """Creates and returns a test suite."""
+    # run tests
+    stageCacheTestSuite = unittest.TestSuite()
+    stageCacheTestSuite.addTest(stageCacheTestCase("testHitAndRevalidate"))
+    stageCacheTestSuite.addTest(stageCacheTestCase(
+        "testStagedFilesArePrivate"))
+    stageCacheTestSuite.addTest(stageCacheTestCase(
+        "testStagedBundlesArePrivate"))
+    stageCacheTestSuite.addTest(stageCacheTestCase("testHardlinkOptIn"))
+    stageCacheTestSuite.addTest(stageCacheTestCase("testPruneAge"))
+    stageCacheTestSuite.addTest(stageCacheTestCase("testPruneSize"))
+    stageCacheTestSuite.addTest(stageCacheTestCase("testPruneInterval"))
+
+    # return
+    return stageCacheTestSuite
+
+
+# main
+if __name__ == "__main__":
+
+    # get testSuite
+    testSuite = getTestSuite()
+
+    # run it
+    runner = unittest.TextTestRunner()
+    runner.run(testSuite)
@@ -10,11 +10,14 @@
 # -----------------------------------------------------------------------------
 import unittest
 import os
+import shutil
 from tempfile import mkdtemp
 import lxml.etree
-from io import StringIO
+from io import StringIO, BytesIO
+from unittest import mock
 
 from sciflo.utils import *
+from sciflo.utils import xmlUtils
 from sciflo.utils.xmlIndent import indent
 
 # this dir
@@ -44,6 +47,9 @@ configFile = os.path.join(thisDir, 'config.xml')
 # endpoint xsl
 configXslFile = os.path.join(thisDir, 'config2EndpointConfig.xsl')
 
+# schema file
+schemaFile = os.path.join(thisDir, 'test.xsd')
+
 # root tag
 rootTag = 'testRootTag'
 
@@ -349,6 +355,190 @@ class xmlUtilsTestCase(unittest.TestCase):
         self.assertEqual(indented, indent(
             lxml.etree.tostring(elt2, encoding='unicode')))
 
+    def testStreamingXmlRecords(self):
+        """Test streaming variants of xml record set functions against the
+        in-memory ones."""
+
+        listXml = '<rows><r><a>1</a><b>x</b></r><r><b>y</b><a>2</a></r></rows>'
+        self.assertEqual(list(iterXml2List(listXml)), xml2List(listXml))
+        self.assertEqual(xml2List(listXml), [['a', 'b'], ['1', 'x'],
+                                             ['2', 'y']])
+
+        listDictXml = '''<ResultSet xmlns="%s">
+  <Result><objectid>a</objectid><v type="xs:int">1</v><s>t</s></Result>
+  <Other/>
+  <Result><objectid>b</objectid><v type="xs:float">2.5</v></Result>
+</ResultSet>''' % defaultNamespace
+        self.assertEqual(dict(iterListDictFromXml(listDictXml)),
+                         getListDictFromXml(listDictXml))
+        self.assertEqual(getListDictFromXml(listDictXml),
+                         {'a': [1, 't'], 'b': [2.5]})
+
+        lodXml = '''<set xmlns="urn:test">
+  <rec><a>1</a></rec>
+  <group><rec><a>2</a><rec><a>3</a></rec></rec></group>
+</set>'''
+        self.assertEqual(list(iterXmlList2PyLoD(lodXml, 'rec')),
+                         xmlList2PyLoD(lodXml, 'rec'))
+        self.assertEqual(len(xmlList2PyLoD(lodXml, 'rec')), 3)
+
+        # force functions to stream
+        threshold = xmlUtils.XML_STREAMING_THRESHOLD
+        xmlUtils.XML_STREAMING_THRESHOLD = 0
+        try:
+            self.assertEqual(xml2List(listXml), [['a', 'b'], ['1', 'x'],
+                                                 ['2', 'y']])
+            self.assertEqual(getListDictFromXml(listDictXml),
+                             {'a': [1, 't'], 'b': [2.5]})
+            self.assertEqual(len(xmlList2PyLoD(lodXml, 'rec')), 3)
+        finally:
+            xmlUtils.XML_STREAMING_THRESHOLD = threshold
+
+    def testStreamingSimpleList2Xml(self):
+        """Test incremental writing of xml from a simple list."""
+
+        rows = [1, 2.5, 'a<b', 'test']
+        xml = simpleList2Xml(rows, rootAttribsDictNonNS={'count': 4})
+        f = BytesIO()
+        writeSimpleList2Xml(rows, f, rootAttribsDictNonNS={'count': 4})
+        self.assertEqual(f.getvalue().decode('utf-8'), xml)
+
+        # generators and empty lists
+        self.assertEqual(simpleList2Xml(iter(rows),
+                                        rootAttribsDictNonNS={'count': 4}), xml)
+        f = BytesIO()
+        writeSimpleList2Xml([], f)
+        self.assertEqual(f.getvalue().decode('utf-8'), simpleList2Xml([]))
+
+        # force list to be written incrementally
+        threshold = xmlUtils.LIST_STREAMING_THRESHOLD
+        xmlUtils.LIST_STREAMING_THRESHOLD = 0
+        try:
+            self.assertEqual(simpleList2Xml(
+                rows, rootAttribsDictNonNS={'count': 4}), xml)
+        finally:
+            xmlUtils.LIST_STREAMING_THRESHOLD = threshold
+
+    def testRunXpath(self):
+        """Test that runXpath gives what lxml does, falling back to the
+        default namespace prefix for unprefixed steps."""
+
+        nsXml = '<sf:a xmlns:sf="%s" xmlns="urn:d"><b>1</b><b>2</b>\
+<sf:c x="y">t</sf:c></sf:a>' % defaultNamespace
+        plainXml = '<a><b>1</b><b>2</b><c x="y">t</c></a>'
+        nsDict = {'sf': defaultNamespace, '_default': 'urn:d', '_': 'urn:d'}
+        root = lxml.etree.XML(nsXml)
+        bs = [lxml.etree.tostring(b, pretty_print=True, encoding='unicode')
+              for b in root.xpath('//_:b', namespaces=nsDict)]
+        self.assertEqual(runXpath(nsXml, '//_:b'), bs)
+        self.assertEqual(runXpath(nsXml, '//{urn:d}b'), bs)
+        self.assertEqual(runXpath(nsXml, '/*/_:b[2]'), bs[1])
+        self.assertEqual(runXpath(nsXml, '//sf:c/@x'), 'y')
+        self.assertEqual(runXpath(nsXml, 'string(//sf:c)'), 't')
+        self.assertEqual(runXpath(root, '//_:b', nsDict), bs)
+        plainRoot = lxml.etree.XML(plainXml)
+        self.assertEqual(runXpath(plainXml, '//b/text()'),
+                         [str(i) for i in plainRoot.xpath('//b/text()')])
+        self.assertEqual(runXpath(plainXml, '//c/@x'), 'y')
+
+        # nothing selected, undefined prefixes and bad syntax fail in lxml
+        for xpathStr in ('//nope', 'undef:b', '//b[', '$v'):
+            self.assertRaises(lxml.etree.XPathEvalError, runXpath, nsXml,
+                              xpathStr)
+        self.assertRaises(lxml.etree.XPathEvalError, runXpath, plainXml,
+                          '//sf:c/@x')
+
+    def testXpathEvaluator(self):
+        """Test that compiled xpaths and parsed docs are reused and bounded
+        and uncompilable xpaths are not cached."""
+
+        xml = '<a xmlns="urn:d"><b>1</b></a>'
+        evaluator = xmlUtils.XpathEvaluator(maxXpaths=3, maxDocs=1)
+        root, nsDict = evaluator.getDoc(xml)
+        nsDict['_'] = nsDict['_default']
+        root2, nsDict2 = evaluator.getDoc(xml)
+        self.assertTrue(root2 is root)
+        self.assertFalse('_' in nsDict2)
+        evaluator.getDoc('<other/>')
+        self.assertFalse(evaluator.getDoc(xml)[0] is root)
+        for i in range(3):
+            self.assertEqual(len(evaluator.evaluate(root, '//_:b', nsDict)),
+                             1)
+        self.assertEqual(evaluator.getStats(), {'hits': 2, 'misses': 1,
+                                                'docHits': 1, 'docMisses': 3,
+                                                'docs': 1,
+                                                'docBytes': len(xml)})
+
+        # an expression that selects nothing compiles its fallback too
+        self.assertEqual(len(evaluator.evaluate(root, 'b', nsDict)), 1)
+        self.assertEqual(len(evaluator._xpaths), 3)
+        self.assertRaises(lxml.etree.XPathEvalError, evaluator.evaluate,
+                          root, '//b[', nsDict)
+        self.assertEqual(len(evaluator._xpaths), 3)
+        evaluator.evaluate(root, '//_:b[1]', nsDict)
+        self.assertEqual(len(evaluator._xpaths), 3)
+        self.assertFalse(('//_:b', tuple(sorted(nsDict.items()))) in
+                         evaluator._xpaths)
+
+    def testXpathEvaluatorDocBytes(self):
+        """Test that parsed docs are bounded by the length of their xml and
+        docs over the streaming threshold are not kept."""
+
+        docs = ['<a>%s</a>' % (str(i) * 20) for i in range(3)]
+        evaluator = xmlUtils.XpathEvaluator(maxDocs=10,
+                                            maxDocBytes=len(docs[0]) * 2)
+        for xml in docs:
+            evaluator.getDoc(xml)
+        self.assertEqual(len(evaluator._docs), 2)
+        self.assertEqual(evaluator.getStats()['docBytes'], len(docs[0]) * 2)
+        root = evaluator.getDoc(docs[2])[0]
+        self.assertTrue(evaluator.getDoc(docs[2])[0] is root)
+        evaluator.getDoc(docs[0])
+        self.assertEqual(evaluator.getStats()['docMisses'], 4)
+
+        # too large for the cache or the streaming threshold
+        big = '<a>%s</a>' % ('x' * len(docs[0]) * 2)
+        root = evaluator.getDoc(big)[0]
+        self.assertFalse(evaluator.getDoc(big)[0] is root)
+        self.assertEqual(len(evaluator._docs), 2)
+        threshold = xmlUtils.XML_STREAMING_THRESHOLD
+        xmlUtils.XML_STREAMING_THRESHOLD = len(docs[0]) - 1
+        try:
+            xml = '<b>%s</b>' % ('y' * 20)
+            root = evaluator.getDoc(xml)[0]
+            self.assertFalse(evaluator.getDoc(xml)[0] is root)
+        finally:
+            xmlUtils.XML_STREAMING_THRESHOLD = threshold
+        self.assertEqual(evaluator.getStats()['docBytes'], len(docs[0]) * 2)
+
+    def testGetXmlSchema(self):
+        """Test that schemas are compiled once per content whether given as
+        file or string."""
+
+        with open(schemaFile) as f:
+            schemaXml = f.read()
+        schemaXml += '<!-- testGetXmlSchema %d -->' % id(self)
+        tmpDir = mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpDir)
+        schemaPath = os.path.join(tmpDir, 'test.xsd')
+        with open(schemaPath, 'w') as f:
+            f.write(schemaXml)
+        with mock.patch.object(xmlUtils.lxml.etree, 'XMLSchema',
+                               wraps=lxml.etree.XMLSchema) as compile:
+            compiled = xmlUtils.getXmlSchema(schemaXml)
+            self.assertTrue(xmlUtils.getXmlSchema(schemaPath) is compiled)
+            self.assertTrue(xmlUtils.getXmlSchema(
+                schemaXml.encode('utf-8')) is compiled)
+            self.assertEqual(compile.call_count, 1)
+            other = xmlUtils.getXmlSchema(schemaXml + ' ')
+            self.assertFalse(other is compiled)
+            self.assertFalse(other[1] is compiled[1])
+            self.assertEqual(compile.call_count, 2)
+        self.assertEqual(xmlUtils.validateXml(
+            os.path.join(thisDir, 'test.xml'), schemaPath), (True, None))
+        self.assertRaises(lxml.etree.XMLSyntaxError, xmlUtils.getXmlSchema,
+                          schemaXml[:-40])
+
 # create testsuite function
 
 
@@ -367,6 +557,12 @@ def getTestSuite():
     xmlUtilsTestSuite.addTest(xmlUtilsTestCase(
         "testConfigToEndpointConfigXmlTransform"))
     xmlUtilsTestSuite.addTest(xmlUtilsTestCase("testXmlIndent"))
+    xmlUtilsTestSuite.addTest(xmlUtilsTestCase("testStreamingXmlRecords"))
+    xmlUtilsTestSuite.addTest(xmlUtilsTestCase("testStreamingSimpleList2Xml"))
+    xmlUtilsTestSuite.addTest(xmlUtilsTestCase("testRunXpath"))
+    xmlUtilsTestSuite.addTest(xmlUtilsTestCase("testXpathEvaluator"))
+    xmlUtilsTestSuite.addTest(xmlUtilsTestCase("testXpathEvaluatorDocBytes"))
+    xmlUtilsTestSuite.addTest(xmlUtilsTestCase("testGetXmlSchema"))
 
     # return
     return xmlUtilsTestSuite